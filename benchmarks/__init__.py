@@ -0,0 +1 @@
+"""Локальные заглушки внешних API и нагрузочные сценарии."""
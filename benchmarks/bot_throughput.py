@@ -0,0 +1,206 @@
+"""Сквозной нагрузочный прогон бота против локальных Bot API и YooKassa.
+
+Сценарий поднимает заглушки Telegram и YooKassa, запускает BotManager
+в режиме polling или webhook с Bot, направленным на заглушку, и проводит
+виртуальных пользователей по пути /start -> /read -> ответ на вопрос ->
+/buy -> выбор пакета. Каждый пользователь ждет первый ответ бота перед
+следующим действием. В отчете - update/s, p50/p99 задержки до первого
+ответа по каждому действию и число ответов 429.
+
+Нужны PostgreSQL с примененными миграциями (DATABASE_URL) и, для /read,
+активный сценарий; Redis необязателен.
+
+Запуск:
+    python -m benchmarks.bot_throughput --users 2000 --ramp-up-sec 10 --mode polling \\
+        --chat-rate 1 --global-rate 30
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+from benchmarks.fake_telegram import FakeTelegram
+from benchmarks.fake_yookassa import FakeYooKassa
+from benchmarks.report import LatencyRecorder
+
+# Действия виртуального пользователя в порядке выполнения
+ACTIONS = ("start", "read", "answer", "buy", "buy_package")
+
+
+async def start_site(app: web.Application, port: int) -> web.AppRunner:
+    """Запуск приложения на 127.0.0.1."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+class VirtualUsers:
+    """Виртуальные пользователи, проходящие сценарий через заглушку Bot API."""
+
+    def __init__(self, fake: FakeTelegram, args: argparse.Namespace):
+        """Инициализация.
+
+        Args:
+            fake: Заглушка Bot API
+            args: Параметры прогона
+        """
+        self.fake = fake
+        self.args = args
+        self.recorders = {action: LatencyRecorder(action) for action in ACTIONS}
+        self.skipped: Dict[str, int] = {action: 0 for action in ACTIONS}
+        self.updates_sent = 0
+
+    async def run(self) -> float:
+        """Прогон всех пользователей.
+
+        Returns:
+            Длительность прогона в секундах
+        """
+        started = time.perf_counter()
+        step = self.args.ramp_up_sec / self.args.users if self.args.users else 0
+        tasks = []
+        for i in range(self.args.users):
+            tasks.append(asyncio.create_task(self.user(self.args.first_user_id + i)))
+            if step:
+                await asyncio.sleep(step)
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - started
+
+    async def user(self, user_id: int) -> None:
+        """Сценарий одного пользователя."""
+        read_command = f"/read {self.args.scenario}" if self.args.scenario else "/read"
+        await self.send("start", self.fake.message_update(user_id, "/start"))
+        await self.send("read", self.fake.message_update(user_id, read_command))
+        await self.click("answer", user_id, "answer:")
+        await self.send("buy", self.fake.message_update(user_id, "/buy"))
+        await self.click("buy_package", user_id, "buy_")
+
+    async def send(self, action: str, update: Dict[str, Any]) -> None:
+        """Отправка update и ожидание первого ответа бота."""
+        if self.args.think_ms:
+            await asyncio.sleep(random.uniform(0, self.args.think_ms) / 1000)
+        self.updates_sent += 1
+        try:
+            latency = await asyncio.wait_for(self.fake.push_update(update), timeout=self.args.response_timeout_sec)
+        except asyncio.TimeoutError:
+            self.recorders[action].record_error()
+            return
+        self.recorders[action].record(latency)
+
+    async def click(self, action: str, user_id: int, prefix: str) -> None:
+        """Нажатие первой кнопки с callback_data, начинающимся с prefix.
+
+        Кнопка может появиться не сразу (шаги сценария идут с задержками),
+        поэтому она ожидается до button_wait_sec.
+        """
+        deadline = time.monotonic() + self.args.button_wait_sec
+        button = self.fake.find_callback_button(user_id, prefix)
+        while button is None and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            button = self.fake.find_callback_button(user_id, prefix)
+        if button is None:
+            self.skipped[action] += 1
+            return
+        await self.send(action, self.fake.callback_update(user_id, button["data"], button["message"]))
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Прогон сценария и печать отчета."""
+    fake_telegram = FakeTelegram(
+        chat_rate=args.chat_rate,
+        global_rate=args.global_rate,
+        latency_ms=args.telegram_latency_ms,
+    )
+    fake_yookassa = FakeYooKassa(
+        shop_id=os.environ["YOOKASSA_SHOP_ID"],
+        secret_key=os.environ["YOOKASSA_API_KEY"],
+        latency_ms=args.yookassa_latency_ms,
+    )
+    runners = [
+        await start_site(fake_telegram.create_app(), args.telegram_port),
+        await start_site(fake_yookassa.create_app(), args.yookassa_port),
+    ]
+
+    # Настройки читаются при импорте, поэтому бот импортируется после подготовки окружения
+    from src.config import settings
+    from src.main import BotManager
+
+    manager = BotManager()
+    bot_task: Optional[asyncio.Task] = None
+    users = VirtualUsers(fake_telegram, args)
+    try:
+        await manager.initialize()
+        if args.mode == "webhook":
+            await manager.bot.set_webhook(
+                url=f"http://127.0.0.1:{args.bot_port}{settings.webhook_path}",
+                secret_token=settings.webhook_secret_token or None,
+            )
+            bot_task = asyncio.create_task(manager.start_webhook_server(host="127.0.0.1", port=args.bot_port))
+        else:
+            await manager.bot.delete_webhook()
+            bot_task = asyncio.create_task(manager.start_polling())
+        await asyncio.sleep(0.5)
+
+        elapsed = await users.run()
+    finally:
+        if bot_task is not None:
+            if args.mode == "webhook":
+                manager.stop()
+            else:
+                await manager.dp.stop_polling()
+            await asyncio.gather(bot_task, return_exceptions=True)
+        await manager.shutdown()
+        for runner in runners:
+            await runner.cleanup()
+
+    print(f"Режим: {args.mode}, пользователей: {args.users}, разгон: {args.ramp_up_sec} сек")
+    print(f"Update: {users.updates_sent} за {elapsed:.1f} сек ({users.updates_sent / elapsed:.1f} update/s)")
+    for action in ACTIONS:
+        print(users.recorders[action].format(elapsed) + f"  пропущено={users.skipped[action]}")
+    print(f"Вызовы Bot API: {dict(sorted(fake_telegram.method_calls.items()))}")
+    print(f"Ответы 429: {dict(fake_telegram.rate_limited)}")
+    if args.mode == "webhook":
+        print(f"Ответы webhook: {dict(fake_telegram.webhook_statuses)}")
+    print(f"Платежей создано в YooKassa: {len(fake_yookassa.payments)}")
+
+
+def main() -> None:
+    """Разбор аргументов, подготовка окружения и запуск."""
+    parser = argparse.ArgumentParser(description="Сквозной нагрузочный прогон бота")
+    parser.add_argument("--mode", choices=("polling", "webhook"), default="polling")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--ramp-up-sec", type=float, default=5)
+    parser.add_argument("--first-user-id", type=int, default=9_000_000_000)
+    parser.add_argument("--scenario", default=None, help="payload для /read")
+    parser.add_argument("--think-ms", type=float, default=0)
+    parser.add_argument("--response-timeout-sec", type=float, default=30)
+    parser.add_argument("--button-wait-sec", type=float, default=5)
+    parser.add_argument("--chat-rate", type=float, default=None, help="сообщений/с на чат до 429")
+    parser.add_argument("--global-rate", type=float, default=None, help="сообщений/с на бота до 429")
+    parser.add_argument("--telegram-latency-ms", type=float, default=0)
+    parser.add_argument("--yookassa-latency-ms", type=float, default=0)
+    parser.add_argument("--telegram-port", type=int, default=8090)
+    parser.add_argument("--yookassa-port", type=int, default=8091)
+    parser.add_argument("--bot-port", type=int, default=8092)
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    os.environ["TELEGRAM_API_URL"] = f"http://127.0.0.1:{args.telegram_port}"
+    os.environ["YOOKASSA_API_URL"] = f"http://127.0.0.1:{args.yookassa_port}/v3"
+    os.environ.setdefault("YOOKASSA_SHOP_ID", "test_shop")
+    os.environ.setdefault("YOOKASSA_API_KEY", "test_key")
+    os.environ["LOG_LEVEL"] = args.log_level
+
+    logging.basicConfig(level=args.log_level)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+"""Локальная замена Telegram Bot API для нагрузочных прогонов.
+
+Сервер отвечает на запросы aiogram по адресу /bot{token}/{method}:
+getMe, getUpdates (long polling), setWebhook, deleteWebhook,
+getWebhookInfo, sendMessage, sendPhoto и другие send*, answerCallbackQuery.
+Update либо отдаются через getUpdates, либо, после setWebhook,
+отправляются POST-запросом на адрес webhook. Лимиты Telegram
+моделируются двумя token bucket: на чат и общий; при их превышении
+отвечается 429 с parameters.retry_after.
+
+Для каждого update запоминается время постановки, и первый ответ бота
+в тот же чат (или answerCallbackQuery на тот же callback) дает задержку
+обработки этого update.
+
+Запуск отдельно:
+    python -m benchmarks.fake_telegram --port 8090 --chat-rate 1 --global-rate 30
+
+Бот подключается к нему через TELEGRAM_API_URL=http://localhost:8090.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Методы отправки и поле сообщения, в которое попадает вложение
+SEND_MEDIA_FIELDS = {
+    "sendPhoto": "photo",
+    "sendVideo": "video",
+    "sendAudio": "audio",
+    "sendDocument": "document",
+    "sendAnimation": "animation",
+    "sendVoice": "voice",
+}
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, не больше burst подряд."""
+
+    def __init__(self, rate: float, burst: float):
+        """Инициализация ограничителя с полным запасом токенов."""
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def take(self) -> float:
+        """Взять токен.
+
+        Returns:
+            0, если токен взят, иначе сколько секунд ждать следующего
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+@dataclass
+class PendingUpdate:
+    """Update, для которого ожидается первый ответ бота."""
+
+    update_id: int
+    kind: str
+    pushed_at: float
+    future: "asyncio.Future[float]" = field(repr=False)
+
+
+class FakeTelegram:
+    """Состояние и обработчики заглушки Bot API."""
+
+    def __init__(
+        self,
+        chat_rate: Optional[float] = None,
+        chat_burst: float = 3,
+        global_rate: Optional[float] = None,
+        global_burst: float = 30,
+        latency_ms: float = 0,
+        history_size: int = 20,
+    ):
+        """Инициализация заглушки.
+
+        Args:
+            chat_rate: Сообщений в секунду на чат (None - без ограничения)
+            chat_burst: Сколько сообщений в чат можно отправить подряд
+            global_rate: Сообщений в секунду на бота (None - без ограничения)
+            global_burst: Сколько сообщений можно отправить подряд всего
+            latency_ms: Задержка каждого ответа API
+            history_size: Сколько последних сообщений бота хранить на чат
+        """
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.global_rate = global_rate
+        self.latency_ms = latency_ms
+        self.history_size = history_size
+
+        self._global_bucket = TokenBucket(global_rate, global_burst) if global_rate else None
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._updates: Deque[Dict[str, Any]] = deque()
+        self._updates_ready = asyncio.Event()
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._awaiting_chat: Dict[int, Deque[PendingUpdate]] = defaultdict(deque)
+        self._awaiting_callback: Dict[str, PendingUpdate] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self.webhook_url: Optional[str] = None
+        self.webhook_secret: Optional[str] = None
+        self.messages: Dict[int, Deque[Dict[str, Any]]] = defaultdict(lambda: deque(maxlen=self.history_size))
+        self.method_calls: Dict[str, int] = defaultdict(int)
+        self.rate_limited: Dict[str, int] = defaultdict(int)
+        self.webhook_statuses: Dict[int, int] = defaultdict(int)
+
+    def create_app(self) -> web.Application:
+        """Приложение aiohttp с маршрутами Bot API."""
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_route("*", "/bot{token}/{method}", self.handle_method)
+        app.on_cleanup.append(self._cleanup)
+        return app
+
+    # Построение update
+
+    def message_update(self, user_id: int, text: str) -> Dict[str, Any]:
+        """Update с текстовым сообщением пользователя в личный чат."""
+        message = {
+            "message_id": self._message_id(),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private", "first_name": f"User{user_id}"},
+            "from": self._user(user_id),
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"update_id": self._update_id(), "message": message}
+
+    def callback_update(self, user_id: int, data: str, message: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Update с нажатием inline-кнопки."""
+        update_id = self._update_id()
+        callback = {
+            "id": f"cbq-{update_id}",
+            "from": self._user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+        }
+        if message is not None:
+            callback["message"] = message
+        return {"update_id": update_id, "callback_query": callback}
+
+    def find_callback_button(self, chat_id: int, prefix: str) -> Optional[Dict[str, Any]]:
+        """Последнее сообщение бота в чате с callback-кнопкой, data которой начинается с prefix.
+
+        Returns:
+            {"message": сообщение, "data": callback_data} или None
+        """
+        for message in reversed(self.messages.get(chat_id, ())):
+            for row in (message.get("reply_markup") or {}).get("inline_keyboard", []):
+                for button in row:
+                    data = button.get("callback_data")
+                    if data and data.startswith(prefix):
+                        return {"message": message, "data": data}
+        return None
+
+    # Доставка update
+
+    def push_update(self, update: Dict[str, Any]) -> "asyncio.Future[float]":
+        """Постановка update для бота.
+
+        Returns:
+            Future с задержкой до первого ответа бота в секундах
+        """
+        future = asyncio.get_running_loop().create_future()
+        if "callback_query" in update:
+            callback = update["callback_query"]
+            pending = PendingUpdate(update["update_id"], "callback", time.perf_counter(), future)
+            self._awaiting_callback[callback["id"]] = pending
+            chat_id = callback["from"]["id"]
+        else:
+            pending = PendingUpdate(update["update_id"], "message", time.perf_counter(), future)
+            chat_id = update["message"]["chat"]["id"]
+        self._awaiting_chat[chat_id].append(pending)
+
+        if self.webhook_url:
+            self._spawn(self._deliver_webhook(update))
+        else:
+            self._updates.append(update)
+            self._updates_ready.set()
+        return future
+
+    async def _deliver_webhook(self, update: Dict[str, Any]) -> None:
+        """Отправка update на webhook бота."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        headers = {"X-Telegram-Bot-Api-Secret-Token": self.webhook_secret} if self.webhook_secret else {}
+        try:
+            async with self._session.post(self.webhook_url, json=update, headers=headers) as response:
+                self.webhook_statuses[response.status] += 1
+        except aiohttp.ClientError as e:
+            self.webhook_statuses[0] += 1
+            logger.warning(f"Update {update['update_id']} не доставлен: {str(e)}")
+
+    def _resolve(self, chat_id: Optional[int] = None, callback_id: Optional[str] = None) -> None:
+        """Отметка первого ответа бота на update."""
+        pending = self._awaiting_callback.pop(callback_id, None) if callback_id else None
+        if pending is None and chat_id is not None:
+            queue = self._awaiting_chat.get(chat_id)
+            while queue and pending is None:
+                candidate = queue.popleft()
+                if not candidate.future.done():
+                    pending = candidate
+            if queue is not None and not queue:
+                self._awaiting_chat.pop(chat_id, None)
+        if pending is not None and not pending.future.done():
+            pending.future.set_result(time.perf_counter() - pending.pushed_at)
+
+    # Обработчики Bot API
+
+    async def handle_method(self, request: web.Request) -> web.Response:
+        """Диспетчеризация метода Bot API."""
+        method = request.match_info["method"]
+        params = await self._read_params(request)
+        self.method_calls[method] += 1
+
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+        if method == "getUpdates":
+            return self._ok(await self._get_updates(params))
+        if method == "getMe":
+            return self._ok({"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"})
+        if method == "setWebhook":
+            self.webhook_url = params.get("url") or None
+            self.webhook_secret = params.get("secret_token") or None
+            return self._ok(True)
+        if method == "deleteWebhook":
+            self.webhook_url = None
+            self.webhook_secret = None
+            return self._ok(True)
+        if method == "getWebhookInfo":
+            return self._ok({"url": self.webhook_url or "", "has_custom_certificate": False, "pending_update_count": 0})
+        if method == "answerCallbackQuery":
+            self._resolve(callback_id=params.get("callback_query_id"))
+            return self._ok(True)
+        if method == "sendMessage" or method in SEND_MEDIA_FIELDS:
+            return self._send(method, params)
+        return self._error(404, "Not Found: method not found")
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Long polling: ждет update не дольше timeout."""
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+
+        # offset подтверждает все update до него
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+
+        if not self._updates and timeout > 0:
+            self._updates_ready.clear()
+            try:
+                await asyncio.wait_for(self._updates_ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        return list(self._updates)[:limit]
+
+    def _send(self, method: str, params: Dict[str, Any]) -> web.Response:
+        """Отправка сообщения с учетом лимитов."""
+        chat_id = int(params["chat_id"])
+        retry_after = self._rate_limit(chat_id)
+        if retry_after:
+            self.rate_limited[method] += 1
+            return self._error(
+                429,
+                f"Too Many Requests: retry after {retry_after}",
+                parameters={"retry_after": retry_after},
+            )
+
+        message: Dict[str, Any] = {
+            "message_id": self._message_id(),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": 1, "is_bot": True, "first_name": "FakeBot"},
+        }
+        if method == "sendMessage":
+            message["text"] = params.get("text", "")
+        else:
+            field_name = SEND_MEDIA_FIELDS[method]
+            message[field_name] = self._media(field_name, params.get(field_name))
+            if params.get("caption"):
+                message["caption"] = params["caption"]
+        if params.get("reply_markup"):
+            markup = params["reply_markup"]
+            if isinstance(markup, dict) and "inline_keyboard" in markup:
+                message["reply_markup"] = markup
+
+        self.messages[chat_id].append(message)
+        self._resolve(chat_id=chat_id)
+        return self._ok(message)
+
+    def _rate_limit(self, chat_id: int) -> int:
+        """Проверка лимитов отправки.
+
+        Returns:
+            0 или retry_after в целых секундах
+        """
+        wait = 0.0
+        if self.chat_rate:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+            wait = bucket.take()
+        if not wait and self._global_bucket is not None:
+            wait = self._global_bucket.take()
+        return math.ceil(wait) if wait else 0
+
+    # Вспомогательные методы
+
+    async def _read_params(self, request: web.Request) -> Dict[str, Any]:
+        """Параметры запроса: JSON, urlencoded или multipart.
+
+        aiogram передает вложенные объекты строкой JSON, они декодируются.
+        """
+        if request.content_type == "application/json":
+            return await request.json()
+        params: Dict[str, Any] = {}
+        if request.method == "GET":
+            form = request.query
+        else:
+            form = await request.post()
+        for key, value in form.items():
+            if isinstance(value, web.FileField):
+                params[key] = value.filename or "upload"
+                continue
+            if isinstance(value, str) and value[:1] in "{[":
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+            params[key] = value
+        return params
+
+    def _media(self, field_name: str, file: Any) -> Any:
+        """Объект вложения в ответе на send*."""
+        file_id = file if isinstance(file, str) and not file.startswith("attach://") else f"fake-{self._next_message_id}"
+        media = {"file_id": file_id, "file_unique_id": file_id[:32]}
+        if field_name == "photo":
+            return [{**media, "width": 800, "height": 600}]
+        if field_name in ("video", "animation"):
+            return {**media, "width": 640, "height": 360, "duration": 1}
+        if field_name in ("audio", "voice"):
+            return {**media, "duration": 1}
+        return media
+
+    def _update_id(self) -> int:
+        """Следующий update_id."""
+        update_id = self._next_update_id
+        self._next_update_id += 1
+        return update_id
+
+    def _message_id(self) -> int:
+        """Следующий message_id."""
+        message_id = self._next_message_id
+        self._next_message_id += 1
+        return message_id
+
+    @staticmethod
+    def _user(user_id: int) -> Dict[str, Any]:
+        """Объект пользователя."""
+        return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "language_code": "ru"}
+
+    @staticmethod
+    def _ok(result: Any) -> web.Response:
+        """Успешный ответ Bot API."""
+        return web.json_response({"ok": True, "result": result})
+
+    @staticmethod
+    def _error(code: int, description: str, parameters: Optional[Dict[str, Any]] = None) -> web.Response:
+        """Ответ Bot API с ошибкой."""
+        body: Dict[str, Any] = {"ok": False, "error_code": code, "description": description}
+        if parameters:
+            body["parameters"] = parameters
+        return web.json_response(body, status=code)
+
+    def _spawn(self, coro) -> None:
+        """Запуск фоновой задачи с учетом в _tasks."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _cleanup(self, app: web.Application) -> None:
+        """Отмена доставок и закрытие сессии webhook."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+
+
+def main() -> None:
+    """Запуск заглушки из командной строки."""
+    parser = argparse.ArgumentParser(description="Локальная замена Telegram Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--chat-rate", type=float, default=None)
+    parser.add_argument("--global-rate", type=float, default=None)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level="INFO", format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    fake = FakeTelegram(chat_rate=args.chat_rate, global_rate=args.global_rate, latency_ms=args.latency_ms)
+    web.run_app(fake.create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
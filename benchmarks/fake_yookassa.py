@@ -0,0 +1,294 @@
+"""Локальная замена API YooKassa для нагрузочных и интеграционных тестов.
+
+Сервер реализует создание и получение платежа (POST /v3/payments,
+GET /v3/payments/{id}), семантику Idempotence-Key, настраиваемые задержку
+и долю ошибок и отправляет боту подписанные уведомления о смене статуса.
+
+Запуск:
+    python -m benchmarks.fake_yookassa --port 8081 --latency-ms 50 --error-rate 0.01 \\
+        --webhook-url http://localhost:8080/yookassa_webhook --auto-succeed-sec 1
+
+Бот подключается к нему через YOOKASSA_API_URL=http://localhost:8081/v3.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import random
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# События, которые отправляются при переходе платежа в статус
+STATUS_EVENTS = {
+    "waiting_for_capture": "payment.waiting_for_capture",
+    "succeeded": "payment.succeeded",
+    "canceled": "payment.canceled",
+}
+
+
+def sign_webhook(body: bytes, secret_key: str) -> str:
+    """Подпись уведомления в формате, который проверяет бот."""
+    return "sha256_" + hmac.new(secret_key.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+class FakeYooKassa:
+    """Состояние и обработчики заглушки API YooKassa.
+
+    Ключ идемпотентности запоминается вместе с хешем тела запроса:
+    повтор с тем же телом возвращает ранее созданный платеж, повтор
+    с другим телом - ошибку 400, как в настоящем API. При error_rate
+    запрос отклоняется до обработки, при lost_response_rate - обрабатывается,
+    но клиент получает 500, и только повтор с тем же ключом не создаст
+    второй платеж.
+    """
+
+    def __init__(
+        self,
+        shop_id: str = "test_shop",
+        secret_key: str = "test_key",
+        latency_ms: float = 0,
+        latency_jitter_ms: float = 0,
+        error_rate: float = 0,
+        lost_response_rate: float = 0,
+        webhook_url: Optional[str] = None,
+        auto_succeed_sec: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
+        """Инициализация заглушки.
+
+        Args:
+            shop_id: Ожидаемый логин Basic-авторизации
+            secret_key: Ожидаемый пароль и ключ подписи уведомлений
+            latency_ms: Задержка каждого ответа
+            latency_jitter_ms: Случайная добавка к задержке (0..jitter)
+            error_rate: Доля запросов, на которые отвечается 500 без обработки
+            lost_response_rate: Доля запросов, которые обрабатываются, но получают 500
+            webhook_url: Куда отправлять уведомления о смене статуса
+            auto_succeed_sec: Через сколько секунд созданный платеж оплачивается сам
+            seed: Зерно генератора для воспроизводимых прогонов
+        """
+        self.shop_id = shop_id
+        self.secret_key = secret_key
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.lost_response_rate = lost_response_rate
+        self.webhook_url = webhook_url
+        self.auto_succeed_sec = auto_succeed_sec
+        self._random = random.Random(seed)
+
+        self.payments: Dict[str, Dict[str, Any]] = {}
+        self._idempotence: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self.requests = 0
+        self.errors = 0
+        self.idempotent_replays = 0
+        self.webhooks_sent = 0
+        self.webhook_statuses: List[int] = []
+
+    def create_app(self) -> web.Application:
+        """Приложение aiohttp с маршрутами API."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post("/v3/payments", self.handle_create)
+        app.router.add_get("/v3/payments/{payment_id}", self.handle_find)
+        app.on_cleanup.append(self._cleanup)
+        return app
+
+    async def set_status(self, payment_id: str, status: str) -> None:
+        """Смена статуса платежа с отправкой уведомления.
+
+        Args:
+            payment_id: ID платежа
+            status: waiting_for_capture, succeeded или canceled
+        """
+        payment = self.payments[payment_id]
+        payment["status"] = status
+        payment["paid"] = status in ("waiting_for_capture", "succeeded")
+        if status == "succeeded":
+            payment["captured_at"] = self._now()
+        await self.send_webhook(STATUS_EVENTS[status], payment)
+
+    async def send_webhook(self, event: str, payment: Dict[str, Any]) -> Optional[int]:
+        """Отправка подписанного уведомления боту.
+
+        Returns:
+            HTTP статус ответа бота или None, если webhook_url не задан или бот недоступен
+        """
+        if not self.webhook_url:
+            return None
+        body = json.dumps(
+            {"type": "notification", "event": event, "object": payment}, ensure_ascii=False
+        ).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Yookassa-Signature": sign_webhook(body, self.secret_key)}
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        try:
+            async with self._session.post(self.webhook_url, data=body, headers=headers) as response:
+                self.webhooks_sent += 1
+                self.webhook_statuses.append(response.status)
+                return response.status
+        except aiohttp.ClientError as e:
+            logger.warning(f"Уведомление {event} не доставлено: {str(e)}")
+            return None
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        """Авторизация, задержка и случайные ошибки для всех запросов."""
+        self.requests += 1
+        if not self._authorized(request):
+            return self._error(401, "invalid_credentials", "Authentication failed")
+
+        delay_ms = self.latency_ms + self._random.uniform(0, self.latency_jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            return self._error(500, "internal_server_error", "Simulated failure")
+
+        response = await handler(request)
+        if self.lost_response_rate and self._random.random() < self.lost_response_rate:
+            self.errors += 1
+            return self._error(500, "internal_server_error", "Simulated lost response")
+        return response
+
+    async def handle_create(self, request: web.Request) -> web.Response:
+        """POST /v3/payments."""
+        key = request.headers.get("Idempotence-Key")
+        if not key:
+            return self._error(400, "invalid_request", "Idempotence-Key header is required")
+
+        raw = await request.read()
+        body_hash = hashlib.sha256(raw).hexdigest()
+        stored = self._idempotence.get(key)
+        if stored is not None:
+            if stored[0] != body_hash:
+                return self._error(400, "invalid_request", "Idempotence key duplicated with another request")
+            self.idempotent_replays += 1
+            return web.json_response(stored[1])
+
+        try:
+            body = json.loads(raw)
+            amount = body["amount"]
+        except (ValueError, KeyError, TypeError):
+            return self._error(400, "invalid_request", "amount is required")
+
+        payment_id = str(uuid.uuid4())
+        payment = {
+            "id": payment_id,
+            "status": "pending",
+            "paid": False,
+            "amount": amount,
+            "description": body.get("description"),
+            "metadata": body.get("metadata", {}),
+            "created_at": self._now(),
+            "test": True,
+            "confirmation": {
+                "type": "redirect",
+                "confirmation_url": f"{request.scheme}://{request.host}/checkout/{payment_id}",
+            },
+        }
+        self.payments[payment_id] = payment
+        self._idempotence[key] = (body_hash, payment)
+
+        if self.auto_succeed_sec is not None:
+            self._spawn(self._auto_succeed(payment_id))
+        return web.json_response(payment)
+
+    async def handle_find(self, request: web.Request) -> web.Response:
+        """GET /v3/payments/{payment_id}."""
+        payment = self.payments.get(request.match_info["payment_id"])
+        if payment is None:
+            return self._error(404, "not_found", "Payment not found")
+        return web.json_response(payment)
+
+    async def _auto_succeed(self, payment_id: str) -> None:
+        """Оплата платежа через auto_succeed_sec."""
+        await asyncio.sleep(self.auto_succeed_sec)
+        if self.payments[payment_id]["status"] == "pending":
+            await self.set_status(payment_id, "succeeded")
+
+    def _authorized(self, request: web.Request) -> bool:
+        """Проверка Basic-авторизации shop_id:secret_key."""
+        header = request.headers.get("Authorization", "")
+        if not header.startswith("Basic "):
+            return False
+        try:
+            login, _, password = base64.b64decode(header[6:]).decode("utf-8").partition(":")
+        except ValueError:
+            return False
+        return login == self.shop_id and password == self.secret_key
+
+    def _spawn(self, coro) -> None:
+        """Запуск фоновой задачи с учетом в _tasks."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _cleanup(self, app: web.Application) -> None:
+        """Отмена отложенных оплат и закрытие сессии уведомлений."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+
+    @staticmethod
+    def _error(status: int, code: str, description: str) -> web.Response:
+        """Ответ с ошибкой в формате API YooKassa."""
+        return web.json_response(
+            {"type": "error", "id": str(uuid.uuid4()), "code": code, "description": description},
+            status=status,
+        )
+
+    @staticmethod
+    def _now() -> str:
+        """Текущее время в формате API."""
+        return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def main() -> None:
+    """Запуск заглушки из командной строки."""
+    parser = argparse.ArgumentParser(description="Локальная замена API YooKassa")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--shop-id", default="test_shop")
+    parser.add_argument("--secret-key", default="test_key")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--lost-response-rate", type=float, default=0)
+    parser.add_argument("--webhook-url", default=None)
+    parser.add_argument("--auto-succeed-sec", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level="INFO", format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    fake = FakeYooKassa(
+        shop_id=args.shop_id,
+        secret_key=args.secret_key,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        lost_response_rate=args.lost_response_rate,
+        webhook_url=args.webhook_url,
+        auto_succeed_sec=args.auto_succeed_sec,
+        seed=args.seed,
+    )
+    web.run_app(fake.create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
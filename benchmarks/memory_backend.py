@@ -0,0 +1,222 @@
+"""Хранение данных репозиториев в памяти для прогонов без PostgreSQL.
+
+Подменяет статические методы репозиториев, которые вызывают обработчики,
+на реализации поверх словарей. Репозитории остаются теми же классами,
+поэтому обработчики и сервисы работают без изменений.
+"""
+
+import itertools
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.models.payment import Payment, PaymentCreate
+from src.models.question import Question
+from src.models.reading import Reading, ReadingCreate, ReadingUpdate
+from src.models.stats import StatsSummary
+from src.models.step import Step, StepContent
+from src.models.user import User, UserCreate
+from src.services.answer_repository import AnswerRepository
+from src.services.funnel_repository import FunnelRepository
+from src.services.payment_repository import PaymentRepository
+from src.services.question_repository import QuestionRepository
+from src.services.reading_repository import ReadingRepository
+from src.services.stats_repository import StatsRepository
+from src.services.step_repository import StepRepository
+from src.services.user_repository import UserRepository
+
+
+class InMemoryBackend:
+    """Данные пользователей, чтений, платежей, шагов и вопросов в памяти."""
+
+    def __init__(self):
+        """Инициализация пустого хранилища."""
+        self.users: Dict[int, User] = {}
+        self.users_by_telegram_id: Dict[int, User] = {}
+        self.readings: Dict[int, Reading] = {}
+        self.readings_by_user: Dict[int, List[Reading]] = {}
+        self.claimed_at: Dict[int, datetime] = {}
+        self.payments: Dict[int, Payment] = {}
+        self.steps: List[Step] = []
+        self.questions_by_step: Dict[int, List[Question]] = {}
+        self.funnel_events = 0
+        self.answers = 0
+        self._ids = itertools.count(1)
+        self._patches: List[Tuple[type, str, Any]] = []
+
+    def seed_scenario(self, steps: int = 3, questions_per_step: int = 1) -> None:
+        """Активный сценарий из steps шагов без задержек с вопросами выбора.
+
+        Args:
+            steps: Число шагов
+            questions_per_step: Число вопросов в каждом шаге
+        """
+        now = datetime.now(timezone.utc)
+        for order in range(1, steps + 1):
+            step = Step(
+                id=next(self._ids),
+                name=f"step-{order}",
+                content=StepContent(text=f"Шаг {order}"),
+                step_order=order,
+                is_active=True,
+                created_at=now,
+                updated_at=now,
+            )
+            self.steps.append(step)
+            self.questions_by_step[step.id] = [
+                Question(
+                    id=next(self._ids),
+                    step_id=step.id,
+                    question_text=f"Вопрос {order}.{i}",
+                    question_type="single_choice",
+                    options=[{"text": "Да", "payload": "yes"}, {"text": "Нет", "payload": "no"}],
+                    question_order=i,
+                    is_required=True,
+                    created_at=now,
+                    updated_at=now,
+                )
+                for i in range(1, questions_per_step + 1)
+            ]
+
+    def install(self) -> Callable[[], None]:
+        """Подмена методов репозиториев.
+
+        Returns:
+            Функция, возвращающая исходные методы
+        """
+        replacements = {
+            UserRepository: {
+                "get_by_telegram_id": self.get_user_by_telegram_id,
+                "create": self.create_user,
+            },
+            ReadingRepository: {
+                "create": self.create_reading,
+                "get_by_user_id": self.get_readings_by_user_id,
+                "update": self.update_reading,
+                "patch": self.patch_reading,
+                "claim_interrupted": self.claim_interrupted_readings,
+            },
+            PaymentRepository: {"create": self.create_payment},
+            StepRepository: {"get_active_steps": self.get_active_steps},
+            QuestionRepository: {
+                "get_by_step_id": self.get_questions_by_step_id,
+                "get_questions_by_step_ids": self.get_questions_by_step_ids,
+            },
+            StatsRepository: {"get_summary": self.get_stats_summary},
+            FunnelRepository: {"record_events": self.record_funnel_events},
+            AnswerRepository: {"copy_answers": self.copy_answers},
+        }
+        for cls, methods in replacements.items():
+            for name, method in methods.items():
+                self._patches.append((cls, name, cls.__dict__[name]))
+                setattr(cls, name, staticmethod(method))
+        return self.uninstall
+
+    def uninstall(self) -> None:
+        """Возврат исходных методов репозиториев."""
+        while self._patches:
+            cls, name, original = self._patches.pop()
+            setattr(cls, name, original)
+
+    async def get_user_by_telegram_id(self, telegram_id: int) -> Optional[User]:
+        """UserRepository.get_by_telegram_id."""
+        return self.users_by_telegram_id.get(telegram_id)
+
+    async def create_user(self, user_data: UserCreate) -> User:
+        """UserRepository.create."""
+        now = datetime.now(timezone.utc)
+        user = User(id=next(self._ids), created_at=now, updated_at=now, **user_data.model_dump())
+        self.users[user.id] = user
+        self.users_by_telegram_id[user.telegram_id] = user
+        return user
+
+    async def create_reading(self, reading_data: ReadingCreate) -> Reading:
+        """ReadingRepository.create."""
+        reading = Reading(id=next(self._ids), created_at=datetime.now(timezone.utc), **reading_data.model_dump())
+        self.readings[reading.id] = reading
+        self.readings_by_user.setdefault(reading.user_id, []).append(reading)
+        return reading
+
+    async def get_readings_by_user_id(self, user_id: int, limit: int = 50, offset: int = 0) -> List[Reading]:
+        """ReadingRepository.get_by_user_id."""
+        readings = self.readings_by_user.get(user_id, [])
+        return list(reversed(readings))[offset:offset + limit]
+
+    async def update_reading(self, reading_id: int, reading_data: ReadingUpdate) -> Optional[Reading]:
+        """ReadingRepository.update."""
+        reading = self.readings.get(reading_id)
+        if reading is None:
+            return None
+        changes = reading_data.model_dump(exclude_none=True, exclude={"payload_patch"})
+        updated = reading.model_copy(update=changes)
+        self.readings[reading_id] = updated
+        return updated
+
+    async def patch_reading(self, reading_id: int, reading_data: ReadingUpdate) -> Optional[Dict[str, Any]]:
+        """ReadingRepository.patch; из операций reading_payload поддерживается set."""
+        reading = self.readings.get(reading_id)
+        if reading is None:
+            return None
+        payload = dict(reading.reading_payload)
+        for patch in reading_data.payload_patch or []:
+            target = payload
+            for key in patch.path[:-1]:
+                target = target.setdefault(key, {})
+            target[patch.path[-1]] = patch.value
+        changes = reading_data.model_dump(exclude_none=True, exclude={"payload_patch"})
+        self.readings[reading_id] = reading.model_copy(update={**changes, "reading_payload": payload})
+        return {"id": reading_id, **changes}
+
+    async def claim_interrupted_readings(self, limit: int, lease: timedelta) -> List[Reading]:
+        """ReadingRepository.claim_interrupted."""
+        now = datetime.now(timezone.utc)
+        claimed = [
+            reading for reading in self.readings.values()
+            if reading.status == "interrupted"
+            or (reading.status == "resuming" and self.claimed_at[reading.id] < now - lease)
+        ][:limit]
+        for reading in claimed:
+            self.readings[reading.id] = reading.model_copy(update={"status": "resuming"})
+            self.claimed_at[reading.id] = now
+        return [self.readings[reading.id] for reading in claimed]
+
+    async def create_payment(self, payment_data: PaymentCreate) -> Payment:
+        """PaymentRepository.create."""
+        now = datetime.now(timezone.utc)
+        payment = Payment(id=next(self._ids), created_at=now, updated_at=now, **payment_data.model_dump())
+        self.payments[payment.id] = payment
+        return payment
+
+    async def get_active_steps(self) -> List[Step]:
+        """StepRepository.get_active_steps."""
+        return list(self.steps)
+
+    async def get_questions_by_step_id(self, step_id: int) -> List[Question]:
+        """QuestionRepository.get_by_step_id."""
+        return list(self.questions_by_step.get(step_id, []))
+
+    async def get_questions_by_step_ids(self, step_ids: List[int]) -> List[Question]:
+        """QuestionRepository.get_questions_by_step_ids."""
+        return [question for step_id in step_ids for question in self.questions_by_step.get(step_id, [])]
+
+    async def get_stats_summary(self, date_from: date, date_to: date) -> StatsSummary:
+        """StatsRepository.get_summary по данным в памяти."""
+        return StatsSummary(
+            date_from=date_from,
+            date_to=date_to,
+            watermark=datetime.now(timezone.utc),
+            total_users=len(self.users),
+            new_users=len(self.users),
+            readings=[],
+            revenue=[],
+        )
+
+    async def record_funnel_events(self, events: List[Any]) -> int:
+        """FunnelRepository.record_events."""
+        self.funnel_events += len(events)
+        return len(events)
+
+    async def copy_answers(self, answers: List[Any]) -> int:
+        """AnswerRepository.copy_answers."""
+        self.answers += len(answers)
+        return len(answers)
+
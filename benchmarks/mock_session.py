@@ -0,0 +1,79 @@
+"""Сессия Bot без сети для микробенчмарков обработчиков.
+
+Запросы не уходят в Telegram: параметры метода сериализуются так же, как
+перед отправкой, а ответ собирается локально и проходит через
+check_response, поэтому стоимость разбора ответа остается в замере.
+"""
+
+import itertools
+import json
+import time
+from collections import Counter
+from typing import Any, AsyncGenerator, Dict, Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import Message
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+
+
+class MockedSession(BaseSession):
+    """Сессия, отвечающая на вызовы Bot API синтетическими результатами.
+
+    Методы, возвращающие Message, получают сообщение с переданными
+    chat_id и text, остальные - True. Вызовы считаются по имени метода.
+    """
+
+    def __init__(self, **kwargs: Any):
+        """Инициализация сессии."""
+        super().__init__(**kwargs)
+        self.calls: Counter = Counter()
+        self._message_ids = itertools.count(1)
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[TelegramType], timeout: Optional[int] = None
+    ) -> TelegramType:
+        """Локальный ответ на вызов метода."""
+        self.calls[method.__api_method__] += 1
+        params = {
+            key: self.prepare_value(value, bot=bot, files={})
+            for key, value in method.model_dump(warnings=False).items()
+        }
+        response = self.check_response(
+            bot=bot,
+            method=method,
+            status_code=200,
+            content=json.dumps({"ok": True, "result": self._result(method, params)}),
+        )
+        return response.result
+
+    def _result(self, method: TelegramMethod, params: Dict[str, Any]) -> Any:
+        """Тело result для ответа на метод."""
+        if method.__returning__ is not Message:
+            return True
+        chat_id = params.get("chat_id") or 0
+        return {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id), "type": "private"},
+            "from": BOT_USER,
+            "text": params.get("text") or params.get("caption") or "",
+        }
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        """Скачивание файлов не поддерживается."""
+        raise NotImplementedError("MockedSession не скачивает файлы")
+        yield b""  # pragma: no cover
+
+    async def close(self) -> None:
+        """Закрывать нечего."""
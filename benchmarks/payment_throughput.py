@@ -0,0 +1,178 @@
+"""Пропускная способность создания и проверки платежей без выхода в сеть.
+
+Сценарий поднимает заглушку YooKassa и приемник уведомлений, создает
+платежи через YooKassaClient с заданной параллельностью, запрашивает их
+статус и ждет подписанные уведомления об оплате. Ошибки заглушки
+проверяют повторы клиента с тем же Idempotence-Key.
+
+Запуск:
+    python -m benchmarks.payment_throughput --payments 2000 --concurrency 50 \\
+        --latency-ms 30 --error-rate 0.05 --lost-response-rate 0.02
+
+С --webhook-url уведомления уходят в запущенный бот вместо встроенного приемника.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from typing import Optional
+
+from aiohttp import web
+
+from benchmarks.fake_yookassa import FakeYooKassa
+from benchmarks.report import LatencyRecorder
+from src.config import settings
+from src.services.payments import payment_service
+from src.services.yookassa_client import YooKassaClient
+
+
+class WebhookSink:
+    """Приемник уведомлений, проверяющий подпись так же, как бот."""
+
+    def __init__(self, expected: int):
+        """Инициализация приемника.
+
+        Args:
+            expected: Сколько уведомлений ожидается
+        """
+        self.expected = expected
+        self.received = 0
+        self.invalid = 0
+        self.done = asyncio.Event()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Проверка подписи и учет уведомления."""
+        body = await request.read()
+        if not payment_service.verify_webhook_signature(body, request.headers.get("Yookassa-Signature", "")):
+            self.invalid += 1
+            return web.Response(status=401)
+        self.received += 1
+        if self.received >= self.expected:
+            self.done.set()
+        return web.Response(text="OK")
+
+
+async def start_site(app: web.Application, port: int) -> web.AppRunner:
+    """Запуск приложения на 127.0.0.1."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Прогон сценария и печать отчета."""
+    sink = WebhookSink(expected=args.payments)
+    sink_runner: Optional[web.AppRunner] = None
+    webhook_url = args.webhook_url
+    if webhook_url is None:
+        sink_app = web.Application()
+        sink_app.router.add_post("/yookassa_webhook", sink.handle)
+        sink_runner = await start_site(sink_app, args.sink_port)
+        webhook_url = f"http://127.0.0.1:{args.sink_port}/yookassa_webhook"
+
+    fake = FakeYooKassa(
+        secret_key=settings.yookassa_api_key,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        lost_response_rate=args.lost_response_rate,
+        webhook_url=webhook_url,
+        auto_succeed_sec=args.auto_succeed_sec,
+        seed=args.seed,
+    )
+    fake_runner = await start_site(fake.create_app(), args.port)
+    client = YooKassaClient(
+        api_url=f"http://127.0.0.1:{args.port}/v3",
+        shop_id=fake.shop_id,
+        secret_key=fake.secret_key,
+        max_connections=args.concurrency,
+        timeout_sec=10,
+        retries=args.retries,
+    )
+
+    create = LatencyRecorder("create_payment")
+    find = LatencyRecorder("get_payment")
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one_payment(i: int) -> None:
+        """Создание платежа и запрос его статуса."""
+        async with semaphore:
+            body = {
+                "amount": {"value": "299.00", "currency": "RUB"},
+                "capture": True,
+                "description": f"bench {i}",
+                "metadata": {"readings": "5"},
+            }
+            started = time.perf_counter()
+            try:
+                payment = await client.create_payment(body, idempotence_key=uuid.uuid4().hex)
+            except RuntimeError:
+                create.record_error()
+                return
+            create.record(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            try:
+                await client.get_payment(payment["id"])
+            except RuntimeError:
+                find.record_error()
+                return
+            find.record(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one_payment(i) for i in range(args.payments)))
+        elapsed = time.perf_counter() - started
+
+        sink.expected = len(fake.payments)
+        if args.webhook_url is None and sink.received < sink.expected:
+            try:
+                await asyncio.wait_for(sink.done.wait(), timeout=args.auto_succeed_sec + 10)
+            except asyncio.TimeoutError:
+                pass
+        webhook_elapsed = time.perf_counter() - started
+    finally:
+        await client.close()
+        await fake_runner.cleanup()
+        if sink_runner is not None:
+            await sink_runner.cleanup()
+
+    print(f"Платежей: {args.payments}, параллельность: {args.concurrency}, "
+          f"задержка: {args.latency_ms}+{args.latency_jitter_ms}мс, ошибки: {args.error_rate:.1%}, "
+          f"потерянные ответы: {args.lost_response_rate:.1%}")
+    print(create.format(elapsed))
+    print(find.format(elapsed))
+    print(f"Запросов к заглушке: {fake.requests}, ответов 500: {fake.errors}, "
+          f"повторов по Idempotence-Key: {fake.idempotent_replays}, платежей создано: {len(fake.payments)}")
+    statuses = {status: fake.webhook_statuses.count(status) for status in sorted(set(fake.webhook_statuses))}
+    print(f"Уведомлений отправлено: {fake.webhooks_sent} за {webhook_elapsed:.1f} сек, ответы: {statuses}")
+    if args.webhook_url is None:
+        print(f"Уведомлений с верной подписью: {sink.received}, с неверной: {sink.invalid}")
+
+
+def main() -> None:
+    """Разбор аргументов и запуск."""
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон платежей против заглушки YooKassa")
+    parser.add_argument("--payments", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--latency-jitter-ms", type=float, default=10)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--lost-response-rate", type=float, default=0.02)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--auto-succeed-sec", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--sink-port", type=int, default=8082)
+    parser.add_argument("--webhook-url", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level="ERROR")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Сбор задержек и форматирование результатов нагрузочных прогонов."""
+
+import math
+from typing import Dict, List
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль q (0..100) методом ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class LatencyRecorder:
+    """Накопитель задержек одной операции."""
+
+    def __init__(self, name: str):
+        """Инициализация накопителя.
+
+        Args:
+            name: Имя операции в отчете
+        """
+        self.name = name
+        self.samples: List[float] = []
+        self.errors = 0
+
+    def record(self, seconds: float) -> None:
+        """Учет успешной операции."""
+        self.samples.append(seconds)
+
+    def record_error(self) -> None:
+        """Учет неудачной операции."""
+        self.errors += 1
+
+    def summary(self, elapsed_sec: float) -> Dict[str, float]:
+        """Сводка: число операций, ошибки, операций в секунду и перцентили в мс."""
+        return {
+            "count": len(self.samples),
+            "errors": self.errors,
+            "per_sec": len(self.samples) / elapsed_sec if elapsed_sec > 0 else 0.0,
+            "p50_ms": percentile(self.samples, 50) * 1000,
+            "p90_ms": percentile(self.samples, 90) * 1000,
+            "p99_ms": percentile(self.samples, 99) * 1000,
+            "max_ms": max(self.samples, default=0.0) * 1000,
+        }
+
+    def format(self, elapsed_sec: float) -> str:
+        """Строка отчета."""
+        s = self.summary(elapsed_sec)
+        return (
+            f"{self.name:<24} n={s['count']:<7} err={s['errors']:<5} {s['per_sec']:9.1f}/s  "
+            f"p50={s['p50_ms']:7.1f}ms p90={s['p90_ms']:7.1f}ms p99={s['p99_ms']:7.1f}ms max={s['max_ms']:7.1f}ms"
+        )
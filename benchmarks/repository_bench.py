@@ -0,0 +1,694 @@
+"""Бенчмарк репозиториев на объемных данных со снимками планов запросов.
+
+Каждый публичный метод UserRepository, ReadingRepository, StepRepository,
+QuestionRepository и PaymentRepository вызывается на базе, заполненной
+benchmarks.seed_dataset, и замеряется по времени. Запросы, которые метод
+отправил в PostgreSQL, перехватываются логгером запросов asyncpg и
+пропускаются через EXPLAIN (FORMAT JSON) с теми же параметрами.
+
+Флаги:
+- seq_scan: последовательное чтение таблицы больше --min-seq-scan-rows строк;
+- cost_jump: стоимость плана выросла больше чем в --cost-ratio раз
+  относительно --baseline;
+- uncovered: у публичного метода нет сценария замера.
+
+Флаги seq_scan для методов из EXPECTED_SEQ_SCANS считаются ожидаемыми
+и не приводят к коду возврата 1.
+
+Пишущие методы работают только со строками, которые бенчмарк создает сам;
+в конце они удаляются.
+
+Запуск:
+    python -m benchmarks.seed_dataset --reset
+    python -m benchmarks.repository_bench --output plans.json
+    python -m benchmarks.repository_bench --output plans-new.json --baseline plans.json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import inspect
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from benchmarks.report import percentile
+from benchmarks.seed_dataset import FIRST_TELEGRAM_ID
+
+logger = logging.getLogger(__name__)
+
+# Методы, для которых полное чтение таблицы ожидаемо: они считают все строки
+EXPECTED_SEQ_SCANS = {
+    "UserRepository.get_total_count",
+    "ReadingRepository.get_total_count",
+    "PaymentRepository.get_total_count",
+}
+
+# Запросы, для которых строится план
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+# telegram_id строк, которые создает бенчмарк
+BENCH_TELEGRAM_ID = 6_000_000_000
+
+
+def normalize_sql(query: str) -> str:
+    """Текст запроса без лишних пробелов."""
+    return re.sub(r"\s+", " ", query).strip()
+
+
+def sql_key(query: str) -> str:
+    """Короткий ключ запроса для сопоставления со снимком."""
+    return hashlib.sha1(normalize_sql(query).encode("utf-8")).hexdigest()[:12]
+
+
+def walk_plan(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Обход узлов плана в глубину."""
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk_plan(child)
+
+
+def describe_node(node: Dict[str, Any]) -> str:
+    """Узел плана одной строкой: тип, индекс, таблица."""
+    text = node["Node Type"]
+    if node.get("Index Name"):
+        text += f" using {node['Index Name']}"
+    if node.get("Relation Name"):
+        text += f" on {node['Relation Name']}"
+    return text
+
+
+def summarize_plan(explain: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Сводка результата EXPLAIN (FORMAT JSON).
+
+    Returns:
+        Стоимость, оценка строк, узлы и таблицы, читаемые последовательно
+    """
+    root = explain[0]["Plan"]
+    nodes = list(walk_plan(root))
+    return {
+        "total_cost": root["Total Cost"],
+        "plan_rows": root["Plan Rows"],
+        "nodes": [describe_node(node) for node in nodes],
+        "seq_scans": sorted({
+            node["Relation Name"] for node in nodes
+            if "Seq Scan" in node["Node Type"] and node.get("Relation Name")
+        }),
+    }
+
+
+def find_flags(
+    methods: Dict[str, Dict[str, Any]],
+    table_rows: Dict[str, int],
+    baseline: Optional[Dict[str, Dict[str, Any]]] = None,
+    min_seq_scan_rows: int = 10_000,
+    cost_ratio: float = 2.0,
+) -> List[Dict[str, Any]]:
+    """Поиск последовательных чтений больших таблиц и скачков стоимости.
+
+    Args:
+        methods: Результаты по методам (раздел methods отчета)
+        table_rows: Оценка числа строк по таблицам
+        baseline: Раздел methods прошлого отчета
+        min_seq_scan_rows: Размер таблицы, начиная с которого seq scan отмечается
+        cost_ratio: Допустимый рост стоимости плана
+
+    Returns:
+        Флаги с полями kind, method, detail и expected
+    """
+    flags = []
+    for method, result in methods.items():
+        before = {query["key"]: query for query in (baseline or {}).get(method, {}).get("queries", [])}
+        for query in result.get("queries", []):
+            for table in query["seq_scans"]:
+                rows = table_rows.get(table, 0)
+                if rows >= min_seq_scan_rows:
+                    flags.append({
+                        "kind": "seq_scan",
+                        "method": method,
+                        "detail": f"Seq Scan on {table} (~{rows} строк): {query['sql'][:120]}",
+                        "expected": method in EXPECTED_SEQ_SCANS,
+                    })
+            old = before.get(query["key"])
+            if old and old["total_cost"] > 0 and query["total_cost"] > old["total_cost"] * cost_ratio:
+                flags.append({
+                    "kind": "cost_jump",
+                    "method": method,
+                    "detail": (
+                        f"стоимость {old['total_cost']:.0f} -> {query['total_cost']:.0f}; "
+                        f"план {' / '.join(old['nodes'])} -> {' / '.join(query['nodes'])}"
+                    ),
+                    "expected": False,
+                })
+    return flags
+
+
+def public_methods(repositories: List[type]) -> List[str]:
+    """Публичные корутины и асинхронные генераторы репозиториев."""
+    names = []
+    for cls in repositories:
+        for name, attr in vars(cls).items():
+            if name.startswith("_") or not isinstance(attr, staticmethod):
+                continue
+            if inspect.iscoroutinefunction(attr.__func__) or inspect.isasyncgenfunction(attr.__func__):
+                names.append(f"{cls.__name__}.{name}")
+    return names
+
+
+class QueryCapture:
+    """Логгер запросов asyncpg, сохраняющий запросы во время захвата."""
+
+    def __init__(self):
+        """Инициализация."""
+        self.capturing = False
+        self.records: List[Any] = []
+
+    async def attach(self, conn: Any) -> None:
+        """init-хук пула: логгер на каждое новое соединение."""
+        conn.add_query_logger(self._log)
+
+    def _log(self, record: Any) -> None:
+        """Сохранение запроса, если идет захват."""
+        if self.capturing:
+            self.records.append(record)
+
+    async def capture(self, call: Callable[[], Awaitable[Any]]) -> List[Any]:
+        """Запросы, выполненные во время call.
+
+        Логгер вызывается через call_soon, поэтому после вызова цикл
+        событий отдает управление один раз, чтобы записи успели прийти.
+        """
+        self.records = []
+        self.capturing = True
+        try:
+            await call()
+            await asyncio.sleep(0)
+        finally:
+            self.capturing = False
+        return self.records
+
+
+@dataclass
+class Case:
+    """Сценарий замера метода.
+
+    prepare вызывается перед каждым замером вне замера и готовит
+    аргументы (например, строку, которую метод изменит или удалит).
+    """
+
+    method: str
+    call: Callable[["BenchContext", Any], Awaitable[Any]]
+    prepare: Optional[Callable[["BenchContext"], Awaitable[Any]]] = None
+    iterations: Optional[int] = None
+
+
+class BenchContext:
+    """Выбор аргументов на заполненной базе и учет созданных строк."""
+
+    def __init__(self, bounds: Dict[str, int], skew: float, seed: int):
+        """Инициализация.
+
+        Args:
+            bounds: Максимальные id сгенерированных строк по таблицам
+            skew: Скошенность выбора пользователей, как при заполнении
+            seed: Зерно генератора
+        """
+        self.bounds = bounds
+        self.skew = skew
+        self.rng = random.Random(seed)
+        self._telegram_ids = itertools.count(BENCH_TELEGRAM_ID + self.rng.randint(0, 10**6) * 1000)
+        self.bench_user: Any = None
+        self.bench_step: Any = None
+        self.bench_question: Any = None
+        self.created_users: List[int] = []
+        self.created_steps: List[int] = []
+
+    def user_id(self) -> int:
+        """Пользователь; активные выбираются чаще, как в данных."""
+        return min(int(self.bounds["bot_users"] * self.rng.random() ** self.skew), self.bounds["bot_users"] - 1) + 1
+
+    def telegram_id(self) -> int:
+        """telegram_id существующего пользователя."""
+        return FIRST_TELEGRAM_ID + self.user_id() - 1
+
+    def reading_id(self) -> int:
+        """Существующее чтение."""
+        return self.rng.randint(1, self.bounds["readings"])
+
+    def payment_id(self) -> int:
+        """Существующий платеж."""
+        return self.rng.randint(1, self.bounds["payments"])
+
+    def step_id(self) -> int:
+        """Существующий шаг."""
+        return self.rng.randint(1, self.bounds["steps"])
+
+    def question_id(self) -> int:
+        """Существующий вопрос."""
+        return self.rng.randint(1, self.bounds["questions"])
+
+    def offset(self) -> int:
+        """Смещение страницы, включая глубокие страницы."""
+        return self.rng.choice((0, 100, 1_000, 10_000))
+
+    def next_telegram_id(self) -> int:
+        """telegram_id для нового пользователя бенчмарка."""
+        return next(self._telegram_ids)
+
+    async def new_user(self) -> Any:
+        """Пользователь бенчмарка; удаляется в конце вместе с чтениями и платежами."""
+        from src.models.user import UserCreate
+        from src.services.user_repository import UserRepository
+
+        user = await UserRepository.create(UserCreate(telegram_id=self.next_telegram_id(), first_name="Bench"))
+        self.created_users.append(user.id)
+        return user
+
+    async def new_step(self) -> Any:
+        """Неактивный шаг бенчмарка; удаляется в конце вместе с вопросами."""
+        from src.models.step import StepCreate
+        from src.services.step_repository import StepRepository
+
+        order = await StepRepository.get_next_step_order()
+        step = await StepRepository.create(StepCreate(name="bench", step_order=order, is_active=False))
+        self.created_steps.append(step.id)
+        return step
+
+    async def new_question(self) -> Any:
+        """Вопрос в шаге бенчмарка."""
+        from src.models.question import QuestionCreate
+        from src.services.question_repository import QuestionRepository
+
+        order = await QuestionRepository.get_next_question_order(self.bench_step.id)
+        return await QuestionRepository.create(
+            QuestionCreate(step_id=self.bench_step.id, question_text="bench", question_order=order)
+        )
+
+    async def new_reading(self) -> Any:
+        """Чтение пользователя бенчмарка."""
+        from src.models.reading import ReadingCreate
+        from src.services.reading_repository import ReadingRepository
+
+        return await ReadingRepository.create(ReadingCreate(user_id=self.bench_user.id, reading_type="default"))
+
+    async def new_payment(self) -> Any:
+        """Платеж пользователя бенчмарка в статусе pending."""
+        from decimal import Decimal
+
+        from src.models.payment import PaymentCreate
+        from src.services.payment_repository import PaymentRepository
+
+        return await PaymentRepository.create(PaymentCreate(
+            user_id=self.bench_user.id,
+            yookassa_payment_id=f"bench-run-{self.next_telegram_id()}",
+            amount=Decimal("299.00"),
+            metadata={"package_type": "buy_5", "readings": 5},
+        ))
+
+    async def new_payments(self, count: int = 10) -> List[Any]:
+        """Несколько платежей пользователя бенчмарка."""
+        return [await self.new_payment() for _ in range(count)]
+
+
+async def first_batch(batches: Any) -> Any:
+    """Первая пачка асинхронного генератора с его закрытием."""
+    try:
+        return await batches.__anext__()
+    except StopAsyncIteration:
+        return None
+    finally:
+        await batches.aclose()
+
+
+def build_cases() -> List[Case]:
+    """Сценарии замера всех публичных методов пяти репозиториев."""
+    from src.models.payment import PaymentUpdate
+    from src.models.question import QuestionUpdate
+    from src.models.reading import PayloadPatch, ReadingCreate, ReadingUpdate
+    from src.models.step import StepCreate, StepUpdate
+    from src.models.user import UserCreate, UserUpdate
+    from src.services.payment_repository import PaymentRepository as P
+    from src.services.question_repository import QuestionRepository as Q
+    from src.services.reading_repository import ReadingRepository as R
+    from src.services.step_repository import StepRepository as S
+    from src.services.user_repository import UserRepository as U
+    from src.services.user_repository import user_cache
+
+    async def create_user_args(ctx: BenchContext) -> UserCreate:
+        return UserCreate(telegram_id=ctx.next_telegram_id(), first_name="Bench")
+
+    async def call_user_create(ctx: BenchContext, data: UserCreate) -> Any:
+        user = await U.create(data)
+        ctx.created_users.append(user.id)
+        return user
+
+    async def create_step_args(ctx: BenchContext) -> StepCreate:
+        return StepCreate(name="bench", step_order=await S.get_next_step_order(), is_active=False)
+
+    async def call_step_create(ctx: BenchContext, data: StepCreate) -> Any:
+        step = await S.create(data)
+        ctx.created_steps.append(step.id)
+        return step
+
+    async def create_question_args(ctx: BenchContext) -> Any:
+        from src.models.question import QuestionCreate
+
+        order = await Q.get_next_question_order(ctx.bench_step.id)
+        return QuestionCreate(step_id=ctx.bench_step.id, question_text="bench", question_order=order)
+
+    async def uncached_telegram_id(ctx: BenchContext) -> int:
+        # Замеряется запрос, а не попадание в кэш пользователей
+        user_cache.clear()
+        return ctx.telegram_id()
+
+    return [
+        # UserRepository
+        Case("UserRepository.create", call_user_create, create_user_args),
+        Case("UserRepository.get_by_id", lambda ctx, _: U.get_by_id(ctx.user_id())),
+        Case("UserRepository.get_by_telegram_id", lambda ctx, tg: U.get_by_telegram_id(tg), uncached_telegram_id),
+        Case("UserRepository.get_by_username", lambda ctx, _: U.get_by_username(f"user_{ctx.user_id()}")),
+        Case("UserRepository.update", lambda ctx, user: U.update(user.id, UserUpdate(first_name="Bench2")), lambda ctx: ctx.new_user()),
+        Case("UserRepository.delete", lambda ctx, user: U.delete(user.id), lambda ctx: ctx.new_user()),
+        Case("UserRepository.get_all", lambda ctx, _: U.get_all(limit=100, offset=ctx.offset())),
+        Case("UserRepository.get_total_count", lambda ctx, _: U.get_total_count(), iterations=3),
+        Case(
+            "UserRepository.get_or_create",
+            lambda ctx, tg: U.get_or_create(tg, UserCreate(telegram_id=tg, first_name="Bench")),
+            uncached_telegram_id,
+        ),
+        Case("UserRepository.get_recently_active", lambda ctx, _: U.get_recently_active(100), iterations=3),
+        Case("UserRepository.preload_cache", lambda ctx, _: U.preload_cache(100), iterations=3),
+        # ReadingRepository
+        Case(
+            "ReadingRepository.create",
+            lambda ctx, _: R.create(ReadingCreate(user_id=ctx.bench_user.id, reading_type="default")),
+        ),
+        Case("ReadingRepository.get_by_id", lambda ctx, _: R.get_by_id(ctx.reading_id())),
+        Case("ReadingRepository.get_by_user_id", lambda ctx, _: R.get_by_user_id(ctx.user_id())),
+        Case(
+            "ReadingRepository.get_by_user_id_and_type",
+            lambda ctx, _: R.get_by_user_id_and_type(ctx.user_id(), "paid"),
+        ),
+        Case("ReadingRepository.get_by_status", lambda ctx, _: R.get_by_status("pending", offset=ctx.offset())),
+        Case("ReadingRepository.claim_interrupted", lambda ctx, _: R.claim_interrupted(100, timedelta(minutes=5)), iterations=3),
+        Case(
+            "ReadingRepository.update",
+            lambda ctx, reading: R.update(reading.id, ReadingUpdate(status="completed")),
+            lambda ctx: ctx.new_reading(),
+        ),
+        Case(
+            "ReadingRepository.patch",
+            lambda ctx, reading: R.patch(
+                reading.id, ReadingUpdate(payload_patch=[PayloadPatch.incr(["progress", "steps_done"])])
+            ),
+            lambda ctx: ctx.new_reading(),
+        ),
+        Case("ReadingRepository.complete_reading", lambda ctx, reading: R.complete_reading(reading.id), lambda ctx: ctx.new_reading()),
+        Case("ReadingRepository.delete", lambda ctx, reading: R.delete(reading.id), lambda ctx: ctx.new_reading()),
+        Case("ReadingRepository.get_all", lambda ctx, _: R.get_all(limit=100, offset=ctx.offset())),
+        Case("ReadingRepository.get_total_count", lambda ctx, _: R.get_total_count(), iterations=3),
+        Case("ReadingRepository.get_user_reading_count", lambda ctx, _: R.get_user_reading_count(ctx.user_id())),
+        Case("ReadingRepository.get_latest_user_reading", lambda ctx, _: R.get_latest_user_reading(ctx.user_id(), "paid")),
+        # StepRepository
+        Case("StepRepository.create", call_step_create, create_step_args),
+        Case("StepRepository.get_by_id", lambda ctx, _: S.get_by_id(ctx.step_id())),
+        Case("StepRepository.get_by_order", lambda ctx, _: S.get_by_order(ctx.step_id())),
+        Case("StepRepository.get_active_steps", lambda ctx, _: S.get_active_steps()),
+        Case("StepRepository.get_all", lambda ctx, _: S.get_all()),
+        Case("StepRepository.get_with_questions", lambda ctx, _: S.get_with_questions(ctx.step_id())),
+        Case("StepRepository.get_active_with_questions", lambda ctx, _: S.get_active_with_questions()),
+        Case("StepRepository.update", lambda ctx, _: S.update(ctx.bench_step.id, StepUpdate(name="bench"))),
+        Case("StepRepository.delete", lambda ctx, step: S.delete(step.id), lambda ctx: ctx.new_step()),
+        Case("StepRepository.get_total_count", lambda ctx, _: S.get_total_count()),
+        Case("StepRepository.get_active_count", lambda ctx, _: S.get_active_count()),
+        Case("StepRepository.get_next_step_order", lambda ctx, _: S.get_next_step_order()),
+        Case(
+            "StepRepository.reorder_steps",
+            lambda ctx, _: S.reorder_steps({ctx.bench_step.id: ctx.bench_step.step_order}),
+        ),
+        # QuestionRepository
+        Case("QuestionRepository.create", lambda ctx, data: Q.create(data), create_question_args),
+        Case("QuestionRepository.get_by_id", lambda ctx, _: Q.get_by_id(ctx.question_id())),
+        Case("QuestionRepository.get_by_step_id", lambda ctx, _: Q.get_by_step_id(ctx.step_id())),
+        Case("QuestionRepository.get_all", lambda ctx, _: Q.get_all()),
+        Case("QuestionRepository.get_by_type", lambda ctx, _: Q.get_by_type("text")),
+        Case("QuestionRepository.get_required_questions", lambda ctx, _: Q.get_required_questions(ctx.step_id())),
+        Case(
+            "QuestionRepository.update",
+            lambda ctx, _: Q.update(ctx.bench_question.id, QuestionUpdate(question_text="bench")),
+        ),
+        Case("QuestionRepository.delete", lambda ctx, question: Q.delete(question.id), lambda ctx: ctx.new_question()),
+        Case("QuestionRepository.delete_by_step_id", lambda ctx, step: Q.delete_by_step_id(step.id), lambda ctx: ctx.new_step()),
+        Case("QuestionRepository.get_total_count", lambda ctx, _: Q.get_total_count()),
+        Case("QuestionRepository.get_step_question_count", lambda ctx, _: Q.get_step_question_count(ctx.step_id())),
+        Case("QuestionRepository.get_next_question_order", lambda ctx, _: Q.get_next_question_order(ctx.step_id())),
+        Case(
+            "QuestionRepository.reorder_questions",
+            lambda ctx, _: Q.reorder_questions(
+                ctx.bench_step.id, {ctx.bench_question.id: ctx.bench_question.question_order}
+            ),
+        ),
+        Case(
+            "QuestionRepository.get_questions_by_step_ids",
+            lambda ctx, _: Q.get_questions_by_step_ids(list(range(1, ctx.bounds["steps"] + 1))),
+        ),
+        # PaymentRepository
+        Case("PaymentRepository.create", lambda ctx, _: ctx.new_payment()),
+        Case("PaymentRepository.get_by_id", lambda ctx, _: P.get_by_id(ctx.payment_id())),
+        Case("PaymentRepository.get_by_yookassa_id", lambda ctx, _: P.get_by_yookassa_id(f"bench-{ctx.payment_id():012d}")),
+        Case("PaymentRepository.get_by_user_id", lambda ctx, _: P.get_by_user_id(ctx.user_id())),
+        Case("PaymentRepository.get_by_status", lambda ctx, _: P.get_by_status("pending", offset=ctx.offset())),
+        Case(
+            "PaymentRepository.update",
+            lambda ctx, payment: P.update(payment.id, PaymentUpdate(description="bench")),
+            lambda ctx: ctx.new_payment(),
+        ),
+        Case(
+            "PaymentRepository.update_status",
+            lambda ctx, payment: P.update_status(payment.id, "canceled"),
+            lambda ctx: ctx.new_payment(),
+        ),
+        Case(
+            "PaymentRepository.apply_status_transition",
+            lambda ctx, payment: P.apply_status_transition(payment.yookassa_payment_id, "succeeded"),
+            lambda ctx: ctx.new_payment(),
+        ),
+        Case(
+            "PaymentRepository.apply_status_transitions",
+            lambda ctx, payments: P.apply_status_transitions([(p.yookassa_payment_id, "succeeded") for p in payments]),
+            lambda ctx: ctx.new_payments(),
+        ),
+        Case(
+            "PaymentRepository.iter_stale_pending",
+            lambda ctx, _: first_batch(P.iter_stale_pending(timedelta(minutes=10), batch_size=100)),
+        ),
+        Case("PaymentRepository.delete", lambda ctx, payment: P.delete(payment.id), lambda ctx: ctx.new_payment()),
+        Case("PaymentRepository.get_all", lambda ctx, _: P.get_all(limit=100, offset=ctx.offset())),
+        Case("PaymentRepository.get_total_count", lambda ctx, _: P.get_total_count(), iterations=3),
+        Case("PaymentRepository.get_user_payment_count", lambda ctx, _: P.get_user_payment_count(ctx.user_id())),
+        Case("PaymentRepository.get_user_total_spent", lambda ctx, _: P.get_user_total_spent(ctx.user_id())),
+        Case(
+            "PaymentRepository.get_successful_payments_by_user",
+            lambda ctx, _: P.get_successful_payments_by_user(ctx.user_id()),
+        ),
+        Case("PaymentRepository.get_pending_payments", lambda ctx, _: P.get_pending_payments(), iterations=3),
+    ]
+
+
+async def explain(conn: Any, records: List[Any]) -> List[Dict[str, Any]]:
+    """Планы перехваченных запросов без повторов.
+
+    EXPLAIN без ANALYZE не выполняет запрос, поэтому пишущие запросы
+    не меняют данные.
+    """
+    plans = []
+    seen = set()
+    for record in records:
+        sql = normalize_sql(record.query)
+        key = sql_key(sql)
+        if key in seen or not sql.upper().startswith(EXPLAINABLE):
+            continue
+        seen.add(key)
+        entry: Dict[str, Any] = {"key": key, "sql": sql}
+        try:
+            raw = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {record.query}", *(record.args or ()))
+            entry.update(summarize_plan(json.loads(raw) if isinstance(raw, str) else raw))
+        except Exception as e:
+            entry.update({"total_cost": 0.0, "plan_rows": 0, "nodes": [], "seq_scans": [], "error": str(e)})
+        plans.append(entry)
+    return plans
+
+
+async def measure(case: Case, ctx: BenchContext, capture: QueryCapture, iterations: int) -> Dict[str, Any]:
+    """Время вызовов метода и планы его запросов."""
+    from src.services.database import get_connection
+
+    timings: List[float] = []
+    for _ in range(iterations):
+        prepared = await case.prepare(ctx) if case.prepare else None
+        started = time.perf_counter()
+        await case.call(ctx, prepared)
+        timings.append(time.perf_counter() - started)
+
+    prepared = await case.prepare(ctx) if case.prepare else None
+    records = await capture.capture(lambda: case.call(ctx, prepared))
+    async with get_connection() as conn:
+        queries = await explain(conn, records)
+
+    return {
+        "iterations": iterations,
+        "mean_ms": sum(timings) / len(timings) * 1000,
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p95_ms": percentile(timings, 95) * 1000,
+        "max_ms": max(timings) * 1000,
+        "queries": queries,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Прогон всех сценариев.
+
+    Returns:
+        Отчет: meta, methods, uncovered и flags
+    """
+    import asyncpg
+
+    from src.services import database
+    from src.services.payment_repository import PaymentRepository
+    from src.services.question_repository import QuestionRepository
+    from src.services.reading_repository import ReadingRepository
+    from src.services.step_repository import StepRepository
+    from src.services.user_repository import UserRepository
+
+    capture = QueryCapture()
+    database.pool = await asyncpg.create_pool(
+        args.database_url,
+        min_size=1,
+        max_size=4,
+        init=capture.attach,
+        server_settings={"application_name": "repository_bench", "timezone": "UTC"},
+    )
+    cases = build_cases()
+    repositories = [UserRepository, ReadingRepository, StepRepository, QuestionRepository, PaymentRepository]
+    covered = {case.method for case in cases}
+    uncovered = [method for method in public_methods(repositories) if method not in covered]
+    if args.methods:
+        cases = [case for case in cases if any(case.method.startswith(prefix) for prefix in args.methods)]
+
+    methods: Dict[str, Dict[str, Any]] = {}
+    ctx: Optional[BenchContext] = None
+    try:
+        async with database.get_connection() as conn:
+            bounds = {
+                table: await conn.fetchval(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+                for table in ("bot_users", "readings", "payments", "steps", "questions")
+            }
+            table_rows = {
+                row["relname"]: int(row["reltuples"])
+                for row in await conn.fetch(
+                    "SELECT relname, reltuples FROM pg_class "
+                    "WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+                )
+            }
+        if not all(bounds.values()):
+            raise RuntimeError(f"База не заполнена ({bounds}); запустите benchmarks.seed_dataset")
+
+        ctx = BenchContext(bounds, skew=args.skew, seed=args.seed)
+        ctx.bench_user = await ctx.new_user()
+        ctx.bench_step = await ctx.new_step()
+        ctx.bench_question = await ctx.new_question()
+
+        for case in cases:
+            try:
+                methods[case.method] = await measure(case, ctx, capture, case.iterations or args.iterations)
+            except Exception as e:
+                logger.error(f"{case.method}: {str(e)}")
+                methods[case.method] = {"error": str(e), "queries": []}
+            logger.info(f"{case.method}: {methods[case.method].get('p50_ms', 0):.2f} мс")
+    finally:
+        if ctx is not None:
+            async with database.get_connection() as conn:
+                await conn.execute("DELETE FROM bot_users WHERE id = ANY($1::int[])", ctx.created_users)
+                await conn.execute("DELETE FROM steps WHERE id = ANY($1::int[])", ctx.created_steps)
+        await database.close_database()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["methods"]
+    flags = find_flags(methods, table_rows, baseline, args.min_seq_scan_rows, args.cost_ratio)
+    flags.extend(
+        {"kind": "uncovered", "method": method, "detail": "нет сценария замера", "expected": False}
+        for method in uncovered
+    )
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "iterations": args.iterations,
+            "table_rows": table_rows,
+        },
+        "methods": methods,
+        "flags": flags,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Таблица времени по методам и список флагов."""
+    lines = [f"{'method':<48} {'p50 ms':>9} {'p95 ms':>9} {'cost':>12}  plan"]
+    for method, m in report["methods"].items():
+        if "error" in m:
+            lines.append(f"{method:<48} ошибка: {m['error']}")
+            continue
+        cost = max((q["total_cost"] for q in m["queries"]), default=0.0)
+        plan = "; ".join(q["nodes"][0] for q in m["queries"] if q["nodes"])
+        lines.append(f"{method:<48} {m['p50_ms']:9.2f} {m['p95_ms']:9.2f} {cost:12.1f}  {plan[:80]}")
+    for flag in report["flags"]:
+        mark = "ожидаемо" if flag["expected"] else "ВНИМАНИЕ"
+        lines.append(f"[{mark}] {flag['kind']} {flag['method']}: {flag['detail']}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Разбор аргументов и запуск."""
+    parser = argparse.ArgumentParser(description="Бенчмарк репозиториев со снимками планов")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--methods", nargs="+", default=None, help="префиксы методов, например PaymentRepository.")
+    parser.add_argument("--skew", type=float, default=2.0, help="как при заполнении")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--min-seq-scan-rows", type=int, default=10_000)
+    parser.add_argument("--cost-ratio", type=float, default=2.0)
+    parser.add_argument("--baseline", default=None, help="прошлый отчет для сравнения стоимости планов")
+    parser.add_argument("--output", default=None, help="файл JSON-отчета")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("нужен --database-url или DATABASE_URL")
+
+    os.environ.setdefault("DATABASE_URL", args.database_url)
+    os.environ.setdefault("BOT_TOKEN", "123456:BENCH-TOKEN")
+    os.environ.setdefault("WEBHOOK_URL", "https://example.com")
+    os.environ.setdefault("YOOKASSA_SHOP_ID", "test_shop")
+    os.environ.setdefault("YOOKASSA_API_KEY", "test_key")
+    os.environ["LOG_LEVEL"] = args.log_level
+    logging.basicConfig(level=args.log_level)
+
+    report = asyncio.run(run(args))
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if any(not flag["expected"] for flag in report["flags"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
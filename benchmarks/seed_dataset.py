@@ -0,0 +1,298 @@
+"""Заполнение локального PostgreSQL объемным набором данных через COPY.
+
+Объемы по умолчанию - 1M пользователей, 10M чтений и 2M платежей.
+Распределения скошены как в проде: небольшая доля пользователей делает
+большую часть чтений и платежей, свежие записи встречаются чаще старых,
+статусы и типы выбираются по весам. Генератор детерминирован при
+одинаковом --seed, поэтому планы запросов сравнимы между прогонами.
+
+Запуск (схема должна быть создана миграциями):
+    python -m benchmarks.seed_dataset --reset
+    python -m benchmarks.seed_dataset --reset --scale 0.01   # 10K / 100K / 20K
+
+Без --reset заполняется только пустая база: --reset очищает bot_users,
+readings, payments, steps, questions и зависящие от них таблицы.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Первый telegram_id сгенерированных пользователей
+FIRST_TELEGRAM_ID = 7_000_000_000
+
+# Размер пачки записей одного COPY
+COPY_CHUNK_ROWS = 50_000
+
+# Окно дат создания записей
+HISTORY_DAYS = 365
+
+READING_TYPES = {"default": 50, "free": 25, "paid": 15, "tarot": 10}
+READING_STATUSES = {"completed": 70, "pending": 22, "failed": 8}
+PAYMENT_STATUSES = {"succeeded": 60, "canceled": 22, "pending": 12, "waiting_for_capture": 3, "expired": 3}
+PACKAGES = {"buy_5": (Decimal("299.00"), 5), "buy_10": (Decimal("499.00"), 10), "buy_20": (Decimal("899.00"), 20)}
+QUESTION_TYPES = ("single_choice", "text", "multiple_choice")
+
+USER_COLUMNS = [
+    "id", "telegram_id", "first_name", "last_name", "username", "is_bot",
+    "paid_readings_left", "created_at", "updated_at",
+]
+READING_COLUMNS = [
+    "id", "user_id", "reading_type", "reading_payload", "status", "created_at", "completed_at", "updated_at",
+]
+PAYMENT_COLUMNS = [
+    "id", "user_id", "yookassa_payment_id", "amount", "currency", "status",
+    "description", "metadata", "created_at", "updated_at",
+]
+STEP_COLUMNS = ["id", "name", "description", "content", "step_order", "is_active", "created_at", "updated_at"]
+QUESTION_COLUMNS = [
+    "id", "step_id", "question_text", "question_type", "options", "question_order",
+    "is_required", "created_at", "updated_at",
+]
+
+# Таблицы, очищаемые --reset; CASCADE захватывает ответы и события воронки
+RESET_TABLES = ("bot_users", "readings", "payments", "steps", "questions")
+
+
+@dataclass
+class DatasetSize:
+    """Объем генерируемых данных."""
+
+    users: int = 1_000_000
+    readings: int = 10_000_000
+    payments: int = 2_000_000
+    steps: int = 10
+    questions_per_step: int = 3
+
+    def scaled(self, scale: float) -> "DatasetSize":
+        """Объем, умноженный на scale; сценарий не масштабируется."""
+        return DatasetSize(
+            users=max(int(self.users * scale), 1),
+            readings=int(self.readings * scale),
+            payments=int(self.payments * scale),
+            steps=self.steps,
+            questions_per_step=self.questions_per_step,
+        )
+
+
+def skewed_index(rng: random.Random, n: int, skew: float) -> int:
+    """Индекс 0..n-1, смещенный к началу по степенному закону.
+
+    При skew=1 распределение равномерное, при skew=2 на первый 1%
+    индексов приходится 10% выборок, при skew=3 - около 22%.
+    """
+    return min(int(n * rng.random() ** skew), n - 1)
+
+
+def weighted(rng: random.Random, weights: Dict[str, int]) -> str:
+    """Случайный ключ словаря с учетом весов."""
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def recent_timestamp(rng: random.Random, now: datetime, after: datetime) -> datetime:
+    """Момент между after и now; свежие моменты выпадают чаще."""
+    span = (now - after).total_seconds()
+    return now - timedelta(seconds=span * rng.random() ** 2)
+
+
+class DatasetGenerator:
+    """Детерминированный генератор строк для COPY."""
+
+    def __init__(self, size: DatasetSize, seed: int = 42, skew: float = 2.0):
+        """Инициализация.
+
+        Args:
+            size: Объем данных
+            seed: Зерно генератора
+            skew: Степень скошенности чтений и платежей по пользователям
+        """
+        self.size = size
+        self.skew = skew
+        self.rng = random.Random(seed)
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.start = self.now - timedelta(days=HISTORY_DAYS)
+        self._user_created: List[datetime] = []
+
+    def users(self) -> Iterator[Tuple[Any, ...]]:
+        """Строки bot_users; ранние id зарегистрированы раньше."""
+        rng = self.rng
+        for i in range(self.size.users):
+            user_id = i + 1
+            created_at = self.start + timedelta(seconds=HISTORY_DAYS * 86400 * i / self.size.users)
+            self._user_created.append(created_at)
+            yield (
+                user_id,
+                FIRST_TELEGRAM_ID + i,
+                f"User{user_id}",
+                f"Last{user_id}" if rng.random() < 0.5 else None,
+                f"user_{user_id}" if rng.random() < 0.7 else None,
+                False,
+                rng.choice((0, 0, 0, 1, 5, 10)),
+                created_at,
+                created_at,
+            )
+
+    def readings(self) -> Iterator[Tuple[Any, ...]]:
+        """Строки readings; активные пользователи получают большую часть чтений."""
+        rng = self.rng
+        for i in range(self.size.readings):
+            user_index = skewed_index(rng, self.size.users, self.skew)
+            created_at = recent_timestamp(rng, self.now, self._user_created[user_index])
+            status = weighted(rng, READING_STATUSES)
+            completed_at = created_at + timedelta(seconds=rng.randint(5, 900)) if status == "completed" else None
+            payload = {"progress": {"steps_done": rng.randint(0, self.size.steps)}}
+            yield (
+                i + 1,
+                user_index + 1,
+                weighted(rng, READING_TYPES),
+                json.dumps(payload),
+                status,
+                created_at,
+                completed_at,
+                completed_at or created_at,
+            )
+
+    def payments(self) -> Iterator[Tuple[Any, ...]]:
+        """Строки payments с тем же перекосом по пользователям."""
+        rng = self.rng
+        for i in range(self.size.payments):
+            user_index = skewed_index(rng, self.size.users, self.skew)
+            created_at = recent_timestamp(rng, self.now, self._user_created[user_index])
+            package_type = rng.choice(list(PACKAGES))
+            amount, readings = PACKAGES[package_type]
+            yield (
+                i + 1,
+                user_index + 1,
+                f"bench-{i + 1:012d}",
+                amount,
+                "RUB",
+                weighted(rng, PAYMENT_STATUSES),
+                f"Пакет из {readings} платных чтений",
+                json.dumps({"package_type": package_type, "readings": readings}),
+                created_at,
+                created_at + timedelta(seconds=rng.randint(1, 600)),
+            )
+
+    def steps(self) -> Iterator[Tuple[Any, ...]]:
+        """Строки steps: активный сценарий."""
+        for order in range(1, self.size.steps + 1):
+            content = {"text": f"Шаг {order}", "delay_sec": 0, "buttons": []}
+            yield (order, f"step-{order}", None, json.dumps(content, ensure_ascii=False), order, True, self.start, self.start)
+
+    def questions(self) -> Iterator[Tuple[Any, ...]]:
+        """Строки questions по questions_per_step на шаг."""
+        question_id = 0
+        options = json.dumps([{"text": "Да", "payload": "yes"}, {"text": "Нет", "payload": "no"}], ensure_ascii=False)
+        for step_id in range(1, self.size.steps + 1):
+            for order in range(1, self.size.questions_per_step + 1):
+                question_id += 1
+                question_type = QUESTION_TYPES[(question_id - 1) % len(QUESTION_TYPES)]
+                yield (
+                    question_id, step_id, f"Вопрос {step_id}.{order}", question_type,
+                    options if question_type != "text" else "[]", order, order == 1, self.start, self.start,
+                )
+
+
+def chunks(rows: Iterator[Tuple[Any, ...]], size: int = COPY_CHUNK_ROWS) -> Iterator[List[Tuple[Any, ...]]]:
+    """Разбиение потока строк на пачки."""
+    chunk: List[Tuple[Any, ...]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def copy_rows(
+    conn: asyncpg.Connection, table: str, columns: Sequence[str], rows: Iterator[Tuple[Any, ...]]
+) -> int:
+    """COPY строк в таблицу пачками с выводом прогресса.
+
+    Returns:
+        Количество записанных строк
+    """
+    started = time.perf_counter()
+    total = 0
+    for chunk in chunks(rows):
+        await conn.copy_records_to_table(table, records=chunk, columns=list(columns))
+        total += len(chunk)
+        if total % (COPY_CHUNK_ROWS * 20) == 0:
+            logger.info(f"{table}: {total} строк, {total / (time.perf_counter() - started):.0f} строк/с")
+    await conn.execute(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), GREATEST((SELECT MAX(id) FROM {table}), 1))"
+    )
+    logger.info(f"{table}: записано {total} строк за {time.perf_counter() - started:.1f} сек")
+    return total
+
+
+async def seed(database_url: str, size: DatasetSize, seed_value: int, skew: float, reset: bool) -> Dict[str, int]:
+    """Заполнение базы.
+
+    Args:
+        database_url: Строка подключения к локальному PostgreSQL
+        size: Объем данных
+        seed_value: Зерно генератора
+        skew: Скошенность распределения по пользователям
+        reset: Очистить таблицы перед заполнением
+
+    Returns:
+        Количество строк по таблицам
+    """
+    conn = await asyncpg.connect(database_url)
+    try:
+        existing = await conn.fetchval("SELECT EXISTS (SELECT 1 FROM bot_users)")
+        if existing and not reset:
+            raise RuntimeError("В bot_users уже есть данные; запустите с --reset, чтобы очистить таблицы")
+        if reset:
+            await conn.execute(f"TRUNCATE {', '.join(RESET_TABLES)} RESTART IDENTITY CASCADE")
+
+        generator = DatasetGenerator(size, seed=seed_value, skew=skew)
+        counts = {
+            "bot_users": await copy_rows(conn, "bot_users", USER_COLUMNS, generator.users()),
+            "readings": await copy_rows(conn, "readings", READING_COLUMNS, generator.readings()),
+            "payments": await copy_rows(conn, "payments", PAYMENT_COLUMNS, generator.payments()),
+            "steps": await copy_rows(conn, "steps", STEP_COLUMNS, generator.steps()),
+            "questions": await copy_rows(conn, "questions", QUESTION_COLUMNS, generator.questions()),
+        }
+
+        logger.info("ANALYZE...")
+        for table in counts:
+            await conn.execute(f"ANALYZE {table}")
+        return counts
+    finally:
+        await conn.close()
+
+
+def main() -> None:
+    """Разбор аргументов и заполнение базы."""
+    parser = argparse.ArgumentParser(description="Заполнение PostgreSQL объемным набором данных")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--scale", type=float, default=1.0, help="множитель объемов 1M/10M/2M")
+    parser.add_argument("--skew", type=float, default=2.0, help="скошенность по пользователям (1 - равномерно)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="очистить таблицы перед заполнением")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("нужен --database-url или DATABASE_URL")
+
+    logging.basicConfig(level="INFO", format="%(asctime)s - %(levelname)s - %(message)s")
+    counts = asyncio.run(seed(args.database_url, DatasetSize().scaled(args.scale), args.seed, args.skew, args.reset))
+    print(json.dumps(counts))
+
+
+if __name__ == "__main__":
+    main()
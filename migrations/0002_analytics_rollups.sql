@@ -0,0 +1,117 @@
+-- =====================================================================================================================
+-- МИГРАЦИЯ: 0002_analytics_rollups.sql
+-- ОПИСАНИЕ: Предагрегированная статистика (rollup-таблицы) для команды /stats
+-- СОЗДАНИЕ: Таблицы stats_daily_users, stats_daily_readings, stats_daily_revenue, stats_daily_durations,
+--           stats_rollup_state
+-- =====================================================================================================================
+--
+-- ИНСТРУКЦИЯ ПО ПРИМЕНЕНИЮ:
+--
+--    psql -U username -d database_name -f /path/to/migrations/0002_analytics_rollups.sql
+--
+-- ПРИМЕЧАНИЯ:
+-- - Требует применённой миграции 0001_init.sql
+-- - Таблицы заполняются фоновой задачей StatsRollupWorker инкрементально, начиная с watermark
+-- - Первый запуск задачи пересчитывает всю историю (watermark = 1970-01-01)
+-- - Миграция идемпотентна (можно запускать несколько раз)
+-- =====================================================================================================================
+
+BEGIN;
+
+-- =====================================================================================================================
+-- ТАБЛИЦА: stats_daily_users
+-- ОПИСАНИЕ: Количество новых пользователей по дням (UTC)
+-- =====================================================================================================================
+
+CREATE TABLE IF NOT EXISTS stats_daily_users (
+    day DATE PRIMARY KEY,
+    new_users INTEGER NOT NULL DEFAULT 0
+);
+
+COMMENT ON TABLE stats_daily_users IS 'Rollup: новые пользователи по дням';
+COMMENT ON COLUMN stats_daily_users.day IS 'День регистрации (UTC)';
+COMMENT ON COLUMN stats_daily_users.new_users IS 'Количество зарегистрированных пользователей';
+
+-- =====================================================================================================================
+-- ТАБЛИЦА: stats_daily_readings
+-- ОПИСАНИЕ: Количество чтений по дням, типам и статусам
+-- =====================================================================================================================
+
+CREATE TABLE IF NOT EXISTS stats_daily_readings (
+    day DATE NOT NULL,
+    reading_type VARCHAR(100) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    readings_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, reading_type, status)
+);
+
+COMMENT ON TABLE stats_daily_readings IS 'Rollup: чтения по дням, типам и статусам';
+COMMENT ON COLUMN stats_daily_readings.day IS 'День создания чтения (UTC)';
+COMMENT ON COLUMN stats_daily_readings.readings_count IS 'Количество чтений';
+
+-- =====================================================================================================================
+-- ТАБЛИЦА: stats_daily_revenue
+-- ОПИСАНИЕ: Выручка по успешным платежам в разрезе дней и пакетов
+-- =====================================================================================================================
+
+CREATE TABLE IF NOT EXISTS stats_daily_revenue (
+    day DATE NOT NULL,
+    package_type VARCHAR(50) NOT NULL,
+    currency VARCHAR(3) NOT NULL,
+    payments_count INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, package_type, currency)
+);
+
+COMMENT ON TABLE stats_daily_revenue IS 'Rollup: выручка по дням и пакетам (только succeeded)';
+COMMENT ON COLUMN stats_daily_revenue.day IS 'День создания платежа (UTC)';
+COMMENT ON COLUMN stats_daily_revenue.package_type IS 'Тип пакета из metadata.package_type';
+COMMENT ON COLUMN stats_daily_revenue.revenue IS 'Сумма успешных платежей';
+
+-- =====================================================================================================================
+-- ТАБЛИЦА: stats_daily_durations
+-- ОПИСАНИЕ: Гистограмма длительности завершённых сценариев. Бакеты суммируются за любой период,
+--           поэтому перцентили считаются без обращения к таблице readings
+-- =====================================================================================================================
+
+CREATE TABLE IF NOT EXISTS stats_daily_durations (
+    day DATE NOT NULL,
+    reading_type VARCHAR(100) NOT NULL,
+    bucket_upper_sec DOUBLE PRECISION NOT NULL,
+    completed_count INTEGER NOT NULL DEFAULT 0,
+    duration_sum_sec DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, reading_type, bucket_upper_sec)
+);
+
+COMMENT ON TABLE stats_daily_durations IS 'Rollup: гистограмма длительности сценариев по дням';
+COMMENT ON COLUMN stats_daily_durations.day IS 'День завершения чтения (UTC)';
+COMMENT ON COLUMN stats_daily_durations.bucket_upper_sec IS 'Верхняя граница бакета в секундах (Infinity для последнего)';
+COMMENT ON COLUMN stats_daily_durations.completed_count IS 'Количество завершённых чтений в бакете';
+COMMENT ON COLUMN stats_daily_durations.duration_sum_sec IS 'Суммарная длительность чтений бакета в секундах';
+
+-- =====================================================================================================================
+-- ТАБЛИЦА: stats_rollup_state
+-- ОПИСАНИЕ: Watermark фоновой задачи пересчёта rollup-таблиц
+-- =====================================================================================================================
+
+CREATE TABLE IF NOT EXISTS stats_rollup_state (
+    job_name VARCHAR(100) PRIMARY KEY,
+    watermark TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL
+);
+
+COMMENT ON TABLE stats_rollup_state IS 'Состояние инкрементального пересчёта статистики';
+COMMENT ON COLUMN stats_rollup_state.watermark IS 'Момент, до которого изменения уже учтены в rollup-таблицах';
+
+INSERT INTO stats_rollup_state (job_name, watermark)
+VALUES ('daily', '1970-01-01 00:00:00+00')
+ON CONFLICT (job_name) DO NOTHING;
+
+-- =====================================================================================================================
+-- ИНДЕКСЫ: поиск изменённых строк от watermark
+-- =====================================================================================================================
+
+CREATE INDEX IF NOT EXISTS idx_readings_completed_at ON readings(completed_at) WHERE completed_at IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_payments_updated_at ON payments(updated_at);
+
+COMMIT;
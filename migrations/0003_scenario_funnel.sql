@@ -0,0 +1,67 @@
+-- =====================================================================================================================
+-- МИГРАЦИЯ: 0003_scenario_funnel.sql
+-- ОПИСАНИЕ: События прохождения шагов сценария и счётчики воронки
+-- СОЗДАНИЕ: Таблицы scenario_step_events, scenario_funnel
+-- =====================================================================================================================
+--
+-- ИНСТРУКЦИЯ ПО ПРИМЕНЕНИЮ:
+--
+--    psql -U username -d database_name -f /path/to/migrations/0003_scenario_funnel.sql
+--
+-- ПРИМЕЧАНИЯ:
+-- - Требует применённой миграции 0001_init.sql
+-- - События пишутся пачками через COPY, счётчики scenario_funnel обновляются в той же транзакции
+-- - Миграция идемпотентна (можно запускать несколько раз)
+-- =====================================================================================================================
+
+BEGIN;
+
+-- =====================================================================================================================
+-- ТАБЛИЦА: scenario_step_events
+-- ОПИСАНИЕ: Журнал событий прохождения шагов (append-only, без внешних ключей для быстрой вставки)
+-- =====================================================================================================================
+
+CREATE TABLE IF NOT EXISTS scenario_step_events (
+    id BIGSERIAL PRIMARY KEY,
+    reading_id INTEGER NOT NULL,
+    reading_type VARCHAR(100) NOT NULL,
+    step_id INTEGER NOT NULL,
+    step_order INTEGER NOT NULL,
+    event VARCHAR(20) NOT NULL CHECK (event IN ('reached', 'completed', 'failed')),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL
+);
+
+COMMENT ON TABLE scenario_step_events IS 'События прохождения шагов сценария';
+COMMENT ON COLUMN scenario_step_events.reading_id IS 'ID чтения (без внешнего ключа)';
+COMMENT ON COLUMN scenario_step_events.reading_type IS 'Тип чтения (сценария)';
+COMMENT ON COLUMN scenario_step_events.step_id IS 'ID шага';
+COMMENT ON COLUMN scenario_step_events.step_order IS 'Порядковый номер шага на момент события';
+COMMENT ON COLUMN scenario_step_events.event IS 'Событие: reached (шаг начат), completed (шаг пройден), failed (ошибка)';
+COMMENT ON COLUMN scenario_step_events.created_at IS 'Время события';
+
+CREATE INDEX IF NOT EXISTS idx_scenario_step_events_reading_id ON scenario_step_events(reading_id);
+CREATE INDEX IF NOT EXISTS idx_scenario_step_events_created_at ON scenario_step_events(created_at);
+
+-- =====================================================================================================================
+-- ТАБЛИЦА: scenario_funnel
+-- ОПИСАНИЕ: Инкрементальные счётчики воронки по типу сценария и шагу
+-- =====================================================================================================================
+
+CREATE TABLE IF NOT EXISTS scenario_funnel (
+    reading_type VARCHAR(100) NOT NULL,
+    step_id INTEGER NOT NULL,
+    step_order INTEGER NOT NULL,
+    reached BIGINT NOT NULL DEFAULT 0,
+    completed BIGINT NOT NULL DEFAULT 0,
+    failed BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL,
+    PRIMARY KEY (reading_type, step_id)
+);
+
+COMMENT ON TABLE scenario_funnel IS 'Счётчики воронки сценариев по шагам';
+COMMENT ON COLUMN scenario_funnel.step_order IS 'Последний известный порядковый номер шага';
+COMMENT ON COLUMN scenario_funnel.reached IS 'Сколько раз шаг был начат';
+COMMENT ON COLUMN scenario_funnel.completed IS 'Сколько раз шаг был пройден';
+COMMENT ON COLUMN scenario_funnel.failed IS 'Сколько раз шаг завершился ошибкой';
+
+COMMIT;
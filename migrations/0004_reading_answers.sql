@@ -0,0 +1,46 @@
+-- =====================================================================================================================
+-- МИГРАЦИЯ: 0004_reading_answers.sql
+-- ОПИСАНИЕ: Хранение ответов пользователей на вопросы сценария
+-- СОЗДАНИЕ: Таблица reading_answers
+-- =====================================================================================================================
+--
+-- ИНСТРУКЦИЯ ПО ПРИМЕНЕНИЮ:
+--
+--    psql -U username -d database_name -f /path/to/migrations/0004_reading_answers.sql
+--
+-- ПРИМЕЧАНИЯ:
+-- - Требует применённой миграции 0001_init.sql
+-- - Ответы пишутся пачками через COPY из буфера AnswerRecorder
+-- - Миграция идемпотентна (можно запускать несколько раз)
+-- =====================================================================================================================
+
+BEGIN;
+
+-- =====================================================================================================================
+-- ТАБЛИЦА: reading_answers
+-- ОПИСАНИЕ: Ответы пользователей на вопросы в рамках чтения (append-only, без внешних ключей для быстрой вставки)
+-- =====================================================================================================================
+
+CREATE TABLE IF NOT EXISTS reading_answers (
+    id BIGSERIAL PRIMARY KEY,
+    reading_id INTEGER NOT NULL,
+    question_id INTEGER NOT NULL,
+    answer_payload VARCHAR(64),
+    answer_text TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL
+);
+
+-- Комментарии к таблице и колонкам
+COMMENT ON TABLE reading_answers IS 'Ответы пользователей на вопросы сценария (пользователь определяется через чтение)';
+COMMENT ON COLUMN reading_answers.id IS 'Первичный ключ';
+COMMENT ON COLUMN reading_answers.reading_id IS 'ID чтения (без внешнего ключа)';
+COMMENT ON COLUMN reading_answers.question_id IS 'ID вопроса (без внешнего ключа)';
+COMMENT ON COLUMN reading_answers.answer_payload IS 'Payload нажатой inline-кнопки';
+COMMENT ON COLUMN reading_answers.answer_text IS 'Текстовый ответ или текст выбранной кнопки клавиатуры';
+COMMENT ON COLUMN reading_answers.created_at IS 'Дата и время ответа';
+
+-- Индексы для оптимизации поиска
+CREATE INDEX IF NOT EXISTS idx_reading_answers_reading_question ON reading_answers(reading_id, question_id);
+CREATE INDEX IF NOT EXISTS idx_reading_answers_question_id ON reading_answers(question_id);
+
+COMMIT;
@@ -0,0 +1,122 @@
+-- =====================================================================================================================
+-- МИГРАЦИЯ: 0005_reading_payload_patch.sql
+-- ОПИСАНИЕ: Функции точечного изменения reading_payload (set / append / merge / incr)
+-- СОЗДАНИЕ: Функции jsonb_patch_set, jsonb_patch_append, jsonb_patch_merge, jsonb_patch_incr
+-- =====================================================================================================================
+--
+-- ИНСТРУКЦИЯ ПО ПРИМЕНЕНИЮ:
+--
+--    psql -U username -d database_name -f /path/to/migrations/0005_reading_payload_patch.sql
+--
+-- ПРИМЕЧАНИЯ:
+-- - Требует применённой миграции 0001_init.sql
+-- - ReadingRepository собирает из этих функций одно выражение SET reading_payload = ...
+--   Каждая функция получает документ один раз, поэтому выражение растёт линейно с числом операций
+-- - Выражение вычисляется над текущей версией строки, поэтому параллельные изменения одного чтения
+--   не затирают друг друга
+-- - Миграция идемпотентна (можно запускать несколько раз)
+-- =====================================================================================================================
+
+BEGIN;
+
+-- =====================================================================================================================
+-- ФУНКЦИЯ: jsonb_patch_set
+-- ОПИСАНИЕ: Установка значения по пути с созданием недостающих промежуточных объектов
+-- =====================================================================================================================
+
+CREATE OR REPLACE FUNCTION jsonb_patch_set(doc JSONB, path TEXT[], value JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    depth INTEGER := COALESCE(array_length(path, 1), 0);
+    node JSONB;
+BEGIN
+    doc := COALESCE(doc, '{}'::JSONB);
+    IF depth = 0 THEN
+        RETURN value;
+    END IF;
+
+    -- jsonb_set создаёт только последний ключ пути, промежуточные объекты создаём сами
+    FOR i IN 1 .. depth - 1 LOOP
+        node := doc #> path[1:i];
+        IF node IS NULL OR node = 'null'::JSONB THEN
+            doc := jsonb_set(doc, path[1:i], '{}'::JSONB, true);
+        END IF;
+    END LOOP;
+
+    RETURN jsonb_set(doc, path, value, true);
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+COMMENT ON FUNCTION jsonb_patch_set(JSONB, TEXT[], JSONB) IS 'Установка значения по пути в JSONB документе';
+
+-- =====================================================================================================================
+-- ФУНКЦИЯ: jsonb_patch_append
+-- ОПИСАНИЕ: Добавление элемента в массив по пути (отсутствующий массив создаётся)
+-- =====================================================================================================================
+
+CREATE OR REPLACE FUNCTION jsonb_patch_append(doc JSONB, path TEXT[], value JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    node JSONB := doc #> path;
+BEGIN
+    IF node IS NULL OR node = 'null'::JSONB THEN
+        node := '[]'::JSONB;
+    ELSIF jsonb_typeof(node) <> 'array' THEN
+        RAISE EXCEPTION 'reading_payload: значение по пути % не является массивом', array_to_string(path, '.');
+    END IF;
+
+    RETURN jsonb_patch_set(doc, path, node || jsonb_build_array(value));
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+COMMENT ON FUNCTION jsonb_patch_append(JSONB, TEXT[], JSONB) IS 'Добавление элемента в массив JSONB документа';
+
+-- =====================================================================================================================
+-- ФУНКЦИЯ: jsonb_patch_merge
+-- ОПИСАНИЕ: Поверхностное слияние объекта по пути (пустой путь - корень документа)
+-- =====================================================================================================================
+
+CREATE OR REPLACE FUNCTION jsonb_patch_merge(doc JSONB, path TEXT[], value JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    node JSONB := CASE WHEN COALESCE(array_length(path, 1), 0) = 0 THEN doc ELSE doc #> path END;
+BEGIN
+    IF jsonb_typeof(value) <> 'object' THEN
+        RAISE EXCEPTION 'reading_payload: для слияния ожидается объект';
+    END IF;
+
+    IF node IS NULL OR node = 'null'::JSONB THEN
+        node := '{}'::JSONB;
+    ELSIF jsonb_typeof(node) <> 'object' THEN
+        RAISE EXCEPTION 'reading_payload: значение по пути % не является объектом', array_to_string(path, '.');
+    END IF;
+
+    RETURN jsonb_patch_set(doc, path, node || value);
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+COMMENT ON FUNCTION jsonb_patch_merge(JSONB, TEXT[], JSONB) IS 'Слияние объекта в JSONB документе';
+
+-- =====================================================================================================================
+-- ФУНКЦИЯ: jsonb_patch_incr
+-- ОПИСАНИЕ: Увеличение числового счётчика по пути (отсутствующий счётчик считается нулём)
+-- =====================================================================================================================
+
+CREATE OR REPLACE FUNCTION jsonb_patch_incr(doc JSONB, path TEXT[], value JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    node JSONB := doc #> path;
+BEGIN
+    IF node IS NULL OR node = 'null'::JSONB THEN
+        node := '0'::JSONB;
+    ELSIF jsonb_typeof(node) <> 'number' THEN
+        RAISE EXCEPTION 'reading_payload: значение по пути % не является числом', array_to_string(path, '.');
+    END IF;
+
+    RETURN jsonb_patch_set(doc, path, to_jsonb(node::NUMERIC + value::NUMERIC));
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+COMMENT ON FUNCTION jsonb_patch_incr(JSONB, TEXT[], JSONB) IS 'Увеличение счётчика в JSONB документе';
+
+COMMIT;
@@ -0,0 +1,85 @@
+-- =====================================================================================================================
+-- МИГРАЦИЯ: 0006_step_content.sql
+-- ОПИСАНИЕ: Структурированное содержимое шагов вместо директив в description
+-- ИЗМЕНЕНИЕ: Колонка steps.content, однократная конвертация директив image_file_id: и delay_sec:
+-- =====================================================================================================================
+--
+-- ИНСТРУКЦИЯ ПО ПРИМЕНЕНИЮ:
+--
+--    psql -U username -d database_name -f /path/to/migrations/0006_step_content.sql
+--
+-- ПРИМЕЧАНИЯ:
+-- - Требует применённой миграции 0001_init.sql
+-- - Формат content: {"text", "media": {"type", "file_id"}, "delay_sec", "parse_mode", "buttons"}
+-- - Конвертируются только шаги с пустым content, разбор совпадает с StepContent.from_description
+-- - Шаги с пустой, нераспознанной или повторной директивой не конвертируются: их id выводятся
+--   через NOTICE, content заполняется вручную
+-- - description остаётся без изменений как описание шага для администратора
+-- - Миграция идемпотентна (можно запускать несколько раз)
+-- =====================================================================================================================
+
+BEGIN;
+
+ALTER TABLE steps ADD COLUMN IF NOT EXISTS content JSONB NOT NULL DEFAULT '{}'::JSONB;
+
+COMMENT ON COLUMN steps.content IS 'Содержимое шага: текст, медиа, задержка, режим разметки, кнопки';
+
+-- =====================================================================================================================
+-- КОНВЕРТАЦИЯ: description -> content
+-- =====================================================================================================================
+
+WITH directives AS (
+    SELECT s.id, m[1] AS name, m[2] AS value
+    FROM steps s, regexp_matches(s.description, '(image_file_id|delay_sec):[ \t]*([^|\s]*)', 'g') AS m
+    WHERE s.content = '{}'::JSONB AND s.description IS NOT NULL
+),
+unparsable AS (
+    -- Пустое или нераспознанное значение и повторная директива не угадываются
+    SELECT id
+    FROM directives
+    GROUP BY id
+    HAVING bool_or(name = 'delay_sec' AND value !~ '^\d+$')
+        OR bool_or(name = 'image_file_id' AND value !~ '^[A-Za-z0-9_-]+$')
+        OR count(*) FILTER (WHERE name = 'delay_sec') > 1
+        OR count(*) FILTER (WHERE name = 'image_file_id') > 1
+)
+UPDATE steps s
+SET content = jsonb_strip_nulls(jsonb_build_object(
+    'text', NULLIF(parsed.text, ''),
+    'media', CASE WHEN parsed.file_id IS NOT NULL
+                  THEN jsonb_build_object('type', 'photo', 'file_id', parsed.file_id) END,
+    'delay_sec', COALESCE(parsed.delay_sec, 0)
+))
+FROM (
+    SELECT
+        id,
+        substring(description FROM 'image_file_id:[ \t]*([^|\s]+)') AS file_id,
+        substring(description FROM 'delay_sec:[ \t]*(\d+)')::NUMERIC AS delay_sec,
+        btrim(
+            regexp_replace(
+                regexp_replace(description, '(image_file_id|delay_sec):[ \t]*[^|\s]*', '', 'g'),
+                '\s*\|\s*', E'\n', 'g'
+            ),
+            E' \n'
+        ) AS text
+    FROM steps
+    WHERE content = '{}'::JSONB
+      AND description IS NOT NULL
+      AND id NOT IN (SELECT id FROM unparsable)
+) parsed
+WHERE s.id = parsed.id;
+
+-- Шаги с нераспознанными директивами остаются без content до ручного исправления
+DO $$
+DECLARE
+    unconverted TEXT;
+BEGIN
+    SELECT string_agg(id::TEXT, ', ' ORDER BY id) INTO unconverted
+    FROM steps
+    WHERE content = '{}'::JSONB AND description ~ '(image_file_id|delay_sec):';
+    IF unconverted IS NOT NULL THEN
+        RAISE NOTICE 'Шаги с нераспознанными директивами не сконвертированы: %', unconverted;
+    END IF;
+END $$;
+
+COMMIT;
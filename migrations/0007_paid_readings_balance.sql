@@ -0,0 +1,33 @@
+-- =====================================================================================================================
+-- МИГРАЦИЯ: 0007_paid_readings_balance.sql
+-- ОПИСАНИЕ: Баланс оплаченных чтений пользователя
+-- ИЗМЕНЕНИЕ: Колонка bot_users.paid_readings_left
+-- =====================================================================================================================
+--
+-- ИНСТРУКЦИЯ ПО ПРИМЕНЕНИЮ:
+--
+--    psql -U username -d database_name -f /path/to/migrations/0007_paid_readings_balance.sql
+--
+-- ПРИМЕЧАНИЯ:
+-- - Требует применённой миграции 0001_init.sql
+-- - Баланс пополняется в той же транзакции, в которой платёж переходит в статус succeeded
+-- - Миграция идемпотентна (можно запускать несколько раз)
+-- =====================================================================================================================
+
+BEGIN;
+
+ALTER TABLE bot_users ADD COLUMN IF NOT EXISTS paid_readings_left INTEGER NOT NULL DEFAULT 0;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'bot_users_paid_readings_left_check'
+    ) THEN
+        ALTER TABLE bot_users
+            ADD CONSTRAINT bot_users_paid_readings_left_check CHECK (paid_readings_left >= 0);
+    END IF;
+END $$;
+
+COMMENT ON COLUMN bot_users.paid_readings_left IS 'Остаток оплаченных чтений';
+
+COMMIT;
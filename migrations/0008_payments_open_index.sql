@@ -0,0 +1,25 @@
+-- =====================================================================================================================
+-- МИГРАЦИЯ: 0008_payments_open_index.sql
+-- ОПИСАНИЕ: Индекс незавершенных платежей для фоновой сверки
+-- ИЗМЕНЕНИЕ: Частичный индекс payments(id) по статусам pending и waiting_for_capture
+-- =====================================================================================================================
+--
+-- ИНСТРУКЦИЯ ПО ПРИМЕНЕНИЮ:
+--
+--    psql -U username -d database_name -f /path/to/migrations/0008_payments_open_index.sql
+--
+-- ПРИМЕЧАНИЯ:
+-- - Сверка читает незавершенные платежи пачками по id; индекс содержит только их
+--   и не растет вместе с историей оплаченных платежей
+-- - Миграция идемпотентна (можно запускать несколько раз)
+-- =====================================================================================================================
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS idx_payments_open
+    ON payments(id)
+    WHERE status IN ('pending', 'waiting_for_capture');
+
+COMMENT ON COLUMN payments.status IS 'Статус платежа (pending, waiting_for_capture, succeeded, canceled, expired)';
+
+COMMIT;
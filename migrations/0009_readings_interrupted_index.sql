@@ -0,0 +1,27 @@
+-- =====================================================================================================================
+-- МИГРАЦИЯ: 0009_readings_interrupted_index.sql
+-- ОПИСАНИЕ: Индекс чтений, прерванных остановкой процесса
+-- ИЗМЕНЕНИЕ: Частичный индекс readings(created_at) по статусу interrupted
+-- =====================================================================================================================
+--
+-- ИНСТРУКЦИЯ ПО ПРИМЕНЕНИЮ:
+--
+--    psql -U username -d database_name -f /path/to/migrations/0009_readings_interrupted_index.sql
+--
+-- ПРИМЕЧАНИЯ:
+-- - При остановке процесса проигрываемый сценарий получает статус interrupted и шаг
+--   продолжения в reading_payload.scenario; при запуске процессы захватывают такие
+--   чтения по created_at (FOR UPDATE SKIP LOCKED)
+-- - Индекс содержит только прерванные чтения и остается пустым между перезапусками
+-- - Миграция идемпотентна (можно запускать несколько раз)
+-- =====================================================================================================================
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS idx_readings_interrupted
+    ON readings(created_at)
+    WHERE status = 'interrupted';
+
+COMMENT ON COLUMN readings.status IS 'Статус чтения (pending, in_progress, interrupted, completed, cancelled)';
+
+COMMIT;
@@ -0,0 +1,38 @@
+-- =====================================================================================================================
+-- МИГРАЦИЯ: 0010_readings_updated_at.sql
+-- ОПИСАНИЕ: Время последнего изменения чтения для инкрементального пересчёта статистики
+-- ИЗМЕНЕНИЕ: Колонка readings.updated_at, триггер update_updated_at_column и индекс по ней
+-- =====================================================================================================================
+--
+-- ИНСТРУКЦИЯ ПО ПРИМЕНЕНИЮ:
+--
+--    psql -U username -d database_name -f /path/to/migrations/0010_readings_updated_at.sql
+--
+-- ПРИМЕЧАНИЯ:
+-- - Требует применённых миграций 0001_init.sql и 0002_analytics_rollups.sql
+-- - Смена статуса без completed_at (cancelled, in_progress, interrupted, pending) раньше не попадала
+--   в пересчёт stats_daily_readings после окна lookback; теперь дни ищутся по updated_at, как у платежей
+-- - Существующие строки получают updated_at = COALESCE(completed_at, created_at)
+-- - Миграция идемпотентна (можно запускать несколько раз)
+-- =====================================================================================================================
+
+BEGIN;
+
+ALTER TABLE readings ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE;
+
+UPDATE readings SET updated_at = COALESCE(completed_at, created_at) WHERE updated_at IS NULL;
+
+ALTER TABLE readings ALTER COLUMN updated_at SET DEFAULT NOW();
+ALTER TABLE readings ALTER COLUMN updated_at SET NOT NULL;
+
+COMMENT ON COLUMN readings.updated_at IS 'Дата и время последнего обновления записи';
+
+DROP TRIGGER IF EXISTS trigger_readings_updated_at ON readings;
+CREATE TRIGGER trigger_readings_updated_at
+    BEFORE UPDATE ON readings
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+CREATE INDEX IF NOT EXISTS idx_readings_updated_at ON readings(updated_at);
+
+COMMIT;
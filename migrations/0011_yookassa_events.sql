@@ -0,0 +1,40 @@
+-- =====================================================================================================================
+-- МИГРАЦИЯ: 0011_yookassa_events.sql
+-- ОПИСАНИЕ: Входящие уведомления YooKassa (inbox)
+-- ИЗМЕНЕНИЕ: Таблица yookassa_events и частичный индекс необработанных уведомлений
+-- =====================================================================================================================
+--
+-- ИНСТРУКЦИЯ ПО ПРИМЕНЕНИЮ:
+--
+--    psql -U username -d database_name -f /path/to/migrations/0011_yookassa_events.sql
+--
+-- ПРИМЕЧАНИЯ:
+-- - Уведомление записывается до ответа YooKassa 200; если запись не удалась, бот отвечает 503,
+--   и YooKassa повторяет доставку
+-- - dedup_key (событие и ID платежа) уникален: повторная доставка не создает вторую запись
+-- - Уведомление, обработка которого не удалась (ошибка БД, платеж еще не записан), остается
+--   с processed_at IS NULL и повторяется фоновой сверкой платежей
+-- - Миграция идемпотентна (можно запускать несколько раз)
+-- =====================================================================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS yookassa_events (
+    id BIGSERIAL PRIMARY KEY,
+    dedup_key VARCHAR(255) NOT NULL UNIQUE,
+    payload JSONB NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    received_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    processed_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_yookassa_events_unprocessed
+    ON yookassa_events(received_at)
+    WHERE processed_at IS NULL;
+
+COMMENT ON TABLE yookassa_events IS 'Входящие уведомления YooKassa, записанные до подтверждения';
+COMMENT ON COLUMN yookassa_events.dedup_key IS 'Событие и ID платежа в YooKassa';
+COMMENT ON COLUMN yookassa_events.attempts IS 'Число неудачных попыток обработки';
+COMMENT ON COLUMN yookassa_events.processed_at IS 'Время успешной обработки (NULL - ожидает обработки)';
+
+COMMIT;
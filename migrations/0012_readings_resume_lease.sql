@@ -0,0 +1,31 @@
+-- =====================================================================================================================
+-- МИГРАЦИЯ: 0012_readings_resume_lease.sql
+-- ОПИСАНИЕ: Аренда прерванных чтений, захваченных процессом для продолжения
+-- ИЗМЕНЕНИЕ: Колонка readings.claimed_at и частичный индекс по статусу resuming
+-- =====================================================================================================================
+--
+-- ИНСТРУКЦИЯ ПО ПРИМЕНЕНИЮ:
+--
+--    psql -U username -d database_name -f /path/to/migrations/0012_readings_resume_lease.sql
+--
+-- ПРИМЕЧАНИЯ:
+-- - Требует применённой миграции 0009_readings_interrupted_index.sql
+-- - Захваченное прерванное чтение получает статус resuming и claimed_at = NOW(); при запуске
+--   проигрывания статус меняется на pending. Если процесс упал до запуска, по истечении аренды
+--   (SCENARIO_RESUME_LEASE_SEC) чтение снова захватывается, как прерванное
+-- - Миграция идемпотентна (можно запускать несколько раз)
+-- =====================================================================================================================
+
+BEGIN;
+
+ALTER TABLE readings ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP WITH TIME ZONE;
+
+COMMENT ON COLUMN readings.claimed_at IS 'Дата и время захвата прерванного чтения для продолжения';
+
+CREATE INDEX IF NOT EXISTS idx_readings_resuming
+    ON readings(claimed_at)
+    WHERE status = 'resuming';
+
+COMMENT ON COLUMN readings.status IS 'Статус чтения (pending, in_progress, interrupted, resuming, completed, cancelled)';
+
+COMMIT;
@@ -1,7 +1,8 @@
 """Конфигурация приложения."""
 
 from pydantic_settings import BaseSettings
-from pydantic import field_validator
+from pydantic import field_validator, model_validator
+from typing import Dict
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,21 +15,129 @@ class Settings(BaseSettings):
     bot_token: str
     webhook_url: str
     webhook_path: str = "/webhook"
+    webhook_secret_token: str = ""
     admin_id: int = 0
 
+    # Адрес Bot API (пусто - api.telegram.org), например локальный Bot API сервер
+    telegram_api_url: str = ""
+
     # Базы данных
     database_url: str
+    database_pool_min_size: int = 5
+    database_pool_max_size: int = 20
     redis_url: str = "redis://localhost:6379/0"
+    redis_timeout_sec: float = 1.0
 
     # Yookassa
     yookassa_shop_id: str
     yookassa_api_key: str
+    yookassa_api_url: str = "https://api.yookassa.ru/v3"
+    yookassa_max_connections: int = 20
+    yookassa_timeout_sec: float = 10
 
     # Приложение
     debug: bool = False
     log_level: str = "INFO"
     webhook_port: int = 8080
 
+    # Вывод логов
+    log_format: str = "json"
+    log_queue_size: int = 10000
+    log_rate_limit_per_sec: float = 50
+    log_rate_limit_burst: int = 200
+    log_sample_rates: Dict[str, float] = {}
+
+    # Режим запуска
+    run_mode: str = "polling"
+    webhook_host: str = "0.0.0.0"
+    webhook_workers: int = 0
+    worker_restart_delay_sec: float = 1
+    worker_restart_max_delay_sec: float = 30
+    worker_shutdown_timeout_sec: float = 30
+    drain_timeout_sec: float = 20
+
+    # Фоновое проигрывание сценариев
+    scenario_max_concurrency: int = 256
+    scenario_max_pending: int = 10000
+    scenario_resume_batch_size: int = 20
+    scenario_resume_lease_sec: int = 300
+
+    # Обработка update в режиме polling
+    polling_max_concurrency: int = 64
+    polling_max_pending: int = 10000
+
+    # Дедупликация повторных доставок
+    dedup_ttl_sec: int = 86400
+    dedup_local_size: int = 10000
+
+    # Очередь webhook update
+    webhook_queue_size: int = 1000
+    webhook_queue_workers: int = 32
+
+    # Очередь уведомлений YooKassa
+    yookassa_queue_size: int = 1000
+    yookassa_queue_workers: int = 4
+
+    # Сверка зависших платежей
+    payment_reconcile_interval_sec: int = 300
+    payment_reconcile_min_age_minutes: int = 10
+    payment_reconcile_expire_hours: int = 24
+    payment_reconcile_concurrency: int = 10
+    payment_reconcile_batch_size: int = 100
+
+    # Статистика
+    stats_rollup_interval_sec: int = 300
+    stats_rollup_lookback_minutes: int = 10
+    stats_default_period_days: int = 30
+
+    # Воронка сценариев
+    funnel_buffer_max_rows: int = 500
+    funnel_buffer_flush_ms: int = 1000
+
+    # Кэши процесса и прогрев при запуске
+    content_cache_ttl_sec: float = 60
+    user_cache_size: int = 10000
+    user_cache_ttl_sec: float = 60
+    warmup_recent_users: int = 0
+
+    # Ответы на вопросы
+    answers_buffer_max_rows: int = 200
+    answers_buffer_flush_ms: int = 500
+    answers_dedup_window_sec: float = 10
+    answers_pending_ttl_sec: int = 86400
+
+    # Метрики; webhook-воркер N слушает metrics_port + N
+    metrics_enabled: bool = True
+    metrics_host: str = "0.0.0.0"
+    metrics_port: int = 9100
+    metrics_path: str = "/metrics"
+    loop_lag_interval_sec: float = 0.5
+    loop_slow_callback_ms: int = 100
+    loop_asyncio_debug: bool = False
+
+    # Проверки /healthz и /readyz
+    health_cache_ttl_sec: float = 2
+    readiness_pool_saturation: float = 0.9
+    readiness_queue_saturation: float = 0.8
+    readiness_require_redis: bool = False
+
+    # Профилирование по командам /profile и /memprofile
+    profile_interval_ms: int = 10
+    profile_max_seconds: int = 120
+    memprofile_frames: int = 10
+
+    # Трассировка update в файл OTLP JSON
+    tracing_enabled: bool = False
+    tracing_file: str = "traces.jsonl"
+    tracing_sample_rate: float = 0.01
+    tracing_slow_ms: int = 1000
+    tracing_batch_size: int = 200
+    tracing_flush_ms: int = 2000
+
+    # Поиск N+1 при DEBUG: запрос, повторенный в update больше порога
+    n_plus_one_threshold: int = 3
+    n_plus_one_strict: bool = False
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -61,6 +170,39 @@ class Settings(BaseSettings):
             raise ValueError("Параметры Yookassa не могут быть пустыми. Установите значения в .env файле.")
         return v
 
+    @field_validator("run_mode")
+    @classmethod
+    def validate_run_mode(cls, v: str) -> str:
+        """Проверка режима запуска."""
+        valid_modes = {"polling", "webhook"}
+        if v.lower() not in valid_modes:
+            raise ValueError(f"Неверный режим запуска: {v}. Допустимые значения: {', '.join(valid_modes)}")
+        return v.lower()
+
+    @model_validator(mode="after")
+    def validate_webhook_secret_token(self) -> "Settings":
+        """Проверка секрета webhook: без него update может прислать кто угодно."""
+        if self.run_mode == "webhook" and not self.webhook_secret_token.strip():
+            raise ValueError("WEBHOOK_SECRET_TOKEN обязателен при RUN_MODE=webhook. Установите значение в .env файле.")
+        return self
+
+    @field_validator("webhook_workers")
+    @classmethod
+    def validate_webhook_workers(cls, v: int) -> int:
+        """Проверка числа webhook-воркеров (0 - по числу ядер)."""
+        if v < 0:
+            raise ValueError("WEBHOOK_WORKERS не может быть отрицательным")
+        return v
+
+    @field_validator("log_format")
+    @classmethod
+    def validate_log_format(cls, v: str) -> str:
+        """Проверка формата логов."""
+        valid_formats = {"json", "text"}
+        if v.lower() not in valid_formats:
+            raise ValueError(f"Неверный формат логов: {v}. Допустимые значения: {', '.join(valid_formats)}")
+        return v.lower()
+
     @field_validator("log_level")
     @classmethod
     def validate_log_level(cls, v: str) -> str:
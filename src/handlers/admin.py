@@ -1,16 +1,28 @@
 """Обработчики администраторских команд."""
 
 import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Tuple
+
 from aiogram import Router, types, F
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
+from aiogram.types import BufferedInputFile
 
 from src.locales import messages
 from src.config import settings
+from src.models.stats import StatsSummary
+from src.services.stats_repository import StatsRepository
+from src.services.funnel_repository import FunnelRepository
+from src.services.profiler import MemoryReport, format_size, memory_profiler, sampling_profiler
 
 logger = logging.getLogger(__name__)
 
 router = Router()
 
+# Длительность /profile и /memprofile без аргумента, секунды
+DEFAULT_PROFILE_SECONDS = 30
+DEFAULT_MEMPROFILE_SECONDS = 10
+
 
 def is_admin(user_id: int) -> bool:
     """Проверка, является ли пользователь администратором.
@@ -40,7 +52,7 @@ async def cmd_get_photo_id(message: types.Message) -> None:
             await message.answer(messages.ADMIN_ONLY)
             return
         
-        logger.info(f"Администратор {user_telegram_id} запросил /get_photo_id")
+        logger.info("Администратор %s запросил /get_photo_id", user_telegram_id)
         
         # Отправляем инструкцию
         await message.answer(messages.PHOTO_ID_INSTRUCTION)
@@ -75,7 +87,7 @@ async def handle_admin_photo(message: types.Message) -> None:
             file_id = photo.file_id
             file_size = photo.file_size or 0
             
-            logger.info(f"Администратор {user_telegram_id} отправил фото: {file_id}")
+            logger.info("Администратор %s отправил фото: %s", user_telegram_id, file_id)
             
             # Отправляем file_id администратору
             response = messages.PHOTO_ID_RECEIVED.format(
@@ -85,7 +97,7 @@ async def handle_admin_photo(message: types.Message) -> None:
             await message.answer(response)
             
             # Логируем информацию о фото
-            logger.info(f"File ID: {file_id}, размер: {file_size} байт")
+            logger.info("File ID: %s, размер: %s байт", file_id, file_size)
         
     except Exception as e:
         logger.error(f"Ошибка при обработке фото админа: {str(e)}")
@@ -106,14 +118,77 @@ async def handle_document(message: types.Message) -> None:
         logger.error(f"Ошибка при обработке документа: {str(e)}")
 
 
+def parse_stats_period(args: Optional[str], today: date) -> Tuple[date, date]:
+    """Разбор аргументов команды /stats.
+
+    Args:
+        args: Аргументы команды: "", "ГГГГ-ММ-ДД" или "ГГГГ-ММ-ДД ГГГГ-ММ-ДД"
+        today: Текущая дата (UTC)
+
+    Returns:
+        Начало и конец периода (включительно)
+
+    Raises:
+        ValueError: Если даты указаны в неверном формате или начало позже конца
+    """
+    parts = args.split() if args else []
+    if len(parts) > 2:
+        raise ValueError("Слишком много аргументов")
+
+    if not parts:
+        date_from = today - timedelta(days=settings.stats_default_period_days - 1)
+        date_to = today
+    else:
+        date_from = date.fromisoformat(parts[0])
+        date_to = date.fromisoformat(parts[1]) if len(parts) > 1 else today
+
+    if date_from > date_to:
+        raise ValueError("Начало периода позже конца")
+
+    return date_from, date_to
+
+
+def format_stats(summary: StatsSummary) -> str:
+    """Форматирование сводной статистики для отправки администратору."""
+    lines = [
+        messages.STATS_HEADER.format(date_from=summary.date_from, date_to=summary.date_to),
+        messages.STATS_USERS.format(total_users=summary.total_users, new_users=summary.new_users),
+        messages.STATS_READINGS.format(
+            total=summary.total_readings,
+            completed=summary.readings_by_status("completed"),
+            in_progress=summary.readings_by_status("in_progress"),
+            cancelled=summary.readings_by_status("cancelled"),
+        ),
+        messages.STATS_REVENUE_HEADER.format(total=summary.total_revenue),
+    ]
+    for row in summary.revenue:
+        lines.append(messages.STATS_REVENUE_ROW.format(**row.model_dump()))
+
+    if summary.durations:
+        lines.append(messages.STATS_DURATIONS_HEADER)
+        for row in summary.durations:
+            lines.append(messages.STATS_DURATION_ROW.format(**row.model_dump()))
+
+    if summary.watermark:
+        lines.append(messages.STATS_UPDATED_AT.format(
+            watermark=summary.watermark.strftime('%d.%m.%Y %H:%M UTC')
+        ))
+    else:
+        lines.append(messages.STATS_NOT_READY)
+
+    return "\n".join(lines)
+
+
 @router.message(Command("stats"))
-async def cmd_stats(message: types.Message) -> None:
+async def cmd_stats(message: types.Message, command: CommandObject) -> None:
     """Обработчик команды /stats для получения статистики (только для админов).
     
-    Показывает:
-    - Количество пользователей
-    - Количество чтений
-    - Статус базы данных
+    Использование:
+    /stats - за последние STATS_DEFAULT_PERIOD_DAYS дней
+    /stats 2024-01-01 - с указанной даты по сегодня
+    /stats 2024-01-01 2024-01-31 - за указанный период
+    
+    Данные читаются из rollup-таблиц, которые обновляет StatsRollupWorker.
     """
     try:
         user_telegram_id = message.from_user.id
@@ -124,25 +199,19 @@ async def cmd_stats(message: types.Message) -> None:
             await message.answer(messages.ADMIN_ONLY)
             return
         
-        logger.info(f"Администратор {user_telegram_id} запросил статистику")
+        logger.info("Администратор %s запросил статистику", user_telegram_id)
         
-        from src.services.user_repository import UserRepository
-        from src.services.reading_repository import ReadingRepository
+        try:
+            date_from, date_to = parse_stats_period(
+                command.args, datetime.now(timezone.utc).date()
+            )
+        except ValueError:
+            await message.answer(messages.STATS_USAGE)
+            return
         
         try:
-            # Получаем статистику
-            all_users = await UserRepository.get_all(limit=1000)
-            all_readings = await ReadingRepository.get_all(limit=1000)
-            
-            stats_text = f"""📊 Статистика бота:
-👥 Всего пользователей: {len(all_users)}
-📖 Всего чтений: {len(all_readings)}
-✅ Завершенных: {len([r for r in all_readings if r.status == 'completed'])}
-⏳ В процессе: {len([r for r in all_readings if r.status == 'in_progress'])}
-⏸️ Отменено: {len([r for r in all_readings if r.status == 'cancelled'])}
-            """
-            
-            await message.answer(stats_text)
+            summary = await StatsRepository.get_summary(date_from, date_to)
+            await message.answer(format_stats(summary))
             logger.info("Статистика отправлена администратору")
             
         except Exception as e:
@@ -154,6 +223,49 @@ async def cmd_stats(message: types.Message) -> None:
         await message.answer(messages.ERROR_MESSAGE)
 
 
+@router.message(Command("funnel"))
+async def cmd_funnel(message: types.Message, command: CommandObject) -> None:
+    """Обработчик команды /funnel для просмотра воронки сценария (только для админов).
+    
+    Использование:
+    /funnel - воронка стандартного сценария
+    /funnel tarot - воронка сценария типа tarot
+    """
+    try:
+        user_telegram_id = message.from_user.id
+        
+        # Проверяем, является ли пользователь админом
+        if not is_admin(user_telegram_id):
+            logger.warning(f"Попытка доступа к /funnel от пользователя {user_telegram_id}")
+            await message.answer(messages.ADMIN_ONLY)
+            return
+        
+        reading_type = (command.args or "default").strip()
+        logger.info("Администратор %s запросил воронку %s", user_telegram_id, reading_type)
+        
+        steps = await FunnelRepository.get_funnel(reading_type)
+        if not steps:
+            await message.answer(messages.FUNNEL_EMPTY.format(reading_type=reading_type))
+            return
+        
+        lines = [messages.FUNNEL_HEADER.format(reading_type=reading_type)]
+        for step in steps:
+            lines.append(messages.FUNNEL_ROW.format(
+                step_order=step.step_order,
+                step_name=step.step_name or f"#{step.step_id}",
+                reached=step.reached,
+                completed=step.completed,
+                rate=step.completion_rate,
+                failed=step.failed,
+            ))
+        
+        await message.answer("\n".join(lines))
+        
+    except Exception as e:
+        logger.error(f"Ошибка в обработчике /funnel: {str(e)}")
+        await message.answer(messages.ERROR_MESSAGE)
+
+
 @router.message(Command("test_scenario"))
 async def cmd_test_scenario(message: types.Message) -> None:
     """Обработчик команды /test_scenario для тестирования (только для админов).
@@ -169,10 +281,146 @@ async def cmd_test_scenario(message: types.Message) -> None:
             await message.answer(messages.ADMIN_ONLY)
             return
         
-        logger.info(f"Администратор {user_telegram_id} запустил тестирование сценария")
+        logger.info("Администратор %s запустил тестирование сценария", user_telegram_id)
         
         await message.answer("🧪 Запускаем тестирование сценария...\n\n📖 Для запуска сценария используйте: /read tarot")
         
     except Exception as e:
         logger.error(f"Ошибка в обработчике /test_scenario: {str(e)}")
         await message.answer(messages.ERROR_MESSAGE)
+
+
+def parse_seconds(args: Optional[str], default: int, maximum: int) -> int:
+    """Разбор длительности для /profile и /memprofile.
+
+    Args:
+        args: Аргументы команды: "" или число секунд
+        default: Длительность без аргумента
+        maximum: Наибольшая длительность
+
+    Returns:
+        Длительность в секундах
+
+    Raises:
+        ValueError: Если аргумент не число или вне диапазона 1..maximum
+    """
+    seconds = int(args.strip()) if args and args.strip() else default
+    if not 1 <= seconds <= maximum:
+        raise ValueError(f"Длительность должна быть от 1 до {maximum}")
+    return seconds
+
+
+@router.message(Command("profile"))
+async def cmd_profile(message: types.Message, command: CommandObject) -> None:
+    """Обработчик команды /profile для профилирования процесса (только для админов).
+    
+    Использование:
+    /profile - 30 секунд
+    /profile 60 - указанное число секунд (не больше PROFILE_MAX_SECONDS)
+    
+    Профили процессорного и реального времени отправляются файлами
+    collapsed stacks.
+    """
+    try:
+        user_telegram_id = message.from_user.id
+        
+        # Проверяем, является ли пользователь админом
+        if not is_admin(user_telegram_id):
+            logger.warning(f"Попытка доступа к /profile от пользователя {user_telegram_id}")
+            await message.answer(messages.ADMIN_ONLY)
+            return
+        
+        try:
+            seconds = parse_seconds(command.args, DEFAULT_PROFILE_SECONDS, settings.profile_max_seconds)
+        except ValueError:
+            await message.answer(messages.PROFILE_USAGE.format(max_seconds=settings.profile_max_seconds))
+            return
+        
+        if sampling_profiler.running:
+            await message.answer(messages.PROFILE_BUSY)
+            return
+        
+        logger.info("Администратор %s запустил профилирование на %s сек", user_telegram_id, seconds)
+        await message.answer(messages.PROFILE_STARTED.format(seconds=seconds))
+        
+        profile = await sampling_profiler.run(seconds)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        
+        await message.answer(messages.PROFILE_DONE.format(
+            seconds=seconds,
+            samples=profile.samples,
+            cpu_sec=profile.cpu_sec,
+            top="\n".join(profile.top()),
+        ))
+        if profile.cpu:
+            await message.answer_document(
+                BufferedInputFile(profile.cpu_collapsed().encode("utf-8"), filename=f"profile-{stamp}-cpu.folded"),
+                caption=messages.PROFILE_CPU_CAPTION,
+            )
+        await message.answer_document(
+            BufferedInputFile(profile.wall_collapsed().encode("utf-8"), filename=f"profile-{stamp}-wall.folded"),
+            caption=messages.PROFILE_WALL_CAPTION,
+        )
+        
+    except Exception as e:
+        logger.error(f"Ошибка в обработчике /profile: {str(e)}")
+        await message.answer(messages.ERROR_MESSAGE)
+
+
+def format_memory_report(report: MemoryReport) -> str:
+    """Форматирование отчета /memprofile."""
+    seconds = f"{report.duration_sec:g}"
+    if not report.sites:
+        return messages.MEMPROFILE_EMPTY.format(seconds=seconds)
+    lines = [messages.MEMPROFILE_HEADER.format(
+        seconds=seconds, current=format_size(report.current), peak=format_size(report.peak)
+    )]
+    for site in report.sites:
+        sign = "+" if site.size_diff >= 0 else "-"
+        lines.append(messages.MEMPROFILE_ROW.format(
+            size_diff=sign + format_size(abs(site.size_diff)),
+            count_diff=site.count_diff,
+            location=site.location,
+        ))
+    return "\n".join(lines)
+
+
+@router.message(Command("memprofile"))
+async def cmd_memprofile(message: types.Message, command: CommandObject) -> None:
+    """Обработчик команды /memprofile для поиска мест роста памяти (только для админов).
+    
+    Использование:
+    /memprofile - 10 секунд
+    /memprofile 60 - указанное число секунд
+    
+    На время замера включается tracemalloc; в ответ приходят места
+    с наибольшим приростом памяти между первым и последним снимком.
+    """
+    try:
+        user_telegram_id = message.from_user.id
+        
+        # Проверяем, является ли пользователь админом
+        if not is_admin(user_telegram_id):
+            logger.warning(f"Попытка доступа к /memprofile от пользователя {user_telegram_id}")
+            await message.answer(messages.ADMIN_ONLY)
+            return
+        
+        try:
+            seconds = parse_seconds(command.args, DEFAULT_MEMPROFILE_SECONDS, settings.profile_max_seconds)
+        except ValueError:
+            await message.answer(messages.MEMPROFILE_USAGE.format(max_seconds=settings.profile_max_seconds))
+            return
+        
+        if memory_profiler.running:
+            await message.answer(messages.MEMPROFILE_BUSY)
+            return
+        
+        logger.info("Администратор %s запустил замер памяти на %s сек", user_telegram_id, seconds)
+        await message.answer(messages.MEMPROFILE_STARTED.format(seconds=seconds))
+        
+        report = await memory_profiler.run(seconds)
+        await message.answer(format_memory_report(report))
+        
+    except Exception as e:
+        logger.error(f"Ошибка в обработчике /memprofile: {str(e)}")
+        await message.answer(messages.ERROR_MESSAGE)
@@ -22,7 +22,7 @@ async def cmd_start(message: types.Message, bot: Bot) -> None:
     """Обработчик команды /start."""
     try:
         user_telegram_id = message.from_user.id
-        logger.info(f"Пользователь {user_telegram_id} запустил /start")
+        logger.info("Пользователь %s запустил /start", user_telegram_id)
         
         # Проверяем наличие пользователя в БД
         user = await UserRepository.get_by_telegram_id(user_telegram_id)
@@ -38,10 +38,10 @@ async def cmd_start(message: types.Message, bot: Bot) -> None:
             )
             user = await UserRepository.create(user_data)
             welcome_msg = messages.START_USER_CREATED.format(first_name=user.first_name)
-            logger.info(f"Создан новый пользователь {user.id} ({user_telegram_id})")
+            logger.info("Создан новый пользователь %s (%s)", user.id, user_telegram_id)
         else:
             welcome_msg = messages.START_USER_EXISTS.format(first_name=user.first_name)
-            logger.info(f"Пользователь {user.id} ({user_telegram_id}) уже существует")
+            logger.info("Пользователь %s (%s) уже существует", user.id, user_telegram_id)
         
         # Получаем баланс пользователя
         scenario_service = ScenarioService(bot)
@@ -64,12 +64,12 @@ async def cmd_start(message: types.Message, bot: Bot) -> None:
 @router.message(Command("help"))
 async def cmd_help(message: types.Message) -> None:
     """Обработчик команды /help."""
-    logger.info(f"Пользователь {message.from_user.id} запросил /help")
+    logger.info("Пользователь %s запросил /help", message.from_user.id)
     await message.answer(messages.HELP_MESSAGE)
 
 
 @router.message(Command("cancel"))
 async def cmd_cancel(message: types.Message) -> None:
     """Обработчик команды /cancel."""
-    logger.info(f"Пользователь {message.from_user.id} отменил операцию")
+    logger.info("Пользователь %s отменил операцию", message.from_user.id)
     await message.answer(messages.CANCEL_MESSAGE)
@@ -116,7 +116,7 @@ async def handle_buy_callback(callback: CallbackQuery, bot: Bot) -> None:
         # Подтверждаем обработку callback
         await callback.answer()
 
-        logger.info(f"Создан платеж {payment_result['payment_id']} для пользователя {user.id}")
+        logger.info("Создан платеж %s для пользователя %s", payment_result['payment_id'], user.id)
 
     except Exception as e:
         logger.error(f"Ошибка при обработке покупки: {str(e)}")
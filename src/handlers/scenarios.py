@@ -1,6 +1,8 @@
 """Обработчики сценариев и вопросов."""
 
 import logging
+from typing import Dict, Union
+
 from aiogram import Router, types, F, Bot
 from aiogram.filters import Command
 from aiogram.types import Message
@@ -8,7 +10,11 @@ from aiogram.types import Message
 from src.locales import messages
 from src.services.user_repository import UserRepository
 from src.services.scenario_service import ScenarioService
+from src.services.answer_service import PendingQuestion, answer_recorder
+from src.services.scenario_content import scenario_content
+from src.services.scenario_runs import scenario_runs
 from src.models.user import UserCreate
+from src.models.answer import AnswerCallback
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +33,7 @@ async def cmd_read(message: Message, bot: Bot, command: Command) -> None:
         user_telegram_id = message.from_user.id
         payload = message.text.split(maxsplit=1)[1] if len(message.text.split()) > 1 else None
         
-        logger.info(f"Пользователь {user_telegram_id} запустил /read с payload={payload}")
+        logger.info("Пользователь %s запустил /read с payload=%s", user_telegram_id, payload)
         
         # Проверяем наличие пользователя в БД
         user = await UserRepository.get_by_telegram_id(user_telegram_id)
@@ -42,7 +48,7 @@ async def cmd_read(message: Message, bot: Bot, command: Command) -> None:
                 is_bot=message.from_user.is_bot
             )
             user = await UserRepository.create(user_data)
-            logger.info(f"Создан новый пользователь {user.id} ({user_telegram_id})")
+            logger.info("Создан новый пользователь %s (%s)", user.id, user_telegram_id)
         
         # Инициализируем сервис сценариев
         scenario_service = ScenarioService(bot)
@@ -54,65 +60,134 @@ async def cmd_read(message: Message, bot: Bot, command: Command) -> None:
             await message.answer(messages.START_PAYLOAD_ERROR)
             return
         
-        logger.info(f"Запущен сценарий {reading_id} для пользователя {user.id}")
+        logger.info("Запущен сценарий %s для пользователя %s", reading_id, user.id)
         
         # Отправляем сообщение о начале сценария
         scenario_name = payload or "Стандартный сценарий"
         await message.answer(messages.SCENARIO_STARTED.format(scenario_name=scenario_name))
         
-        # Проигрываем сценарий
-        success = await scenario_service.play_scenario_steps(
-            user.id,
-            message.chat.id,
-            reading_id
-        )
+        async def play() -> None:
+            success = await scenario_service.play_scenario_steps(
+                user.id,
+                message.chat.id,
+                reading_id,
+                reading_type=payload or "default"
+            )
+            if not success:
+                logger.error(f"Ошибка при проигрывании сценария {reading_id}")
         
-        if not success:
-            logger.error(f"Ошибка при проигрывании сценария {reading_id}")
+        # Сценарий с паузами идет минутами: он проигрывается в фоне,
+        # а обработчик сразу освобождает воркер очереди update
+        await scenario_runs.submit(message.chat.id, play)
         
     except Exception as e:
         logger.error(f"Ошибка в обработчике /read: {str(e)}")
         await message.answer(messages.ERROR_MESSAGE)
 
 
-@router.callback_query(F.data.startswith("answer_"))
-async def answer_question(callback_query: types.CallbackQuery, bot: Bot) -> None:
+@router.callback_query(AnswerCallback.filter())
+async def answer_question(callback_query: types.CallbackQuery, callback_data: AnswerCallback) -> None:
     """Обработчик нажатия на кнопку ответа.
     
-    Callback data формат: answer_<question_id>_<payload>
+    Callback data формат: answer:<reading_id>:<question_id>:<option>
+    Callback data приходит от клиента, поэтому ответ принимается, только
+    если вопрос этого чтения отправлялся в чат пользователя. Payload
+    варианта берется из вопроса в кэше сценария. Ответ ставится в буфер
+    и записывается в reading_answers пачкой, повторные нажатия той же
+    кнопки отбрасываются.
     """
     try:
         user_telegram_id = callback_query.from_user.id
-        
-        # Разбираем callback data
-        parts = callback_query.data.split("_", 2)
-        if len(parts) < 3:
-            logger.warning(f"Неверный формат callback: {callback_query.data}")
-            await callback_query.answer("❌ Ошибка при обработке ответа")
+        chat_id = callback_query.message.chat.id if callback_query.message else user_telegram_id
+        
+        if not await answer_recorder.is_expected_choice(
+            chat_id, callback_data.reading_id, callback_data.question_id
+        ):
+            logger.warning(
+                f"Пользователь {user_telegram_id} ответил на вопрос {callback_data.question_id} "
+                f"чтения {callback_data.reading_id}, не отправленный в чат {chat_id}"
+            )
+            await callback_query.answer(messages.ANSWER_NOT_ACCEPTED)
             return
         
-        question_id = parts[1]
-        payload = parts[2]
+        question = await scenario_content.get_question(callback_data.question_id)
+        payload = question.option_payload(callback_data.option) if question else None
+        if payload is None:
+            # Сценарий изменился после отправки кнопки: сохраняется номер варианта
+            payload = str(callback_data.option)
         
-        logger.info(f"Пользователь {user_telegram_id} ответил на вопрос {question_id}: {payload}")
+        accepted = answer_recorder.record(
+            callback_data.reading_id,
+            callback_data.question_id,
+            answer_payload=payload
+        )
+        
+        if accepted:
+            logger.info(
+                "Пользователь %s ответил на вопрос %s: %s",
+                user_telegram_id, callback_data.question_id, payload,
+            )
         
         # Отправляем подтверждение
         await callback_query.answer(f"✅ Ваш ответ: {payload}")
         
-        # Если нужно сохранить ответ - добавить логику сохранения
-        # Здесь можно обновить reading_payload с ответом
+    except Exception as e:
+        logger.error(f"Ошибка в обработчике ответа: {str(e)}")
+        await callback_query.answer("❌ Ошибка при обработке ответа")
+
+
+@router.callback_query(F.data.startswith("answer_"))
+async def answer_question_legacy(callback_query: types.CallbackQuery) -> None:
+    """Обработчик кнопок старого формата answer_<question_id>_<payload>.
+    
+    Такие кнопки не содержат ID чтения, поэтому ответ только подтверждается.
+    """
+    try:
+        parts = callback_query.data.split("_", 2)
+        if len(parts) < 3:
+            logger.warning(f"Неверный формат callback: {callback_query.data}")
+            await callback_query.answer("❌ Ошибка при обработке ответа")
+            return
+        
+        await callback_query.answer(f"✅ Ваш ответ: {parts[2]}")
         
     except Exception as e:
         logger.error(f"Ошибка в обработчике ответа: {str(e)}")
         await callback_query.answer("❌ Ошибка при обработке ответа")
 
 
+async def pending_text_question(message: Message) -> Union[bool, Dict[str, PendingQuestion]]:
+    """Фильтр: самый ранний вопрос чата, ожидающий текстового ответа."""
+    pending = await answer_recorder.pop_pending_text(message.chat.id)
+    return {"pending": pending} if pending is not None else False
+
+
+# Команды не считаются ответом и доходят до своих обработчиков в следующих роутерах
+@router.message(F.text, ~F.text.startswith("/"), pending_text_question)
+async def answer_text(message: Message, pending: PendingQuestion) -> None:
+    """Обработчик текстового ответа на вопрос сценария.
+    
+    Ответ сопоставляется с самым ранним вопросом чата, ожидающим ответа.
+    """
+    try:
+        if message.text == messages.BUTTON_SKIP:
+            answer_recorder.record(pending.reading_id, pending.question_id, answer_payload="skip")
+            await message.answer("⏭️ Вопрос пропущен")
+            return
+        
+        answer_recorder.record(pending.reading_id, pending.question_id, answer_text=message.text)
+        logger.info("Пользователь %s ответил на вопрос %s", message.from_user.id, pending.question_id)
+        
+    except Exception as e:
+        logger.error(f"Ошибка в обработчике текстового ответа: {str(e)}")
+
+
 @router.message(F.text == messages.BUTTON_SKIP)
 async def skip_question(message: Message) -> None:
     """Обработчик нажатия на кнопку пропуска."""
     try:
         user_telegram_id = message.from_user.id
-        logger.info(f"Пользователь {user_telegram_id} пропустил вопрос")
+        logger.info("Пользователь %s пропустил вопрос", user_telegram_id)
         
         await message.answer("⏭️ Вопрос пропущен")
         
@@ -125,7 +200,7 @@ async def answer_yes(message: Message) -> None:
     """Обработчик кнопки 'Да'."""
     try:
         user_telegram_id = message.from_user.id
-        logger.info(f"Пользователь {user_telegram_id} ответил 'Да'")
+        logger.info("Пользователь %s ответил 'Да'", user_telegram_id)
         
     except Exception as e:
         logger.error(f"Ошибка в обработчике 'Да': {str(e)}")
@@ -136,7 +211,7 @@ async def answer_no(message: Message) -> None:
     """Обработчик кнопки 'Нет'."""
     try:
         user_telegram_id = message.from_user.id
-        logger.info(f"Пользователь {user_telegram_id} ответил 'Нет'")
+        logger.info("Пользователь %s ответил 'Нет'", user_telegram_id)
         
     except Exception as e:
         logger.error(f"Ошибка в обработчике 'Нет': {str(e)}")
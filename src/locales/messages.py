@@ -98,6 +98,7 @@ START_NO_PAYLOAD = "📖 Выберите сценарий для начала:"
 # Сообщения проигрывателя сценариев
 SCENARIO_STARTED = "▶️ Начинаем сценарий: {scenario_name}"
 SCENARIO_COMPLETED = "✅ Сценарий завершен!"
+SCENARIO_RESUMED = "▶️ Продолжаем сценарий с того места, где остановились"
 SCENARIO_ERROR = "❌ Ошибка при выполнении сценария: {error}"
 SCENARIO_STEP_LOADING = "⏳ Загрузка шага..."
 PHOTO_NOT_FOUND = "❌ Фото не найдено в сценарии"
@@ -107,12 +108,38 @@ TEXT_CONTENT = "{text}"
 QUESTION_REQUIRED = "⚠️ Это обязательное поле"
 QUESTION_SELECTION = "❓ Выберите ответ:"
 QUESTION_TEXT_INPUT = "✍️ Введите свой ответ:"
+ANSWER_NOT_ACCEPTED = "⚠️ Этот вопрос вам не задавался"
 
 # Администраторские команды
 ADMIN_ONLY = "⛔ Это команда доступна только администраторам"
 PHOTO_ID_INSTRUCTION = "📸 Пожалуйста, отправьте фото для получения file_id"
 PHOTO_ID_RECEIVED = "📋 File ID фото:\n<code>{file_id}</code>\n\nТип фото: {photo_type}"
 PHOTO_INVALID_TYPE = "❌ Это не фото. Пожалуйста, отправьте изображение."
+STATS_HEADER = "📊 Статистика бота за {date_from} — {date_to}:"
+STATS_USERS = "👥 Всего пользователей: {total_users}\n🆕 Новых за период: {new_users}"
+STATS_READINGS = "📖 Чтений за период: {total}\n✅ Завершенных: {completed}\n⏳ В процессе: {in_progress}\n⏸️ Отменено: {cancelled}"
+STATS_REVENUE_HEADER = "💰 Выручка: {total}"
+STATS_REVENUE_ROW = "  • {package_type}: {payments_count} шт. на {revenue} {currency}"
+STATS_DURATIONS_HEADER = "⏱️ Длительность сценариев:"
+STATS_DURATION_ROW = "  • {reading_type}: {completed_count} шт., ср. {avg_sec:.0f}с, p50 ≤{p50_sec:.0f}с, p90 ≤{p90_sec:.0f}с, p99 ≤{p99_sec:.0f}с"
+STATS_UPDATED_AT = "🕒 Данные актуальны на {watermark}"
+STATS_NOT_READY = "🕒 Статистика ещё не рассчитана"
+STATS_USAGE = "❌ Неверный формат дат. Использование: /stats [ГГГГ-ММ-ДД] [ГГГГ-ММ-ДД]"
+FUNNEL_HEADER = "🔻 Воронка сценария {reading_type}:"
+FUNNEL_ROW = "{step_order}. {step_name}: начали {reached}, прошли {completed} ({rate:.0%}), ошибок {failed}"
+FUNNEL_EMPTY = "🔻 Нет данных воронки для сценария {reading_type}"
+PROFILE_USAGE = "❌ Использование: /profile [секунды, от 1 до {max_seconds}]"
+PROFILE_STARTED = "🔬 Профилирование {seconds} сек..."
+PROFILE_BUSY = "⏳ Профилирование уже запущено"
+PROFILE_DONE = "🔬 Профиль за {seconds} сек: {samples} замеров, CPU цикла событий {cpu_sec:.2f} сек\n{top}"
+PROFILE_CPU_CAPTION = "CPU потока цикла событий, мкс (collapsed stacks для flamegraph.pl / speedscope)"
+PROFILE_WALL_CAPTION = "Реальное время: поток цикла событий и ожидание задач asyncio, отсчеты"
+MEMPROFILE_USAGE = "❌ Использование: /memprofile [секунды, от 1 до {max_seconds}]"
+MEMPROFILE_STARTED = "🧠 Замер памяти {seconds} сек..."
+MEMPROFILE_BUSY = "⏳ Замер памяти уже запущен"
+MEMPROFILE_HEADER = "🧠 Память за {seconds} сек: сейчас {current}, пик {peak}\nНаибольший прирост:"
+MEMPROFILE_ROW = "{size_diff} ({count_diff:+d} блоков) {location}"
+MEMPROFILE_EMPTY = "🧠 Прироста памяти за {seconds} сек нет"
 
 # Кнопки
 BUTTON_START_READING = "📖 Начать чтение"
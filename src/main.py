@@ -2,52 +2,196 @@
 
 import asyncio
 import logging
-from typing import Optional
+import signal
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Начало импорта приложения: от него считается время запуска процесса
+IMPORT_STARTED = time.perf_counter()
 
 from aiogram import Bot, Dispatcher, types
-from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiohttp import web
 
 from src.config import settings
 from src.handlers import router
 from src.locales import messages
+from src.middlewares import (
+    BotApiMetricsMiddleware,
+    BotApiTracingMiddleware,
+    BotApiUsageMiddleware,
+    ChatOrderingMiddleware,
+    HandlerMetricsMiddleware,
+    LogContextMiddleware,
+    ResourceUsageMiddleware,
+    UpdateDedupMiddleware,
+    UpdateTracingMiddleware,
+)
 from src.services import init_database, close_database
-from src.services.payments import yookassa_webhook_handler
+from src.services.payments import yookassa_webhook_handler, yookassa_event_queue
+from src.services.stats_service import stats_rollup_worker
+from src.services.payment_reconciler import payment_reconciler
+from src.services.yookassa_client import yookassa_client
+from src.services.funnel_service import funnel_recorder
+from src.services.answer_service import answer_recorder
+from src.services.work_queue import BoundedWorkQueue
+from src.services.chat_executor import ChatExecutor
+from src.services.dedup import update_deduplicator
+from src.services.redis_client import init_redis, close_redis
+from src.services.metrics import create_metrics_app, watch_chat_executor
+from src.services.health import health_checker
+from src.services.scenario_runs import scenario_runs
+from src.services.scenario_service import ScenarioService
+from src.services.loop_monitor import loop_lag_monitor
+from src.services.tracing import tracer
+from src.services.logging_setup import setup_logging, shutdown_logging
+from src.services.startup import StartupTimer
+from src.services.warmup import warmup
+
+# Импорт aiogram и модулей бота - основная часть запуска процесса
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
 
-# Настройка логирования
-logging.basicConfig(
-    level=settings.log_level,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
 logger = logging.getLogger(__name__)
 
 
+def create_bot() -> Bot:
+    """Создание бота; при заданном TELEGRAM_API_URL запросы идут на этот сервер."""
+    if settings.telegram_api_url:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(settings.telegram_api_url))
+    else:
+        session = AiohttpSession()
+    session.middleware(BotApiMetricsMiddleware())
+    session.middleware(BotApiUsageMiddleware(count_bytes=settings.debug))
+    if tracer.enabled:
+        session.middleware(BotApiTracingMiddleware(tracer))
+    return Bot(token=settings.bot_token, session=session)
+
+
 class BotManager:
     """Менеджер для управления ботом."""
 
-    def __init__(self):
-        """Инициализация менеджера бота."""
+    def __init__(self, started: Optional[float] = None):
+        """Инициализация менеджера бота.
+
+        Args:
+            started: Начало запуска процесса по time.perf_counter; по умолчанию -
+                начало импорта модуля, и импорт учитывается отдельной фазой
+        """
         self.bot: Optional[Bot] = None
         self.dp: Optional[Dispatcher] = None
         self.app: Optional[web.Application] = None
+        self.update_queue: Optional[BoundedWorkQueue[Dict[str, Any]]] = None
+        self.chat_executor: Optional[ChatExecutor] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._metrics_runner: Optional[web.AppRunner] = None
+        self._resume_task: Optional[asyncio.Task] = None
+        self._drain_deadline: Optional[float] = None
+        if started is None:
+            self.startup = StartupTimer(IMPORT_STARTED)
+            self.startup.record("import", IMPORT_SECONDS)
+        else:
+            self.startup = StartupTimer(started)
 
     async def initialize(self) -> None:
-        """Инициализация бота и диспетчера."""
+        """Инициализация бота и диспетчера.
+
+        Пул БД, Redis и getMe не зависят друг от друга и открываются
+        параллельно; время каждой фазы попадает в отчет о запуске.
+        Прогрев кэшей идет сразу после открытия пула, и update начинают
+        приниматься только после него.
+        """
         logger.info("Инициализация бота...")
 
-        # Инициализация базы данных
-        await init_database()
+        self.bot = create_bot()
+        with self.startup.phase("connect"):
+            await asyncio.gather(
+                self._init_database(),
+                self.startup.timed("redis", init_redis()),
+                self.startup.timed("get_me", self._fetch_bot_info()),
+            )
+
+        with self.startup.phase("dispatcher"):
+            self._setup_dispatcher()
+
+        with self.startup.phase("workers"):
+            # Фоновый пересчёт статистики и сверка зависших платежей
+            stats_rollup_worker.start()
+            payment_reconciler.start()
+
+            # Задержка цикла событий и поиск блокирующих вызовов
+            loop_lag_monitor.start()
+            watch_chat_executor("scenarios", scenario_runs.executor)
+
+            # Сценарии, прерванные остановкой предыдущих процессов
+            self._resume_task = asyncio.create_task(
+                ScenarioService(self.bot).resume_interrupted(), name="scenario-resume"
+            )
+
+        logger.info(messages.BOT_STARTED)
+        logger.info(self.startup.report())
 
-        # Создание бота
-        self.bot = Bot(token=settings.bot_token)
+    async def _init_database(self) -> None:
+        """Пул БД с подготовленными запросами и прогрев кэшей."""
+        await self.startup.timed("database", init_database())
+        await self.startup.timed("warmup", warmup.run())
 
-        # Создание диспетчера
+    async def _fetch_bot_info(self) -> None:
+        """Запрос getMe; aiogram кэширует ответ и не повторяет его при запуске polling."""
+        try:
+            await self.bot.me()
+        except Exception as e:
+            # Webhook-воркер может принимать update и без getMe
+            logger.warning(f"Не удалось получить данные бота: {str(e)}")
+
+    def _setup_dispatcher(self) -> None:
+        """Создание диспетчера с middleware и роутерами."""
         self.dp = Dispatcher()
 
+        # Корневой span update; inner middleware выполняется уже в задаче обработки
+        if tracer.enabled:
+            self.dp.update.middleware(UpdateTracingMiddleware(tracer))
+
+        # Поля update (update_id, user_id, chat_id, trace_id) в записях лога
+        self.dp.update.middleware(LogContextMiddleware(tracer))
+
+        # Время обработчиков; inner middleware действуют и во вложенных роутерах
+        self.dp.message.middleware(HandlerMetricsMiddleware())
+        self.dp.callback_query.middleware(HandlerMetricsMiddleware())
+
+        # Ресурсы обработчиков; в режиме отладки - поиск N+1
+        usage_middleware = ResourceUsageMiddleware(
+            n_plus_one_threshold=settings.n_plus_one_threshold if settings.debug else 0,
+            strict=settings.n_plus_one_strict,
+        )
+        self.dp.message.middleware(usage_middleware)
+        self.dp.callback_query.middleware(usage_middleware)
+
         # Регистрация роутеров
         self.dp.include_router(router)
 
-        logger.info(messages.BOT_STARTED)
+    async def start_metrics_server(self, port: Optional[int] = None) -> None:
+        """Запуск отдельного HTTP сервера /metrics, /healthz и /readyz.
+        
+        Args:
+            port: Порт сервера метрик (по умолчанию METRICS_PORT)
+        """
+        if not settings.metrics_enabled:
+            return
+        port = settings.metrics_port if port is None else port
+        app = create_metrics_app(settings.metrics_path)
+        health_checker.register(app)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, settings.metrics_host, port).start()
+        except OSError as e:
+            await runner.cleanup()
+            logger.error(f"Сервер метрик не запущен на порту {port}: {str(e)}")
+            return
+        self._metrics_runner = runner
+        logger.info("Метрики: http://%s:%s%s", settings.metrics_host, port, settings.metrics_path)
 
     async def setup_webhook(self) -> None:
         """Настройка webhook."""
@@ -55,14 +199,10 @@ class BotManager:
             raise RuntimeError("Бот не инициализирован")
 
         try:
-            # Удаление старого webhook, если он был
-            await self.bot.session.delete(
-                f"https://api.telegram.org/bot{settings.bot_token}/deleteWebhook"
-            )
-
-            # Установка нового webhook
+            # Установка webhook заменяет ранее установленный
             webhook_info = await self.bot.set_webhook(
-                url=f"{settings.webhook_url}{settings.webhook_path}"
+                url=f"{settings.webhook_url}{settings.webhook_path}",
+                secret_token=settings.webhook_secret_token or None
             )
 
             if webhook_info:
@@ -82,77 +222,213 @@ class BotManager:
         if not self.bot or not self.dp:
             raise RuntimeError("Бот не инициализирован")
 
+        # Update одного чата выполняются по порядку, разных чатов - параллельно;
+        # повторные доставки отбрасываются до постановки в очередь чата
+        self.chat_executor = ChatExecutor(
+            max_concurrency=settings.polling_max_concurrency,
+            max_pending=settings.polling_max_pending,
+        )
+        self.dp.update.outer_middleware(UpdateDedupMiddleware(update_deduplicator))
+        self.dp.update.outer_middleware(ChatOrderingMiddleware(self.chat_executor))
+        watch_chat_executor("polling", self.chat_executor)
+        health_checker.watch_queue(
+            "polling-updates", lambda: self.chat_executor.pending, settings.polling_max_pending
+        )
+
         try:
             logger.info("Запуск бота в режиме polling...")
-            await self.dp.start_polling(self.bot)
+            await self.dp.start_polling(self.bot, handle_as_tasks=False)
         except Exception as e:
             logger.error(f"Ошибка во время polling: {str(e)}")
         finally:
-            await self.bot.session.close()
-
-    async def start_webhook_server(self, host: str = "0.0.0.0", port: int = None) -> None:
-        """Запуск webhook сервера."""
+            # Polling остановлен; принятые update дообрабатываются, сессия Bot закрывается в shutdown()
+            self._stop_intake()
+            await self.chat_executor.close(timeout=self._drain_remaining())
+
+    async def start_webhook_server(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        reuse_port: bool = False
+    ) -> None:
+        """Запуск webhook сервера до вызова stop().
+        
+        Args:
+            host: Адрес для прослушивания
+            port: Порт для прослушивания
+            reuse_port: Разрешить нескольким процессам слушать один порт (SO_REUSEPORT)
+        """
         if not self.bot or not self.dp:
             raise RuntimeError("Бот не инициализирован")
 
+        # Модули только для режима webhook
+        from aiogram.webhook.aiohttp_server import setup_application
+        from src.services.telegram_webhook import QueuedRequestHandler
+
+        host = host or settings.webhook_host
         if port is None:
             port = settings.webhook_port
 
+        self._stop_event = asyncio.Event()
+        runner: Optional[web.AppRunner] = None
+        site: Optional[web.TCPSite] = None
+
         try:
-            logger.info(f"Запуск webhook сервера на {host}:{port}...")
+            logger.info("Запуск webhook сервера на %s:%s...", host, port)
 
             # Создание приложения
             self.app = web.Application()
 
+            # Очередь update: webhook отвечает сразу, обработка идет в фоне
+            self.update_queue = BoundedWorkQueue(
+                "telegram-updates",
+                self._process_update,
+                workers=settings.webhook_queue_workers,
+                max_size=settings.webhook_queue_size,
+            )
+            self.update_queue.start()
+            yookassa_event_queue.start()
+            health_checker.watch_queue(self.update_queue.name, self.update_queue.__len__, self.update_queue.max_size)
+            health_checker.watch_queue(
+                yookassa_event_queue.name, yookassa_event_queue.__len__, yookassa_event_queue.max_size
+            )
+
             # Создание обработчика для Telegram webhook
-            SimpleRequestHandler(
+            QueuedRequestHandler(
                 dispatcher=self.dp,
                 bot=self.bot,
+                queue=self.update_queue,
+                secret_token=settings.webhook_secret_token,
+                deduplicator=update_deduplicator,
             ).register(self.app, path=settings.webhook_path)
 
             # Регистрация обработчика для YooKassa webhook
             self.app.router.add_post('/yookassa_webhook', yookassa_webhook_handler)
 
+            # Проверки живости и готовности для оркестратора
+            health_checker.register(self.app)
+
             # Настройка приложения
-            setup_application(self.app, self.dp, self.bot)
+            setup_application(self.app, self.dp, bot=self.bot)
 
             # Запуск сервера
             runner = web.AppRunner(self.app)
             await runner.setup()
-            site = web.TCPSite(runner, host, port)
+            site = web.TCPSite(runner, host, port, reuse_port=reuse_port)
             await site.start()
 
-            logger.info(f"Webhook сервер запущен на http://{host}:{port}")
-            logger.info(f"Telegram webhook: {settings.webhook_path}")
+            logger.info("Webhook сервер запущен на http://%s:%s", host, port)
+            logger.info("Telegram webhook: %s", settings.webhook_path)
             logger.info("YooKassa webhook: /yookassa_webhook")
+            logger.info("Проверки: /healthz, /readyz")
 
-            # Создание бесконечного цикла для сохранения сервера в работе
-            await asyncio.Event().wait()
+            # Работаем до сигнала остановки
+            await self._stop_event.wait()
 
         except Exception as e:
             logger.error(f"Ошибка при запуске webhook сервера: {str(e)}")
+            raise
+        finally:
+            # Порт закрывается сразу: новые соединения достаются остальным воркерам
+            self._stop_intake()
+            if site is not None:
+                await site.stop()
+
+            # Дообработка принятых update до остановки HTTP сервера
+            if self.update_queue is not None:
+                await self.update_queue.close(timeout=self._drain_remaining())
+            await yookassa_event_queue.close(timeout=self._drain_remaining())
+            if runner is not None:
+                await runner.cleanup()
+
+    async def _process_update(self, update: Dict[str, Any]) -> None:
+        """Обработка update из очереди webhook.
+
+        При ошибке или отмене ключ дедупликации освобождается, и повторная
+        доставка того же update_id будет обработана.
+        """
+        try:
+            await self.dp.feed_raw_update(self.bot, update)
+        except BaseException:
+            if update.get("update_id") is not None:
+                await update_deduplicator.forget(str(update["update_id"]))
+            raise
+
+    def stop(self) -> None:
+        """Запрос остановки webhook сервера."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def _stop_intake(self) -> None:
+        """Начало остановки: /readyz отвечает 503, сценарии сохраняют прогресс на границе шага.
+
+        Первый вызов начинает отсчет DRAIN_TIMEOUT_SEC, общего для всех шагов
+        дообработки: очереди update и уведомлений, сценарии и их исполнитель
+        делят один срок, а не получают его каждый заново.
+        """
+        if self._drain_deadline is None:
+            self._drain_deadline = asyncio.get_running_loop().time() + settings.drain_timeout_sec
+        health_checker.start_draining()
+        scenario_runs.interrupt()
+
+    def _drain_remaining(self) -> float:
+        """Время, оставшееся до конца дообработки."""
+        return max(self._drain_deadline - asyncio.get_running_loop().time(), 0.0)
+
+    async def _drain_resumed_scenarios(self) -> None:
+        """Ожидание захвата прерванных сценариев в пределах общего срока остановки."""
+        if self._resume_task is None:
+            return
+        _, not_done = await asyncio.wait({self._resume_task}, timeout=self._drain_remaining())
+        if not_done:
+            logger.warning(f"Продолжение прерванных сценариев не остановлено за {settings.drain_timeout_sec} сек, отмена")
+            self._resume_task.cancel()
+            await asyncio.gather(self._resume_task, return_exceptions=True)
+        self._resume_task = None
 
     async def shutdown(self) -> None:
-        """Остановка бота."""
+        """Остановка бота.
+
+        Порядок: прием update прекращен и обработчики дообработаны (в
+        start_polling и start_webhook_server), затем сценарии сохраняют
+        прогресс, фоновые воркеры останавливаются, буферы записи
+        сбрасываются в БД, и только после этого закрываются сессия Bot
+        и пулы соединений.
+        """
+        self._stop_intake()
+        await self._drain_resumed_scenarios()
+        await scenario_runs.wait(timeout=self._drain_remaining())
+
+        await stats_rollup_worker.stop()
+        await payment_reconciler.stop()
+        await loop_lag_monitor.stop()
+        if self._metrics_runner is not None:
+            await self._metrics_runner.cleanup()
+            self._metrics_runner = None
+        await yookassa_client.close()
+
+        # Сброс накопленных событий до закрытия пула
+        await funnel_recorder.close()
+        await answer_recorder.close()
+        await tracer.close()
+
         if self.bot:
             await self.bot.session.close()
         
         # Закрытие соединений с базой данных
         await close_database()
+        await close_redis()
         
         logger.info(messages.BOT_STOPPED)
 
 
 async def main() -> None:
-    """Основная функция."""
+    """Запуск бота в режиме polling."""
     bot_manager = BotManager()
 
     try:
         await bot_manager.initialize()
-
-        # Здесь можно выбрать между polling и webhook
-        # Для локальной разработки используйте polling
-        # Для production используйте webhook
+        await bot_manager.start_metrics_server()
         await bot_manager.start_polling()
 
     except KeyboardInterrupt:
@@ -164,5 +440,71 @@ async def main() -> None:
         await bot_manager.shutdown()
 
 
+async def run_webhook_worker(index: int, started: Optional[float] = None) -> None:
+    """Webhook-воркер: собственные пул БД и сессия Bot, остановка по SIGTERM/SIGINT.
+    
+    Args:
+        index: Номер воркера
+        started: Начало запуска процесса воркера по time.perf_counter
+    """
+    bot_manager = BotManager(started)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, bot_manager.stop)
+
+    try:
+        await bot_manager.initialize()
+        await bot_manager.start_metrics_server(settings.metrics_port + index)
+        await bot_manager.start_webhook_server(reuse_port=True)
+        logger.info("Воркер %s получил сигнал остановки", index)
+    finally:
+        await bot_manager.shutdown()
+
+
+def webhook_worker_process(index: int) -> None:
+    """Точка входа процесса webhook-воркера.
+
+    Модули импортированы один раз сервером forkserver, и IMPORT_STARTED у всех
+    воркеров - время его запуска; запуск воркера считается от fork, без фазы import.
+    """
+    started = time.perf_counter()
+    setup_logging()
+    try:
+        asyncio.run(run_webhook_worker(index, started))
+    finally:
+        # Процесс из forkserver завершается через os._exit, без atexit
+        shutdown_logging()
+
+
+async def configure_webhook() -> None:
+    """Однократная установка webhook в Telegram до запуска воркеров."""
+    bot_manager = BotManager()
+    bot_manager.bot = create_bot()
+    try:
+        await bot_manager.setup_webhook()
+    finally:
+        await bot_manager.bot.session.close()
+
+
+def run() -> None:
+    """Запуск в режиме, заданном RUN_MODE."""
+    setup_logging()
+    if settings.run_mode == "webhook":
+        from src.supervisor import WorkerSupervisor, resolve_worker_count
+
+        # setWebhook идет параллельно с запуском воркеров, а не перед ним
+        threading.Thread(target=lambda: asyncio.run(configure_webhook()), name="webhook-setup", daemon=True).start()
+        WorkerSupervisor(
+            webhook_worker_process,
+            workers=resolve_worker_count(settings.webhook_workers),
+            preload=["src.main"],
+            restart_delay_sec=settings.worker_restart_delay_sec,
+            max_restart_delay_sec=settings.worker_restart_max_delay_sec,
+            shutdown_timeout_sec=settings.worker_shutdown_timeout_sec,
+        ).run()
+    else:
+        asyncio.run(main())
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()
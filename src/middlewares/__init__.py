@@ -0,0 +1,20 @@
+"""Middleware диспетчера."""
+
+from .chat_ordering import ChatOrderingMiddleware
+from .dedup import UpdateDedupMiddleware
+from .log_context import LogContextMiddleware
+from .metrics import BotApiMetricsMiddleware, HandlerMetricsMiddleware
+from .resource_usage import BotApiUsageMiddleware, ResourceUsageMiddleware
+from .tracing import BotApiTracingMiddleware, UpdateTracingMiddleware
+
+__all__ = [
+    "BotApiMetricsMiddleware",
+    "BotApiTracingMiddleware",
+    "BotApiUsageMiddleware",
+    "ChatOrderingMiddleware",
+    "HandlerMetricsMiddleware",
+    "LogContextMiddleware",
+    "ResourceUsageMiddleware",
+    "UpdateDedupMiddleware",
+    "UpdateTracingMiddleware",
+]
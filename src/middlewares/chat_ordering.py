@@ -0,0 +1,43 @@
+"""Middleware упорядоченной по чатам обработки update в режиме polling."""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from ..services.chat_executor import ChatExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ChatOrderingMiddleware(BaseMiddleware):
+    """Передает обработку update в ChatExecutor и сразу возвращает управление.
+
+    Регистрируется как outer middleware update после UserContextMiddleware,
+    которое кладет в data event_chat. Цикл polling не ждет окончания
+    обработки, поэтому долгий сценарий одного пользователя не задерживает
+    остальных, а update одного чата выполняются в порядке получения.
+    """
+
+    def __init__(self, executor: ChatExecutor):
+        """Инициализация middleware.
+
+        Args:
+            executor: Исполнитель задач
+        """
+        self.executor = executor
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Постановка обработки update в очередь его чата."""
+        chat = data.get("event_chat")
+        user = data.get("event_from_user")
+        key = chat.id if chat else (user.id if user else None)
+
+        await self.executor.submit(key, lambda: handler(event, data))
+        return None
@@ -0,0 +1,50 @@
+"""Middleware отбрасывания повторно доставленных update."""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from ..services.dedup import Deduplicator
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateDedupMiddleware(BaseMiddleware):
+    """Пропускает каждый update_id только один раз (режим polling).
+
+    Регистрируется перед ChatOrderingMiddleware, поэтому повтор
+    отбрасывается до постановки в очередь чата и работы с БД. Если update
+    не удалось поставить в очередь или обработать, ключ освобождается.
+    В режиме webhook update_id проверяет QueuedRequestHandler до очереди
+    update, и эта middleware не регистрируется.
+    """
+
+    def __init__(self, deduplicator: Deduplicator):
+        """Инициализация middleware.
+
+        Args:
+            deduplicator: Окно дедупликации update
+        """
+        self.deduplicator = deduplicator
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Проверка update_id перед обработкой."""
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        key = str(event.update_id)
+        if await self.deduplicator.is_duplicate(key):
+            logger.info("Повторный update %s отброшен", event.update_id)
+            return None
+        try:
+            return await handler(event, data)
+        except BaseException:
+            await self.deduplicator.forget(key)
+            raise
@@ -0,0 +1,53 @@
+"""Middleware полей контекста логов."""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from ..services.logging_setup import bind_log_context, reset_log_context
+from ..services.tracing import Tracer
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """Поля update во всех записях лога, сделанных при его обработке.
+
+    Регистрируется как inner middleware update диспетчера после
+    UpdateTracingMiddleware: контекст задается уже в задаче обработки,
+    и при включенной трассировке в него попадает trace_id.
+    """
+
+    def __init__(self, tracer: Tracer):
+        """Инициализация middleware.
+
+        Args:
+            tracer: Трассировщик, из текущего span которого берется trace_id
+        """
+        self.tracer = tracer
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Обработка update с полями контекста."""
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        fields: Dict[str, Any] = {"update_id": event.update_id}
+        user = data.get("event_from_user")
+        if user is not None:
+            fields["user_id"] = user.id
+        chat = data.get("event_chat")
+        if chat is not None:
+            fields["chat_id"] = chat.id
+        span = self.tracer.current_span()
+        if span is not None:
+            fields["trace_id"] = span.trace.trace_id
+
+        token = bind_log_context(**fields)
+        try:
+            return await handler(event, data)
+        finally:
+            reset_log_context(token)
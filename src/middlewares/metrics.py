@@ -0,0 +1,65 @@
+"""Middleware метрик обработчиков и вызовов Bot API."""
+
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject
+
+from ..services.metrics import HANDLER_DURATION, TELEGRAM_API_DURATION, TELEGRAM_API_ERRORS
+
+
+def handler_labels(data: Dict[str, Any]) -> Tuple[str, str]:
+    """Метки обработчика: модуль роутера (commands, scenarios, admin, payments) и имя функции."""
+    callback = data["handler"].callback
+    return callback.__module__.rsplit(".", 1)[-1], getattr(callback, "__name__", "unknown")
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Время обработчика с метками роутера и обработчика.
+
+    Регистрируется как inner middleware событий диспетчера и поэтому
+    срабатывает только для update, нашедших обработчик. Роутер - модуль
+    обработчика (commands, scenarios, admin, payments).
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Замер времени вызова обработчика."""
+        router, name = handler_labels(data)
+        started = time.perf_counter()
+        status = "error"
+        try:
+            result = await handler(event, data)
+            status = "ok"
+            return result
+        finally:
+            HANDLER_DURATION.observe(time.perf_counter() - started, router, name, status)
+
+
+class BotApiMetricsMiddleware(BaseRequestMiddleware):
+    """Время и ошибки вызовов Bot API по методам."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        """Замер вызова метода."""
+        api_method = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            TELEGRAM_API_ERRORS.inc(api_method, type(e).__name__)
+            raise
+        finally:
+            TELEGRAM_API_DURATION.observe(time.perf_counter() - started, api_method)
@@ -0,0 +1,115 @@
+"""Middleware учета ресурсов обработчика и поиска N+1."""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import InputFile, TelegramObject
+
+from ..services.resource_usage import N_PLUS_ONE, NPlusOneError, UpdateUsage, current_usage, end_usage, start_usage
+from .metrics import handler_labels
+
+logger = logging.getLogger(__name__)
+
+
+def request_size(bot: Bot, method: TelegramMethod) -> int:
+    """Размер параметров вызова Bot API в байтах, как их сериализует сессия."""
+    files: Dict[str, InputFile] = {}
+    size = 0
+    for key, value in method.model_dump(warnings=False).items():
+        prepared = bot.session.prepare_value(value, bot=bot, files=files)
+        if prepared is not None:
+            size += len(key) + len(prepared.encode("utf-8"))
+    for file in files.values():
+        size += len(getattr(file, "data", b""))
+    return size
+
+
+class ResourceUsageMiddleware(BaseMiddleware):
+    """Запросы к БД, строки, ожидание пула и вызовы Bot API каждого обработчика.
+
+    Регистрируется как inner middleware событий корневого роутера рядом с
+    HandlerMetricsMiddleware. Показатели пишутся в метрики bot_handler_*
+    и в лог уровня DEBUG (поле usage записи лога). Если задан
+    n_plus_one_threshold, запрос, выполненный за один вызов обработчика
+    больше этого числа раз, отмечается как N+1; в строгом режиме
+    обработчик завершается NPlusOneError, чтобы тест упал.
+    """
+
+    def __init__(self, n_plus_one_threshold: int = 0, strict: bool = False):
+        """Инициализация middleware.
+
+        Args:
+            n_plus_one_threshold: Допустимое число повторов запроса (0 - не проверять)
+            strict: Бросать NPlusOneError вместо предупреждения
+        """
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.strict = strict
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Вызов обработчика с учетом ресурсов."""
+        router, name = handler_labels(data)
+        usage, token = start_usage()
+        try:
+            result = await handler(event, data)
+        finally:
+            end_usage(token)
+            usage.observe(router, name)
+            if logger.isEnabledFor(logging.DEBUG):
+                stats = usage.as_dict()
+                logger.debug("Ресурсы %s.%s: %s", router, name, stats, extra={"usage": stats})
+
+        if self.n_plus_one_threshold:
+            self._check_n_plus_one(usage, router, name)
+        return result
+
+    def _check_n_plus_one(self, usage: UpdateUsage, router: str, name: str) -> None:
+        """Поиск повторяющихся запросов."""
+        repeated = usage.repeated_statements(self.n_plus_one_threshold)
+        if not repeated:
+            return
+        N_PLUS_ONE.inc(router, name)
+        statement, count = repeated[0]
+        message = f"N+1 в {router}.{name}: запрос выполнен {count} раз за update: {statement[:200]}"
+        if self.strict:
+            raise NPlusOneError(message)
+        logger.warning(message)
+
+
+class BotApiUsageMiddleware(BaseRequestMiddleware):
+    """Учет вызовов Bot API и отправленных байт в показателях update.
+
+    Размер параметров считается повторной сериализацией вызова, поэтому
+    только при count_bytes (в режиме DEBUG): на горячем пути отправки
+    сообщений учитывается лишь число вызовов.
+    """
+
+    def __init__(self, count_bytes: bool = False):
+        """Инициализация middleware.
+
+        Args:
+            count_bytes: Считать размер параметров вызовов
+        """
+        self.count_bytes = count_bytes
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        """Учет вызова вне зависимости от результата."""
+        usage = current_usage()
+        if usage is not None:
+            usage.api_calls += 1
+            if self.count_bytes:
+                usage.api_bytes += request_size(bot, method)
+        return await make_request(bot, method)
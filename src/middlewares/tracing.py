@@ -0,0 +1,74 @@
+"""Middleware трассировки update и вызовов Bot API."""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from ..services.tracing import SpanKind, Tracer
+
+
+class UpdateTracingMiddleware(BaseMiddleware):
+    """Корневой span на каждый update.
+
+    Регистрируется как inner middleware update диспетчера: оно
+    срабатывает после outer middleware, то есть уже внутри задачи
+    ChatExecutor или воркера очереди webhook, и span покрывает саму
+    обработку, а не постановку в очередь.
+    """
+
+    def __init__(self, tracer: Tracer):
+        """Инициализация middleware.
+
+        Args:
+            tracer: Трассировщик
+        """
+        self.tracer = tracer
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Обработка update внутри корневого span."""
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        event_type = event.event_type
+        attributes: Dict[str, Any] = {"telegram.update_id": event.update_id, "telegram.update_type": event_type}
+        chat = data.get("event_chat")
+        if chat is not None:
+            attributes["telegram.chat_id"] = chat.id
+
+        with self.tracer.trace(f"update {event_type}", attributes) as span:
+            result = await handler(event, data)
+            span.set_attribute("telegram.handled", result is not UNHANDLED)
+            return result
+
+
+class BotApiTracingMiddleware(BaseRequestMiddleware):
+    """Дочерний span на каждый вызов Bot API."""
+
+    def __init__(self, tracer: Tracer):
+        """Инициализация middleware.
+
+        Args:
+            tracer: Трассировщик
+        """
+        self.tracer = tracer
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        """Вызов метода внутри span."""
+        api_method = method.__api_method__
+        with self.tracer.span(f"telegram {api_method}", SpanKind.CLIENT, {"rpc.method": api_method}):
+            return await make_request(bot, method)
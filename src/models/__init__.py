@@ -1,15 +1,22 @@
 """Модели данных приложения."""
 
 from .user import User, UserCreate, UserUpdate
-from .reading import Reading, ReadingCreate, ReadingUpdate
-from .payment import Payment, PaymentCreate, PaymentUpdate
-from .step import Step, StepCreate, StepUpdate, StepWithQuestions
+from .reading import Reading, ReadingCreate, ReadingUpdate, PayloadPatch
+from .payment import Payment, PaymentCreate, PaymentUpdate, PaymentTransition
+from .step import Step, StepCreate, StepUpdate, StepWithQuestions, StepContent, StepMedia, StepButton
 from .question import Question, QuestionCreate, QuestionUpdate
+from .stats import StatsSummary, ReadingStatusCount, PackageRevenue, ScenarioDurationStats
+from .funnel import StepEvent, FunnelStep
+from .answer import ReadingAnswer, ReadingAnswerCreate, AnswerCallback
 
 __all__ = [
     "User", "UserCreate", "UserUpdate",
-    "Reading", "ReadingCreate", "ReadingUpdate", 
-    "Payment", "PaymentCreate", "PaymentUpdate",
+    "Reading", "ReadingCreate", "ReadingUpdate", "PayloadPatch",
+    "Payment", "PaymentCreate", "PaymentUpdate", "PaymentTransition",
     "Step", "StepCreate", "StepUpdate", "StepWithQuestions",
+    "StepContent", "StepMedia", "StepButton",
     "Question", "QuestionCreate", "QuestionUpdate",
+    "StatsSummary", "ReadingStatusCount", "PackageRevenue", "ScenarioDurationStats",
+    "StepEvent", "FunnelStep",
+    "ReadingAnswer", "ReadingAnswerCreate", "AnswerCallback",
 ]
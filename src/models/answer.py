@@ -0,0 +1,57 @@
+"""Модели ответов на вопросы."""
+
+from aiogram.filters.callback_data import CallbackData
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+
+
+class ReadingAnswer(BaseModel):
+    """Модель данных ответа из базы данных."""
+
+    id: int = Field(..., description="ID записи в базе данных")
+    reading_id: int = Field(..., description="ID чтения")
+    question_id: int = Field(..., description="ID вопроса")
+    answer_payload: Optional[str] = Field(None, description="Payload нажатой кнопки")
+    answer_text: Optional[str] = Field(None, description="Текст ответа")
+    created_at: datetime = Field(..., description="Время ответа")
+
+    class Config:
+        """Конфигурация модели."""
+
+        json_schema_extra = {
+            "example": {
+                "id": 1,
+                "reading_id": 1,
+                "question_id": 1,
+                "answer_payload": "yes",
+                "answer_text": None,
+                "created_at": "2024-01-01T00:00:00Z",
+            }
+        }
+
+
+class ReadingAnswerCreate(BaseModel):
+    """Модель для создания ответа."""
+
+    reading_id: int = Field(..., description="ID чтения")
+    question_id: int = Field(..., description="ID вопроса")
+    answer_payload: Optional[str] = Field(None, description="Payload нажатой кнопки")
+    answer_text: Optional[str] = Field(None, description="Текст ответа")
+    created_at: datetime = Field(..., description="Время ответа")
+
+    def dedup_key(self) -> tuple:
+        """Ключ для отбрасывания повторных нажатий одной и той же кнопки."""
+        return (self.reading_id, self.question_id, self.answer_payload, self.answer_text)
+
+
+class AnswerCallback(CallbackData, prefix="answer"):
+    """Callback data кнопки ответа: answer:<reading_id>:<question_id>:<option>.
+
+    Вместо payload варианта передается его номер в question.options:
+    payload может содержать ":" или не поместиться в 64 байта callback data.
+    """
+
+    reading_id: int
+    question_id: int
+    option: int
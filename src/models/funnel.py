@@ -0,0 +1,34 @@
+"""Модели воронки сценариев."""
+
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Literal, Optional
+
+StepEventType = Literal["reached", "completed", "failed"]
+
+
+class StepEvent(BaseModel):
+    """Событие прохождения шага сценария."""
+
+    reading_id: int = Field(..., description="ID чтения")
+    reading_type: str = Field(..., description="Тип чтения")
+    step_id: int = Field(..., description="ID шага")
+    step_order: int = Field(..., description="Порядковый номер шага")
+    event: StepEventType = Field(..., description="Тип события")
+    created_at: datetime = Field(..., description="Время события")
+
+
+class FunnelStep(BaseModel):
+    """Счётчики воронки для одного шага."""
+
+    step_id: int = Field(..., description="ID шага")
+    step_order: int = Field(..., description="Порядковый номер шага")
+    step_name: Optional[str] = Field(None, description="Название шага")
+    reached: int = Field(0, description="Сколько раз шаг был начат")
+    completed: int = Field(0, description="Сколько раз шаг был пройден")
+    failed: int = Field(0, description="Сколько раз шаг завершился ошибкой")
+
+    @property
+    def completion_rate(self) -> float:
+        """Доля прохождений шага среди начавших его."""
+        return self.completed / self.reached if self.reached else 0.0
@@ -1,10 +1,33 @@
 """Модели платежей."""
 
-from pydantic import BaseModel, Field
+import json
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, FrozenSet
 from decimal import Decimal
 
+# Допустимые переходы статусов платежа; финальные статусы переходов не имеют.
+# expired ставит сверка платежей; поздняя оплата такого платежа все равно засчитывается
+PAYMENT_STATUS_TRANSITIONS: Dict[str, FrozenSet[str]] = {
+    "pending": frozenset({"waiting_for_capture", "succeeded", "canceled", "expired"}),
+    "waiting_for_capture": frozenset({"succeeded", "canceled", "expired"}),
+    "expired": frozenset({"succeeded", "canceled"}),
+    "succeeded": frozenset(),
+    "canceled": frozenset(),
+}
+
+# Статус платежа, в который переводит событие YooKassa
+YOOKASSA_EVENT_STATUSES: Dict[str, str] = {
+    "payment.waiting_for_capture": "waiting_for_capture",
+    "payment.succeeded": "succeeded",
+    "payment.canceled": "canceled",
+}
+
+
+def can_transition(current: str, new: str) -> bool:
+    """Разрешен ли переход статуса платежа."""
+    return new in PAYMENT_STATUS_TRANSITIONS.get(current, frozenset())
+
 
 class Payment(BaseModel):
     """Модель данных платежа из базы данных."""
@@ -20,6 +43,14 @@ class Payment(BaseModel):
     created_at: datetime = Field(..., description="Время создания записи")
     updated_at: datetime = Field(..., description="Время последнего обновления")
 
+    @field_validator("metadata", mode="before")
+    @classmethod
+    def decode_metadata(cls, v: Any) -> Any:
+        """asyncpg возвращает JSONB строкой."""
+        if v is None:
+            return {}
+        return json.loads(v) if isinstance(v, str) else v
+
     class Config:
         """Конфигурация модели."""
 
@@ -84,4 +115,31 @@ class PaymentUpdate(BaseModel):
                 "status": "succeeded",
                 "yookassa_payment_id": "yookassa_12345",
             }
-        }
\ No newline at end of file
+        }
+
+class PaymentTransition(BaseModel):
+    """Результат применения статуса к платежу."""
+
+    payment_id: int = Field(..., description="ID платежа")
+    user_id: int = Field(..., description="ID пользователя")
+    old_status: str = Field(..., description="Статус до изменения")
+    new_status: str = Field(..., description="Запрошенный статус")
+    applied: bool = Field(..., description="Был ли переход выполнен")
+    credited_readings: int = Field(0, description="Сколько чтений начислено пользователю")
+
+
+class YooKassaEvent(BaseModel):
+    """Уведомление YooKassa, записанное до подтверждения."""
+
+    id: int = Field(..., description="ID записи в базе данных")
+    dedup_key: str = Field(..., description="Событие и ID платежа в YooKassa")
+    payload: Dict[str, Any] = Field(..., description="Тело уведомления")
+    attempts: int = Field(0, description="Число неудачных попыток обработки")
+    received_at: datetime = Field(..., description="Время получения")
+    processed_at: Optional[datetime] = Field(None, description="Время успешной обработки")
+
+    @field_validator("payload", mode="before")
+    @classmethod
+    def decode_payload(cls, v: Any) -> Any:
+        """asyncpg возвращает JSONB строкой."""
+        return json.loads(v) if isinstance(v, str) else v
@@ -18,6 +18,13 @@ class Question(BaseModel):
     created_at: datetime = Field(..., description="Время создания записи")
     updated_at: datetime = Field(..., description="Время последнего обновления")
 
+    def option_payload(self, index: int) -> Optional[str]:
+        """Payload варианта ответа по номеру или None, если варианта нет."""
+        if not 0 <= index < len(self.options):
+            return None
+        option = self.options[index]
+        return str(option.get("payload", option.get("text", "Опция")))
+
     class Config:
         """Конфигурация модели."""
 
@@ -1,8 +1,11 @@
 """Модели чтений."""
 
-from pydantic import BaseModel, Field
+import json
+from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Literal, Union
+
+PayloadPatchOp = Literal["set", "append", "merge", "incr"]
 
 
 class Reading(BaseModel):
@@ -16,6 +19,12 @@ class Reading(BaseModel):
     created_at: datetime = Field(..., description="Время создания записи")
     completed_at: Optional[datetime] = Field(None, description="Время завершения чтения")
 
+    @field_validator("reading_payload", mode="before")
+    @classmethod
+    def decode_payload(cls, v: Any) -> Any:
+        """asyncpg возвращает JSONB строкой."""
+        return json.loads(v) if isinstance(v, str) else v
+
     class Config:
         """Конфигурация модели."""
 
@@ -53,11 +62,66 @@ class ReadingCreate(BaseModel):
         }
 
 
+class PayloadPatch(BaseModel):
+    """Точечное изменение reading_payload без перезаписи документа.
+
+    Путь задается списком ключей или строкой через точку ("progress.step").
+    """
+
+    op: PayloadPatchOp = Field(..., description="Операция: set, append, merge или incr")
+    path: List[str] = Field(default_factory=list, description="Путь в документе")
+    value: Any = Field(None, description="Значение операции")
+
+    @field_validator("path", mode="before")
+    @classmethod
+    def split_path(cls, v: Any) -> Any:
+        """Разбор пути, заданного строкой."""
+        if isinstance(v, str):
+            return [part for part in v.split(".") if part]
+        return v
+
+    @model_validator(mode="after")
+    def validate_value(self) -> "PayloadPatch":
+        """Проверка значения и пути для операции."""
+        if self.op != "merge" and not self.path:
+            raise ValueError(f"Операция {self.op} требует непустой путь")
+        if self.op == "merge" and not isinstance(self.value, dict):
+            raise ValueError("Операция merge требует объект")
+        if self.op == "incr" and (isinstance(self.value, bool) or not isinstance(self.value, (int, float))):
+            raise ValueError("Операция incr требует число")
+        return self
+
+    @classmethod
+    def set(cls, path: Union[str, List[str]], value: Any) -> "PayloadPatch":
+        """Установка значения по пути."""
+        return cls(op="set", path=path, value=value)
+
+    @classmethod
+    def append(cls, path: Union[str, List[str]], value: Any) -> "PayloadPatch":
+        """Добавление элемента в массив по пути."""
+        return cls(op="append", path=path, value=value)
+
+    @classmethod
+    def merge(cls, path: Union[str, List[str]], value: Dict[str, Any]) -> "PayloadPatch":
+        """Слияние ключей объекта по пути."""
+        return cls(op="merge", path=path, value=value)
+
+    @classmethod
+    def incr(cls, path: Union[str, List[str]], value: Union[int, float] = 1) -> "PayloadPatch":
+        """Увеличение счетчика по пути."""
+        return cls(op="incr", path=path, value=value)
+
+
 class ReadingUpdate(BaseModel):
-    """Модель для обновления чтения."""
+    """Модель для обновления чтения.
+
+    reading_payload заменяет документ целиком, payload_patch применяется
+    поверх текущего (или нового) документа в том же UPDATE.
+    """
 
     reading_type: Optional[str] = Field(None, description="Тип чтения")
     reading_payload: Optional[Dict[str, Any]] = Field(None, description="Данные чтения в формате JSON")
+    payload_patch: Optional[List[PayloadPatch]] = Field(None, description="Точечные изменения reading_payload")
     status: Optional[str] = Field(None, description="Статус чтения")
     completed_at: Optional[datetime] = Field(None, description="Время завершения чтения")
 
@@ -67,7 +131,10 @@ class ReadingUpdate(BaseModel):
         json_schema_extra = {
             "example": {
                 "reading_type": "tarot",
-                "reading_payload": {"cards": ["The Fool", "The Magician"]},
+                "payload_patch": [
+                    {"op": "incr", "path": ["progress", "steps_done"], "value": 1},
+                    {"op": "append", "path": ["cards"], "value": "The Fool"},
+                ],
                 "status": "completed",
                 "completed_at": "2024-01-01T01:00:00Z",
             }
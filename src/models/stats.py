@@ -0,0 +1,61 @@
+"""Модели агрегированной статистики."""
+
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional
+
+
+class ReadingStatusCount(BaseModel):
+    """Количество чтений определенного типа и статуса."""
+
+    reading_type: str = Field(..., description="Тип чтения")
+    status: str = Field(..., description="Статус чтения")
+    readings_count: int = Field(0, description="Количество чтений")
+
+
+class PackageRevenue(BaseModel):
+    """Выручка по пакету."""
+
+    package_type: str = Field(..., description="Тип пакета")
+    currency: str = Field("RUB", description="Валюта")
+    payments_count: int = Field(0, description="Количество успешных платежей")
+    revenue: Decimal = Field(Decimal("0"), description="Сумма успешных платежей")
+
+
+class ScenarioDurationStats(BaseModel):
+    """Статистика длительности сценариев одного типа."""
+
+    reading_type: str = Field(..., description="Тип чтения")
+    completed_count: int = Field(0, description="Количество завершенных чтений")
+    avg_sec: float = Field(0.0, description="Средняя длительность в секундах")
+    p50_sec: float = Field(0.0, description="Медиана длительности в секундах")
+    p90_sec: float = Field(0.0, description="90-й перцентиль длительности в секундах")
+    p99_sec: float = Field(0.0, description="99-й перцентиль длительности в секундах")
+
+
+class StatsSummary(BaseModel):
+    """Сводная статистика бота за период."""
+
+    date_from: date = Field(..., description="Начало периода (включительно)")
+    date_to: date = Field(..., description="Конец периода (включительно)")
+    watermark: Optional[datetime] = Field(None, description="Момент последнего пересчёта rollup-таблиц")
+    total_users: int = Field(0, description="Всего пользователей")
+    new_users: int = Field(0, description="Новых пользователей за период")
+    readings: List[ReadingStatusCount] = Field(default_factory=list, description="Чтения по типам и статусам")
+    revenue: List[PackageRevenue] = Field(default_factory=list, description="Выручка по пакетам")
+    durations: List[ScenarioDurationStats] = Field(default_factory=list, description="Длительность сценариев")
+
+    def readings_by_status(self, status: str) -> int:
+        """Количество чтений с указанным статусом по всем типам."""
+        return sum(r.readings_count for r in self.readings if r.status == status)
+
+    @property
+    def total_readings(self) -> int:
+        """Общее количество чтений за период."""
+        return sum(r.readings_count for r in self.readings)
+
+    @property
+    def total_revenue(self) -> Decimal:
+        """Общая выручка за период."""
+        return sum((r.revenue for r in self.revenue), Decimal("0"))
@@ -1,11 +1,86 @@
 """Модели шагов."""
 
-from pydantic import BaseModel, Field
+import json
+import re
+from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime
-from typing import Optional, List, TYPE_CHECKING
+from typing import Any, Optional, List, Literal
 
-if TYPE_CHECKING:
-    from .question import Question
+from .question import Question
+
+# Директивы старого формата description (см. миграцию 0006_step_content.sql)
+_LEGACY_DIRECTIVE = re.compile(r"(image_file_id|delay_sec):[ \t]*([^|\s]*)")
+_LEGACY_VALUES = {"image_file_id": re.compile(r"[A-Za-z0-9_-]+"), "delay_sec": re.compile(r"\d+")}
+_LEGACY_SEPARATOR = re.compile(r"\s*\|\s*")
+
+# Ограничения Telegram Bot API
+MESSAGE_MAX_LENGTH = 4096
+CAPTION_MAX_LENGTH = 1024
+CALLBACK_DATA_MAX_BYTES = 64
+
+
+class StepMedia(BaseModel):
+    """Медиафайл шага."""
+
+    type: Literal["photo", "video", "document", "animation"] = Field("photo", description="Тип медиа")
+    file_id: str = Field(..., min_length=1, description="File ID в Telegram")
+
+
+class StepButton(BaseModel):
+    """Inline-кнопка шага: ссылка или callback."""
+
+    text: str = Field(..., min_length=1, description="Текст кнопки")
+    url: Optional[str] = Field(None, description="Ссылка")
+    callback_data: Optional[str] = Field(None, description="Callback data")
+
+    @model_validator(mode="after")
+    def validate_action(self) -> "StepButton":
+        """У кнопки должно быть ровно одно действие."""
+        if (self.url is None) == (self.callback_data is None):
+            raise ValueError("Кнопка должна содержать либо url, либо callback_data")
+        if self.callback_data is not None and len(self.callback_data.encode()) > CALLBACK_DATA_MAX_BYTES:
+            raise ValueError(f"callback_data длиннее {CALLBACK_DATA_MAX_BYTES} байт")
+        return self
+
+
+class StepContent(BaseModel):
+    """Содержимое шага для проигрывания."""
+
+    text: Optional[str] = Field(None, max_length=MESSAGE_MAX_LENGTH, description="Текст сообщения")
+    media: Optional[StepMedia] = Field(None, description="Медиафайл")
+    delay_sec: int = Field(0, ge=0, description="Пауза после шага в секундах")
+    parse_mode: Optional[Literal["HTML", "Markdown", "MarkdownV2"]] = Field(None, description="Режим разметки")
+    buttons: List[List[StepButton]] = Field(default_factory=list, description="Inline-кнопки по рядам")
+
+    @classmethod
+    def from_description(cls, description: Optional[str]) -> "StepContent":
+        """Разбор description старого формата с директивами image_file_id: и delay_sec:.
+
+        Директивы вырезаются из текста, фрагменты между "|" становятся строками.
+        Директива с пустым или нераспознанным значением, как и повторная,
+        не угадывается, а отклоняется.
+
+        Raises:
+            ValueError: Директива не разбирается
+        """
+        if not description:
+            return cls()
+
+        values = {}
+        for match in _LEGACY_DIRECTIVE.finditer(description):
+            name, value = match.groups()
+            if name in values:
+                raise ValueError(f"Директива {name}: указана несколько раз")
+            if not _LEGACY_VALUES[name].fullmatch(value):
+                raise ValueError(f"Некорректное значение директивы {name}: {value!r}")
+            values[name] = value
+
+        text = _LEGACY_SEPARATOR.sub("\n", _LEGACY_DIRECTIVE.sub("", description)).strip(" \n")
+        return cls(
+            text=text or None,
+            media=StepMedia(file_id=values["image_file_id"]) if "image_file_id" in values else None,
+            delay_sec=int(values.get("delay_sec", 0)),
+        )
 
 
 class Step(BaseModel):
@@ -14,11 +89,18 @@ class Step(BaseModel):
     id: int = Field(..., description="ID записи в базе данных")
     name: str = Field(..., description="Название шага")
     description: Optional[str] = Field(None, description="Описание шага")
+    content: StepContent = Field(default_factory=StepContent, description="Содержимое шага")
     step_order: int = Field(..., description="Порядковый номер шага")
     is_active: bool = Field(..., description="Флаг активности шага")
     created_at: datetime = Field(..., description="Время создания записи")
     updated_at: datetime = Field(..., description="Время последнего обновления")
 
+    @field_validator("content", mode="before")
+    @classmethod
+    def decode_content(cls, v: Any) -> Any:
+        """asyncpg возвращает JSONB строкой."""
+        return json.loads(v) if isinstance(v, str) else v
+
     class Config:
         """Конфигурация модели."""
 
@@ -36,13 +118,24 @@ class Step(BaseModel):
 
 
 class StepCreate(BaseModel):
-    """Модель для создания шага."""
+    """Модель для создания шага.
+
+    Если content не передан, он строится из description старого формата.
+    """
 
     name: str = Field(..., description="Название шага")
     description: Optional[str] = Field(None, description="Описание шага")
+    content: Optional[StepContent] = Field(None, description="Содержимое шага")
     step_order: int = Field(..., description="Порядковый номер шага")
     is_active: bool = Field(True, description="Флаг активности шага")
 
+    @model_validator(mode="after")
+    def fill_content(self) -> "StepCreate":
+        """Построение content из description."""
+        if self.content is None:
+            self.content = StepContent.from_description(self.description)
+        return self
+
     class Config:
         """Конфигурация модели."""
 
@@ -57,13 +150,24 @@ class StepCreate(BaseModel):
 
 
 class StepUpdate(BaseModel):
-    """Модель для обновления шага."""
+    """Модель для обновления шага.
+
+    Новый description без content пересобирает content из директив.
+    """
 
     name: Optional[str] = Field(None, description="Название шага")
     description: Optional[str] = Field(None, description="Описание шага")
+    content: Optional[StepContent] = Field(None, description="Содержимое шага")
     step_order: Optional[int] = Field(None, description="Порядковый номер шага")
     is_active: Optional[bool] = Field(None, description="Флаг активности шага")
 
+    @model_validator(mode="after")
+    def fill_content(self) -> "StepUpdate":
+        """Построение content из нового description."""
+        if self.content is None and self.description is not None:
+            self.content = StepContent.from_description(self.description)
+        return self
+
     class Config:
         """Конфигурация модели."""
 
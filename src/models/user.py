@@ -14,6 +14,7 @@ class User(BaseModel):
     last_name: Optional[str] = Field(None, description="Фамилия пользователя")
     username: Optional[str] = Field(None, description="Username в Telegram")
     is_bot: bool = Field(False, description="Является ли пользователь ботом")
+    paid_readings_left: int = Field(0, description="Остаток оплаченных чтений")
     created_at: datetime = Field(..., description="Время создания записи")
     updated_at: datetime = Field(..., description="Время последнего обновления")
 
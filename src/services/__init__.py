@@ -10,6 +10,9 @@ from .reading_repository import ReadingRepository
 from .payment_repository import PaymentRepository
 from .step_repository import StepRepository
 from .question_repository import QuestionRepository
+from .stats_repository import StatsRepository
+from .funnel_repository import FunnelRepository
+from .answer_repository import AnswerRepository
 from .scenario_service import ScenarioService
 
 __all__ = [
@@ -19,7 +22,8 @@ __all__ = [
     "is_database_initialized", "test_connection",
     # Repositories
     "UserRepository", "ReadingRepository", "PaymentRepository", 
-    "StepRepository", "QuestionRepository",
+    "StepRepository", "QuestionRepository", "StatsRepository",
+    "FunnelRepository", "AnswerRepository",
     # Services
     "ScenarioService",
 ]
@@ -0,0 +1,63 @@
+"""Репозиторий для работы с ответами на вопросы."""
+
+import logging
+from typing import List
+
+from ..models.answer import ReadingAnswer, ReadingAnswerCreate
+from .database import get_connection, fetch_many
+
+logger = logging.getLogger(__name__)
+
+ANSWER_COLUMNS = ["reading_id", "question_id", "answer_payload", "answer_text", "created_at"]
+
+
+class AnswerRepository:
+    """Репозиторий для управления ответами на вопросы."""
+
+    @staticmethod
+    async def copy_answers(answers: List[ReadingAnswerCreate]) -> int:
+        """Пакетная запись ответов через COPY.
+
+        Args:
+            answers: Ответы для записи
+
+        Returns:
+            Количество записанных ответов
+        """
+        if not answers:
+            return 0
+
+        try:
+            async with get_connection() as conn:
+                await conn.copy_records_to_table(
+                    "reading_answers",
+                    records=[
+                        (a.reading_id, a.question_id, a.answer_payload, a.answer_text, a.created_at)
+                        for a in answers
+                    ],
+                    columns=ANSWER_COLUMNS,
+                )
+
+            logger.debug("Записано %s ответов", len(answers))
+            return len(answers)
+
+        except Exception as e:
+            logger.error(f"Ошибка при записи ответов: {str(e)}")
+            raise RuntimeError(f"Ошибка при записи ответов: {str(e)}")
+
+    @staticmethod
+    async def get_by_reading_id(reading_id: int) -> List[ReadingAnswer]:
+        """Получение ответов чтения в порядке поступления."""
+        try:
+            query = """
+                SELECT id, reading_id, question_id, answer_payload, answer_text, created_at
+                FROM reading_answers
+                WHERE reading_id = $1
+                ORDER BY created_at ASC, id ASC
+            """
+            results = await fetch_many(query, reading_id)
+            return [ReadingAnswer(**result) for result in results]
+
+        except Exception as e:
+            logger.error(f"Ошибка при получении ответов чтения {reading_id}: {str(e)}")
+            raise RuntimeError(f"Ошибка при получении ответов: {str(e)}")
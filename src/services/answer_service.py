@@ -0,0 +1,195 @@
+"""Сервис сохранения ответов на вопросы сценария."""
+
+import logging
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Deque, NamedTuple, Optional, Set
+
+from ..config import settings
+from ..models.answer import ReadingAnswerCreate
+from .answer_repository import AnswerRepository
+from .redis_client import get_redis
+from .write_buffer import BatchBuffer
+
+logger = logging.getLogger(__name__)
+
+# Ограничение числа чатов с ожидающими текстовыми ответами
+MAX_PENDING_CHATS = 10_000
+
+
+class PendingQuestion(NamedTuple):
+    """Вопрос, на который ожидается ответ текстом."""
+
+    reading_id: int
+    question_id: int
+
+
+class AnswerRecorder:
+    """Принимает ответы и пишет их в reading_answers через буфер.
+
+    Нажатия кнопок и текстовые ответы попадают в буфер, который сбрасывается
+    через COPY пачками по answers_buffer_max_rows записей или раз в
+    answers_buffer_flush_ms миллисекунд. Повторное нажатие той же кнопки
+    в течение answers_dedup_window_sec секунд отбрасывается.
+
+    Вопросы, ожидающие текстового ответа, хранятся в Redis списком на чат:
+    в режиме webhook ответ пользователя может попасть в другой воркер.
+    Если Redis недоступен, вопрос запоминается в памяти процесса.
+
+    Так же на чат хранятся вопросы, отправленные с inline-кнопками: ID
+    чтения в callback data приходит от клиента, и ответ принимается, только
+    если этот вопрос этого чтения действительно отправлялся в чат.
+    """
+
+    def __init__(self):
+        """Инициализация буфера ответов."""
+        self.buffer: BatchBuffer[ReadingAnswerCreate] = BatchBuffer(
+            "reading-answers",
+            AnswerRepository.copy_answers,
+            max_rows=settings.answers_buffer_max_rows,
+            flush_interval_ms=settings.answers_buffer_flush_ms,
+            dedup_key=ReadingAnswerCreate.dedup_key,
+            dedup_window_sec=settings.answers_dedup_window_sec,
+        )
+        self._pending: "OrderedDict[int, Deque[PendingQuestion]]" = OrderedDict()
+        self._choices: "OrderedDict[int, Set[str]]" = OrderedDict()
+
+    def record(
+        self,
+        reading_id: int,
+        question_id: int,
+        answer_payload: Optional[str] = None,
+        answer_text: Optional[str] = None
+    ) -> bool:
+        """Сохранение ответа без ожидания записи в БД.
+
+        Args:
+            reading_id: ID чтения
+            question_id: ID вопроса
+            answer_payload: Payload нажатой кнопки
+            answer_text: Текст ответа
+
+        Returns:
+            True если ответ принят, False если это повтор
+        """
+        return self.buffer.add(ReadingAnswerCreate(
+            reading_id=reading_id,
+            question_id=question_id,
+            answer_payload=answer_payload,
+            answer_text=answer_text,
+            created_at=datetime.now(timezone.utc),
+        ))
+
+    async def expect_text(self, chat_id: int, reading_id: int, question_id: int) -> None:
+        """Регистрация вопроса, ответ на который придет текстовым сообщением."""
+        redis = get_redis()
+        if redis is not None:
+            key = self._pending_key(chat_id)
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.rpush(key, f"{reading_id}:{question_id}")
+                    pipe.expire(key, settings.answers_pending_ttl_sec)
+                    await pipe.execute()
+                return
+            except Exception as e:
+                logger.warning(f"Вопрос {question_id} ожидает ответа только в памяти процесса: {str(e)}")
+        self._expect_local(chat_id, PendingQuestion(reading_id, question_id))
+
+    async def pop_pending_text(self, chat_id: int) -> Optional[PendingQuestion]:
+        """Извлечение самого раннего вопроса, ожидающего ответа в чате."""
+        question = self._pop_local(chat_id)
+        if question is not None:
+            return question
+
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            value = await redis.lpop(self._pending_key(chat_id))
+        except Exception as e:
+            logger.warning(f"Не удалось получить ожидающий вопрос чата {chat_id}: {str(e)}")
+            return None
+        if value is None:
+            return None
+        reading_id, question_id = (value.decode() if isinstance(value, bytes) else value).split(":")
+        return PendingQuestion(int(reading_id), int(question_id))
+
+    async def expect_choice(self, chat_id: int, reading_id: int, question_id: int) -> None:
+        """Регистрация вопроса, отправленного в чат с inline-кнопками ответа."""
+        redis = get_redis()
+        if redis is not None:
+            key = self._choices_key(chat_id)
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.hset(key, f"{reading_id}:{question_id}", 1)
+                    pipe.expire(key, settings.answers_pending_ttl_sec)
+                    await pipe.execute()
+                return
+            except Exception as e:
+                logger.warning(f"Вопрос {question_id} с кнопками запомнен только в памяти процесса: {str(e)}")
+
+        choices = self._choices.get(chat_id)
+        if choices is None:
+            choices = self._choices[chat_id] = set()
+        self._choices.move_to_end(chat_id)
+        choices.add(f"{reading_id}:{question_id}")
+        while len(self._choices) > MAX_PENDING_CHATS:
+            self._choices.popitem(last=False)
+
+    async def is_expected_choice(self, chat_id: int, reading_id: int, question_id: int) -> bool:
+        """Отправлялся ли вопрос чтения в чат с inline-кнопками."""
+        field = f"{reading_id}:{question_id}"
+        if field in self._choices.get(chat_id, ()):
+            return True
+
+        redis = get_redis()
+        if redis is None:
+            return False
+        try:
+            return bool(await redis.hexists(self._choices_key(chat_id), field))
+        except Exception as e:
+            logger.warning(f"Не удалось проверить вопрос {question_id} чата {chat_id}: {str(e)}")
+            return False
+
+    @staticmethod
+    def _choices_key(chat_id: int) -> str:
+        """Ключ вопросов с inline-кнопками, отправленных в чат, в Redis."""
+        return f"answers:choices:{chat_id}"
+
+    @staticmethod
+    def _pending_key(chat_id: int) -> str:
+        """Ключ списка ожидающих вопросов чата в Redis."""
+        return f"answers:pending:{chat_id}"
+
+    def _expect_local(self, chat_id: int, question: PendingQuestion) -> None:
+        """Запоминание вопроса в памяти процесса."""
+        queue = self._pending.get(chat_id)
+        if queue is None:
+            queue = self._pending[chat_id] = deque()
+        self._pending.move_to_end(chat_id)
+        queue.append(question)
+
+        while len(self._pending) > MAX_PENDING_CHATS:
+            self._pending.popitem(last=False)
+
+    def _pop_local(self, chat_id: int) -> Optional[PendingQuestion]:
+        """Извлечение вопроса, запомненного в памяти процесса."""
+        queue = self._pending.get(chat_id)
+        if not queue:
+            return None
+        question = queue.popleft()
+        if not queue:
+            del self._pending[chat_id]
+        return question
+
+    async def flush(self) -> int:
+        """Принудительный сброс накопленных ответов."""
+        return await self.buffer.flush()
+
+    async def close(self) -> None:
+        """Финальный сброс ответов при остановке."""
+        await self.buffer.close()
+
+
+# Создание экземпляра сервиса
+answer_recorder = AnswerRecorder()
@@ -0,0 +1,69 @@
+"""Кэш в памяти процесса."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """LRU-кэш фиксированного размера с временем жизни записей.
+
+    При переполнении вытесняется запись, к которой дольше всего не
+    обращались; просроченные записи удаляются при обращении к ним.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl_sec: float = 60):
+        """Инициализация кэша.
+
+        Args:
+            max_size: Предельное число записей
+            ttl_sec: Время жизни записи в секундах
+        """
+        self.max_size = max_size
+        self.ttl_sec = ttl_sec
+        self._data: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        """Число записей, включая еще не удаленные просроченные."""
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        """Есть ли в кэше непросроченная запись."""
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: K, default: Any = None) -> Optional[V]:
+        """Получение значения с продлением его позиции в LRU."""
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl_sec: Optional[float] = None) -> None:
+        """Запись значения."""
+        ttl = self.ttl_sec if ttl_sec is None else ttl_sec
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K, default: Any = None) -> Optional[V]:
+        """Удаление записи."""
+        item = self._data.pop(key, None)
+        return item[1] if item is not None else default
+
+    def clear(self) -> None:
+        """Очистка кэша."""
+        self._data.clear()
+
+
+_MISSING = object()
@@ -0,0 +1,149 @@
+"""Исполнитель задач с порядком внутри чата и общим лимитом параллельности."""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[Any]]
+
+
+class ChatExecutor:
+    """Выполняет задачи одного чата строго по очереди, разных чатов - параллельно.
+
+    Для каждого чата с задачами существует одна задача-исполнитель, которая
+    разбирает очередь чата и завершается, когда очередь опустела; очередь
+    при этом удаляется, так что простаивающие чаты не занимают память.
+    Одновременно выполняется не больше max_concurrency задач. Задачи без
+    ключа (key=None) не упорядочиваются и выполняются сразу под общим лимитом.
+    """
+
+    def __init__(self, max_concurrency: int = 64, max_pending: int = 10_000):
+        """Инициализация исполнителя.
+
+        Args:
+            max_concurrency: Предельное число одновременно выполняемых задач
+            max_pending: Число ожидающих задач, при котором submit начинает ждать
+        """
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._queues: Dict[Hashable, Deque[Job]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._has_capacity = asyncio.Event()
+        self._has_capacity.set()
+        self._pending = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def active_chats(self) -> int:
+        """Число чатов с невыполненными задачами."""
+        return len(self._queues)
+
+    @property
+    def pending(self) -> int:
+        """Число принятых, но еще не завершенных задач."""
+        return self._pending
+
+    def queue_depth(self, key: Hashable) -> int:
+        """Число задач чата, ожидающих выполнения."""
+        queue = self._queues.get(key)
+        return len(queue) if queue else 0
+
+    def max_queue_depth(self) -> int:
+        """Глубина самой длинной очереди чата."""
+        return max((len(queue) for queue in self._queues.values()), default=0)
+
+    def stats(self) -> Dict[str, int]:
+        """Текущие метрики исполнителя."""
+        return {
+            "active_chats": self.active_chats,
+            "pending": self.pending,
+            "running": self.running,
+            "max_queue_depth": self.max_queue_depth(),
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    async def submit(self, key: Optional[Hashable], job: Job) -> None:
+        """Постановка задачи в очередь чата.
+
+        Ждет только при превышении max_pending, что замедляет прием
+        новых update вместо неограниченного роста очередей.
+
+        Args:
+            key: ID чата или None для задач без порядка
+            job: Фабрика корутины задачи
+        """
+        await self._has_capacity.wait()
+        self._pending += 1
+        if self._pending >= self.max_pending:
+            self._has_capacity.clear()
+
+        if key is None:
+            self._spawn(self._run_job(job))
+            return
+
+        queue = self._queues.get(key)
+        if queue is not None:
+            queue.append(job)
+            return
+
+        self._queues[key] = deque([job])
+        self._spawn(self._drain(key))
+
+    async def close(self, timeout: float = 30) -> None:
+        """Ожидание завершения задач с отменой по таймауту."""
+        if not self._tasks:
+            return
+        done, not_done = await asyncio.wait(set(self._tasks), timeout=timeout)
+        if not_done:
+            logger.warning(f"Не завершено {self.pending} задач за {timeout} сек, отмена")
+            for task in not_done:
+                task.cancel()
+            await asyncio.gather(*not_done, return_exceptions=True)
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        """Запуск фоновой задачи с учетом в _tasks."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _drain(self, key: Hashable) -> None:
+        """Последовательное выполнение очереди чата до ее опустошения."""
+        queue = self._queues[key]
+        try:
+            while queue:
+                await self._run_job(queue.popleft())
+        finally:
+            # Очередь пустого чата удаляется; при отмене оставшиеся задачи снимаются с учета
+            self._queues.pop(key, None)
+            if queue:
+                self._release(len(queue))
+
+    async def _run_job(self, job: Job) -> None:
+        """Выполнение одной задачи под общим лимитом."""
+        try:
+            async with self._semaphore:
+                self.running += 1
+                try:
+                    await job()
+                    self.completed += 1
+                except Exception as e:
+                    self.failed += 1
+                    logger.error(f"Ошибка при выполнении задачи: {str(e)}")
+                finally:
+                    self.running -= 1
+        finally:
+            self._release(1)
+
+    def _release(self, count: int) -> None:
+        """Снятие задач с учета ожидающих."""
+        self._pending -= count
+        if self._pending < self.max_pending:
+            self._has_capacity.set()
@@ -1,17 +1,60 @@
 """Сервис для работы с базой данных."""
 
 import asyncpg
+import functools
 import logging
-from typing import Optional
+import time
+from typing import AsyncIterator, List, Optional
 from contextlib import asynccontextmanager
 
 from ..config import settings
+from .resource_usage import count_rows, current_usage
+from .tracing import SpanKind, tracer
 
 logger = logging.getLogger(__name__)
 
 # Глобальный пул соединений
 pool: Optional[asyncpg.Pool] = None
 
+# Запросы горячего пути, подготавливаемые на каждом новом соединении пула
+PREPARED_STATEMENTS: List[str] = []
+
+
+def prepared(query: str) -> str:
+    """Регистрация запроса для подготовки при открытии соединения.
+
+    Используется для констант запросов уровня модуля: текст должен
+    совпадать с тем, что передается в fetch_*, - по нему ищется запрос
+    в кэше соединения.
+    """
+    PREPARED_STATEMENTS.append(query)
+    return query
+
+
+async def prepare_connection(conn: asyncpg.Connection) -> None:
+    """Подготовка запросов горячего пути на новом соединении.
+
+    Разбор запроса, план и загрузка кодеков типов (jsonb, numeric)
+    выполняются при открытии соединения, а не на первом update. Запрос
+    кладется в кэш соединения тем же вызовом, которым его ищут fetch и
+    execute: публичный prepare() кэш asyncpg не использует.
+
+    _get_statement - внутренний метод asyncpg (версия закреплена в
+    requirements.txt). Если его нет, запросы готовятся через prepare():
+    кэш запросов не заполняется, но кодеки типов соединение загружает.
+    """
+    get_statement = getattr(conn, "_get_statement", None)
+    if get_statement is None:
+        logger.warning("asyncpg без Connection._get_statement: запросы не попадут в кэш соединения")
+    for query in PREPARED_STATEMENTS:
+        try:
+            if get_statement is not None:
+                await get_statement(query, None)
+            else:
+                await conn.prepare(query)
+        except asyncpg.PostgresError as e:
+            logger.warning(f"Запрос не подготовлен: {str(e)}: {query[:100]}")
+
 
 async def init_database() -> None:
     """Инициализация пула соединений с базой данных."""
@@ -20,9 +63,10 @@ async def init_database() -> None:
         logger.info("Инициализация пула соединений с базой данных...")
         pool = await asyncpg.create_pool(
             settings.database_url,
-            min_size=5,
-            max_size=20,
+            min_size=settings.database_pool_min_size,
+            max_size=settings.database_pool_max_size,
             command_timeout=60,
+            init=prepare_connection,
             server_settings={
                 "application_name": "telegram_bot",
                 "timezone": "UTC"
@@ -56,7 +100,11 @@ async def get_connection():
     
     conn = None
     try:
+        started = time.perf_counter()
         conn = await pool.acquire()
+        usage = current_usage()
+        if usage is not None:
+            usage.db_pool_wait += time.perf_counter() - started
         yield conn
     except Exception as e:
         logger.error(f"Ошибка при работе с соединением: {str(e)}")
@@ -66,12 +114,61 @@ async def get_connection():
             await pool.release(conn)
 
 
+@asynccontextmanager
+async def try_advisory_lock(key: int) -> AsyncIterator[bool]:
+    """Сессионная advisory-блокировка PostgreSQL без ожидания.
+
+    Фоновые задачи, запущенные в каждом webhook-воркере, выполняют
+    проход только в процессе, получившем блокировку. Соединение держится
+    до выхода из блока, затем блокировка снимается.
+
+    Args:
+        key: Ключ блокировки, общий для всех процессов
+
+    Yields:
+        True если блокировка получена, False если ее держит другой процесс
+    """
+    async with get_connection() as conn:
+        acquired = await conn.fetchval("SELECT pg_try_advisory_lock($1)", key)
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                await conn.fetchval("SELECT pg_advisory_unlock($1)", key)
+
+
+def traced(operation: str):
+    """Декоратор запроса: вызов внутри span и учет в показателях update."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(query, *args):
+            attributes = {"db.system": "postgresql", "db.operation": operation}
+            if isinstance(query, str):
+                attributes["db.statement"] = query
+            else:
+                attributes["db.statement_count"] = len(query)
+            with tracer.span(f"db {operation}", SpanKind.CLIENT, attributes):
+                result = await func(query, *args)
+            usage = current_usage()
+            if usage is not None:
+                if isinstance(query, str):
+                    usage.add_query(query, count_rows(result))
+                else:
+                    for statement, _ in query:
+                        usage.add_query(statement, 0)
+                    usage.db_rows += count_rows(result)
+            return result
+        return wrapper
+    return decorator
+
+
+@traced("execute")
 async def execute_query(query: str, *args) -> str:
     """Выполнение запроса без возврата результата (INSERT, UPDATE, DELETE)."""
     async with get_connection() as conn:
         try:
             result = await conn.execute(query, *args)
-            logger.debug(f"Выполнен запрос: {query[:100]}... с аргументами: {args}")
+            logger.debug("Выполнен запрос: %s... с аргументами: %s", query[:100], args)
             return result
         except asyncpg.PostgresError as e:
             logger.error(f"Ошибка PostgreSQL при выполнении запроса: {str(e)}")
@@ -81,12 +178,13 @@ async def execute_query(query: str, *args) -> str:
             raise RuntimeError(f"Ошибка выполнения запроса: {str(e)}")
 
 
+@traced("fetch_one")
 async def fetch_one(query: str, *args) -> Optional[dict]:
     """Получение одной записи из базы данных."""
     async with get_connection() as conn:
         try:
             result = await conn.fetchrow(query, *args)
-            logger.debug(f"Получена запись: {query[:100]}... с аргументами: {args}")
+            logger.debug("Получена запись: %s... с аргументами: %s", query[:100], args)
             return dict(result) if result else None
         except asyncpg.PostgresError as e:
             logger.error(f"Ошибка PostgreSQL при получении записи: {str(e)}")
@@ -96,12 +194,13 @@ async def fetch_one(query: str, *args) -> Optional[dict]:
             raise RuntimeError(f"Ошибка выполнения запроса: {str(e)}")
 
 
+@traced("fetch_many")
 async def fetch_many(query: str, *args) -> list[dict]:
     """Получение множества записей из базы данных."""
     async with get_connection() as conn:
         try:
             result = await conn.fetch(query, *args)
-            logger.debug(f"Получено {len(result)} записей: {query[:100]}... с аргументами: {args}")
+            logger.debug("Получено %s записей: %s... с аргументами: %s", len(result), query[:100], args)
             return [dict(row) for row in result]
         except asyncpg.PostgresError as e:
             logger.error(f"Ошибка PostgreSQL при получении записей: {str(e)}")
@@ -111,12 +210,13 @@ async def fetch_many(query: str, *args) -> list[dict]:
             raise RuntimeError(f"Ошибка выполнения запроса: {str(e)}")
 
 
+@traced("fetch_val")
 async def fetch_val(query: str, *args) -> any:
     """Получение одного значения из базы данных."""
     async with get_connection() as conn:
         try:
             result = await conn.fetchval(query, *args)
-            logger.debug(f"Получено значение: {query[:100]}... с аргументами: {args}")
+            logger.debug("Получено значение: %s... с аргументами: %s", query[:100], args)
             return result
         except asyncpg.PostgresError as e:
             logger.error(f"Ошибка PostgreSQL при получении значения: {str(e)}")
@@ -126,6 +226,7 @@ async def fetch_val(query: str, *args) -> any:
             raise RuntimeError(f"Ошибка выполнения запроса: {str(e)}")
 
 
+@traced("transaction")
 async def execute_transaction(queries: list[tuple[str, tuple]]) -> list:
     """Выполнение транзакции с несколькими запросами."""
     async with get_connection() as conn:
@@ -139,7 +240,7 @@ async def execute_transaction(queries: list[tuple[str, tuple]]) -> list:
                     else:
                         result = await conn.fetchrow(query, *args)
                         results.append(dict(result) if result else None)
-                logger.debug(f"Выполнена транзакция из {len(queries)} запросов")
+                logger.debug("Выполнена транзакция из %s запросов", len(queries))
                 return results
         except asyncpg.PostgresError as e:
             logger.error(f"Ошибка PostgreSQL при выполнении транзакции: {str(e)}")
@@ -158,7 +259,7 @@ async def test_connection() -> bool:
     """Проверка соединения с базой данных."""
     try:
         await fetch_val("SELECT 1")
-        logger.info("Соединение с базой данных успешно проверено")
+        logger.debug("Соединение с базой данных успешно проверено")
         return True
     except Exception as e:
         logger.error(f"Ошибка при проверке соединения с базой данных: {str(e)}")
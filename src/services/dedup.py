@@ -0,0 +1,81 @@
+"""Отбрасывание повторно доставленных событий."""
+
+import logging
+
+from ..config import settings
+from .cache import TTLCache
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class Deduplicator:
+    """Окно дедупликации: локальный LRU перед Redis SET NX EX.
+
+    Локальный кэш отсекает повторы внутри процесса без обращения к Redis.
+    Redis - источник истины для всех воркеров: первый SET NX ключа
+    выигрывает, остальные доставки считаются повтором. Если Redis
+    недоступен, решение принимается только по локальному кэшу, чтобы
+    сбой Redis не останавливал обработку.
+    """
+
+    def __init__(self, namespace: str, ttl_sec: int, local_size: int = 10_000):
+        """Инициализация окна.
+
+        Args:
+            namespace: Префикс ключей в Redis
+            ttl_sec: Время, в течение которого повтор отбрасывается
+            local_size: Размер локального кэша
+        """
+        self.namespace = namespace
+        self.ttl_sec = ttl_sec
+        self._local: TTLCache[str, bool] = TTLCache(max_size=local_size, ttl_sec=ttl_sec)
+        self.duplicates = 0
+
+    async def is_duplicate(self, key: str) -> bool:
+        """Отметка события как полученного.
+
+        Args:
+            key: Идентификатор события
+
+        Returns:
+            True если событие уже было получено в пределах окна
+        """
+        if key in self._local:
+            self.duplicates += 1
+            return True
+        self._local.set(key, True)
+
+        redis = get_redis()
+        if redis is None:
+            return False
+
+        try:
+            first = await redis.set(f"{self.namespace}:{key}", 1, nx=True, ex=self.ttl_sec)
+        except Exception as e:
+            logger.warning(f"Дедупликация {self.namespace}: Redis недоступен, проверка только локально: {str(e)}")
+            return False
+
+        if not first:
+            self.duplicates += 1
+            return True
+        return False
+
+    async def forget(self, key: str) -> None:
+        """Снятие отметки, чтобы повторная доставка была обработана.
+
+        Используется, когда обработку события не удалось завершить.
+        """
+        self._local.pop(key)
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.delete(f"{self.namespace}:{key}")
+        except Exception as e:
+            logger.warning(f"Дедупликация {self.namespace}: не удалось снять отметку {key}: {str(e)}")
+
+
+# Окна дедупликации update Telegram и уведомлений YooKassa
+update_deduplicator = Deduplicator("dedup:tg_update", settings.dedup_ttl_sec, settings.dedup_local_size)
+yookassa_deduplicator = Deduplicator("dedup:yookassa", settings.dedup_ttl_sec, settings.dedup_local_size)
@@ -29,7 +29,7 @@ class ExampleService:
     @staticmethod
     async def process_data(data: dict) -> dict:
         """Пример метода для обработки данных."""
-        logger.info(f"Обработка данных: {data}")
+        logger.info("Обработка данных: %s", data)
         return {"status": "processed", "data": data}
 
     @staticmethod
@@ -43,7 +43,7 @@ class ExampleService:
             )
             
             user = await UserRepository.create(user_data)
-            logger.info(f"Пример: создан пользователь {user.first_name} (ID: {user.id})")
+            logger.info("Пример: создан пользователь %s (ID: %s)", user.first_name, user.id)
             return user
             
         except Exception as e:
@@ -66,7 +66,7 @@ class ExampleService:
             # Например, баланс = сумма платежей - стоимость использованных услуг
             balance = float(total_spent)
             
-            logger.info(f"Баланс пользователя {user.first_name}: {balance}")
+            logger.info("Баланс пользователя %s: %s", user.first_name, balance)
             return balance
             
         except Exception as e:
@@ -84,7 +84,7 @@ class ExampleService:
             )
             
             reading = await ReadingRepository.create(reading_data)
-            logger.info(f"Пример: создано чтение типа {reading_type} для пользователя {user_id}")
+            logger.info("Пример: создано чтение типа %s для пользователя %s", reading_type, user_id)
             return reading
             
         except Exception as e:
@@ -96,7 +96,7 @@ class ExampleService:
         """Пример получения активных шагов с вопросами."""
         try:
             steps_with_questions = await StepRepository.get_active_with_questions()
-            logger.info(f"Получено {len(steps_with_questions)} активных шагов с вопросами")
+            logger.info("Получено %s активных шагов с вопросами", len(steps_with_questions))
             return steps_with_questions
             
         except Exception as e:
@@ -117,7 +117,7 @@ class ExampleService:
             )
             
             payment = await PaymentRepository.create(payment_data)
-            logger.info(f"Пример: создан платеж на сумму {amount} для пользователя {user_id}")
+            logger.info("Пример: создан платеж на сумму %s для пользователя %s", amount, user_id)
             return payment
             
         except Exception as e:
@@ -135,7 +135,7 @@ class ExampleService:
             )
             
             if payment:
-                logger.info(f"Пример: платеж {payment_id} успешно завершен")
+                logger.info("Пример: платеж %s успешно завершен", payment_id)
             else:
                 logger.warning(f"Пример: платеж {payment_id} не найден")
             
@@ -0,0 +1,100 @@
+"""Репозиторий для работы с воронкой сценариев."""
+
+import logging
+from typing import Dict, List, Tuple
+
+from ..models.funnel import StepEvent, FunnelStep
+from .database import get_connection, fetch_many
+
+logger = logging.getLogger(__name__)
+
+EVENT_COLUMNS = ["reading_id", "reading_type", "step_id", "step_order", "event", "created_at"]
+
+
+class FunnelRepository:
+    """Репозиторий событий шагов и счётчиков воронки."""
+
+    @staticmethod
+    async def record_events(events: List[StepEvent]) -> int:
+        """Пакетная запись событий и инкремент счётчиков воронки.
+
+        События копируются через COPY, счётчики обновляются одним UPSERT
+        с уже агрегированными приращениями. Обе операции выполняются
+        в одной транзакции.
+
+        Args:
+            events: События прохождения шагов
+
+        Returns:
+            Количество записанных событий
+        """
+        if not events:
+            return 0
+
+        try:
+            deltas: Dict[Tuple[str, int], List[int]] = {}
+            for event in events:
+                delta = deltas.setdefault((event.reading_type, event.step_id), [event.step_order, 0, 0, 0])
+                delta[0] = event.step_order
+                if event.event == "reached":
+                    delta[1] += 1
+                elif event.event == "completed":
+                    delta[2] += 1
+                else:
+                    delta[3] += 1
+
+            # Сортировка ключей исключает взаимоблокировки между процессами
+            keys = sorted(deltas)
+            async with get_connection() as conn:
+                async with conn.transaction():
+                    await conn.copy_records_to_table(
+                        "scenario_step_events",
+                        records=[
+                            (e.reading_id, e.reading_type, e.step_id, e.step_order, e.event, e.created_at)
+                            for e in events
+                        ],
+                        columns=EVENT_COLUMNS,
+                    )
+                    await conn.execute(
+                        """
+                        INSERT INTO scenario_funnel (reading_type, step_id, step_order, reached, completed, failed)
+                        SELECT * FROM unnest($1::varchar[], $2::int[], $3::int[], $4::bigint[], $5::bigint[], $6::bigint[])
+                        ON CONFLICT (reading_type, step_id) DO UPDATE SET
+                            step_order = EXCLUDED.step_order,
+                            reached = scenario_funnel.reached + EXCLUDED.reached,
+                            completed = scenario_funnel.completed + EXCLUDED.completed,
+                            failed = scenario_funnel.failed + EXCLUDED.failed,
+                            updated_at = NOW()
+                        """,
+                        [key[0] for key in keys],
+                        [key[1] for key in keys],
+                        [deltas[key][0] for key in keys],
+                        [deltas[key][1] for key in keys],
+                        [deltas[key][2] for key in keys],
+                        [deltas[key][3] for key in keys],
+                    )
+
+            logger.debug("Записано %s событий воронки по %s шагам", len(events), len(keys))
+            return len(events)
+
+        except Exception as e:
+            logger.error(f"Ошибка при записи событий воронки: {str(e)}")
+            raise RuntimeError(f"Ошибка при записи событий воронки: {str(e)}")
+
+    @staticmethod
+    async def get_funnel(reading_type: str) -> List[FunnelStep]:
+        """Получение воронки сценария из предрассчитанных счётчиков."""
+        try:
+            query = """
+                SELECT f.step_id, f.step_order, s.name AS step_name, f.reached, f.completed, f.failed
+                FROM scenario_funnel f
+                LEFT JOIN steps s ON s.id = f.step_id
+                WHERE f.reading_type = $1
+                ORDER BY f.step_order ASC
+            """
+            results = await fetch_many(query, reading_type)
+            return [FunnelStep(**result) for result in results]
+
+        except Exception as e:
+            logger.error(f"Ошибка при получении воронки сценария {reading_type}: {str(e)}")
+            raise RuntimeError(f"Ошибка при получении воронки: {str(e)}")
@@ -0,0 +1,55 @@
+"""Сервис учета прохождения шагов сценариев (воронка)."""
+
+import logging
+from datetime import datetime, timezone
+
+from ..config import settings
+from ..models.funnel import StepEvent, StepEventType
+from ..models.step import Step
+from .funnel_repository import FunnelRepository
+from .write_buffer import BatchBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class FunnelRecorder:
+    """Фиксирует события шагов через буфер пакетной записи."""
+
+    def __init__(self):
+        """Инициализация буфера событий."""
+        self.buffer: BatchBuffer[StepEvent] = BatchBuffer(
+            "scenario-funnel",
+            FunnelRepository.record_events,
+            max_rows=settings.funnel_buffer_max_rows,
+            flush_interval_ms=settings.funnel_buffer_flush_ms,
+        )
+
+    def record(self, reading_id: int, reading_type: str, step: Step, event: StepEventType) -> None:
+        """Регистрация события шага без ожидания записи в БД.
+
+        Args:
+            reading_id: ID чтения
+            reading_type: Тип чтения
+            step: Шаг сценария
+            event: Тип события (reached, completed, failed)
+        """
+        self.buffer.add(StepEvent(
+            reading_id=reading_id,
+            reading_type=reading_type,
+            step_id=step.id,
+            step_order=step.step_order,
+            event=event,
+            created_at=datetime.now(timezone.utc),
+        ))
+
+    async def flush(self) -> int:
+        """Принудительный сброс накопленных событий."""
+        return await self.buffer.flush()
+
+    async def close(self) -> None:
+        """Финальный сброс событий при остановке."""
+        await self.buffer.close()
+
+
+# Создание экземпляра сервиса
+funnel_recorder = FunnelRecorder()
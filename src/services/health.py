@@ -0,0 +1,164 @@
+"""Проверки живости и готовности процесса (/healthz и /readyz)."""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+from aiohttp import web
+
+from ..config import settings
+from . import database
+from .cache import TTLCache
+from .metrics import registry
+from .redis_client import get_redis
+from .warmup import warmup
+
+logger = logging.getLogger(__name__)
+
+_READINESS = "readiness"
+
+READY = registry.gauge("bot_ready", "Готовность процесса принимать update (1 - готов)")
+
+
+class HealthChecker:
+    """Готовность процесса по пулу БД, Redis, очередям и прогреву.
+
+    Результат проверки кэшируется на cache_ttl_sec: частые запросы
+    оркестратора и балансировщика отвечают из памяти, а SELECT 1 и PING
+    Redis выполняются не чаще раза за этот интервал. Параллельные
+    запросы при устаревшем результате ждут одну проверку.
+    """
+
+    def __init__(
+        self,
+        cache_ttl_sec: Optional[float] = None,
+        pool_saturation: Optional[float] = None,
+        queue_saturation: Optional[float] = None,
+        require_redis: Optional[bool] = None,
+    ):
+        """Инициализация.
+
+        Args:
+            cache_ttl_sec: Время жизни результата проверки
+            pool_saturation: Доля занятых соединений пула, с которой процесс не готов
+            queue_saturation: Доля заполнения очереди, с которой процесс не готов
+            require_redis: Считать недоступность Redis неготовностью
+        """
+        self.cache_ttl_sec = settings.health_cache_ttl_sec if cache_ttl_sec is None else cache_ttl_sec
+        self.pool_saturation = settings.readiness_pool_saturation if pool_saturation is None else pool_saturation
+        self.queue_saturation = settings.readiness_queue_saturation if queue_saturation is None else queue_saturation
+        self.require_redis = settings.readiness_require_redis if require_redis is None else require_redis
+        self.started = time.monotonic()
+        self.draining = False
+        self._queues: Dict[str, Callable[[], Dict[str, int]]] = {}
+        self._cache: TTLCache[str, Dict[str, Any]] = TTLCache(max_size=1, ttl_sec=self.cache_ttl_sec)
+        self._lock = asyncio.Lock()
+
+    def watch_queue(self, name: str, depth: Callable[[], int], capacity: int) -> None:
+        """Учет очереди в готовности.
+
+        Args:
+            name: Имя очереди в ответе /readyz
+            depth: Функция текущей глубины очереди
+            capacity: Предельная глубина очереди
+        """
+        self._queues[name] = lambda: {"depth": depth(), "capacity": capacity}
+
+    def unwatch_queue(self, name: str) -> None:
+        """Снятие очереди с учета."""
+        self._queues.pop(name, None)
+
+    def start_draining(self) -> None:
+        """Остановка процесса: /readyz сразу отвечает 503."""
+        self.draining = True
+        self._cache.clear()
+
+    def liveness(self) -> Dict[str, Any]:
+        """Процесс жив, пока цикл событий отвечает на запросы."""
+        return {"status": "ok", "uptime_sec": round(time.monotonic() - self.started, 1)}
+
+    async def readiness(self) -> Dict[str, Any]:
+        """Результат проверки готовности, не старше cache_ttl_sec."""
+        report = self._cache.get(_READINESS)
+        if report is not None:
+            return report
+        async with self._lock:
+            report = self._cache.get(_READINESS)
+            if report is None:
+                report = await self.check()
+                self._cache.set(_READINESS, report)
+        return report
+
+    async def check(self) -> Dict[str, Any]:
+        """Проверка готовности без кэша."""
+        if warmup.failed:
+            # Прогрев не удался при запуске (например, БД была недоступна): повторяем
+            await warmup.run()
+        database_check, redis_check = await asyncio.gather(self._check_database(), self._check_redis())
+        checks: Dict[str, Dict[str, Any]] = {
+            "accepting": {"ok": not self.draining},
+            "warmup": {"ok": warmup.completed},
+            "database": database_check,
+            "redis": redis_check,
+        }
+        if warmup.failed:
+            checks["warmup"]["failed"] = warmup.failed
+        for name, read in self._queues.items():
+            queue = read()
+            queue["ok"] = queue["depth"] < queue["capacity"] * self.queue_saturation
+            checks[f"queue:{name}"] = queue
+
+        ready = all(check["ok"] for name, check in checks.items() if name != "redis" or self.require_redis)
+        READY.set(1 if ready else 0)
+        if not ready:
+            failed = [name for name, check in checks.items() if not check["ok"]]
+            logger.warning(f"Процесс не готов принимать update: {', '.join(failed)}")
+        return {"status": "ready" if ready else "not_ready", "checks": checks}
+
+    async def _check_database(self) -> Dict[str, Any]:
+        """Занятость пула и SELECT 1, если в пуле есть свободное соединение."""
+        pool = database.pool
+        if pool is None:
+            return {"ok": False, "error": "pool is not initialized"}
+
+        max_size = pool.get_max_size()
+        in_use = pool.get_size() - pool.get_idle_size()
+        result: Dict[str, Any] = {"in_use": in_use, "max_size": max_size}
+        if in_use >= max_size * self.pool_saturation:
+            # Проверочный запрос ждал бы соединения вместе с обработчиками
+            result["ok"] = False
+            return result
+        result["ok"] = await database.test_connection()
+        return result
+
+    async def _check_redis(self) -> Dict[str, Any]:
+        """PING Redis с таймаутом клиента."""
+        redis = get_redis()
+        if redis is None:
+            return {"ok": False, "error": "client is not initialized"}
+        try:
+            await redis.ping()
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+        return {"ok": True}
+
+    async def healthz_handler(self, request: web.Request) -> web.Response:
+        """GET /healthz."""
+        return web.json_response(self.liveness())
+
+    async def readyz_handler(self, request: web.Request) -> web.Response:
+        """GET /readyz: 200 при готовности, иначе 503."""
+        report = await self.readiness()
+        status = 200 if report["status"] == "ready" else 503
+        return web.json_response(report, status=status, dumps=lambda obj: json.dumps(obj, ensure_ascii=False))
+
+    def register(self, app: web.Application) -> None:
+        """Регистрация /healthz и /readyz в приложении aiohttp."""
+        app.router.add_get("/healthz", self.healthz_handler)
+        app.router.add_get("/readyz", self.readyz_handler)
+
+
+# Проверки процесса
+health_checker = HealthChecker()
@@ -0,0 +1,287 @@
+"""Асинхронный структурированный вывод логов.
+
+Корневой логгер получает единственный обработчик - QueueLogHandler.
+Поток, вызвавший logger.info, только создает запись, проверяет ее
+фильтрами и кладет в очередь; форматирование (в том числе подстановка
+аргументов %-шаблона) и запись в stderr выполняет поток QueueListener.
+Поэтому вывод логов не блокирует цикл событий и не попадает в профили
+задержки цикла.
+
+Фильтры обработчика выполняются в вызывающем потоке:
+- ContextFilter добавляет к записи поля контекста (update_id, user_id,
+  chat_id), заданные LogContextMiddleware через bind_log_context;
+- SamplingFilter оставляет заданную долю записей уровня INFO и ниже
+  для логгеров из LOG_SAMPLE_RATES;
+- RateLimitFilter ограничивает число записей уровня INFO и ниже от одного
+  логгера (token bucket); первая запись после ограничения получает поле
+  suppressed с числом отброшенных.
+
+Предупреждения и ошибки не сэмплируются и не ограничиваются.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import settings
+from .metrics import registry
+
+LOG_RECORDS_DROPPED = registry.counter(
+    "log_records_dropped_total",
+    "Записи лога, отброшенные до вывода",
+    ["reason"],
+)
+
+# Формат текстового вывода
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Атрибуты LogRecord, которые не выводятся как дополнительные поля
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_log_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+
+
+def log_context() -> Dict[str, Any]:
+    """Поля контекста текущей задачи."""
+    return _log_context.get()
+
+
+def bind_log_context(**fields: Any) -> Any:
+    """Добавление полей к контексту текущей задачи.
+
+    Returns:
+        Токен для reset_log_context
+    """
+    return _log_context.set({**_log_context.get(), **fields})
+
+
+def reset_log_context(token: Any) -> None:
+    """Возврат контекста, действовавшего до bind_log_context."""
+    _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Поля контекста задачи в записи лога (атрибут context)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Добавление контекста; запись не отбрасывается."""
+        context = _log_context.get()
+        if context:
+            record.context = context
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Сэмплирование записей уровня INFO и ниже по имени логгера.
+
+    Доля задается для логгера и действует на дочерние логгеры:
+    {"aiogram.event": 0.1} оставляет каждую десятую запись
+    "Update id=... is handled".
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        """Инициализация фильтра.
+
+        Args:
+            rates: Доля сохраняемых записей по имени логгера
+        """
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+
+    def rate(self, name: str) -> float:
+        """Доля для логгера: задана для него или для ближайшего родителя."""
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            prefix = name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Сохранение записи с вероятностью rate."""
+        if record.levelno > logging.INFO or not self.rates:
+            return True
+        rate = self.rate(record.name)
+        if rate >= 1 or random.random() < rate:
+            return True
+        LOG_RECORDS_DROPPED.inc("sampled")
+        return False
+
+
+class RateLimitFilter(logging.Filter):
+    """Ограничение числа записей уровня INFO и ниже от одного логгера.
+
+    Каждый логгер получает burst записей подряд и rate_per_sec записей
+    в секунду сверх этого. Отброшенные записи считаются, их число
+    выводится в поле suppressed первой пропущенной записи.
+    """
+
+    def __init__(self, rate_per_sec: float, burst: int):
+        """Инициализация фильтра.
+
+        Args:
+            rate_per_sec: Записей в секунду на логгер
+            burst: Записей подряд без ограничения
+        """
+        super().__init__()
+        self.rate_per_sec = rate_per_sec
+        self.burst = max(burst, 1)
+        # Имя логгера -> (токены, время последнего пополнения, отброшено)
+        self._buckets: Dict[str, Tuple[float, float, int]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Пропуск записи при наличии токена."""
+        if record.levelno > logging.INFO:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, dropped = self._buckets.get(record.name, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate_per_sec)
+            if tokens < 1:
+                self._buckets[record.name] = (tokens, now, dropped + 1)
+                LOG_RECORDS_DROPPED.inc("rate_limit")
+                return False
+            self._buckets[record.name] = (tokens - 1, now, 0)
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+
+def record_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    """Контекст и дополнительные поля записи (extra)."""
+    fields = dict(getattr(record, "context", {}))
+    for key, value in record.__dict__.items():
+        if key not in _RECORD_ATTRS and key != "context":
+            fields[key] = value
+    return fields
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Сериализация записи."""
+        data: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        data.update(record_fields(record))
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Текстовый формат с полями контекста в конце строки."""
+
+    def __init__(self):
+        """Инициализация формата."""
+        super().__init__(TEXT_FORMAT)
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        """Сообщение и поля "ключ=значение"."""
+        message = super().formatMessage(record)
+        fields = record_fields(record)
+        if fields:
+            message += " [" + " ".join(f"{key}={value}" for key, value in fields.items()) + "]"
+        return message
+
+
+class QueueLogHandler(QueueHandler):
+    """Обработчик, передающий записи в поток вывода без форматирования.
+
+    В отличие от QueueHandler запись не форматируется в вызывающем
+    потоке: сообщение собирается из шаблона и аргументов в потоке
+    QueueListener. Изменяемые аргументы, измененные сразу после вызова
+    логгера, могут попасть в лог уже измененными. При переполненной
+    очереди запись отбрасывается.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Запись передается как есть."""
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Постановка в очередь без ожидания."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc("queue_full")
+
+
+_handler: Optional[QueueLogHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    log_format: Optional[str] = None,
+    stream: Any = None,
+) -> QueueLogHandler:
+    """Настройка корневого логгера; повторный вызов заменяет прежнюю настройку.
+
+    Args:
+        level: Уровень логирования (по умолчанию LOG_LEVEL)
+        log_format: "json" или "text" (по умолчанию LOG_FORMAT)
+        stream: Поток вывода (по умолчанию stderr)
+
+    Returns:
+        Обработчик корневого логгера
+    """
+    global _handler, _listener
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if (log_format or settings.log_format) == "json" else TextFormatter())
+
+    handler = QueueLogHandler(queue.Queue(settings.log_queue_size))
+    handler.addFilter(ContextFilter())
+    if settings.log_sample_rates:
+        handler.addFilter(SamplingFilter(settings.log_sample_rates))
+    if settings.log_rate_limit_per_sec > 0:
+        handler.addFilter(RateLimitFilter(settings.log_rate_limit_per_sec, settings.log_rate_limit_burst))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level or settings.log_level)
+
+    _listener = QueueListener(handler.queue, output)
+    _listener.start()
+    _handler = handler
+    return handler
+
+
+def shutdown_logging() -> None:
+    """Вывод оставшихся записей и остановка потока вывода."""
+    global _handler, _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,225 @@
+"""Измерение задержки цикла событий и поиск блокирующих вызовов."""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from ..config import settings
+from .metrics import EVENT_LOOP_BLOCKED, EVENT_LOOP_LAG, EVENT_LOOP_LAG_LAST, EVENT_LOOP_SLOW_CALLBACKS
+
+logger = logging.getLogger(__name__)
+
+# Глубина сохраняемого стека
+STACK_LIMIT = 30
+
+
+class BlockingCallWatchdog:
+    """Поток-сторож, снимающий стек потока цикла событий во время блокировки.
+
+    Поток раз в threshold/2 ставит в цикл событий отметку через
+    call_soon_threadsafe. Если отметка не обработана за threshold, цикл
+    занят синхронным кодом: поток читает текущий кадр потока цикла
+    (sys._current_frames) - это и есть блокирующий вызов. Когда цикл
+    освобождается и обрабатывает отметку, блокировка с ее стеком пишется
+    в лог и в event_loop_blocked_seconds.
+    """
+
+    def __init__(self, threshold_sec: float):
+        """Инициализация.
+
+        Args:
+            threshold_sec: Время, после которого цикл считается заблокированным
+        """
+        self.threshold_sec = threshold_sec
+        self.last_stack: Optional[str] = None
+        self.last_stack_at = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._ping_sent_at: Optional[float] = None
+        self._captured: Optional[str] = None
+
+    def start(self) -> None:
+        """Запуск потока для текущего цикла событий."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Остановка потока."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.threshold_sec * 2)
+            self._thread = None
+        with self._lock:
+            self._ping_sent_at = None
+            self._captured = None
+
+    def recent_stack(self, within_sec: float) -> Optional[str]:
+        """Стек, снятый не раньше within_sec секунд назад."""
+        if self.last_stack is not None and time.monotonic() - self.last_stack_at <= within_sec:
+            return self.last_stack
+        return None
+
+    def _watch(self) -> None:
+        """Цикл потока: отметки и снятие стека."""
+        while not self._stopped.wait(self.threshold_sec / 2):
+            with self._lock:
+                sent_at = self._ping_sent_at
+                if sent_at is None:
+                    self._ping_sent_at = time.monotonic()
+                    try:
+                        self._loop.call_soon_threadsafe(self._pong)
+                    except RuntimeError:
+                        # Цикл событий закрыт
+                        return
+                elif self._captured is None and time.monotonic() - sent_at >= self.threshold_sec:
+                    self._captured = self._capture_stack()
+                    self.last_stack, self.last_stack_at = self._captured, time.monotonic()
+
+    def _capture_stack(self) -> str:
+        """Стек потока цикла событий."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return "<стек недоступен>"
+        return "".join(traceback.format_stack(frame, limit=STACK_LIMIT))
+
+    def _pong(self) -> None:
+        """Обработка отметки в цикле событий."""
+        with self._lock:
+            sent_at, stack = self._ping_sent_at, self._captured
+            self._ping_sent_at = None
+            self._captured = None
+        if stack is not None and sent_at is not None:
+            self.report(time.monotonic() - sent_at, stack)
+
+    def report(self, blocked_sec: float, stack: str) -> None:
+        """Учет блокировки цикла событий."""
+        EVENT_LOOP_BLOCKED.observe(blocked_sec)
+        logger.warning(f"Цикл событий заблокирован на {blocked_sec * 1000:.0f} мс, стек блокирующего вызова:\n{stack}")
+
+
+class SlowCallbackFilter(logging.Filter):
+    """Учет предупреждений asyncio о медленных callback.
+
+    В режиме отладки asyncio пишет "Executing <handle> took N seconds"
+    для callback дольше loop.slow_callback_duration. Фильтр считает их в
+    event_loop_slow_callbacks_total и добавляет к записи стек, снятый
+    BlockingCallWatchdog во время этого callback.
+    """
+
+    def __init__(self, watchdog: Optional[BlockingCallWatchdog] = None):
+        """Инициализация фильтра.
+
+        Args:
+            watchdog: Источник стека блокирующего вызова
+        """
+        super().__init__()
+        self.watchdog = watchdog
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Учет записи о медленном callback; запись не отбрасывается."""
+        if not (isinstance(record.msg, str) and record.msg.startswith("Executing ") and "took" in record.msg):
+            return True
+        EVENT_LOOP_SLOW_CALLBACKS.inc()
+        duration = record.args[-1] if isinstance(record.args, tuple) and record.args else 0
+        stack = self.watchdog.recent_stack(duration + self.watchdog.threshold_sec) if self.watchdog else None
+        if stack is not None:
+            record.msg += "\nСтек во время callback:\n%s"
+            record.args = (*record.args, stack)
+        return True
+
+
+class EventLoopLagMonitor:
+    """Периодически засыпает на interval_sec и меряет, насколько позже проснулся.
+
+    Опоздание - время, которое цикл событий был занят другим кодом
+    (синхронные вызовы, тяжелые обработчики). Значение пишется
+    в event_loop_lag_seconds и event_loop_lag_last_seconds.
+
+    Если задан порог slow_callback_ms, вместе с монитором запускается
+    BlockingCallWatchdog, а при asyncio_debug включается режим отладки
+    asyncio с тем же порогом slow_callback_duration.
+    """
+
+    def __init__(
+        self,
+        interval_sec: Optional[float] = None,
+        slow_callback_ms: Optional[int] = None,
+        asyncio_debug: Optional[bool] = None,
+    ):
+        """Инициализация монитора.
+
+        Args:
+            interval_sec: Интервал замеров (по умолчанию из настроек)
+            slow_callback_ms: Порог блокировки цикла, 0 - не искать блокировки
+            asyncio_debug: Включить поиск медленных callback средствами asyncio
+        """
+        self.interval_sec = interval_sec or settings.loop_lag_interval_sec
+        self.slow_callback_ms = settings.loop_slow_callback_ms if slow_callback_ms is None else slow_callback_ms
+        self.asyncio_debug = settings.loop_asyncio_debug if asyncio_debug is None else asyncio_debug
+        self.last_lag = 0.0
+        self.watchdog: Optional[BlockingCallWatchdog] = None
+        self._filter: Optional[SlowCallbackFilter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Запуск фоновой задачи и поиска блокировок."""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+        if self.slow_callback_ms > 0:
+            self.watchdog = BlockingCallWatchdog(self.slow_callback_ms / 1000)
+            self.watchdog.start()
+        if self.asyncio_debug:
+            loop = asyncio.get_running_loop()
+            loop.set_debug(True)
+            loop.slow_callback_duration = (self.slow_callback_ms or 100) / 1000
+            self._filter = SlowCallbackFilter(self.watchdog)
+            logging.getLogger("asyncio").addFilter(self._filter)
+
+    async def stop(self) -> None:
+        """Остановка фоновой задачи и поиска блокировок."""
+        if self.watchdog is not None:
+            self.watchdog.stop()
+            self.watchdog = None
+        if self._filter is not None:
+            logging.getLogger("asyncio").removeFilter(self._filter)
+            self._filter = None
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def record(self, lag: float) -> None:
+        """Учет одного замера."""
+        self.last_lag = lag
+        EVENT_LOOP_LAG.observe(lag)
+        EVENT_LOOP_LAG_LAST.set(lag)
+
+    async def _run(self) -> None:
+        """Цикл замеров."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval_sec)
+            self.record(max(loop.time() - started - self.interval_sec, 0.0))
+
+
+# Монитор процесса
+loop_lag_monitor = EventLoopLagMonitor()
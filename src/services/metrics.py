@@ -0,0 +1,382 @@
+"""Метрики процесса в текстовом формате Prometheus.
+
+Счетчики, gauge и гистограммы хранятся в памяти процесса и отдаются
+обработчиком /metrics. Обновление метрики - словарный поиск по меткам
+и сложение, поэтому метрики можно держать включенными в проде.
+"""
+
+import bisect
+import logging
+import math
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from aiohttp import web
+
+from . import database
+
+if TYPE_CHECKING:
+    from .chat_executor import ChatExecutor
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Границы гистограмм по умолчанию, секунды
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Экранирование значения метки."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Метки в виде {a="1",b="2"}."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Число в формате экспозиции."""
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """Базовая метрика с метками."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        """Инициализация.
+
+        Args:
+            name: Имя метрики
+            description: Текст HELP
+            labelnames: Имена меток
+        """
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Sequence[str]) -> LabelValues:
+        """Проверка числа значений меток."""
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: ожидаются метки {self.labelnames}, получено {labels}")
+        return tuple(str(value) for value in labels)
+
+    def render(self) -> List[str]:
+        """Строки экспозиции с HELP и TYPE."""
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type_name}", *self.samples()]
+
+    def samples(self) -> List[str]:
+        """Строки значений."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        """Инициализация счетчика."""
+        super().__init__(name, description, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Увеличение счетчика с метками labels."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        """Текущее значение."""
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        """Строки значений."""
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(Metric):
+    """Значение, которое может расти и убывать.
+
+    Gauge с collect не хранит значение, а читает его при каждой выдаче
+    метрик - так снимаются показатели пула соединений. Для gauge с метками
+    collect возвращает словарь значений по кортежам значений меток.
+    """
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Callable[[], Union[None, float, Dict[LabelValues, float]]]] = None,
+    ):
+        """Инициализация.
+
+        Args:
+            collect: Функция, возвращающая текущее значение (None - нет значения)
+                или словарь значений по меткам
+        """
+        super().__init__(name, description, labelnames)
+        self.collect = collect
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        """Установка значения."""
+        self._values[self._key(labels)] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Увеличение значения."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        """Уменьшение значения."""
+        self.inc(*labels, amount=-amount)
+
+    def value(self, *labels: str) -> float:
+        """Текущее значение."""
+        if self.collect is not None:
+            value = self.collect()
+            if isinstance(value, dict):
+                return value.get(self._key(labels), 0)
+            return value or 0
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        """Строки значений."""
+        if self.collect is not None:
+            try:
+                value = self.collect()
+            except Exception as e:
+                logger.warning(f"Метрика {self.name} не собрана: {str(e)}")
+                return []
+            if value is None:
+                return []
+            if isinstance(value, dict):
+                return [
+                    f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(item)}"
+                    for key, item in value.items()
+                ]
+            return [f"{self.name} {_format_value(value)}"]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам с суммой и количеством."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        """Инициализация.
+
+        Args:
+            buckets: Верхние границы корзин по возрастанию, без +Inf
+        """
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Для каждого набора меток: счетчики корзин (последняя - +Inf), сумма
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Учет значения."""
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        """Количество значений."""
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def sum(self, *labels: str) -> float:
+        """Сумма значений."""
+        state = self._values.get(self._key(labels))
+        return state[1][0] if state else 0.0
+
+    def samples(self) -> List[str]:
+        """Строки корзин, суммы и количества."""
+        lines = []
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        """Инициализация пустого набора."""
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Регистрация метрики; имя должно быть уникальным."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Регистрация счетчика."""
+        return self.register(Counter(name, description, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Callable[[], Union[None, float, Dict[LabelValues, float]]]] = None,
+    ) -> Gauge:
+        """Регистрация gauge."""
+        return self.register(Gauge(name, description, labelnames, collect))
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Регистрация гистограммы."""
+        return self.register(Histogram(name, description, labelnames, buckets))
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _pool_value(read: Callable[[object], float]) -> Callable[[], Optional[float]]:
+    """Функция чтения показателя пула, если пул создан."""
+    def collect() -> Optional[float]:
+        return read(database.pool) if database.pool is not None else None
+    return collect
+
+
+# Исполнители задач по чатам, показатели которых выдаются в метриках
+_chat_executors: Dict[str, "ChatExecutor"] = {}
+
+
+def watch_chat_executor(name: str, executor: "ChatExecutor") -> None:
+    """Выдача показателей исполнителя в метриках chat_executor_*{executor=name}."""
+    _chat_executors[name] = executor
+
+
+def _executor_value(read: Callable[["ChatExecutor"], float]) -> Callable[[], Dict[LabelValues, float]]:
+    """Функция чтения показателя всех наблюдаемых исполнителей."""
+    def collect() -> Dict[LabelValues, float]:
+        return {(name,): read(executor) for name, executor in _chat_executors.items()}
+    return collect
+
+
+# Метрики процесса
+registry = MetricsRegistry()
+
+HANDLER_DURATION = registry.histogram(
+    "bot_handler_duration_seconds",
+    "Время обработчика update",
+    ["router", "handler", "status"],
+)
+TELEGRAM_API_DURATION = registry.histogram(
+    "telegram_api_request_duration_seconds",
+    "Время вызова Bot API",
+    ["method"],
+)
+TELEGRAM_API_ERRORS = registry.counter(
+    "telegram_api_errors_total",
+    "Ошибки вызовов Bot API",
+    ["method", "error"],
+)
+YOOKASSA_DURATION = registry.histogram(
+    "yookassa_request_duration_seconds",
+    "Время запроса к API YooKassa (каждая попытка)",
+    ["operation", "status"],
+)
+SCENARIO_DURATION = registry.histogram(
+    "scenario_playback_duration_seconds",
+    "Длительность проигрывания сценария, включая паузы шагов",
+    ["result"],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+EVENT_LOOP_LAG = registry.histogram(
+    "event_loop_lag_seconds",
+    "Задержка срабатывания таймера цикла событий",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+EVENT_LOOP_LAG_LAST = registry.gauge(
+    "event_loop_lag_last_seconds",
+    "Последняя измеренная задержка цикла событий",
+)
+EVENT_LOOP_BLOCKED = registry.histogram(
+    "event_loop_blocked_seconds",
+    "Блокировки цикла событий дольше LOOP_SLOW_CALLBACK_MS",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+EVENT_LOOP_SLOW_CALLBACKS = registry.counter(
+    "event_loop_slow_callbacks_total",
+    "Медленные callback по данным отладки asyncio",
+)
+registry.gauge("db_pool_size", "Открытые соединения пула БД", collect=_pool_value(lambda p: p.get_size()))
+registry.gauge("db_pool_idle", "Свободные соединения пула БД", collect=_pool_value(lambda p: p.get_idle_size()))
+registry.gauge("db_pool_max_size", "Предельный размер пула БД", collect=_pool_value(lambda p: p.get_max_size()))
+registry.gauge(
+    "db_pool_in_use",
+    "Занятые соединения пула БД",
+    collect=_pool_value(lambda p: p.get_size() - p.get_idle_size()),
+)
+for _name, _description, _read in (
+    ("chat_executor_active_chats", "Чаты с невыполненными задачами", lambda e: e.active_chats),
+    ("chat_executor_pending", "Принятые, но не завершенные задачи", lambda e: e.pending),
+    ("chat_executor_running", "Выполняемые задачи", lambda e: e.running),
+    ("chat_executor_max_queue_depth", "Глубина самой длинной очереди чата", lambda e: e.max_queue_depth()),
+    ("chat_executor_completed", "Завершенные задачи с запуска процесса", lambda e: e.completed),
+    ("chat_executor_failed", "Задачи, завершенные ошибкой, с запуска процесса", lambda e: e.failed),
+):
+    registry.gauge(_name, _description, ["executor"], collect=_executor_value(_read))
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """GET /metrics."""
+    return web.Response(body=registry.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+
+def create_metrics_app(path: str = "/metrics") -> web.Application:
+    """Отдельное приложение с одним маршрутом метрик."""
+    app = web.Application()
+    app.router.add_get(path, metrics_handler)
+    return app
@@ -0,0 +1,205 @@
+"""Фоновая сверка зависших платежей с YooKassa."""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..models.payment import Payment, PAYMENT_STATUS_TRANSITIONS
+from .database import try_advisory_lock
+from .payment_repository import PaymentRepository
+from .payments import payment_service
+from .yookassa_client import YooKassaClient, yookassa_client
+from .yookassa_event_repository import YooKassaEventRepository
+
+logger = logging.getLogger(__name__)
+
+# Уведомление моложе этого возраста еще может разбираться очередью
+EVENT_RETRY_AFTER = timedelta(minutes=1)
+
+# После стольких неудачных попыток уведомление не повторяется, платеж сверяется по статусу
+MAX_EVENT_ATTEMPTS = 20
+
+# Ключ advisory-блокировки: сверку выполняет один процесс из всех воркеров
+RECONCILE_LOCK_KEY = 7_460_002
+
+
+class PaymentReconciler:
+    """Периодически сверяет неоплаченные платежи со статусом в YooKassa.
+
+    Платежи, уведомление о которых потерялось, иначе навсегда остаются
+    в pending. Воркер читает такие платежи пачками, запрашивает их статус
+    в YooKassa не более чем concurrency запросами одновременно и применяет
+    изменения одной транзакцией на пачку. Платеж, который YooKassa не знает
+    или который не оплачен дольше expire_after, переводится в expired.
+
+    Перед сверкой повторяются уведомления из yookassa_events, обработка
+    которых не удалась или не дошла до очереди. Воркер запускается в каждом
+    процессе, но проход выполняет только процесс, получивший
+    advisory-блокировку RECONCILE_LOCK_KEY, так что YooKassa не получает
+    одни и те же запросы от всех воркеров.
+    """
+
+    def __init__(
+        self,
+        client: Optional[YooKassaClient] = None,
+        interval_sec: Optional[int] = None,
+        min_age_minutes: Optional[int] = None,
+        expire_hours: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ):
+        """Инициализация воркера.
+
+        Args:
+            client: Клиент YooKassa (по умолчанию общий клиент процесса)
+            interval_sec: Интервал между сверками (по умолчанию из настроек)
+            min_age_minutes: Возраст платежа, после которого он сверяется (по умолчанию из настроек)
+            expire_hours: Возраст, после которого неоплаченный платеж истекает (по умолчанию из настроек)
+            concurrency: Число одновременных запросов в YooKassa (по умолчанию из настроек)
+            batch_size: Размер пачки платежей (по умолчанию из настроек)
+        """
+        self.client = client or yookassa_client
+        self.interval_sec = interval_sec or settings.payment_reconcile_interval_sec
+        self.min_age = timedelta(minutes=min_age_minutes or settings.payment_reconcile_min_age_minutes)
+        self.expire_after = timedelta(hours=expire_hours or settings.payment_reconcile_expire_hours)
+        self.concurrency = concurrency or settings.payment_reconcile_concurrency
+        self.batch_size = batch_size or settings.payment_reconcile_batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Запуск фоновой задачи."""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run(), name="payment-reconcile")
+        logger.info("Запущена сверка платежей каждые %s сек", self.interval_sec)
+
+    async def stop(self) -> None:
+        """Остановка фоновой задачи."""
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Сверка платежей остановлена")
+
+    async def run_once(self) -> Dict[str, int]:
+        """Однократная сверка всех зависших платежей.
+
+        Returns:
+            Счетчики: checked, updated, expired, failed
+        """
+        stats = {"checked": 0, "updated": 0, "expired": 0, "failed": 0}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async for batch in PaymentRepository.iter_stale_pending(self.min_age, self.batch_size):
+            results = await asyncio.gather(*(self._fetch_status(payment, semaphore) for payment in batch))
+
+            changes: List[Tuple[str, str]] = []
+            for payment, (ok, remote_status) in zip(batch, results):
+                stats["checked"] += 1
+                if not ok:
+                    stats["failed"] += 1
+                    continue
+                new_status = self.resolve_status(payment, remote_status)
+                if new_status is not None:
+                    changes.append((payment.yookassa_payment_id, new_status))
+
+            if not changes:
+                continue
+            for transition in await PaymentRepository.apply_status_transitions(changes):
+                if transition.applied:
+                    stats["expired" if transition.new_status == "expired" else "updated"] += 1
+
+        if stats["checked"]:
+            logger.info("Сверка платежей: %s", stats)
+        return stats
+
+    async def retry_events(self) -> int:
+        """Повторная обработка записанных, но не обработанных уведомлений YooKassa.
+
+        Returns:
+            Число обработанных уведомлений
+        """
+        events = await YooKassaEventRepository.get_unprocessed(EVENT_RETRY_AFTER, MAX_EVENT_ATTEMPTS, self.batch_size)
+        processed = 0
+        for event in events:
+            if await payment_service.process_webhook_event(event):
+                processed += 1
+        if events:
+            logger.info("Повторено уведомлений YooKassa: %s, обработано: %s", len(events), processed)
+        return processed
+
+    async def run_exclusive(self) -> bool:
+        """Повтор уведомлений и сверка, если их не выполняет другой процесс.
+
+        Returns:
+            True если проход выполнен в этом процессе
+        """
+        async with try_advisory_lock(RECONCILE_LOCK_KEY) as acquired:
+            if not acquired:
+                logger.debug("Сверку платежей выполняет другой процесс")
+                return False
+            await self.retry_events()
+            await self.run_once()
+            return True
+
+    def resolve_status(
+        self,
+        payment: Payment,
+        remote_status: Optional[str],
+        now: Optional[datetime] = None,
+    ) -> Optional[str]:
+        """Статус, в который нужно перевести платеж по ответу YooKassa.
+
+        Args:
+            payment: Платеж из БД
+            remote_status: Статус в YooKassa или None, если платеж там не найден
+            now: Текущее время (для тестов)
+
+        Returns:
+            Новый статус или None, если менять нечего
+        """
+        if remote_status is not None and remote_status != payment.status:
+            return remote_status if remote_status in PAYMENT_STATUS_TRANSITIONS else None
+
+        now = now or datetime.now(timezone.utc)
+        created_at = payment.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        if remote_status is None or now - created_at >= self.expire_after:
+            return "expired"
+        return None
+
+    async def _fetch_status(self, payment: Payment, semaphore: asyncio.Semaphore) -> Tuple[bool, Optional[str]]:
+        """Запрос статуса платежа в YooKassa.
+
+        Returns:
+            (успех запроса, статус или None если платеж не найден)
+        """
+        async with semaphore:
+            try:
+                remote = await self.client.get_payment(payment.yookassa_payment_id)
+            except Exception as e:
+                logger.warning(f"Сверка платежа {payment.id} отложена: {str(e)}")
+                return False, None
+        return True, remote.get("status") if remote else None
+
+    async def _run(self) -> None:
+        """Цикл фоновой сверки."""
+        while True:
+            try:
+                await self.run_exclusive()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка в фоновой сверке платежей: {str(e)}")
+            await asyncio.sleep(self.interval_sec)
+
+
+# Создание экземпляра воркера
+payment_reconciler = PaymentReconciler()
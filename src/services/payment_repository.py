@@ -1,14 +1,23 @@
 """Репозиторий для работы с платежами."""
 
+import json
 import logging
-from typing import Optional, List
+from datetime import timedelta
+from typing import AsyncIterator, Dict, Optional, List, Sequence, Tuple
 from decimal import Decimal
 
-from ..models.payment import Payment, PaymentCreate, PaymentUpdate
-from .database import fetch_one, fetch_many, execute_query, fetch_val
+from ..models.payment import Payment, PaymentCreate, PaymentUpdate, PaymentTransition, can_transition
+from .database import fetch_one, fetch_many, execute_query, fetch_val, get_connection, prepared
 
 logger = logging.getLogger(__name__)
 
+# Запросы горячего пути готовятся на каждом соединении пула
+INSERT_PAYMENT = prepared("""
+    INSERT INTO payments (user_id, yookassa_payment_id, amount, currency, status, description, metadata)
+    VALUES ($1, $2, $3, $4, $5, $6, $7::jsonb)
+    RETURNING id, user_id, yookassa_payment_id, amount, currency, status, description, metadata, created_at, updated_at
+""")
+
 
 class PaymentRepository:
     """Репозиторий для управления платежами."""
@@ -17,26 +26,21 @@ class PaymentRepository:
     async def create(payment_data: PaymentCreate) -> Payment:
         """Создание нового платежа."""
         try:
-            query = """
-                INSERT INTO payments (user_id, yookassa_payment_id, amount, currency, status, description, metadata)
-                VALUES ($1, $2, $3, $4, $5, $6, $7)
-                RETURNING id, user_id, yookassa_payment_id, amount, currency, status, description, metadata, created_at, updated_at
-            """
             result = await fetch_one(
-                query,
+                INSERT_PAYMENT,
                 payment_data.user_id,
                 payment_data.yookassa_payment_id,
                 payment_data.amount,
                 payment_data.currency,
                 payment_data.status,
                 payment_data.description,
-                payment_data.metadata
+                json.dumps(payment_data.metadata or {}, ensure_ascii=False)
             )
             
             if not result:
                 raise RuntimeError("Не удалось создать платеж")
             
-            logger.info(f"Создан платеж для пользователя: {payment_data.user_id} на сумму {payment_data.amount}")
+            logger.info("Создан платеж для пользователя: %s на сумму %s", payment_data.user_id, payment_data.amount)
             return Payment(**result)
             
         except Exception as e:
@@ -146,8 +150,8 @@ class PaymentRepository:
                 arg_index += 1
 
             if payment_data.metadata is not None:
-                update_fields.append(f"metadata = ${arg_index}")
-                args.append(payment_data.metadata)
+                update_fields.append(f"metadata = ${arg_index}::jsonb")
+                args.append(json.dumps(payment_data.metadata, ensure_ascii=False))
                 arg_index += 1
 
             if not update_fields:
@@ -168,7 +172,7 @@ class PaymentRepository:
             if not result:
                 return None
             
-            logger.info(f"Обновлен платеж с ID: {payment_id}")
+            logger.info("Обновлен платеж с ID: %s", payment_id)
             return Payment(**result)
             
         except Exception as e:
@@ -199,13 +203,158 @@ class PaymentRepository:
             if not result:
                 return None
             
-            logger.info(f"Обновлен статус платежа {payment_id} на {status}")
+            logger.info("Обновлен статус платежа %s на %s", payment_id, status)
             return Payment(**result)
             
         except Exception as e:
             logger.error(f"Ошибка при обновлении статуса платежа {payment_id}: {str(e)}")
             raise RuntimeError(f"Ошибка при обновлении статуса платежа: {str(e)}")
 
+    @staticmethod
+    async def apply_status_transition(yookassa_payment_id: str, new_status: str) -> Optional[PaymentTransition]:
+        """Перевод платежа в новый статус с начислением чтений в одной транзакции.
+
+        Args:
+            yookassa_payment_id: ID платежа в YooKassa
+            new_status: Новый статус
+
+        Returns:
+            Результат перехода или None, если платеж не найден
+        """
+        transitions = await PaymentRepository.apply_status_transitions([(yookassa_payment_id, new_status)])
+        return transitions[0] if transitions else None
+
+    @staticmethod
+    async def apply_status_transitions(changes: Sequence[Tuple[str, str]]) -> List[PaymentTransition]:
+        """Пакетный перевод платежей в новые статусы в одной транзакции.
+
+        Строки платежей блокируются FOR UPDATE в порядке id, поэтому
+        параллельные уведомления и сверка применяются по очереди: второе
+        изменение видит уже обновленный статус и отклоняется автоматом
+        состояний. При переходе в succeeded баланс пользователя пополняется
+        в той же транзакции, так что чтения начисляются ровно один раз.
+
+        Args:
+            changes: Пары (ID платежа в YooKassa, новый статус)
+
+        Returns:
+            Результаты переходов для найденных платежей
+        """
+        if not changes:
+            return []
+
+        new_statuses = dict(changes)
+        try:
+            transitions: List[PaymentTransition] = []
+            async with get_connection() as conn:
+                async with conn.transaction():
+                    rows = await conn.fetch(
+                        """
+                        SELECT id, user_id, yookassa_payment_id, status, metadata
+                        FROM payments
+                        WHERE yookassa_payment_id = ANY($1::varchar[])
+                        ORDER BY id
+                        FOR UPDATE
+                        """,
+                        list(new_statuses)
+                    )
+
+                    credits: Dict[int, int] = {}
+                    for row in rows:
+                        new_status = new_statuses[row["yookassa_payment_id"]]
+                        transition = PaymentTransition(
+                            payment_id=row["id"],
+                            user_id=row["user_id"],
+                            old_status=row["status"],
+                            new_status=new_status,
+                            applied=can_transition(row["status"], new_status),
+                        )
+                        if transition.applied and new_status == "succeeded":
+                            metadata = row["metadata"]
+                            if isinstance(metadata, str):
+                                metadata = json.loads(metadata)
+                            transition.credited_readings = max(int((metadata or {}).get("readings", 0)), 0)
+                            credits[row["user_id"]] = credits.get(row["user_id"], 0) + transition.credited_readings
+                        transitions.append(transition)
+
+                    applied = [t for t in transitions if t.applied]
+                    if applied:
+                        await conn.execute(
+                            """
+                            UPDATE payments p
+                            SET status = c.status
+                            FROM unnest($1::int[], $2::varchar[]) AS c(id, status)
+                            WHERE p.id = c.id
+                            """,
+                            [t.payment_id for t in applied],
+                            [t.new_status for t in applied]
+                        )
+
+                    credits = {user_id: count for user_id, count in credits.items() if count > 0}
+                    if credits:
+                        await conn.execute(
+                            """
+                            UPDATE bot_users u
+                            SET paid_readings_left = u.paid_readings_left + c.readings
+                            FROM unnest($1::int[], $2::int[]) AS c(id, readings)
+                            WHERE u.id = c.id
+                            """,
+                            list(credits),
+                            list(credits.values())
+                        )
+
+            for transition in applied:
+                logger.info(
+                    "Платеж %s: %s -> %s, начислено чтений: %s",
+                    transition.payment_id, transition.old_status, transition.new_status, transition.credited_readings,
+                )
+            return transitions
+
+        except Exception as e:
+            logger.error(f"Ошибка при смене статуса платежей: {str(e)}")
+            raise RuntimeError(f"Ошибка при смене статуса платежей: {str(e)}")
+
+    @staticmethod
+    async def iter_stale_pending(older_than: timedelta, batch_size: int = 100) -> AsyncIterator[List[Payment]]:
+        """Потоковое чтение неоплаченных платежей старше older_than.
+
+        Платежи читаются пачками по id (keyset), поэтому между пачками
+        соединение возвращается в пул и долгие внешние проверки не держат
+        транзакцию.
+
+        Args:
+            older_than: Минимальный возраст платежа
+            batch_size: Размер пачки
+
+        Yields:
+            Пачки платежей в порядке id
+        """
+        last_id = 0
+        while True:
+            try:
+                query = """
+                    SELECT id, user_id, yookassa_payment_id, amount, currency, status, description, metadata, created_at, updated_at
+                    FROM payments
+                    WHERE status IN ('pending', 'waiting_for_capture')
+                      AND yookassa_payment_id IS NOT NULL
+                      AND created_at < NOW() - $1::interval
+                      AND id > $2
+                    ORDER BY id
+                    LIMIT $3
+                """
+                results = await fetch_many(query, older_than, last_id, batch_size)
+            except Exception as e:
+                logger.error(f"Ошибка при получении зависших платежей: {str(e)}")
+                raise RuntimeError(f"Ошибка при получении платежей: {str(e)}")
+
+            if not results:
+                return
+            batch = [Payment(**result) for result in results]
+            last_id = batch[-1].id
+            yield batch
+            if len(batch) < batch_size:
+                return
+
     @staticmethod
     async def delete(payment_id: int) -> bool:
         """Удаление платежа."""
@@ -217,7 +366,7 @@ class PaymentRepository:
             deleted = "DELETE 1" in result
             
             if deleted:
-                logger.info(f"Удален платеж с ID: {payment_id}")
+                logger.info("Удален платеж с ID: %s", payment_id)
             
             return deleted
             
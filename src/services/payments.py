@@ -1,20 +1,23 @@
 """Сервис для работы с платежами YooKassa."""
 
+import json
 import logging
 import hmac
 import hashlib
+import uuid
 from typing import Optional, Dict, Any
 from decimal import Decimal
 
 from aiohttp import web
-from yookassa import Configuration, Payment as YooKassaPayment
-from yookassa.domain.common import SecurityHelper
-from yookassa.domain.response import PaymentResponse
 
 from ..config import settings
-from ..models.payment import PaymentCreate, PaymentUpdate
+from ..models.payment import PaymentCreate, PaymentUpdate, YooKassaEvent, YOOKASSA_EVENT_STATUSES
 from ..services.payment_repository import PaymentRepository
 from ..services.user_repository import UserRepository
+from .dedup import yookassa_deduplicator
+from .work_queue import BoundedWorkQueue
+from .yookassa_event_repository import YooKassaEventRepository
+from .yookassa_client import yookassa_client
 from ..locales import messages
 
 logger = logging.getLogger(__name__)
@@ -25,10 +28,6 @@ class PaymentService:
 
     def __init__(self):
         """Инициализация сервиса."""
-        # Настройка YooKassa
-        Configuration.account_id = settings.yookassa_shop_id
-        Configuration.secret_key = settings.yookassa_api_key
-
         # Цены пакетов чтений (в рублях)
         self.PACKAGES = {
             "buy_5": {
@@ -66,8 +65,8 @@ class PaymentService:
 
             package = self.PACKAGES[package_type]
             
-            # Создаем платеж в YooKassa
-            yookassa_payment = YooKassaPayment.create({
+            # Создаем платеж в YooKassa; повторы запроса идут с тем же ключом идемпотентности
+            yookassa_payment = await yookassa_client.create_payment({
                 "amount": {
                     "value": str(package["amount"]),
                     "currency": "RUB"
@@ -83,12 +82,12 @@ class PaymentService:
                     "package_type": package_type,
                     "readings": str(package["readings"])
                 }
-            })
+            }, idempotence_key=uuid.uuid4().hex)
 
             # Сохраняем платеж в БД
             payment_data = PaymentCreate(
                 user_id=user_id,
-                yookassa_payment_id=yookassa_payment.id,
+                yookassa_payment_id=yookassa_payment["id"],
                 amount=package["amount"],
                 currency="RUB",
                 status="pending",
@@ -101,12 +100,12 @@ class PaymentService:
 
             payment = await PaymentRepository.create(payment_data)
             
-            logger.info(f"Создан платеж {payment.id} для пользователя {user_id} на сумму {package['amount']}")
+            logger.info("Создан платеж %s для пользователя %s на сумму %s", payment.id, user_id, package['amount'])
             
             return {
                 "payment_id": payment.id,
-                "yookassa_payment_id": yookassa_payment.id,
-                "confirmation_url": yookassa_payment.confirmation.confirmation_url,
+                "yookassa_payment_id": yookassa_payment["id"],
+                "confirmation_url": yookassa_payment["confirmation"]["confirmation_url"],
                 "amount": str(package["amount"]),
                 "description": package["description"]
             }
@@ -125,17 +124,20 @@ class PaymentService:
             Статус платежа или None при ошибке
         """
         try:
-            payment = YooKassaPayment.find_one(yookassa_payment_id)
-            return payment.status
+            payment = await yookassa_client.get_payment(yookassa_payment_id)
+            return payment.get('status') if payment else None
         except Exception as e:
             logger.error(f"Ошибка при проверке статуса платежа {yookassa_payment_id}: {str(e)}")
             return None
 
-    def verify_webhook_signature(self, payload: str, signature: str) -> bool:
+    def verify_webhook_signature(self, payload: bytes, signature: str) -> bool:
         """Проверка подписи webhook от YooKassa.
         
+        Подпись считается по сырым байтам тела: повторная сериализация
+        или декодирование могут изменить тело и сломать проверку.
+        
         Args:
-            payload: Тело запроса
+            payload: Тело запроса как получено
             signature: Подпись из заголовка
             
         Returns:
@@ -145,12 +147,12 @@ class PaymentService:
             # Создаем HMAC-SHA256 хеш
             expected_signature = hmac.new(
                 settings.yookassa_api_key.encode('utf-8'),
-                payload.encode('utf-8'),
+                payload,
                 hashlib.sha256
             ).hexdigest()
 
             # YooKassa присылает подпись в формате "sha256_hash"
-            received_signature = signature.replace('sha256_', '')
+            received_signature = signature.strip().removeprefix('sha256_')
             
             return hmac.compare_digest(expected_signature, received_signature)
         except Exception as e:
@@ -160,6 +162,10 @@ class PaymentService:
     async def handle_webhook(self, request_data: Dict[str, Any]) -> bool:
         """Обработка webhook от YooKassa.
         
+        Статус платежа меняется только по допустимому переходу
+        (см. PAYMENT_STATUS_TRANSITIONS), поэтому повторные и пришедшие
+        не по порядку уведомления ничего не меняют.
+        
         Args:
             request_data: Данные webhook
             
@@ -169,8 +175,9 @@ class PaymentService:
         try:
             # Проверяем тип события
             event = request_data.get('event')
-            if event != 'payment.succeeded':
-                logger.info(f"Пропускаем событие: {event}")
+            new_status = YOOKASSA_EVENT_STATUSES.get(event)
+            if new_status is None:
+                logger.info("Пропускаем событие: %s", event)
                 return True
 
             payment_object = request_data.get('object', {})
@@ -180,50 +187,43 @@ class PaymentService:
                 logger.error("Отсутствует ID платежа в webhook")
                 return False
 
-            # Ищем платеж в БД
-            payment = await PaymentRepository.get_by_yookassa_id(yookassa_payment_id)
+            transition = await PaymentRepository.apply_status_transition(yookassa_payment_id, new_status)
             
-            if not payment:
+            if transition is None:
                 logger.error(f"Платеж {yookassa_payment_id} не найден в БД")
                 return False
 
-            # Проверяем статус для идемпотентности
-            if payment.status == 'succeeded':
-                logger.info(f"Платеж {payment.id} уже обработан")
+            if not transition.applied:
+                logger.info(
+                    "Платеж %s: переход %s -> %s не выполнен, событие %s пропущено",
+                    transition.payment_id, transition.old_status, new_status, event,
+                )
                 return True
 
-            # Обновляем статус платежа
-            updated_payment = await PaymentRepository.update_status(
-                payment.id, 
-                'succeeded',
-                yookassa_payment_id
-            )
-
-            if not updated_payment:
-                logger.error(f"Не удалось обновить статус платежа {payment.id}")
-                return False
-
-            # Начисляем чтения пользователю
-            metadata = payment.metadata
-            package_type = metadata.get('package_type')
-            readings_count = int(metadata.get('readings', 0))
-
-            if readings_count > 0:
-                # Здесь должна быть логика обновления баланса пользователя
-                # Поскольку в текущей модели пользователя нет полей баланса,
-                # мы просто логируем начисление
-                logger.info(f"Начислено {readings_count} чтений пользователю {payment.user_id}")
-                
-                # TODO: Реализовать обновление баланса в модели пользователя
-                # await self._add_paid_readings_to_user(payment.user_id, readings_count)
-
-            logger.info(f"Платеж {payment.id} успешно обработан")
+            logger.info("Платеж %s успешно обработан", transition.payment_id)
             return True
 
         except Exception as e:
             logger.error(f"Ошибка при обработке webhook: {str(e)}")
             return False
 
+    async def process_webhook_event(self, event: YooKassaEvent) -> bool:
+        """Обработка уведомления, записанного в yookassa_events.
+        
+        YooKassa уже получила 200 и повторять доставку не будет, поэтому
+        при неудаче (ошибка БД, платеж еще не записан) уведомление остается
+        необработанным и повторяется фоновой сверкой платежей.
+        
+        Returns:
+            True если уведомление обработано
+        """
+        if await self.handle_webhook(event.payload):
+            await YooKassaEventRepository.mark_processed(event.id)
+            return True
+        logger.warning(f"Уведомление YooKassa {event.dedup_key} не обработано, будет повторено сверкой")
+        await YooKassaEventRepository.mark_failed(event.id)
+        return False
+
     async def get_user_payments(self, user_id: int) -> list:
         """Получение платежей пользователя.
         
@@ -250,66 +250,84 @@ class PaymentService:
         """
         return self.PACKAGES.get(package_type)
 
-    async def _add_paid_readings_to_user(self, user_id: int, readings_count: int) -> bool:
-        """Добавление платных чтений пользователю.
-        
-        Args:
-            user_id: ID пользователя в БД
-            readings_count: Количество чтений для начисления
-            
-        Returns:
-            True если успешно, иначе False
-        """
-        # TODO: Реализовать после добавления полей баланса в модель пользователя
-        # Эта функция должна обновлять поле paid_readings_left в таблице users
-        logger.info(f"TODO: Добавить {readings_count} платных чтений пользователю {user_id}")
-        return True
-
 
 # Создание экземпляра сервиса
 payment_service = PaymentService()
 
 
+def webhook_dedup_key(request_data: Dict[str, Any]) -> str:
+    """Ключ дедупликации уведомления: событие и ID платежа."""
+    return f"{request_data.get('event')}:{request_data.get('object', {}).get('id')}"
+
+
+# Очередь уведомлений: ответ YooKassa уходит сразу, работа с БД идет в фоне
+yookassa_event_queue: BoundedWorkQueue[YooKassaEvent] = BoundedWorkQueue(
+    "yookassa-events",
+    payment_service.process_webhook_event,
+    workers=settings.yookassa_queue_workers,
+    max_size=settings.yookassa_queue_size,
+)
+
+
 async def yookassa_webhook_handler(request: web.Request) -> web.Response:
     """Обработчик webhook для YooKassa.
     
+    Проверяет подпись, отбрасывает повторы, записывает уведомление
+    в yookassa_events и только после этого отвечает 200 и ставит его
+    в очередь. Если записать уведомление не удалось или процесс
+    останавливается, отвечает 503, и YooKassa повторит доставку.
+    Уведомление, не поместившееся в очередь, обработает фоновая сверка.
+    
     Args:
         request: HTTP запрос
         
     Returns:
         HTTP ответ
     """
-    try:
-        # Получаем подпись из заголовка
-        signature = request.headers.get('HTTP_YOOKASSA_SIGNATURE') or request.headers.get('Yookassa-Signature')
-        
-        if not signature:
-            logger.warning("Отсутствует подпись webhook")
-            return web.Response(status=400, text="Missing signature")
+    # Получаем подпись из заголовка
+    signature = request.headers.get('HTTP_YOOKASSA_SIGNATURE') or request.headers.get('Yookassa-Signature')
+    
+    if not signature:
+        logger.warning("Отсутствует подпись webhook")
+        return web.Response(status=400, text="Missing signature")
 
-        # Получаем тело запроса
-        payload = await request.text()
-        
-        # Проверяем подпись
-        if not payment_service.verify_webhook_signature(payload, signature):
-            logger.warning("Неверная подпись webhook")
-            return web.Response(status=401, text="Invalid signature")
+    # Получаем тело запроса
+    payload = await request.read()
+    
+    # Проверяем подпись
+    if not payment_service.verify_webhook_signature(payload, signature):
+        logger.warning("Неверная подпись webhook")
+        return web.Response(status=401, text="Invalid signature")
 
-        # Парсим JSON
-        import json
+    # Парсим JSON
+    try:
         request_data = json.loads(payload)
-
-        # Обрабатываем webhook
-        success = await payment_service.handle_webhook(request_data)
-        
-        if success:
-            return web.Response(status=200, text="OK")
-        else:
-            return web.Response(status=500, text="Processing error")
-
-    except json.JSONDecodeError as e:
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
         logger.error(f"Ошибка парсинга JSON webhook: {str(e)}")
         return web.Response(status=400, text="Invalid JSON")
+    if not isinstance(request_data, dict):
+        return web.Response(status=400, text="Invalid JSON")
+
+    if not yookassa_event_queue.accepting:
+        return web.Response(status=503, text="Service Unavailable")
+
+    # Повторное уведомление о том же событии отбрасывается до работы с БД
+    dedup_key = webhook_dedup_key(request_data)
+    if await yookassa_deduplicator.is_duplicate(dedup_key):
+        logger.info("Повторное уведомление YooKassa %s отброшено", dedup_key)
+        return web.Response(status=200, text="OK")
+
+    # Подтверждается только записанное уведомление
+    try:
+        event = await YooKassaEventRepository.save(dedup_key, request_data)
     except Exception as e:
-        logger.error(f"Ошибка при обработке webhook: {str(e)}")
-        return web.Response(status=500, text="Internal server error")
\ No newline at end of file
+        logger.error(f"Уведомление YooKassa {dedup_key} не записано: {str(e)}")
+        await yookassa_deduplicator.forget(dedup_key)
+        return web.Response(status=503, text="Service Unavailable")
+
+    if event is None:
+        logger.info("Уведомление YooKassa %s уже записано", dedup_key)
+    elif not yookassa_event_queue.submit(event):
+        logger.warning(f"Очередь уведомлений YooKassa заполнена, {dedup_key} обработает сверка")
+
+    return web.Response(status=200, text="OK")
@@ -0,0 +1,306 @@
+"""Профилирование работающего процесса по запросу администратора.
+
+SamplingProfiler раз в interval снимает стек потока цикла событий из
+отдельного потока (sys._current_frames) и складывает его в два профиля:
+по реальному времени (каждый замер - один отсчет) и по процессорному
+времени потока цикла (вес замера - потраченные с прошлого замера
+микросекунды CPU). Дополнительно из самого цикла событий снимаются
+стеки ожидания всех задач asyncio по цепочке cr_await: они показывают,
+чего ждут обработчики (БД, Bot API, asyncio.sleep), когда поток цикла
+свободен. Результат - строки collapsed stack ("a;b;c 42"), которые
+открываются flamegraph.pl, speedscope или inferno.
+
+MemoryProfiler сравнивает два снимка tracemalloc и возвращает места
+с наибольшим приростом выделенной памяти.
+"""
+
+import asyncio
+import functools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from types import CodeType, FrameType
+from typing import Any, List, Optional
+
+from ..config import settings
+
+# Глубина снимаемых стеков
+MAX_DEPTH = 64
+
+# Корневые кадры профиля задач asyncio
+TASKS_ROOT = "asyncio-tasks"
+
+# Задачи обходятся реже замеров потока: вес одного обхода - столько же отсчетов
+TASK_SAMPLE_RATIO = 10
+
+# Каталог кода бота: по нему находится ближайшая к выделению строка проекта
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@functools.lru_cache(maxsize=4096)
+def frame_label(code: CodeType) -> str:
+    """Имя кадра: функция с файлом и строкой объявления."""
+    name = getattr(code, "co_qualname", code.co_name)
+    path = code.co_filename
+    parts = path.replace("\\", "/").split("/")
+    short = "/".join(parts[-2:]) if len(parts) > 1 else path
+    return f"{name} ({short}:{code.co_firstlineno})"
+
+
+def collapse_frame(frame: Optional[FrameType]) -> str:
+    """Стек потока от корня к листу в формате collapsed stack."""
+    labels: List[str] = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def collapse_task(task: "asyncio.Task") -> Optional[str]:
+    """Стек ожидания задачи: цепочка корутин от корня задачи к текущему await."""
+    labels = [f"{TASKS_ROOT};task {task.get_name()}"]
+    awaitable: Any = task.get_coro()
+    while awaitable is not None and len(labels) < MAX_DEPTH:
+        code = getattr(awaitable, "cr_code", None) or getattr(awaitable, "gi_code", None)
+        if code is None:
+            # Future, Task или другой объект, которого ждет корутина
+            labels.append(f"<{type(awaitable).__name__}>")
+            break
+        labels.append(frame_label(code))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return ";".join(labels) if len(labels) > 1 else None
+
+
+def format_collapsed(stacks: Counter) -> str:
+    """Строки collapsed stack по убыванию веса."""
+    return "".join(f"{stack} {int(weight)}\n" for stack, weight in stacks.most_common() if weight >= 1)
+
+
+@dataclass
+class Profile:
+    """Результат профилирования."""
+
+    duration_sec: float
+    interval_sec: float
+    samples: int = 0
+    cpu_sec: float = 0.0
+    wall: Counter = field(default_factory=Counter)
+    cpu: Counter = field(default_factory=Counter)
+
+    def wall_collapsed(self) -> str:
+        """Профиль реального времени: отсчеты потока цикла и ожидания задач."""
+        return format_collapsed(self.wall)
+
+    def cpu_collapsed(self) -> str:
+        """Профиль процессорного времени в микросекундах."""
+        return format_collapsed(self.cpu)
+
+    def top(self, limit: int = 5) -> List[str]:
+        """Функции-листья с наибольшим процессорным временем."""
+        leaves: Counter = Counter()
+        for stack, weight in self.cpu.items():
+            leaves[stack.rsplit(";", 1)[-1]] += weight
+        total = sum(leaves.values()) or 1
+        return [f"{weight / total:.0%} {leaf}" for leaf, weight in leaves.most_common(limit)]
+
+
+class SamplingProfiler:
+    """Статистический профилировщик потока цикла событий."""
+
+    def __init__(self, interval_ms: Optional[int] = None):
+        """Инициализация.
+
+        Args:
+            interval_ms: Интервал замеров (по умолчанию из настроек)
+        """
+        self.interval_sec = (interval_ms or settings.profile_interval_ms) / 1000
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Идет ли профилирование."""
+        return self._lock.locked()
+
+    async def run(self, duration_sec: float) -> Profile:
+        """Профилирование в течение duration_sec секунд.
+
+        Raises:
+            RuntimeError: Если профилирование уже идет
+        """
+        if self.running:
+            raise RuntimeError("Профилирование уже запущено")
+
+        async with self._lock:
+            profile = Profile(duration_sec=duration_sec, interval_sec=self.interval_sec)
+            stopped = threading.Event()
+            thread = threading.Thread(
+                target=self._sample_thread,
+                args=(threading.get_ident(), profile, stopped),
+                name="profiler",
+                daemon=True,
+            )
+            thread.start()
+            try:
+                await self._sample_tasks(profile, duration_sec)
+            finally:
+                stopped.set()
+                await asyncio.to_thread(thread.join)
+            return profile
+
+    def _sample_thread(self, thread_id: int, profile: Profile, stopped: threading.Event) -> None:
+        """Замеры стека потока цикла из отдельного потока."""
+        cpu_clock = _thread_cpu_clock(thread_id)
+        last_cpu = time.clock_gettime(cpu_clock) if cpu_clock is not None else 0.0
+        while not stopped.wait(self.interval_sec):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            stack = collapse_frame(frame)
+            profile.samples += 1
+            profile.wall[stack] += 1
+            if cpu_clock is not None:
+                now = time.clock_gettime(cpu_clock)
+                delta = now - last_cpu
+                last_cpu = now
+                if delta > 0:
+                    profile.cpu[stack] += delta * 1_000_000
+                    profile.cpu_sec += delta
+
+    async def _sample_tasks(self, profile: Profile, duration_sec: float) -> None:
+        """Замеры стеков ожидания задач asyncio из цикла событий."""
+        current = asyncio.current_task()
+        deadline = time.monotonic() + duration_sec
+        while time.monotonic() < deadline:
+            for task in asyncio.all_tasks():
+                if task is current or task.done():
+                    continue
+                stack = collapse_task(task)
+                if stack is not None:
+                    profile.wall[stack] += TASK_SAMPLE_RATIO
+            await asyncio.sleep(min(self.interval_sec * TASK_SAMPLE_RATIO, max(deadline - time.monotonic(), 0)))
+
+
+def _thread_cpu_clock(thread_id: int) -> Optional[int]:
+    """Часы процессорного времени потока (только POSIX)."""
+    try:
+        return time.pthread_getcpuclockid(thread_id)
+    except (AttributeError, OSError):
+        return None
+
+
+@dataclass
+class AllocationSite:
+    """Место выделения памяти."""
+
+    location: str
+    size_diff: int
+    count_diff: int
+    size: int
+
+
+@dataclass
+class MemoryReport:
+    """Результат сравнения снимков tracemalloc."""
+
+    duration_sec: float
+    current: int
+    peak: int
+    sites: List[AllocationSite]
+
+
+class MemoryProfiler:
+    """Снимки tracemalloc по запросу."""
+
+    def __init__(self, frames: Optional[int] = None):
+        """Инициализация.
+
+        Args:
+            frames: Глубина стека выделений (по умолчанию из настроек)
+        """
+        self.frames = frames or settings.memprofile_frames
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Идет ли замер."""
+        return self._lock.locked()
+
+    async def run(self, duration_sec: float, limit: int = 15) -> MemoryReport:
+        """Сравнение снимков в начале и в конце интервала.
+
+        Если tracemalloc не был включен, он включается на время замера:
+        трассировка выделений замедляет процесс.
+
+        Raises:
+            RuntimeError: Если замер уже идет
+        """
+        if self.running:
+            raise RuntimeError("Замер памяти уже запущен")
+
+        async with self._lock:
+            started_here = not tracemalloc.is_tracing()
+            if started_here:
+                tracemalloc.start(self.frames)
+            try:
+                before = await asyncio.to_thread(self._snapshot)
+                await asyncio.sleep(duration_sec)
+                after = await asyncio.to_thread(self._snapshot)
+                current, peak = tracemalloc.get_traced_memory()
+                stats = await asyncio.to_thread(after.compare_to, before, "traceback")
+            finally:
+                if started_here:
+                    tracemalloc.stop()
+
+            sites = [
+                AllocationSite(
+                    location=self._location(stat.traceback),
+                    size_diff=stat.size_diff,
+                    count_diff=stat.count_diff,
+                    size=stat.size,
+                )
+                for stat in stats[:limit]
+            ]
+            return MemoryReport(duration_sec=duration_sec, current=current, peak=peak, sites=sites)
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        """Снимок без выделений tracemalloc, самого профилировщика и импорта."""
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__, all_frames=True),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    @staticmethod
+    def _location(traceback: tracemalloc.Traceback) -> str:
+        """Место выделения: строка выделения и ближайшая строка проекта."""
+        if not len(traceback):
+            return "<unknown>"
+        # Кадры упорядочены от старого к новому: последний - само выделение
+        frame = traceback[-1]
+        if frame.filename.startswith(PROJECT_DIR):
+            return f"{os.path.relpath(frame.filename, PROJECT_DIR)}:{frame.lineno}"
+        place = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+        project = next((f for f in reversed(traceback) if f.filename.startswith(PROJECT_DIR)), None)
+        if project is not None:
+            place += f" <- {os.path.relpath(project.filename, PROJECT_DIR)}:{project.lineno}"
+        return place
+
+
+def format_size(size: float) -> str:
+    """Размер в байтах в читаемом виде."""
+    for unit in ("Б", "КиБ", "МиБ"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "Б" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ГиБ"
+
+
+# Профилировщики процесса
+sampling_profiler = SamplingProfiler()
+memory_profiler = MemoryProfiler()
@@ -34,7 +34,7 @@ class QuestionRepository:
             if not result:
                 raise RuntimeError("Не удалось создать вопрос")
             
-            logger.info(f"Создан вопрос для шага {question_data.step_id}")
+            logger.info("Создан вопрос для шага %s", question_data.step_id)
             return Question(**result)
             
         except Exception as e:
@@ -188,7 +188,7 @@ class QuestionRepository:
             if not result:
                 return None
             
-            logger.info(f"Обновлен вопрос с ID: {question_id}")
+            logger.info("Обновлен вопрос с ID: %s", question_id)
             return Question(**result)
             
         except Exception as e:
@@ -206,7 +206,7 @@ class QuestionRepository:
             deleted = "DELETE 1" in result
             
             if deleted:
-                logger.info(f"Удален вопрос с ID: {question_id}")
+                logger.info("Удален вопрос с ID: %s", question_id)
             
             return deleted
             
@@ -227,7 +227,7 @@ class QuestionRepository:
             deleted_count = int(match.group(1)) if match else 0
             
             if deleted_count > 0:
-                logger.info(f"Удалено {deleted_count} вопросов для шага {step_id}")
+                logger.info("Удалено %s вопросов для шага %s", deleted_count, step_id)
             
             return deleted_count
             
@@ -284,7 +284,7 @@ class QuestionRepository:
                 query = "UPDATE questions SET question_order = $1 WHERE id = $2 AND step_id = $3"
                 await execute_query(query, new_order, question_id, step_id)
             
-            logger.info(f"Изменен порядок вопросов для шага {step_id}: {question_orders}")
+            logger.info("Изменен порядок вопросов для шага %s: %s", step_id, question_orders)
             return True
             
         except Exception as e:
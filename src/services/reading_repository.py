@@ -1,14 +1,61 @@
 """Репозиторий для работы с чтениями."""
 
+import json
 import logging
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+from datetime import datetime, timedelta
 
-from ..models.reading import Reading, ReadingCreate, ReadingUpdate
-from .database import fetch_one, fetch_many, execute_query, fetch_val
+from ..models.reading import Reading, ReadingCreate, ReadingUpdate, PayloadPatch
+from .database import fetch_one, fetch_many, execute_query, fetch_val, prepared
 
 logger = logging.getLogger(__name__)
 
+# Запросы горячего пути готовятся на каждом соединении пула
+SELECT_READINGS_BY_USER = prepared("""
+    SELECT id, user_id, reading_type, reading_payload, status, created_at, completed_at
+    FROM readings
+    WHERE user_id = $1
+    ORDER BY created_at DESC
+    LIMIT $2 OFFSET $3
+""")
+INSERT_READING = prepared("""
+    INSERT INTO readings (user_id, reading_type, reading_payload, status)
+    VALUES ($1, $2, $3::jsonb, $4)
+    RETURNING id, user_id, reading_type, reading_payload, status, created_at, completed_at
+""")
+
+# SQL-функции операций над reading_payload (миграция 0005_reading_payload_patch.sql)
+PAYLOAD_PATCH_FUNCTIONS = {
+    "set": "jsonb_patch_set",
+    "append": "jsonb_patch_append",
+    "merge": "jsonb_patch_merge",
+    "incr": "jsonb_patch_incr",
+}
+
+
+def compile_payload_patch(base: str, patches: List[PayloadPatch], args: List[Any]) -> str:
+    """Сборка SQL-выражения, применяющего операции к reading_payload.
+
+    Операции оборачивают выражение по очереди, каждая ссылается на
+    предыдущий результат один раз, поэтому выражение растет линейно.
+    Параметры (путь и значение в JSON) добавляются в args.
+
+    Args:
+        base: Исходное выражение документа
+        patches: Операции в порядке применения
+        args: Список параметров запроса
+
+    Returns:
+        SQL-выражение нового значения reading_payload
+    """
+    expr = base
+    for patch in patches:
+        args.append(patch.path)
+        path_index = len(args)
+        args.append(json.dumps(patch.value, ensure_ascii=False))
+        expr = f"{PAYLOAD_PATCH_FUNCTIONS[patch.op]}({expr}, ${path_index}::text[], ${len(args)}::jsonb)"
+    return expr
+
 
 class ReadingRepository:
     """Репозиторий для управления чтениями."""
@@ -17,23 +64,18 @@ class ReadingRepository:
     async def create(reading_data: ReadingCreate) -> Reading:
         """Создание нового чтения."""
         try:
-            query = """
-                INSERT INTO readings (user_id, reading_type, reading_payload, status)
-                VALUES ($1, $2, $3, $4)
-                RETURNING id, user_id, reading_type, reading_payload, status, created_at, completed_at
-            """
             result = await fetch_one(
-                query,
+                INSERT_READING,
                 reading_data.user_id,
                 reading_data.reading_type,
-                reading_data.reading_payload,
+                json.dumps(reading_data.reading_payload or {}, ensure_ascii=False),
                 reading_data.status
             )
             
             if not result:
                 raise RuntimeError("Не удалось создать чтение")
             
-            logger.info(f"Создано чтение для пользователя: {reading_data.user_id}")
+            logger.info("Создано чтение для пользователя: %s", reading_data.user_id)
             return Reading(**result)
             
         except Exception as e:
@@ -60,14 +102,7 @@ class ReadingRepository:
     async def get_by_user_id(user_id: int, limit: int = 50, offset: int = 0) -> List[Reading]:
         """Получение чтений пользователя с пагинацией."""
         try:
-            query = """
-                SELECT id, user_id, reading_type, reading_payload, status, created_at, completed_at
-                FROM readings
-                WHERE user_id = $1
-                ORDER BY created_at DESC
-                LIMIT $2 OFFSET $3
-            """
-            results = await fetch_many(query, user_id, limit, offset)
+            results = await fetch_many(SELECT_READINGS_BY_USER, user_id, limit, offset)
             return [Reading(**result) for result in results]
             
         except Exception as e:
@@ -111,33 +146,88 @@ class ReadingRepository:
             raise RuntimeError(f"Ошибка при получении чтений: {str(e)}")
 
     @staticmethod
-    async def update(reading_id: int, reading_data: ReadingUpdate) -> Optional[Reading]:
-        """Обновление данных чтения."""
+    async def claim_interrupted(limit: int, lease: timedelta) -> List[Reading]:
+        """Захват чтений, прерванных остановкой процесса, для продолжения.
+
+        Захваченные чтения переводятся в resuming с отметкой claimed_at одним
+        запросом; строки, заблокированные другим воркером, пропускаются,
+        поэтому каждое чтение продолжает только один процесс. Чтение, которое
+        захвативший процесс не начал проигрывать за lease (процесс упал),
+        захватывается снова.
+
+        Args:
+            limit: Максимальное количество чтений
+            lease: Время аренды захваченного чтения
+
+        Returns:
+            Захваченные чтения в порядке создания
+        """
         try:
-            # Динамическое формирование запроса на основе переданных данных
-            update_fields = []
-            args = []
-            arg_index = 1
+            query = """
+                UPDATE readings
+                SET status = 'resuming', claimed_at = NOW()
+                WHERE id IN (
+                    SELECT id
+                    FROM readings
+                    WHERE status = 'interrupted'
+                       OR (status = 'resuming' AND claimed_at < NOW() - $2::interval)
+                    ORDER BY created_at
+                    LIMIT $1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, user_id, reading_type, reading_payload, status, created_at, completed_at
+            """
+            results = await fetch_many(query, limit, lease)
+            return [Reading(**result) for result in results]
 
-            if reading_data.reading_type is not None:
-                update_fields.append(f"reading_type = ${arg_index}")
-                args.append(reading_data.reading_type)
-                arg_index += 1
+        except Exception as e:
+            logger.error(f"Ошибка при захвате прерванных чтений: {str(e)}")
+            raise RuntimeError(f"Ошибка при захвате прерванных чтений: {str(e)}")
 
-            if reading_data.reading_payload is not None:
-                update_fields.append(f"reading_payload = ${arg_index}")
-                args.append(reading_data.reading_payload)
-                arg_index += 1
+    @staticmethod
+    def _build_update(reading_data: ReadingUpdate) -> Tuple[List[str], List[Any]]:
+        """Формирование SET-выражений и параметров UPDATE.
+
+        reading_payload и payload_patch сводятся к одному выражению:
+        операции применяются поверх нового документа или текущего значения
+        колонки, которое при конкурентном UPDATE берется из последней версии строки.
+        """
+        update_fields = []
+        args = []
+
+        if reading_data.reading_type is not None:
+            args.append(reading_data.reading_type)
+            update_fields.append(f"reading_type = ${len(args)}")
+
+        payload_expr = None
+        if reading_data.reading_payload is not None:
+            args.append(json.dumps(reading_data.reading_payload, ensure_ascii=False))
+            payload_expr = f"${len(args)}::jsonb"
+
+        if reading_data.payload_patch:
+            payload_expr = compile_payload_patch(
+                payload_expr or "reading_payload", reading_data.payload_patch, args
+            )
 
-            if reading_data.status is not None:
-                update_fields.append(f"status = ${arg_index}")
-                args.append(reading_data.status)
-                arg_index += 1
+        if payload_expr is not None:
+            update_fields.append(f"reading_payload = {payload_expr}")
 
-            if reading_data.completed_at is not None:
-                update_fields.append(f"completed_at = ${arg_index}")
-                args.append(reading_data.completed_at)
-                arg_index += 1
+        if reading_data.status is not None:
+            args.append(reading_data.status)
+            update_fields.append(f"status = ${len(args)}")
+
+        if reading_data.completed_at is not None:
+            args.append(reading_data.completed_at)
+            update_fields.append(f"completed_at = ${len(args)}")
+
+        return update_fields, args
+
+    @staticmethod
+    async def update(reading_id: int, reading_data: ReadingUpdate) -> Optional[Reading]:
+        """Обновление данных чтения."""
+        try:
+            # Динамическое формирование запроса на основе переданных данных
+            update_fields, args = ReadingRepository._build_update(reading_data)
 
             if not update_fields:
                 # Нет полей для обновления
@@ -148,7 +238,7 @@ class ReadingRepository:
             query = f"""
                 UPDATE readings
                 SET {', '.join(update_fields)}
-                WHERE id = ${arg_index}
+                WHERE id = ${len(args)}
                 RETURNING id, user_id, reading_type, reading_payload, status, created_at, completed_at
             """
             
@@ -157,13 +247,81 @@ class ReadingRepository:
             if not result:
                 return None
             
-            logger.info(f"Обновлено чтение с ID: {reading_id}")
+            logger.info("Обновлено чтение с ID: %s", reading_id)
             return Reading(**result)
             
         except Exception as e:
             logger.error(f"Ошибка при обновлении чтения {reading_id}: {str(e)}")
             raise RuntimeError(f"Ошибка при обновлении чтения: {str(e)}")
 
+    @staticmethod
+    async def patch(reading_id: int, reading_data: ReadingUpdate) -> Optional[Dict[str, Any]]:
+        """Обновление чтения с возвратом только измененных значений.
+
+        В отличие от update не передает документ reading_payload обратно:
+        для payload_patch возвращаются значения по измененным путям.
+
+        Args:
+            reading_id: ID чтения
+            reading_data: Изменения
+
+        Returns:
+            Словарь измененных колонок; значения путей reading_payload лежат
+            в ключе "reading_payload" как {"a.b": значение}. None если чтение не найдено
+        """
+        try:
+            update_fields, args = ReadingRepository._build_update(reading_data)
+
+            if not update_fields:
+                return {}
+
+            returning = ["id"]
+            for column in ("reading_type", "status", "completed_at"):
+                if getattr(reading_data, column) is not None:
+                    returning.append(column)
+            if reading_data.reading_payload is not None:
+                returning.append("reading_payload")
+
+            patched_paths = []
+            if reading_data.reading_payload is None and reading_data.payload_patch:
+                for patch in reading_data.payload_patch:
+                    path = ".".join(patch.path)
+                    if path in patched_paths:
+                        continue
+                    args.append(patch.path)
+                    returning.append(f"reading_payload #> ${len(args)}::text[] AS patched_{len(patched_paths)}")
+                    patched_paths.append(path)
+
+            args.append(reading_id)
+
+            query = f"""
+                UPDATE readings
+                SET {', '.join(update_fields)}
+                WHERE id = ${len(args)}
+                RETURNING {', '.join(returning)}
+            """
+
+            result = await fetch_one(query, *args)
+
+            if not result:
+                return None
+
+            changed = {key: value for key, value in result.items() if not key.startswith("patched_")}
+            if "reading_payload" in changed:
+                changed["reading_payload"] = json.loads(changed["reading_payload"])
+            elif patched_paths:
+                changed["reading_payload"] = {
+                    path: json.loads(result[f"patched_{i}"]) if result[f"patched_{i}"] is not None else None
+                    for i, path in enumerate(patched_paths)
+                }
+
+            logger.debug("Изменено чтение с ID: %s", reading_id)
+            return changed
+
+        except Exception as e:
+            logger.error(f"Ошибка при изменении чтения {reading_id}: {str(e)}")
+            raise RuntimeError(f"Ошибка при изменении чтения: {str(e)}")
+
     @staticmethod
     async def complete_reading(reading_id: int) -> Optional[Reading]:
         """Завершение чтения."""
@@ -180,7 +338,7 @@ class ReadingRepository:
             if not result:
                 return None
             
-            logger.info(f"Завершено чтение с ID: {reading_id}")
+            logger.info("Завершено чтение с ID: %s", reading_id)
             return Reading(**result)
             
         except Exception as e:
@@ -198,7 +356,7 @@ class ReadingRepository:
             deleted = "DELETE 1" in result
             
             if deleted:
-                logger.info(f"Удалено чтение с ID: {reading_id}")
+                logger.info("Удалено чтение с ID: %s", reading_id)
             
             return deleted
             
@@ -0,0 +1,49 @@
+"""Сервис для работы с Redis."""
+
+import logging
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Глобальный клиент Redis
+redis: Optional[Redis] = None
+
+
+async def init_redis() -> None:
+    """Инициализация клиента Redis.
+
+    Недоступность Redis при старте не останавливает бота: сервисы,
+    использующие Redis, работают в деградированном режиме.
+    """
+    global redis
+    redis = Redis.from_url(
+        settings.redis_url,
+        socket_timeout=settings.redis_timeout_sec,
+        socket_connect_timeout=settings.redis_timeout_sec,
+    )
+    try:
+        await redis.ping()
+        logger.info("Подключение к Redis установлено")
+    except Exception as e:
+        logger.warning(f"Redis недоступен: {str(e)}")
+
+
+async def close_redis() -> None:
+    """Закрытие клиента Redis."""
+    global redis
+    try:
+        if redis:
+            await redis.aclose()
+            redis = None
+            logger.info("Соединение с Redis закрыто")
+    except Exception as e:
+        logger.error(f"Ошибка при закрытии соединения с Redis: {str(e)}")
+
+
+def get_redis() -> Optional[Redis]:
+    """Текущий клиент Redis или None, если он не инициализирован."""
+    return redis
@@ -0,0 +1,145 @@
+"""Учет ресурсов, потраченных на обработку одного update.
+
+На время обработчика в контекст кладется UpdateUsage; вызовы
+database.py, выдача соединений из пула и вызовы Bot API добавляют в
+него свои показатели. Счетчики текстов запросов позволяют находить
+N+1: один и тот же запрос, выполненный в одном update больше
+N_PLUS_ONE_THRESHOLD раз.
+"""
+
+import re
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from .metrics import registry
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Границы гистограмм количества вызовов
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+DB_QUERIES = registry.histogram(
+    "bot_handler_db_queries",
+    "Запросов к БД за один вызов обработчика",
+    ["router", "handler"],
+    buckets=COUNT_BUCKETS,
+)
+DB_ROWS = registry.counter(
+    "bot_handler_db_rows_total",
+    "Строк, полученных из БД обработчиком",
+    ["router", "handler"],
+)
+DB_POOL_WAIT = registry.histogram(
+    "bot_handler_db_pool_wait_seconds",
+    "Ожидание соединения из пула за один вызов обработчика",
+    ["router", "handler"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+API_CALLS = registry.histogram(
+    "bot_handler_api_calls",
+    "Вызовов Bot API за один вызов обработчика",
+    ["router", "handler"],
+    buckets=COUNT_BUCKETS,
+)
+API_BYTES = registry.counter(
+    "bot_handler_api_bytes_sent_total",
+    "Байт параметров, отправленных в Bot API обработчиком",
+    ["router", "handler"],
+)
+N_PLUS_ONE = registry.counter(
+    "bot_handler_n_plus_one_total",
+    "Вызовы обработчика с повторяющимся запросом (N+1)",
+    ["router", "handler"],
+)
+
+
+class NPlusOneError(RuntimeError):
+    """Запрос выполнен в одном update больше допустимого числа раз."""
+
+
+def normalize_statement(query: str) -> str:
+    """Текст запроса без различий в пробелах и переносах."""
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+class UpdateUsage:
+    """Показатели обработки одного update."""
+
+    __slots__ = ("db_queries", "db_rows", "db_pool_wait", "api_calls", "api_bytes", "statements")
+
+    def __init__(self):
+        """Инициализация нулевых показателей."""
+        self.db_queries = 0
+        self.db_rows = 0
+        self.db_pool_wait = 0.0
+        self.api_calls = 0
+        self.api_bytes = 0
+        self.statements: Counter = Counter()
+
+    def add_query(self, query: str, rows: int) -> None:
+        """Учет выполненного запроса."""
+        self.db_queries += 1
+        self.db_rows += rows
+        self.statements[query] += 1
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """Запросы, выполненные больше threshold раз, по убыванию числа."""
+        return [
+            (normalize_statement(query), count)
+            for query, count in self.statements.most_common()
+            if count > threshold
+        ]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Показатели для логов."""
+        return {
+            "db_queries": self.db_queries,
+            "db_rows": self.db_rows,
+            "db_pool_wait_ms": round(self.db_pool_wait * 1000, 3),
+            "api_calls": self.api_calls,
+            "api_bytes": self.api_bytes,
+        }
+
+    def observe(self, router: str, handler: str) -> None:
+        """Запись показателей в метрики обработчика."""
+        DB_QUERIES.observe(self.db_queries, router, handler)
+        DB_POOL_WAIT.observe(self.db_pool_wait, router, handler)
+        API_CALLS.observe(self.api_calls, router, handler)
+        if self.db_rows:
+            DB_ROWS.inc(router, handler, amount=self.db_rows)
+        if self.api_bytes:
+            API_BYTES.inc(router, handler, amount=self.api_bytes)
+
+
+_current_usage: ContextVar[Optional[UpdateUsage]] = ContextVar("current_usage", default=None)
+
+
+def current_usage() -> Optional[UpdateUsage]:
+    """Показатели текущего update или None вне обработчика."""
+    return _current_usage.get()
+
+
+def start_usage() -> Tuple[UpdateUsage, Any]:
+    """Новые показатели в текущем контексте.
+
+    Returns:
+        (показатели, токен для end_usage)
+    """
+    usage = UpdateUsage()
+    return usage, _current_usage.set(usage)
+
+
+def end_usage(token: Any) -> None:
+    """Снятие показателей с контекста."""
+    _current_usage.reset(token)
+
+
+def count_rows(result: Any) -> int:
+    """Количество строк в результате функции database.py."""
+    if result is None or isinstance(result, str):
+        # Статус execute ("UPDATE 3") - строки не получались
+        return 0
+    if isinstance(result, list):
+        return sum(1 for row in result if isinstance(row, dict))
+    return 1
@@ -0,0 +1,80 @@
+"""Кэш активных шагов сценария с вопросами."""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from ..config import settings
+from ..models.question import Question
+from ..models.step import StepWithQuestions
+from .cache import TTLCache
+from .question_repository import QuestionRepository
+from .step_repository import StepRepository
+
+logger = logging.getLogger(__name__)
+
+_ACTIVE = "active"
+
+
+class ScenarioContent:
+    """Активные шаги с вопросами, общие для всех чтений процесса.
+
+    Сценарий одинаков для всех пользователей, поэтому вместо запроса
+    шагов и запроса вопросов каждого шага на каждый /read содержимое
+    загружается двумя запросами и живет в памяти ttl_sec секунд.
+    Параллельные обращения при пустом кэше ждут одну загрузку.
+    """
+
+    def __init__(self, ttl_sec: Optional[float] = None):
+        """Инициализация кэша.
+
+        Args:
+            ttl_sec: Время жизни содержимого (по умолчанию из настроек)
+        """
+        self.ttl_sec = settings.content_cache_ttl_sec if ttl_sec is None else ttl_sec
+        self._cache: TTLCache[str, List[StepWithQuestions]] = TTLCache(max_size=1, ttl_sec=self.ttl_sec)
+        self._lock = asyncio.Lock()
+
+    async def get_active_steps(self) -> List[StepWithQuestions]:
+        """Активные шаги по порядку с вопросами."""
+        steps = self._cache.get(_ACTIVE)
+        if steps is not None:
+            return steps
+        async with self._lock:
+            steps = self._cache.get(_ACTIVE)
+            if steps is None:
+                steps = await self.load()
+        return steps
+
+    async def load(self) -> List[StepWithQuestions]:
+        """Загрузка шагов и их вопросов из БД в кэш."""
+        steps = await StepRepository.get_active_steps()
+        questions = await QuestionRepository.get_questions_by_step_ids([step.id for step in steps])
+
+        by_step: Dict[int, List[Question]] = {}
+        for question in questions:
+            by_step.setdefault(question.step_id, []).append(question)
+
+        content = [
+            StepWithQuestions(**step.model_dump(), questions=by_step.get(step.id, []))
+            for step in steps
+        ]
+        self._cache.set(_ACTIVE, content)
+        logger.debug("Загружено шагов сценария: %s, вопросов: %s", len(content), len(questions))
+        return content
+
+    async def get_question(self, question_id: int) -> Optional[Question]:
+        """Вопрос активного шага по ID или None, если его нет в сценарии."""
+        for step in await self.get_active_steps():
+            for question in step.questions:
+                if question.id == question_id:
+                    return question
+        return None
+
+    def invalidate(self) -> None:
+        """Сброс кэша: следующее обращение загрузит содержимое заново."""
+        self._cache.clear()
+
+
+# Кэш процесса
+scenario_content = ScenarioContent()
@@ -0,0 +1,100 @@
+"""Учет проигрываемых сценариев для остановки процесса."""
+
+import asyncio
+import logging
+from typing import Set
+
+from ..config import settings
+from .chat_executor import ChatExecutor, Job
+
+logger = logging.getLogger(__name__)
+
+
+class ScenarioRuns:
+    """Сигнал остановки для сценариев, проигрываемых в процессе.
+
+    Сценарий с паузами между шагами может идти минутами, дольше времени
+    на остановку воркера. После interrupt() проигрывание прекращается на
+    ближайшей границе шага или паузы: паузы прерываются сразу, а сценарий
+    сохраняет в чтении, с какого шага продолжить (checkpoint), и
+    возвращает управление, так что обработчик завершается без отмены.
+
+    Сценарии проигрываются в фоне через собственный ChatExecutor: обработчик
+    /read только ставит проигрывание в очередь чата и освобождает воркер
+    очереди webhook или слот polling. Сценарии одного чата идут по очереди,
+    одновременно проигрывается не больше scenario_max_concurrency.
+    """
+
+    def __init__(self, max_concurrency: int = 256, max_pending: int = 10_000):
+        """Инициализация.
+
+        Args:
+            max_concurrency: Предельное число одновременно проигрываемых сценариев
+            max_pending: Число принятых сценариев, при котором submit начинает ждать
+        """
+        self.interrupted = False
+        self.active = 0
+        self.executor = ChatExecutor(max_concurrency=max_concurrency, max_pending=max_pending)
+        self._waiters: Set[asyncio.Future] = set()
+
+    async def submit(self, chat_id: int, job: Job) -> None:
+        """Проигрывание сценария в фоне, после предыдущих сценариев чата.
+
+        Args:
+            chat_id: ID чата
+            job: Фабрика корутины проигрывания
+        """
+        await self.executor.submit(chat_id, job)
+
+    @property
+    def free_slots(self) -> int:
+        """Число сценариев, которые можно начать без ожидания места."""
+        return max(self.executor.max_concurrency - self.executor.pending, 0)
+
+    async def wait(self, timeout: float) -> None:
+        """Ожидание фоновых сценариев; не завершенные за timeout отменяются."""
+        await self.executor.close(timeout=timeout)
+
+    def started(self) -> None:
+        """Учет начала проигрывания."""
+        self.active += 1
+
+    def finished(self) -> None:
+        """Учет окончания проигрывания."""
+        self.active -= 1
+
+    async def sleep(self, seconds: float) -> bool:
+        """Пауза сценария, прерываемая остановкой.
+
+        Returns:
+            True если пауза выдержана, False если ее прервала остановка
+        """
+        if self.interrupted:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.add(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=seconds)
+        finally:
+            self._waiters.discard(waiter)
+        return not waiter.done()
+
+    def interrupt(self) -> None:
+        """Остановка: новые шаги не начинаются, паузы прерываются."""
+        if not self.interrupted:
+            logger.info("Остановка сценариев: проигрывается %s", self.active)
+        self.interrupted = True
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def reset(self) -> None:
+        """Возобновление приема сценариев."""
+        self.interrupted = False
+
+
+# Сценарии процесса
+scenario_runs = ScenarioRuns(
+    max_concurrency=settings.scenario_max_concurrency,
+    max_pending=settings.scenario_max_pending,
+)
@@ -2,16 +2,25 @@
 
 import asyncio
 import logging
+import time
 from typing import Optional, Dict, Any, List
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from aiogram import Bot, types
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
 
+from ..config import settings
 from .reading_repository import ReadingRepository
-from .step_repository import StepRepository
-from .question_repository import QuestionRepository
-from ..models.reading import ReadingCreate, ReadingUpdate
+from .scenario_content import scenario_content
+from .chat_executor import Job
+from .scenario_runs import scenario_runs
+from .funnel_service import funnel_recorder
+from .answer_service import answer_recorder
+from .metrics import SCENARIO_DURATION
+from .tracing import tracer
+from ..models.answer import AnswerCallback
+from ..models.reading import PayloadPatch, Reading, ReadingCreate, ReadingUpdate
+from ..models.step import StepContent, CAPTION_MAX_LENGTH
 from ..locales import messages
 
 logger = logging.getLogger(__name__)
@@ -38,7 +47,7 @@ class ScenarioService:
             free_count = len([r for r in readings if r.reading_type == "free"])
             paid_count = len([r for r in readings if r.reading_type == "paid"])
             
-            logger.info(f"Получен баланс пользователя {user_id}: бесплатные={free_count}, платные={paid_count}")
+            logger.info("Получен баланс пользователя %s: бесплатные=%s, платные=%s", user_id, free_count, paid_count)
             return {
                 "free_readings": free_count,
                 "paid_readings": paid_count
@@ -66,7 +75,7 @@ class ScenarioService:
             )
             
             reading = await ReadingRepository.create(reading_data)
-            logger.info(f"Создано чтение {reading.id} для пользователя {user_id} типа {reading_type}")
+            logger.info("Создано чтение %s для пользователя %s типа %s", reading.id, user_id, reading_type)
             return reading.id
             
         except Exception as e:
@@ -77,21 +86,58 @@ class ScenarioService:
         self,
         user_id: int,
         chat_id: int,
-        reading_id: int
+        reading_id: int,
+        reading_type: str = "default",
+        from_step_order: Optional[int] = None,
+        step_reached: bool = False
     ) -> bool:
         """Проигрывание всех шагов сценария последовательно.
         
+        Прохождение каждого шага фиксируется в воронке сценария,
+        длительность всего проигрывания - в scenario_playback_duration_seconds.
+        При остановке процесса проигрывание прерывается на границе шага,
+        а чтение получает статус interrupted и шаг, с которого его
+        продолжит следующий запущенный процесс (resume_interrupted).
+        
         Args:
             user_id: ID пользователя в БД
             chat_id: ID чата Telegram
             reading_id: ID чтения
+            reading_type: Тип чтения для воронки
+            from_step_order: Начать с шага с этим порядком (при продолжении)
+            step_reached: Шаг from_step_order уже отмечен в воронке как reached
             
         Returns:
-            True если успешно, False если произошла ошибка
+            True если сценарий завершен или прерван остановкой, False если произошла ошибка
+        """
+        started = time.perf_counter()
+        scenario_runs.started()
+        try:
+            result = await self._play_scenario_steps(
+                user_id, chat_id, reading_id, reading_type, from_step_order, step_reached
+            )
+        finally:
+            scenario_runs.finished()
+        SCENARIO_DURATION.observe(time.perf_counter() - started, result)
+        return result != "failed"
+
+    async def _play_scenario_steps(
+        self,
+        user_id: int,
+        chat_id: int,
+        reading_id: int,
+        reading_type: str,
+        from_step_order: Optional[int],
+        step_reached: bool = False
+    ) -> str:
+        """Проигрывание шагов без учета длительности.
+
+        Returns:
+            Результат: completed, interrupted или failed
         """
         try:
-            # Получаем все активные шаги
-            steps = await StepRepository.get_active_steps()
+            # Активные шаги с вопросами из кэша процесса
+            steps = await scenario_content.get_active_steps()
             
             if not steps:
                 logger.warning(f"Нет активных шагов для чтения {reading_id}")
@@ -99,25 +145,45 @@ class ScenarioService:
                     chat_id,
                     messages.SCENARIO_ERROR.format(error="Сценарий не содержит шагов")
                 )
-                return False
+                return "failed"
+            
+            if from_step_order is not None:
+                steps = [step for step in steps if step.step_order >= from_step_order]
+            # Шаг, прерванный посреди проигрывания, уже учтен в воронке как reached
+            reached_order = from_step_order if step_reached else None
             
             # Проходим через каждый шаг
             for step in steps:
+                # Остановка процесса: шаг проиграет следующий процесс
+                if scenario_runs.interrupted:
+                    await self._checkpoint(reading_id, chat_id, step)
+                    return "interrupted"
+                
+                if step.step_order != reached_order:
+                    funnel_recorder.record(reading_id, reading_type, step, "reached")
                 try:
-                    await self._play_step(chat_id, step, reading_id)
+                    with tracer.span("scenario step", attributes={"scenario.step_id": step.id}):
+                        await self._play_step(chat_id, step, reading_id)
+                    
+                    # Пауза после шага; остановка процесса прерывает ее
+                    if step.content.delay_sec > 0:
+                        with tracer.span("scenario delay", attributes={"scenario.delay_sec": step.content.delay_sec}):
+                            await scenario_runs.sleep(step.content.delay_sec)
+                    
+                    funnel_recorder.record(reading_id, reading_type, step, "completed")
                     
-                    # Получаем задержку (если она есть в description)
-                    delay_sec = self._extract_delay(step.description)
-                    if delay_sec > 0:
-                        await asyncio.sleep(delay_sec)
-                        
+                except asyncio.CancelledError:
+                    # Время на остановку истекло посреди шага: шаг будет проигран заново
+                    await self._checkpoint(reading_id, chat_id, step, reached=True)
+                    raise
                 except Exception as e:
+                    funnel_recorder.record(reading_id, reading_type, step, "failed")
                     logger.error(f"Ошибка при проигрывании шага {step.id}: {str(e)}")
                     await self.bot.send_message(
                         chat_id,
                         messages.SCENARIO_ERROR.format(error=str(e))
                     )
-                    return False
+                    return "failed"
             
             # Завершаем чтение
             update_data = ReadingUpdate(
@@ -127,47 +193,132 @@ class ScenarioService:
             await ReadingRepository.update(reading_id, update_data)
             
             await self.bot.send_message(chat_id, messages.SCENARIO_COMPLETED)
-            logger.info(f"Сценарий чтения {reading_id} успешно завершен")
-            return True
+            logger.info("Сценарий чтения %s успешно завершен", reading_id)
+            return "completed"
             
         except Exception as e:
             logger.error(f"Ошибка при проигрывании сценария: {str(e)}")
-            return False
+            return "failed"
+
+    async def _checkpoint(self, reading_id: int, chat_id: int, step, reached: bool = False) -> None:
+        """Сохранение шага, с которого продолжится прерванный сценарий.
+        
+        Args:
+            reading_id: ID чтения
+            chat_id: ID чата Telegram
+            step: Первый не проигранный шаг
+            reached: Шаг уже отмечен в воронке как reached
+        """
+        progress = {"chat_id": chat_id, "next_step_order": step.step_order}
+        if reached:
+            progress["step_reached"] = True
+        try:
+            await ReadingRepository.patch(reading_id, ReadingUpdate(
+                status="interrupted",
+                payload_patch=[PayloadPatch.set("scenario", progress)]
+            ))
+            logger.info("Сценарий чтения %s прерван остановкой перед шагом %s", reading_id, step.id)
+        except Exception as e:
+            logger.error(f"Не удалось сохранить прогресс сценария {reading_id}: {str(e)}")
+
+    async def resume_interrupted(self, batch_size: Optional[int] = None) -> int:
+        """Продолжение сценариев, прерванных остановкой процессов.
+        
+        Процесс захватывает прерванные чтения пачками не больше свободных
+        мест исполнителя сценариев и берет следующую пачку, когда
+        проигрывание захваченных началось, поэтому чтения распределяются
+        между запускающимися воркерами, а не достаются первому. Сценарии
+        продолжаются через scenario_runs: в очереди своего чата и под
+        общим лимитом scenario_max_concurrency.
+        
+        Args:
+            batch_size: Размер пачки (по умолчанию из настроек)
+            
+        Returns:
+            Число продолженных сценариев
+        """
+        batch_size = batch_size or settings.scenario_resume_batch_size
+        lease = timedelta(seconds=settings.scenario_resume_lease_sec)
+        resumed = 0
+        while not scenario_runs.interrupted:
+            limit = min(batch_size, scenario_runs.free_slots)
+            if limit == 0:
+                # Исполнитель занят: ждем освобождения мест, не захватывая чтения
+                if not await scenario_runs.sleep(1):
+                    break
+                continue
+            
+            try:
+                batch = await ReadingRepository.claim_interrupted(limit, lease)
+            except Exception as e:
+                logger.error(f"Ошибка при захвате прерванных сценариев: {str(e)}")
+                break
+            if not batch:
+                break
+            
+            logger.info("Продолжение прерванных сценариев: %s", len(batch))
+            started = []
+            for reading in batch:
+                started.append(asyncio.get_running_loop().create_future())
+                await scenario_runs.submit(
+                    (reading.reading_payload.get("scenario") or {}).get("chat_id"),
+                    self._resume_job(reading, started[-1])
+                )
+            await asyncio.wait(started)
+            resumed += len(batch)
+        return resumed
+
+    def _resume_job(self, reading: Reading, started: asyncio.Future) -> Job:
+        """Задача исполнителя сценариев, отмечающая начало продолжения."""
+        async def job() -> None:
+            started.set_result(None)
+            await self._resume(reading)
+        return job
+
+    async def _resume(self, reading: Reading) -> None:
+        """Продолжение одного прерванного сценария."""
+        try:
+            # Проигрывание началось: чтение больше не ждет истечения аренды
+            await ReadingRepository.patch(reading.id, ReadingUpdate(status="pending"))
+        except Exception as e:
+            logger.error(f"Не удалось начать продолжение сценария {reading.id}: {str(e)}")
+            return
+        
+        progress = reading.reading_payload.get("scenario") or {}
+        chat_id = progress.get("chat_id")
+        if chat_id is None:
+            logger.warning(f"Прерванное чтение {reading.id} не содержит чата, продолжение невозможно")
+            return
+        
+        try:
+            await self.bot.send_message(chat_id, messages.SCENARIO_RESUMED)
+        except Exception as e:
+            logger.warning(f"Не удалось уведомить о продолжении сценария {reading.id}: {str(e)}")
+        
+        await self.play_scenario_steps(
+            reading.user_id,
+            chat_id,
+            reading.id,
+            reading.reading_type,
+            from_step_order=progress.get("next_step_order"),
+            step_reached=progress.get("step_reached", False)
+        )
 
     async def _play_step(self, chat_id: int, step, reading_id: int) -> None:
         """Проигрывание одного шага.
         
         Args:
             chat_id: ID чата Telegram
-            step: Объект шага
+            step: Шаг с вопросами
             reading_id: ID чтения
         """
         try:
-            logger.info(f"Проигрывание шага {step.id} ({step.name})")
+            logger.info("Проигрывание шага %s (%s)", step.id, step.name)
             
-            # Получаем вопросы для этого шага
-            questions = await QuestionRepository.get_by_step_id(step.id)
-            
-            # Если в description содержится текст, отправляем его
-            if step.description:
-                # Проверяем, содержит ли описание image_file_id
-                if "image_file_id:" in step.description:
-                    file_id = self._extract_file_id(step.description)
-                    if file_id:
-                        try:
-                            await self.bot.send_photo(chat_id, file_id)
-                        except Exception as e:
-                            logger.error(f"Ошибка при отправке фото: {str(e)}")
-                    # Отправляем текст после фото (если есть)
-                    text = self._extract_text_before_image(step.description)
-                    if text.strip():
-                        await self.bot.send_message(chat_id, text)
-                else:
-                    # Просто отправляем текст
-                    await self.bot.send_message(chat_id, step.description)
+            await self._send_step_content(chat_id, step.content)
             
             # Обрабатываем вопросы шага
-            for question in questions:
+            for question in step.questions:
                 await self._handle_question(chat_id, question, reading_id)
                 
         except Exception as e:
@@ -177,13 +328,16 @@ class ScenarioService:
     async def _handle_question(self, chat_id: int, question, reading_id: int) -> None:
         """Обработка вопроса.
         
+        Для текстовых вопросов и вопросов с keyboard кнопками ответ придет
+        обычным сообщением, поэтому вопрос регистрируется как ожидающий ответа.
+        
         Args:
             chat_id: ID чата Telegram
             question: Объект вопроса
             reading_id: ID чтения
         """
         try:
-            logger.info(f"Обработка вопроса {question.id} ({question.question_text})")
+            logger.info("Обработка вопроса %s (%s)", question.id, question.question_text)
             
             if question.question_type == "text":
                 # Текстовый вопрос - просто отправляем сообщение
@@ -191,12 +345,15 @@ class ScenarioService:
                     chat_id,
                     f"{messages.QUESTION_TEXT_INPUT}\n\n{question.question_text}"
                 )
+                await answer_recorder.expect_text(chat_id, reading_id, question.id)
             elif question.question_type == "single_choice":
                 # Выбор одного варианта - inline кнопки
-                await self._send_single_choice_question(chat_id, question)
+                await self._send_single_choice_question(chat_id, question, reading_id)
+                await answer_recorder.expect_choice(chat_id, reading_id, question.id)
             elif question.question_type == "multiple_choice":
                 # Выбор нескольких вариантов - keyboard кнопки
                 await self._send_multiple_choice_question(chat_id, question)
+                await answer_recorder.expect_text(chat_id, reading_id, question.id)
             else:
                 # Неизвестный тип вопроса
                 await self.bot.send_message(chat_id, question.question_text)
@@ -205,23 +362,27 @@ class ScenarioService:
             logger.error(f"Ошибка при обработке вопроса {question.id}: {str(e)}")
             raise
 
-    async def _send_single_choice_question(self, chat_id: int, question) -> None:
+    async def _send_single_choice_question(self, chat_id: int, question, reading_id: int) -> None:
         """Отправка вопроса с одним вариантом ответа (inline кнопки).
         
         Args:
             chat_id: ID чата Telegram
             question: Объект вопроса
+            reading_id: ID чтения
         """
         try:
             keyboard = InlineKeyboardMarkup(inline_keyboard=[])
             
             if question.options:
-                for option in question.options:
-                    text = option.get("text", "Опция")
-                    callback_data = option.get("payload", text)
+                for index, option in enumerate(question.options):
+                    # В callback data только номер варианта: payload может не поместиться в 64 байта
                     button = InlineKeyboardButton(
-                        text=text,
-                        callback_data=f"answer_{question.id}_{callback_data}"
+                        text=option.get("text", "Опция"),
+                        callback_data=AnswerCallback(
+                            reading_id=reading_id,
+                            question_id=question.id,
+                            option=index
+                        ).pack()
                     )
                     keyboard.inline_keyboard.append([button])
             
@@ -272,73 +433,60 @@ class ScenarioService:
             logger.error(f"Ошибка при отправке multiple choice вопроса: {str(e)}")
             raise
 
-    @staticmethod
-    def _extract_delay(description: Optional[str]) -> int:
-        """Извлечение задержки из описания.
+    async def _send_step_content(self, chat_id: int, content: StepContent) -> None:
+        """Отправка содержимого шага.
         
-        Args:
-            description: Описание шага
-            
-        Returns:
-            Задержка в секундах
-        """
-        if not description:
-            return 0
-        
-        try:
-            if "delay_sec:" in description:
-                parts = description.split("delay_sec:")
-                if len(parts) > 1:
-                    delay_str = parts[1].split("|")[0].strip()
-                    return int(delay_str)
-        except Exception as e:
-            logger.error(f"Ошибка при извлечении задержки: {str(e)}")
-        
-        return 0
-
-    @staticmethod
-    def _extract_file_id(description: Optional[str]) -> Optional[str]:
-        """Извлечение file_id фото из описания.
+        Текст, помещающийся в подпись, отправляется вместе с медиа одним
+        сообщением, иначе медиа и текст уходят отдельно.
         
         Args:
-            description: Описание шага
-            
-        Returns:
-            File ID или None
+            chat_id: ID чата Telegram
+            content: Содержимое шага
         """
-        if not description:
-            return None
+        reply_markup = self._build_step_keyboard(content)
+        text = content.text
         
-        try:
-            if "image_file_id:" in description:
-                parts = description.split("image_file_id:")
-                if len(parts) > 1:
-                    file_id = parts[1].split("|")[0].strip()
-                    return file_id
-        except Exception as e:
-            logger.error(f"Ошибка при извлечении file_id: {str(e)}")
+        if content.media:
+            with_caption = text is not None and len(text) <= CAPTION_MAX_LENGTH
+            send_media = getattr(self.bot, f"send_{content.media.type}")
+            try:
+                await send_media(
+                    chat_id,
+                    content.media.file_id,
+                    caption=text if with_caption else None,
+                    parse_mode=content.parse_mode,
+                    reply_markup=reply_markup if with_caption or not text else None
+                )
+                if with_caption:
+                    return
+            except Exception as e:
+                logger.error(f"Ошибка при отправке медиа: {str(e)}")
         
-        return None
+        if text:
+            await self.bot.send_message(
+                chat_id,
+                text,
+                parse_mode=content.parse_mode,
+                reply_markup=reply_markup
+            )
 
     @staticmethod
-    def _extract_text_before_image(description: Optional[str]) -> str:
-        """Извлечение текста перед фото.
+    def _build_step_keyboard(content: StepContent) -> Optional[InlineKeyboardMarkup]:
+        """Построение inline-клавиатуры шага.
         
         Args:
-            description: Описание шага
+            content: Содержимое шага
             
         Returns:
-            Текст или пустая строка
+            Клавиатура или None, если кнопок нет
         """
-        if not description:
-            return ""
-        
-        try:
-            if "image_file_id:" in description:
-                parts = description.split("image_file_id:")
-                if len(parts) > 0:
-                    return parts[0].strip()
-        except Exception as e:
-            logger.error(f"Ошибка при извлечении текста: {str(e)}")
+        if not content.buttons:
+            return None
         
-        return description
+        return InlineKeyboardMarkup(inline_keyboard=[
+            [
+                InlineKeyboardButton(text=button.text, url=button.url, callback_data=button.callback_data)
+                for button in row
+            ]
+            for row in content.buttons
+        ])
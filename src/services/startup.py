@@ -0,0 +1,65 @@
+"""Замер фаз запуска процесса."""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Dict, Iterator, Optional, TypeVar
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+STARTUP_PHASE = registry.gauge(
+    "bot_startup_phase_seconds",
+    "Длительность фаз запуска процесса",
+    ["phase"],
+)
+STARTUP_TOTAL = registry.gauge(
+    "bot_startup_seconds",
+    "Время от начала импорта приложения до готовности",
+)
+
+
+class StartupTimer:
+    """Длительности фаз запуска.
+
+    Фазы могут выполняться параллельно (timed внутри asyncio.gather),
+    поэтому общее время считается от started, а не суммой фаз.
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        """Инициализация.
+
+        Args:
+            started: Начало запуска по time.perf_counter (по умолчанию - сейчас)
+        """
+        self.started = time.perf_counter() if started is None else started
+        self.phases: Dict[str, float] = {}
+
+    def record(self, phase: str, seconds: float) -> None:
+        """Учет длительности фазы."""
+        self.phases[phase] = seconds
+        STARTUP_PHASE.set(seconds, phase)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Замер фазы, выполняемой внутри блока with."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    async def timed(self, name: str, awaitable: Awaitable[T]) -> T:
+        """Замер фазы-корутины; удобно для параллельных фаз в asyncio.gather."""
+        with self.phase(name):
+            return await awaitable
+
+    def report(self) -> str:
+        """Общее время и фазы в порядке завершения."""
+        total = time.perf_counter() - self.started
+        STARTUP_TOTAL.set(total)
+        phases = ", ".join(f"{name}={seconds * 1000:.0f}" for name, seconds in self.phases.items())
+        return f"Запуск за {total * 1000:.0f} мс ({phases})"
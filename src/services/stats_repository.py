@@ -0,0 +1,294 @@
+"""Репозиторий для работы с агрегированной статистикой."""
+
+import json
+import logging
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from ..models.stats import (
+    StatsSummary, ReadingStatusCount, PackageRevenue, ScenarioDurationStats
+)
+from .database import get_connection, fetch_one
+
+logger = logging.getLogger(__name__)
+
+# Границы бакетов гистограммы длительности сценариев (секунды)
+DURATION_BUCKETS_SEC: List[float] = [
+    1.0, 2.0, 5.0, 10.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0, 1800.0, 3600.0
+]
+
+ROLLUP_JOB_NAME = "daily"
+
+# Начальный watermark из миграции: статистика ещё ни разу не рассчитывалась
+_EPOCH_WATERMARK = datetime(1970, 1, 2, tzinfo=timezone.utc)
+
+
+def histogram_percentile(buckets: List[Tuple[float, int]], quantile: float) -> float:
+    """Оценка перцентиля по гистограмме.
+
+    Args:
+        buckets: Пары (верхняя граница бакета, количество), отсортированные по границе
+        quantile: Квантиль от 0 до 1
+
+    Returns:
+        Верхняя граница бакета, в который попадает квантиль. Для бакета
+        без верхней границы возвращается последняя конечная граница.
+    """
+    total = sum(count for _, count in buckets)
+    if total == 0:
+        return 0.0
+
+    rank = quantile * total
+    cumulative = 0
+    for upper, count in buckets:
+        cumulative += count
+        if cumulative >= rank:
+            return upper if upper != float("inf") else DURATION_BUCKETS_SEC[-1]
+    return DURATION_BUCKETS_SEC[-1]
+
+
+class StatsRepository:
+    """Репозиторий для rollup-таблиц статистики."""
+
+    @staticmethod
+    async def refresh_rollups(lookback: timedelta = timedelta(minutes=10)) -> Optional[datetime]:
+        """Инкрементальный пересчёт rollup-таблиц начиная с watermark.
+
+        Пересчитываются только дни, в которых с момента watermark появились
+        или изменились строки (по updated_at, который ведет триггер). Состояние блокируется через SKIP LOCKED, поэтому
+        при нескольких репликах пересчёт выполняет только одна.
+
+        Args:
+            lookback: Запас назад от watermark для транзакций, закоммиченных с опозданием
+
+        Returns:
+            Новый watermark или None, если пересчёт уже выполняется другим процессом
+        """
+        try:
+            async with get_connection() as conn:
+                async with conn.transaction():
+                    state = await conn.fetchrow(
+                        """
+                        SELECT watermark, NOW() AS now
+                        FROM stats_rollup_state
+                        WHERE job_name = $1
+                        FOR UPDATE SKIP LOCKED
+                        """,
+                        ROLLUP_JOB_NAME
+                    )
+                    if state is None:
+                        logger.debug("Пересчёт статистики уже выполняется другим процессом")
+                        return None
+
+                    since = state["watermark"] - lookback
+                    new_watermark = state["now"]
+
+                    days = await conn.fetchrow(
+                        """
+                        SELECT
+                            ARRAY(SELECT DISTINCT created_at::date FROM bot_users
+                                  WHERE created_at >= $1) AS user_days,
+                            ARRAY(SELECT DISTINCT created_at::date FROM readings
+                                  WHERE updated_at >= $1) AS reading_days,
+                            ARRAY(SELECT DISTINCT completed_at::date FROM readings
+                                  WHERE completed_at >= $1) AS duration_days,
+                            ARRAY(SELECT DISTINCT created_at::date FROM payments
+                                  WHERE updated_at >= $1) AS payment_days
+                        """,
+                        since
+                    )
+
+                    if days["user_days"]:
+                        await conn.execute(
+                            "DELETE FROM stats_daily_users WHERE day = ANY($1::date[])",
+                            days["user_days"]
+                        )
+                        await conn.execute(
+                            """
+                            INSERT INTO stats_daily_users (day, new_users)
+                            SELECT d.day, COUNT(u.id)
+                            FROM unnest($1::date[]) AS d(day)
+                            JOIN bot_users u ON u.created_at >= d.day AND u.created_at < d.day + 1
+                            GROUP BY d.day
+                            """,
+                            days["user_days"]
+                        )
+
+                    if days["reading_days"]:
+                        await conn.execute(
+                            "DELETE FROM stats_daily_readings WHERE day = ANY($1::date[])",
+                            days["reading_days"]
+                        )
+                        await conn.execute(
+                            """
+                            INSERT INTO stats_daily_readings (day, reading_type, status, readings_count)
+                            SELECT d.day, r.reading_type, r.status, COUNT(*)
+                            FROM unnest($1::date[]) AS d(day)
+                            JOIN readings r ON r.created_at >= d.day AND r.created_at < d.day + 1
+                            GROUP BY d.day, r.reading_type, r.status
+                            """,
+                            days["reading_days"]
+                        )
+
+                    if days["duration_days"]:
+                        await conn.execute(
+                            "DELETE FROM stats_daily_durations WHERE day = ANY($1::date[])",
+                            days["duration_days"]
+                        )
+                        await conn.execute(
+                            """
+                            INSERT INTO stats_daily_durations
+                                (day, reading_type, bucket_upper_sec, completed_count, duration_sum_sec)
+                            SELECT day, reading_type,
+                                   ($2::float8[] || 'Infinity'::float8)[width_bucket(duration, $2::float8[]) + 1],
+                                   COUNT(*), SUM(duration)
+                            FROM (
+                                SELECT d.day, r.reading_type,
+                                       EXTRACT(EPOCH FROM r.completed_at - r.created_at)::float8 AS duration
+                                FROM unnest($1::date[]) AS d(day)
+                                JOIN readings r ON r.completed_at >= d.day AND r.completed_at < d.day + 1
+                                WHERE r.status = 'completed'
+                            ) AS completed
+                            GROUP BY 1, 2, 3
+                            """,
+                            days["duration_days"],
+                            DURATION_BUCKETS_SEC
+                        )
+
+                    if days["payment_days"]:
+                        await conn.execute(
+                            "DELETE FROM stats_daily_revenue WHERE day = ANY($1::date[])",
+                            days["payment_days"]
+                        )
+                        await conn.execute(
+                            """
+                            INSERT INTO stats_daily_revenue (day, package_type, currency, payments_count, revenue)
+                            SELECT d.day, COALESCE(p.metadata->>'package_type', 'unknown'), p.currency,
+                                   COUNT(*), SUM(p.amount)
+                            FROM unnest($1::date[]) AS d(day)
+                            JOIN payments p ON p.created_at >= d.day AND p.created_at < d.day + 1
+                            WHERE p.status = 'succeeded'
+                            GROUP BY 1, 2, 3
+                            """,
+                            days["payment_days"]
+                        )
+
+                    await conn.execute(
+                        """
+                        UPDATE stats_rollup_state
+                        SET watermark = $2, updated_at = NOW()
+                        WHERE job_name = $1
+                        """,
+                        ROLLUP_JOB_NAME,
+                        new_watermark
+                    )
+
+            logger.info(
+                "Статистика пересчитана до %s: дней пользователей=%s, чтений=%s, длительностей=%s, платежей=%s",
+                new_watermark.isoformat(),
+                len(days['user_days']),
+                len(days['reading_days']),
+                len(days['duration_days']),
+                len(days['payment_days']),
+            )
+            return new_watermark
+
+        except Exception as e:
+            logger.error(f"Ошибка при пересчёте статистики: {str(e)}")
+            raise RuntimeError(f"Ошибка при пересчёте статистики: {str(e)}")
+
+    @staticmethod
+    async def get_summary(date_from: date, date_to: date) -> StatsSummary:
+        """Получение сводной статистики за период одним запросом к rollup-таблицам.
+
+        Args:
+            date_from: Начало периода (включительно)
+            date_to: Конец периода (включительно)
+
+        Returns:
+            Сводная статистика
+        """
+        try:
+            query = """
+                SELECT
+                    (SELECT watermark FROM stats_rollup_state WHERE job_name = $3) AS watermark,
+                    (SELECT COALESCE(SUM(new_users), 0) FROM stats_daily_users) AS total_users,
+                    (SELECT COALESCE(SUM(new_users), 0) FROM stats_daily_users
+                     WHERE day BETWEEN $1 AND $2) AS new_users,
+                    (SELECT COALESCE(jsonb_agg(x), '[]'::jsonb) FROM (
+                        SELECT reading_type, status, SUM(readings_count) AS readings_count
+                        FROM stats_daily_readings
+                        WHERE day BETWEEN $1 AND $2
+                        GROUP BY reading_type, status
+                        ORDER BY reading_type, status
+                    ) x) AS readings,
+                    (SELECT COALESCE(jsonb_agg(x), '[]'::jsonb) FROM (
+                        SELECT package_type, currency, SUM(payments_count) AS payments_count,
+                               SUM(revenue)::text AS revenue
+                        FROM stats_daily_revenue
+                        WHERE day BETWEEN $1 AND $2
+                        GROUP BY package_type, currency
+                        ORDER BY package_type, currency
+                    ) x) AS revenue,
+                    (SELECT COALESCE(jsonb_agg(x), '[]'::jsonb) FROM (
+                        SELECT reading_type, bucket_upper_sec::text AS bucket_upper_sec,
+                               SUM(completed_count) AS completed_count,
+                               SUM(duration_sum_sec) AS duration_sum_sec
+                        FROM stats_daily_durations
+                        WHERE day BETWEEN $1 AND $2
+                        GROUP BY reading_type, bucket_upper_sec
+                        ORDER BY reading_type, bucket_upper_sec
+                    ) x) AS durations
+            """
+            result = await fetch_one(query, date_from, date_to, ROLLUP_JOB_NAME)
+            if not result:
+                return StatsSummary(date_from=date_from, date_to=date_to)
+
+            readings = [ReadingStatusCount(**row) for row in json.loads(result["readings"])]
+            revenue = [
+                PackageRevenue(
+                    package_type=row["package_type"],
+                    currency=row["currency"],
+                    payments_count=row["payments_count"],
+                    revenue=Decimal(row["revenue"])
+                )
+                for row in json.loads(result["revenue"])
+            ]
+
+            histograms: Dict[str, List[Tuple[float, int]]] = {}
+            duration_sums: Dict[str, float] = {}
+            for row in json.loads(result["durations"]):
+                reading_type = row["reading_type"]
+                histograms.setdefault(reading_type, []).append(
+                    (float(row["bucket_upper_sec"]), int(row["completed_count"]))
+                )
+                duration_sums[reading_type] = duration_sums.get(reading_type, 0.0) + float(row["duration_sum_sec"])
+
+            durations = []
+            for reading_type, buckets in histograms.items():
+                completed_count = sum(count for _, count in buckets)
+                durations.append(ScenarioDurationStats(
+                    reading_type=reading_type,
+                    completed_count=completed_count,
+                    avg_sec=duration_sums[reading_type] / completed_count if completed_count else 0.0,
+                    p50_sec=histogram_percentile(buckets, 0.50),
+                    p90_sec=histogram_percentile(buckets, 0.90),
+                    p99_sec=histogram_percentile(buckets, 0.99),
+                ))
+
+            watermark = result["watermark"]
+            return StatsSummary(
+                date_from=date_from,
+                date_to=date_to,
+                watermark=watermark if watermark and watermark > _EPOCH_WATERMARK else None,
+                total_users=result["total_users"],
+                new_users=result["new_users"],
+                readings=readings,
+                revenue=revenue,
+                durations=durations,
+            )
+
+        except Exception as e:
+            logger.error(f"Ошибка при получении статистики за период {date_from} - {date_to}: {str(e)}")
+            raise RuntimeError(f"Ошибка при получении статистики: {str(e)}")
@@ -0,0 +1,85 @@
+"""Фоновый пересчёт агрегированной статистики."""
+
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from ..config import settings
+from .database import try_advisory_lock
+from .stats_repository import StatsRepository
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory-блокировки: пересчёт выполняет один процесс из всех воркеров
+ROLLUP_LOCK_KEY = 7_460_001
+
+
+class StatsRollupWorker:
+    """Периодически обновляет rollup-таблицы статистики от watermark.
+
+    Воркер запускается в каждом процессе, но каждый проход выполняет
+    только процесс, получивший advisory-блокировку ROLLUP_LOCK_KEY.
+    """
+
+    def __init__(self, interval_sec: Optional[int] = None, lookback_minutes: Optional[int] = None):
+        """Инициализация воркера.
+
+        Args:
+            interval_sec: Интервал между пересчётами (по умолчанию из настроек)
+            lookback_minutes: Запас назад от watermark (по умолчанию из настроек)
+        """
+        self.interval_sec = interval_sec or settings.stats_rollup_interval_sec
+        self.lookback = timedelta(minutes=lookback_minutes or settings.stats_rollup_lookback_minutes)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Запуск фоновой задачи."""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run(), name="stats-rollup")
+        logger.info("Запущен пересчёт статистики каждые %s сек", self.interval_sec)
+
+    async def stop(self) -> None:
+        """Остановка фоновой задачи."""
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Пересчёт статистики остановлен")
+
+    async def run_once(self) -> None:
+        """Однократный пересчёт статистики."""
+        await StatsRepository.refresh_rollups(self.lookback)
+
+    async def run_exclusive(self) -> bool:
+        """Пересчёт, если его не выполняет другой процесс.
+
+        Returns:
+            True если пересчёт выполнен в этом процессе
+        """
+        async with try_advisory_lock(ROLLUP_LOCK_KEY) as acquired:
+            if not acquired:
+                logger.debug("Пересчёт статистики выполняет другой процесс")
+                return False
+            await self.run_once()
+            return True
+
+    async def _run(self) -> None:
+        """Цикл фонового пересчёта."""
+        while True:
+            try:
+                await self.run_exclusive()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка в фоновом пересчёте статистики: {str(e)}")
+            await asyncio.sleep(self.interval_sec)
+
+
+# Создание экземпляра воркера
+stats_rollup_worker = StatsRollupWorker()
@@ -18,14 +18,15 @@ class StepRepository:
         """Создание нового шага."""
         try:
             query = """
-                INSERT INTO steps (name, description, step_order, is_active)
-                VALUES ($1, $2, $3, $4)
-                RETURNING id, name, description, step_order, is_active, created_at, updated_at
+                INSERT INTO steps (name, description, content, step_order, is_active)
+                VALUES ($1, $2, $3::jsonb, $4, $5)
+                RETURNING id, name, description, content, step_order, is_active, created_at, updated_at
             """
             result = await fetch_one(
                 query,
                 step_data.name,
                 step_data.description,
+                step_data.content.model_dump_json(exclude_none=True),
                 step_data.step_order,
                 step_data.is_active
             )
@@ -33,7 +34,7 @@ class StepRepository:
             if not result:
                 raise RuntimeError("Не удалось создать шаг")
             
-            logger.info(f"Создан шаг: {step_data.name}")
+            logger.info("Создан шаг: %s", step_data.name)
             return Step(**result)
             
         except Exception as e:
@@ -45,7 +46,7 @@ class StepRepository:
         """Получение шага по ID."""
         try:
             query = """
-                SELECT id, name, description, step_order, is_active, created_at, updated_at
+                SELECT id, name, description, content, step_order, is_active, created_at, updated_at
                 FROM steps
                 WHERE id = $1
             """
@@ -61,7 +62,7 @@ class StepRepository:
         """Получение шага по порядковому номеру."""
         try:
             query = """
-                SELECT id, name, description, step_order, is_active, created_at, updated_at
+                SELECT id, name, description, content, step_order, is_active, created_at, updated_at
                 FROM steps
                 WHERE step_order = $1
             """
@@ -77,7 +78,7 @@ class StepRepository:
         """Получение всех активных шагов, отсортированных по порядковому номеру."""
         try:
             query = """
-                SELECT id, name, description, step_order, is_active, created_at, updated_at
+                SELECT id, name, description, content, step_order, is_active, created_at, updated_at
                 FROM steps
                 WHERE is_active = TRUE
                 ORDER BY step_order ASC
@@ -94,7 +95,7 @@ class StepRepository:
         """Получение списка всех шагов с пагинацией."""
         try:
             query = """
-                SELECT id, name, description, step_order, is_active, created_at, updated_at
+                SELECT id, name, description, content, step_order, is_active, created_at, updated_at
                 FROM steps
                 ORDER BY step_order ASC
                 LIMIT $1 OFFSET $2
@@ -112,7 +113,7 @@ class StepRepository:
         try:
             # Получаем шаг
             step_query = """
-                SELECT id, name, description, step_order, is_active, created_at, updated_at
+                SELECT id, name, description, content, step_order, is_active, created_at, updated_at
                 FROM steps
                 WHERE id = $1
             """
@@ -145,7 +146,7 @@ class StepRepository:
         try:
             # Получаем активные шаги
             steps_query = """
-                SELECT id, name, description, step_order, is_active, created_at, updated_at
+                SELECT id, name, description, content, step_order, is_active, created_at, updated_at
                 FROM steps
                 WHERE is_active = TRUE
                 ORDER BY step_order ASC
@@ -197,6 +198,11 @@ class StepRepository:
                 args.append(step_data.description)
                 arg_index += 1
 
+            if step_data.content is not None:
+                update_fields.append(f"content = ${arg_index}::jsonb")
+                args.append(step_data.content.model_dump_json(exclude_none=True))
+                arg_index += 1
+
             if step_data.step_order is not None:
                 update_fields.append(f"step_order = ${arg_index}")
                 args.append(step_data.step_order)
@@ -217,7 +223,7 @@ class StepRepository:
                 UPDATE steps
                 SET {', '.join(update_fields)}
                 WHERE id = ${arg_index}
-                RETURNING id, name, description, step_order, is_active, created_at, updated_at
+                RETURNING id, name, description, content, step_order, is_active, created_at, updated_at
             """
             
             result = await fetch_one(query, *args)
@@ -225,7 +231,7 @@ class StepRepository:
             if not result:
                 return None
             
-            logger.info(f"Обновлен шаг с ID: {step_id}")
+            logger.info("Обновлен шаг с ID: %s", step_id)
             return Step(**result)
             
         except Exception as e:
@@ -243,7 +249,7 @@ class StepRepository:
             deleted = "DELETE 1" in result
             
             if deleted:
-                logger.info(f"Удален шаг с ID: {step_id}")
+                logger.info("Удален шаг с ID: %s", step_id)
             
             return deleted
             
@@ -300,7 +306,7 @@ class StepRepository:
                 query = "UPDATE steps SET step_order = $1 WHERE id = $2"
                 await execute_query(query, new_order, step_id)
             
-            logger.info(f"Изменен порядок шагов: {step_orders}")
+            logger.info("Изменен порядок шагов: %s", step_orders)
             return True
             
         except Exception as e:
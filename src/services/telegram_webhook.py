@@ -0,0 +1,96 @@
+"""Прием Telegram webhook с быстрым ответом и фоновой обработкой."""
+
+import logging
+from typing import Any, Dict, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import web
+
+from .dedup import Deduplicator
+from .work_queue import BoundedWorkQueue
+
+logger = logging.getLogger(__name__)
+
+# Через сколько секунд Telegram стоит повторить доставку при перегрузке
+RETRY_AFTER_SEC = 5
+
+
+class QueuedRequestHandler(SimpleRequestHandler):
+    """Webhook-обработчик, который только проверяет и ставит update в очередь.
+
+    Ответ Telegram уходит сразу после постановки в очередь, поэтому долгий
+    сценарий не держит HTTP-запрос и не вызывает повторную доставку.
+    При заполненной очереди возвращается 429, при остановке - 503:
+    Telegram повторит доставку позже, а процесс не накапливает задачи в памяти.
+
+    Повторно доставленный update_id подтверждается без постановки в очередь.
+    Если update не принят (429 или обрыв запроса), его ключ дедупликации
+    освобождается, чтобы повторная доставка Telegram была обработана.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        queue: BoundedWorkQueue[Dict[str, Any]],
+        secret_token: str = "",
+        deduplicator: Optional[Deduplicator] = None,
+        **data: Any,
+    ) -> None:
+        """Инициализация обработчика.
+
+        Args:
+            dispatcher: Диспетчер aiogram
+            bot: Экземпляр бота
+            queue: Очередь сырых update
+            secret_token: Ожидаемое значение X-Telegram-Bot-Api-Secret-Token
+            deduplicator: Окно дедупликации update_id
+        """
+        super().__init__(
+            dispatcher=dispatcher,
+            bot=bot,
+            handle_in_background=True,
+            secret_token=secret_token or None,
+            **data,
+        )
+        self.queue = queue
+        self.deduplicator = deduplicator
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Проверка секрета, постановка update в очередь и немедленный ответ."""
+        if not self.verify_secret(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), self.bot):
+            logger.warning(f"Webhook с неверным секретом от {request.remote}")
+            return web.Response(body="Unauthorized", status=401)
+
+        if not self.queue.accepting:
+            return web.Response(
+                body="Service Unavailable", status=503, headers={"Retry-After": str(RETRY_AFTER_SEC)}
+            )
+
+        try:
+            update = await request.json(loads=self.bot.session.json_loads)
+        except ValueError:
+            return web.Response(body="Bad Request", status=400)
+
+        update_id = update.get("update_id")
+        key = str(update_id) if self.deduplicator is not None and update_id is not None else None
+        if key is not None and await self.deduplicator.is_duplicate(key):
+            logger.info("Повторный update %s отброшен", update_id)
+            return web.json_response({}, dumps=self.bot.session.json_dumps)
+
+        try:
+            if not self.queue.submit(update):
+                logger.warning(f"Очередь update заполнена ({len(self.queue)}), update {update_id} отклонен")
+                if key is not None:
+                    await self.deduplicator.forget(key)
+                return web.Response(
+                    body="Too Many Requests", status=429, headers={"Retry-After": str(RETRY_AFTER_SEC)}
+                )
+        except BaseException:
+            # Запрос оборван до постановки в очередь: Telegram доставит update повторно
+            if key is not None:
+                await self.deduplicator.forget(key)
+            raise
+
+        return web.json_response({}, dumps=self.bot.session.json_dumps)
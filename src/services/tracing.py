@@ -0,0 +1,355 @@
+"""Трассировка обработки update.
+
+Каждый update получает корневой span, вызовы БД из database.py, Bot API
+и YooKassa - дочерние span. Span всех update собираются в памяти, а по
+завершении корневого span решается, сохранять ли трассу: сохраняется
+доля TRACING_SAMPLE_RATE (head sampling) и всегда - трассы дольше
+TRACING_SLOW_MS или завершившиеся ошибкой (tail sampling). Сохраненные
+span пишутся пачками в файл в формате OTLP JSON: каждая строка файла -
+один ExportTraceServiceRequest.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Dict, List, Optional
+
+from ..config import settings
+from .write_buffer import BatchBuffer
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "telegram_bot"
+
+# Ограничения на размер трассы в памяти
+MAX_SPANS_PER_TRACE = 512
+MAX_ATTRIBUTE_LENGTH = 256
+
+
+class SpanKind(IntEnum):
+    """Вид span по спецификации OTLP."""
+
+    INTERNAL = 1
+    SERVER = 2
+    CLIENT = 3
+
+
+class StatusCode(IntEnum):
+    """Статус span по спецификации OTLP."""
+
+    UNSET = 0
+    OK = 1
+    ERROR = 2
+
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Trace:
+    """Span одной трассы, ожидающие решения о сохранении."""
+
+    __slots__ = ("trace_id", "sampled", "spans", "error", "finished", "dropped_spans")
+
+    def __init__(self, sampled: bool):
+        """Инициализация.
+
+        Args:
+            sampled: Трасса попала в долю head sampling
+        """
+        self.trace_id = os.urandom(16).hex()
+        self.sampled = sampled
+        self.spans: List["Span"] = []
+        self.error = False
+        self.finished = False
+        self.dropped_spans = 0
+
+
+class Span:
+    """Интервал работы с атрибутами; используется как контекстный менеджер."""
+
+    __slots__ = (
+        "tracer", "trace", "span_id", "parent_id", "name", "kind",
+        "attributes", "start_ns", "end_ns", "status", "status_message", "_token",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        trace: Trace,
+        name: str,
+        kind: SpanKind,
+        attributes: Optional[Dict[str, Any]],
+        parent: Optional["Span"],
+    ):
+        """Инициализация span (время начала фиксируется при входе в контекст)."""
+        self.tracer = tracer
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes) if attributes else {}
+        self.start_ns = 0
+        self.end_ns = 0
+        self.status = StatusCode.UNSET
+        self.status_message = ""
+        self._token = None
+
+    def __enter__(self) -> "Span":
+        """Начало span и установка его текущим."""
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        """Завершение span; исключение отмечается ошибкой и пробрасывается дальше."""
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc is not None and not isinstance(exc, asyncio.CancelledError):
+            self.record_error(exc)
+        self.tracer._finish_span(self)
+        return False
+
+    @property
+    def duration_ms(self) -> float:
+        """Длительность в миллисекундах."""
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Установка атрибута."""
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        """Отметка span и трассы ошибкой."""
+        self.status = StatusCode.ERROR
+        self.status_message = f"{type(error).__name__}: {error}"[:MAX_ATTRIBUTE_LENGTH]
+        self.trace.error = True
+
+
+class _NoopSpan:
+    """Span вне трассы: ничего не записывает."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """Значение атрибута в виде AnyValue."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)[:MAX_ATTRIBUTE_LENGTH]}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Атрибуты в виде списка KeyValue."""
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def span_to_otlp(span: Span) -> Dict[str, Any]:
+    """Span в формате OTLP JSON."""
+    data: Dict[str, Any] = {
+        "traceId": span.trace.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": int(span.kind),
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": _otlp_attributes(span.attributes),
+        "status": {"code": int(span.status)},
+    }
+    if span.parent_id is not None:
+        data["parentSpanId"] = span.parent_id
+    if span.status_message:
+        data["status"]["message"] = span.status_message
+    return data
+
+
+def otlp_request(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """ExportTraceServiceRequest с одним ресурсом - текущим процессом."""
+    resource = {"service.name": SERVICE_NAME, "process.pid": os.getpid()}
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes(resource)},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+        }]
+    }
+
+
+class TraceFileExporter:
+    """Пакетная запись span в файл OTLP JSON Lines.
+
+    Span копятся в BatchBuffer; пачка сериализуется в одну строку и
+    дописывается в файл в отдельном потоке, не блокируя цикл событий.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """Инициализация.
+
+        Args:
+            path: Путь к файлу трасс (по умолчанию из настроек)
+        """
+        self.path = path or settings.tracing_file
+        self.buffer: BatchBuffer[Dict[str, Any]] = BatchBuffer(
+            "traces",
+            self.write,
+            max_rows=settings.tracing_batch_size,
+            flush_interval_ms=settings.tracing_flush_ms,
+            max_pending=settings.tracing_batch_size * 100,
+        )
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        """Постановка span трассы в очередь записи."""
+        for span in spans:
+            self.buffer.add(span)
+
+    async def write(self, spans: List[Dict[str, Any]]) -> None:
+        """Запись пачки span одной строкой."""
+        line = json.dumps(otlp_request(spans), ensure_ascii=False, separators=(",", ":"))
+        await asyncio.to_thread(self._append, line)
+
+    def _append(self, line: str) -> None:
+        """Дописывание строки в файл."""
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(line + "\n")
+
+    async def flush(self) -> int:
+        """Принудительная запись накопленных span."""
+        return await self.buffer.flush()
+
+    async def close(self) -> None:
+        """Финальная запись при остановке."""
+        await self.buffer.close()
+
+
+class Tracer:
+    """Создание span и решение о сохранении трасс."""
+
+    def __init__(
+        self,
+        exporter: Optional[TraceFileExporter] = None,
+        enabled: Optional[bool] = None,
+        sample_rate: Optional[float] = None,
+        slow_ms: Optional[float] = None,
+    ):
+        """Инициализация.
+
+        Args:
+            exporter: Запись сохраненных трасс (по умолчанию в TRACING_FILE)
+            enabled: Включена ли трассировка (по умолчанию из настроек)
+            sample_rate: Доля трасс, сохраняемых без условий
+            slow_ms: Порог длительности, выше которого трасса сохраняется всегда
+        """
+        self.enabled = settings.tracing_enabled if enabled is None else enabled
+        self.sample_rate = settings.tracing_sample_rate if sample_rate is None else sample_rate
+        self.slow_ms = settings.tracing_slow_ms if slow_ms is None else slow_ms
+        self._exporter = exporter
+        self.kept = 0
+        self.discarded = 0
+
+    @property
+    def exporter(self) -> TraceFileExporter:
+        """Экспортер, создаваемый при первой сохраненной трассе."""
+        if self._exporter is None:
+            self._exporter = TraceFileExporter()
+        return self._exporter
+
+    def trace(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Any:
+        """Корневой span новой трассы.
+
+        Args:
+            name: Имя span
+            attributes: Атрибуты span
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        trace = Trace(sampled=random.random() < self.sample_rate)
+        return Span(self, trace, name, SpanKind.SERVER, attributes, parent=None)
+
+    def span(
+        self,
+        name: str,
+        kind: SpanKind = SpanKind.INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """Дочерний span текущего; вне трассы ничего не записывается.
+
+        Args:
+            name: Имя span
+            kind: Вид span
+            attributes: Атрибуты span
+        """
+        parent = _current_span.get()
+        if parent is None or parent.trace.finished:
+            return NOOP_SPAN
+        return Span(self, parent.trace, name, kind, attributes, parent)
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        """Текущий span или None."""
+        return _current_span.get()
+
+    def _finish_span(self, span: Span) -> None:
+        """Учет завершенного span; завершение корневого закрывает трассу."""
+        trace = span.trace
+        if trace.finished:
+            return
+        if span.parent_id is not None:
+            if len(trace.spans) < MAX_SPANS_PER_TRACE:
+                trace.spans.append(span)
+            else:
+                trace.dropped_spans += 1
+            return
+
+        trace.finished = True
+        reason = self._keep_reason(trace, span)
+        if reason is None:
+            self.discarded += 1
+            return
+
+        self.kept += 1
+        span.set_attribute("sampling.reason", reason)
+        if trace.dropped_spans:
+            span.set_attribute("trace.dropped_spans", trace.dropped_spans)
+        self.exporter.export([span_to_otlp(item) for item in (span, *trace.spans)])
+
+    def _keep_reason(self, trace: Trace, root: Span) -> Optional[str]:
+        """Причина сохранения трассы или None, если трасса отбрасывается."""
+        if trace.error:
+            return "error"
+        if root.duration_ms >= self.slow_ms:
+            return "slow"
+        if trace.sampled:
+            return "head"
+        return None
+
+    async def close(self) -> None:
+        """Запись оставшихся трасс при остановке."""
+        if self._exporter is not None:
+            await self._exporter.close()
+
+
+# Трассировщик процесса
+tracer = Tracer()
@@ -3,11 +3,42 @@
 import logging
 from typing import Optional, List
 
+from ..config import settings
 from ..models.user import User, UserCreate, UserUpdate
-from .database import fetch_one, fetch_many, execute_query, fetch_val
+from .cache import TTLCache
+from .database import fetch_one, fetch_many, execute_query, fetch_val, prepared
 
 logger = logging.getLogger(__name__)
 
+# Пользователи по telegram_id. Кэш процесса: изменения из других процессов
+# (например, paid_readings_left после оплаты) видны после истечения TTL
+user_cache: TTLCache[int, User] = TTLCache(settings.user_cache_size, settings.user_cache_ttl_sec)
+
+# Запросы горячего пути готовятся на каждом соединении пула
+SELECT_USER_BY_TELEGRAM_ID = prepared("""
+    SELECT id, telegram_id, first_name, last_name, username, is_bot, paid_readings_left, created_at, updated_at
+    FROM bot_users
+    WHERE telegram_id = $1
+""")
+INSERT_USER = prepared("""
+    INSERT INTO bot_users (telegram_id, first_name, last_name, username, is_bot)
+    VALUES ($1, $2, $3, $4, $5)
+    RETURNING id, telegram_id, first_name, last_name, username, is_bot, paid_readings_left, created_at, updated_at
+""")
+SELECT_RECENTLY_ACTIVE_USERS = """
+    WITH recent AS (
+        SELECT user_id, MAX(created_at) AS last_reading_at
+        FROM (SELECT user_id, created_at FROM readings ORDER BY created_at DESC LIMIT $2) r
+        GROUP BY user_id
+    )
+    SELECT u.id, u.telegram_id, u.first_name, u.last_name, u.username, u.is_bot, u.paid_readings_left,
+           u.created_at, u.updated_at
+    FROM recent
+    JOIN bot_users u ON u.id = recent.user_id
+    ORDER BY recent.last_reading_at DESC
+    LIMIT $1
+"""
+
 
 class UserRepository:
     """Репозиторий для управления пользователями."""
@@ -16,13 +47,8 @@ class UserRepository:
     async def create(user_data: UserCreate) -> User:
         """Создание нового пользователя."""
         try:
-            query = """
-                INSERT INTO bot_users (telegram_id, first_name, last_name, username, is_bot)
-                VALUES ($1, $2, $3, $4, $5)
-                RETURNING id, telegram_id, first_name, last_name, username, is_bot, created_at, updated_at
-            """
             result = await fetch_one(
-                query,
+                INSERT_USER,
                 user_data.telegram_id,
                 user_data.first_name,
                 user_data.last_name,
@@ -33,8 +59,10 @@ class UserRepository:
             if not result:
                 raise RuntimeError("Не удалось создать пользователя")
             
-            logger.info(f"Создан пользователь с telegram_id: {user_data.telegram_id}")
-            return User(**result)
+            logger.info("Создан пользователь с telegram_id: %s", user_data.telegram_id)
+            user = User(**result)
+            user_cache.set(user.telegram_id, user)
+            return user
             
         except Exception as e:
             logger.error(f"Ошибка при создании пользователя: {str(e)}")
@@ -45,7 +73,7 @@ class UserRepository:
         """Получение пользователя по ID."""
         try:
             query = """
-                SELECT id, telegram_id, first_name, last_name, username, is_bot, created_at, updated_at
+                SELECT id, telegram_id, first_name, last_name, username, is_bot, paid_readings_left, created_at, updated_at
                 FROM bot_users
                 WHERE id = $1
             """
@@ -60,13 +88,16 @@ class UserRepository:
     async def get_by_telegram_id(telegram_id: int) -> Optional[User]:
         """Получение пользователя по telegram_id."""
         try:
-            query = """
-                SELECT id, telegram_id, first_name, last_name, username, is_bot, created_at, updated_at
-                FROM bot_users
-                WHERE telegram_id = $1
-            """
-            result = await fetch_one(query, telegram_id)
-            return User(**result) if result else None
+            cached = user_cache.get(telegram_id)
+            if cached is not None:
+                return cached
+
+            result = await fetch_one(SELECT_USER_BY_TELEGRAM_ID, telegram_id)
+            if not result:
+                return None
+            user = User(**result)
+            user_cache.set(telegram_id, user)
+            return user
             
         except Exception as e:
             logger.error(f"Ошибка при получении пользователя по telegram_id {telegram_id}: {str(e)}")
@@ -77,7 +108,7 @@ class UserRepository:
         """Получение пользователя по username."""
         try:
             query = """
-                SELECT id, telegram_id, first_name, last_name, username, is_bot, created_at, updated_at
+                SELECT id, telegram_id, first_name, last_name, username, is_bot, paid_readings_left, created_at, updated_at
                 FROM bot_users
                 WHERE username = $1
             """
@@ -127,7 +158,7 @@ class UserRepository:
                 UPDATE bot_users
                 SET {', '.join(update_fields)}
                 WHERE id = ${arg_index}
-                RETURNING id, telegram_id, first_name, last_name, username, is_bot, created_at, updated_at
+                RETURNING id, telegram_id, first_name, last_name, username, is_bot, paid_readings_left, created_at, updated_at
             """
             
             result = await fetch_one(query, *args)
@@ -135,8 +166,10 @@ class UserRepository:
             if not result:
                 return None
             
-            logger.info(f"Обновлен пользователь с ID: {user_id}")
-            return User(**result)
+            logger.info("Обновлен пользователь с ID: %s", user_id)
+            user = User(**result)
+            user_cache.set(user.telegram_id, user)
+            return user
             
         except Exception as e:
             logger.error(f"Ошибка при обновлении пользователя {user_id}: {str(e)}")
@@ -153,7 +186,9 @@ class UserRepository:
             deleted = "DELETE 1" in result
             
             if deleted:
-                logger.info(f"Удален пользователь с ID: {user_id}")
+                # telegram_id удаленного пользователя неизвестен, удаление редкое
+                user_cache.clear()
+                logger.info("Удален пользователь с ID: %s", user_id)
             
             return deleted
             
@@ -166,7 +201,7 @@ class UserRepository:
         """Получение списка всех пользователей с пагинацией."""
         try:
             query = """
-                SELECT id, telegram_id, first_name, last_name, username, is_bot, created_at, updated_at
+                SELECT id, telegram_id, first_name, last_name, username, is_bot, paid_readings_left, created_at, updated_at
                 FROM bot_users
                 ORDER BY created_at DESC
                 LIMIT $1 OFFSET $2
@@ -178,6 +213,33 @@ class UserRepository:
             logger.error(f"Ошибка при получении списка пользователей: {str(e)}")
             raise RuntimeError(f"Ошибка при получении списка пользователей: {str(e)}")
 
+    @staticmethod
+    async def get_recently_active(limit: int) -> List[User]:
+        """Пользователи с самыми последними чтениями.
+
+        Просматриваются последние limit * 10 чтений по индексу
+        idx_readings_created_at, а не вся таблица.
+        """
+        try:
+            results = await fetch_many(SELECT_RECENTLY_ACTIVE_USERS, limit, limit * 10)
+            return [User(**result) for result in results]
+
+        except Exception as e:
+            logger.error(f"Ошибка при получении активных пользователей: {str(e)}")
+            raise RuntimeError(f"Ошибка при получении активных пользователей: {str(e)}")
+
+    @staticmethod
+    async def preload_cache(limit: int) -> int:
+        """Загрузка недавно активных пользователей в кэш.
+
+        Returns:
+            Количество загруженных пользователей
+        """
+        users = await UserRepository.get_recently_active(limit)
+        for user in users:
+            user_cache.set(user.telegram_id, user)
+        return len(users)
+
     @staticmethod
     async def get_total_count() -> int:
         """Получение общего количества пользователей."""
@@ -0,0 +1,79 @@
+"""Прогрев процесса перед приемом update."""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from ..config import settings
+from . import database
+from .scenario_content import scenario_content
+from .user_repository import UserRepository
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """Загрузка кэшей, без которой первые update после запуска медленные.
+
+    Соединения пула (DATABASE_POOL_MIN_SIZE) открываются при создании
+    пула, и на каждом из них сразу готовятся запросы горячего пути
+    (database.prepare_connection). Прогрев дополняет это загрузкой
+    шагов сценария с вопросами и, если задано WARMUP_RECENT_USERS,
+    недавно активных пользователей в кэш. Процесс начинает принимать
+    update только после прогрева; completed показывает, что все шаги
+    прогрева выполнены, а failed - какие из них не удались. Процесс с
+    неудавшимся прогревом запускается, но не готов (/readyz), пока
+    повторный прогрев не пройдет.
+    """
+
+    def __init__(self, recent_users: Optional[int] = None):
+        """Инициализация.
+
+        Args:
+            recent_users: Сколько недавно активных пользователей загрузить (0 - не загружать)
+        """
+        self.recent_users = settings.warmup_recent_users if recent_users is None else recent_users
+        self.completed = False
+        self.failed: List[str] = []
+        self.stats: Dict[str, int] = {}
+
+    async def run(self) -> Dict[str, int]:
+        """Прогрев; ошибки пишутся в лог и не останавливают запуск.
+
+        Returns:
+            Что загружено: запросов на соединение, шагов, пользователей
+        """
+        self.stats = {"prepared_statements": len(database.PREPARED_STATEMENTS)}
+        results = await asyncio.gather(
+            scenario_content.get_active_steps(),
+            UserRepository.preload_cache(self.recent_users) if self.recent_users > 0 else _nothing(),
+            return_exceptions=True,
+        )
+        steps, users = results
+        failed = []
+        if isinstance(steps, BaseException):
+            failed.append("steps")
+            logger.warning(f"Шаги сценария не загружены при прогреве: {str(steps)}")
+        else:
+            self.stats["steps"] = len(steps)
+            self.stats["questions"] = sum(len(step.questions) for step in steps)
+        if isinstance(users, BaseException):
+            failed.append("users")
+            logger.warning(f"Пользователи не загружены при прогреве: {str(users)}")
+        else:
+            self.stats["users"] = users
+
+        self.failed = failed
+        self.completed = not failed
+        if self.completed:
+            logger.info("Прогрев завершен: %s", self.stats)
+        return self.stats
+
+
+async def _nothing() -> int:
+    """Пропущенный шаг прогрева."""
+    return 0
+
+
+# Прогрев процесса
+warmup = Warmup()
@@ -0,0 +1,122 @@
+"""Ограниченная очередь фоновой обработки с пулом воркеров."""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BoundedWorkQueue(Generic[T]):
+    """Очередь задач фиксированного размера, которую разбирают N воркеров.
+
+    submit() не ждет: при заполненной или закрытой очереди он возвращает
+    False, и вызывающий код сообщает отправителю о перегрузке, вместо того
+    чтобы копить задачи в памяти. Ошибки обработчика логируются и не
+    останавливают воркер.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[T], Awaitable[None]],
+        workers: int = 16,
+        max_size: int = 1000,
+    ):
+        """Инициализация очереди.
+
+        Args:
+            name: Имя очереди для логов
+            handler: Асинхронный обработчик одной задачи
+            workers: Число воркеров
+            max_size: Предельное число задач в очереди
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.max_size = max_size
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._closed = False
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        """Число задач, ожидающих обработки."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def accepting(self) -> bool:
+        """Принимает ли очередь новые задачи."""
+        return self._queue is not None and not self._closed
+
+    def start(self) -> None:
+        """Запуск воркеров."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._closed = False
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info("Очередь %s запущена: воркеров=%s, размер=%s", self.name, self.workers, self.max_size)
+
+    def submit(self, item: T) -> bool:
+        """Постановка задачи в очередь без ожидания.
+
+        Returns:
+            True если задача принята, False если очередь заполнена или закрыта
+        """
+        if not self.accepting:
+            self.rejected += 1
+            return False
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        return True
+
+    async def close(self, timeout: float = 30) -> None:
+        """Прекращение приема задач и дообработка очереди.
+
+        Args:
+            timeout: Время на дообработку, после которого воркеры отменяются
+        """
+        if self._queue is None or not self._tasks:
+            return
+
+        self._closed = True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Очередь {self.name}: не обработано {len(self)} задач за {timeout} сек"
+            )
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Очередь %s остановлена", self.name)
+
+    async def _worker(self) -> None:
+        """Цикл воркера."""
+        while True:
+            item = await self._queue.get()
+            self.in_flight += 1
+            try:
+                await self.handler(item)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Очередь {self.name}: ошибка обработки задачи: {str(e)}")
+            finally:
+                self.in_flight -= 1
+                self._queue.task_done()
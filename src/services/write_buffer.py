@@ -0,0 +1,161 @@
+"""Буфер отложенной пакетной записи (write-behind)."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Generic, Hashable, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BatchBuffer(Generic[T]):
+    """Копит записи в памяти и сбрасывает их пачкой.
+
+    Сброс происходит, когда накоплено max_rows записей, по таймеру раз в
+    flush_interval_ms миллисекунд и при закрытии. Добавление не блокирует
+    обработчик: запись в БД выполняется в фоновой задаче. Если сброс не
+    удался, записи возвращаются в буфер; при переполнении max_pending
+    самые старые отбрасываются.
+
+    Если задан dedup_key, повторная запись с тем же ключом в течение
+    dedup_window_sec отбрасывается (например, двойное нажатие кнопки).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush_func: Callable[[List[T]], Awaitable[Any]],
+        max_rows: int = 500,
+        flush_interval_ms: int = 1000,
+        max_pending: int = 100_000,
+        dedup_key: Optional[Callable[[T], Hashable]] = None,
+        dedup_window_sec: float = 0,
+    ):
+        """Инициализация буфера.
+
+        Args:
+            name: Имя буфера для логов
+            flush_func: Корутина, записывающая пачку записей
+            max_rows: Размер пачки, при котором сброс запускается сразу
+            flush_interval_ms: Максимальное время жизни записи в буфере
+            max_pending: Предельное число записей в памяти
+            dedup_key: Функция ключа для отбрасывания повторов
+            dedup_window_sec: Окно, в течение которого повтор считается дублем
+        """
+        self.name = name
+        self.flush_func = flush_func
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.dedup_key = dedup_key
+        self.dedup_window_sec = dedup_window_sec
+
+        self._recent: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._items: List[T] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self._flush_tasks: set = set()
+        self._closed = False
+
+    def __len__(self) -> int:
+        """Количество записей, ожидающих сброса."""
+        return len(self._items)
+
+    def add(self, item: T) -> bool:
+        """Добавление записи в буфер.
+
+        Args:
+            item: Запись
+
+        Returns:
+            True если запись принята, False если буфер закрыт или запись — дубль
+        """
+        if self._closed:
+            logger.warning(f"Буфер {self.name} закрыт, запись отброшена")
+            return False
+
+        if self.dedup_key is not None and self._is_duplicate(self.dedup_key(item)):
+            logger.debug("Буфер %s: дубль записи отброшен", self.name)
+            return False
+
+        self._items.append(item)
+        self._trim()
+
+        if len(self._items) >= self.max_rows:
+            self._schedule_flush()
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later(), name=f"{self.name}-timer")
+        return True
+
+    async def flush(self) -> int:
+        """Сброс всех накопленных записей.
+
+        Returns:
+            Количество записанных записей
+        """
+        async with self._lock:
+            if not self._items:
+                return 0
+
+            batch, self._items = self._items, []
+            try:
+                await self.flush_func(batch)
+                logger.debug("Буфер %s: записано %s записей", self.name, len(batch))
+                return len(batch)
+            except asyncio.CancelledError:
+                self._items = batch + self._items
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка при сбросе буфера {self.name} ({len(batch)} записей): {str(e)}")
+                self._items = batch + self._items
+                self._trim()
+                return 0
+
+    async def close(self) -> None:
+        """Остановка таймера и финальный сброс."""
+        self._closed = True
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        await self.flush()
+        if self._items:
+            logger.error(f"Буфер {self.name}: при закрытии потеряно {len(self._items)} записей")
+
+    def _schedule_flush(self) -> None:
+        """Запуск сброса в фоне без ожидания."""
+        task = asyncio.create_task(self.flush(), name=f"{self.name}-flush")
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_later(self) -> None:
+        """Сброс по истечении интервала, пока в буфере остаются записи."""
+        while self._items:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def _is_duplicate(self, key: Hashable) -> bool:
+        """Проверка ключа по окну недавних записей с его обновлением."""
+        now = time.monotonic()
+        # Записи в OrderedDict упорядочены по времени, устаревшие лежат в начале
+        while self._recent:
+            seen_at = next(iter(self._recent.values()))
+            if now - seen_at < self.dedup_window_sec and len(self._recent) <= self.max_pending:
+                break
+            self._recent.popitem(last=False)
+
+        if key in self._recent:
+            return True
+        self._recent[key] = now
+        return False
+
+    def _trim(self) -> None:
+        """Ограничение размера буфера."""
+        overflow = len(self._items) - self.max_pending
+        if overflow > 0:
+            del self._items[:overflow]
+            logger.warning(f"Буфер {self.name} переполнен, отброшено {overflow} старых записей")
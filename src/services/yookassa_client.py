@@ -0,0 +1,139 @@
+"""Асинхронный HTTP-клиент API YooKassa."""
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+from ..config import settings
+from .metrics import YOOKASSA_DURATION
+from .tracing import SpanKind, tracer
+
+logger = logging.getLogger(__name__)
+
+
+class YooKassaClient:
+    """Клиент API YooKassa на общем пуле соединений aiohttp.
+
+    SDK yookassa синхронный и блокирует цикл событий на время запроса,
+    поэтому запросы из асинхронного кода идут через этот клиент. Сессия
+    создается при первом запросе и переиспользует соединения; их число
+    ограничено max_connections. Сетевые ошибки и ответы 5xx повторяются
+    до retries раз: чтение безопасно повторять, а создание платежа
+    повторяется с тем же Idempotence-Key.
+    """
+
+    # Пауза перед повтором, умножается на номер попытки
+    RETRY_DELAY_SEC = 0.2
+
+    def __init__(
+        self,
+        api_url: Optional[str] = None,
+        shop_id: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        timeout_sec: Optional[float] = None,
+        retries: int = 2,
+    ):
+        """Инициализация клиента.
+
+        Args:
+            api_url: Базовый URL API (по умолчанию из настроек)
+            shop_id: ID магазина (по умолчанию из настроек)
+            secret_key: Секретный ключ (по умолчанию из настроек)
+            max_connections: Размер пула соединений (по умолчанию из настроек)
+            timeout_sec: Таймаут запроса (по умолчанию из настроек)
+            retries: Число повторов при сетевой ошибке или ответе 5xx
+        """
+        self.api_url = (api_url or settings.yookassa_api_url).rstrip("/")
+        self.shop_id = shop_id or settings.yookassa_shop_id
+        self.secret_key = secret_key or settings.yookassa_api_key
+        self.max_connections = max_connections or settings.yookassa_max_connections
+        self.timeout_sec = timeout_sec or settings.yookassa_timeout_sec
+        self.retries = retries
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Общая сессия клиента, создается при первом запросе."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                auth=aiohttp.BasicAuth(self.shop_id, self.secret_key),
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout_sec),
+            )
+        return self._session
+
+    async def create_payment(self, body: Dict[str, Any], idempotence_key: Optional[str] = None) -> Dict[str, Any]:
+        """Создание платежа.
+
+        Args:
+            body: Параметры платежа в формате API YooKassa
+            idempotence_key: Ключ идемпотентности (по умолчанию случайный)
+
+        Returns:
+            Созданный платеж
+        """
+        headers = {"Idempotence-Key": idempotence_key or uuid.uuid4().hex}
+        status, data = await self._request("POST", "/payments", json=body, headers=headers)
+        if status != 200:
+            raise RuntimeError(f"YooKassa вернула HTTP {status} при создании платежа: {data}")
+        return data
+
+    async def get_payment(self, payment_id: str) -> Optional[Dict[str, Any]]:
+        """Получение платежа.
+
+        Args:
+            payment_id: ID платежа в YooKassa
+
+        Returns:
+            Объект платежа или None, если платеж не найден
+        """
+        status, data = await self._request("GET", f"/payments/{payment_id}")
+        if status == 404:
+            return None
+        if status != 200:
+            raise RuntimeError(f"YooKassa вернула HTTP {status} для платежа {payment_id}: {data}")
+        return data
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> Tuple[int, Any]:
+        """Запрос к API с повторами при сетевых ошибках и ответах 5xx.
+
+        Returns:
+            (HTTP статус, тело ответа)
+        """
+        operation = f"{method} /{path.strip('/').split('/')[0]}"
+        attributes = {"http.method": method, "http.route": operation}
+        with tracer.span(f"yookassa {operation}", SpanKind.CLIENT, attributes) as span:
+            for attempt in range(self.retries + 1):
+                started = time.perf_counter()
+                try:
+                    async with self._get_session().request(method, f"{self.api_url}{path}", **kwargs) as response:
+                        YOOKASSA_DURATION.observe(time.perf_counter() - started, operation, str(response.status))
+                        span.set_attribute("http.status_code", response.status)
+                        span.set_attribute("yookassa.attempts", attempt + 1)
+                        if response.status < 500 or attempt == self.retries:
+                            if response.content_type == "application/json":
+                                return response.status, await response.json()
+                            return response.status, (await response.text())[:200]
+                        logger.warning(f"YooKassa {method} {path}: HTTP {response.status}, повтор")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    YOOKASSA_DURATION.observe(time.perf_counter() - started, operation, "error")
+                    if attempt == self.retries:
+                        logger.error(f"Ошибка запроса {method} {path} в YooKassa: {str(e)}")
+                        raise RuntimeError(f"Ошибка запроса в YooKassa: {str(e)}")
+                    logger.warning(f"YooKassa {method} {path}: {str(e) or type(e).__name__}, повтор")
+                await asyncio.sleep(self.RETRY_DELAY_SEC * (attempt + 1))
+            raise RuntimeError("Исчерпаны повторы запроса в YooKassa")
+
+    async def close(self) -> None:
+        """Закрытие пула соединений."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# Общий клиент процесса
+yookassa_client = YooKassaClient()
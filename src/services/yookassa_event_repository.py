@@ -0,0 +1,91 @@
+"""Репозиторий входящих уведомлений YooKassa."""
+
+import json
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from ..models.payment import YooKassaEvent
+from .database import execute_query, fetch_many, fetch_one
+
+logger = logging.getLogger(__name__)
+
+EVENT_COLUMNS = "id, dedup_key, payload, attempts, received_at, processed_at"
+
+
+class YooKassaEventRepository:
+    """Репозиторий для управления входящими уведомлениями YooKassa."""
+
+    @staticmethod
+    async def save(dedup_key: str, payload: Dict[str, Any]) -> Optional[YooKassaEvent]:
+        """Запись уведомления до подтверждения.
+
+        Args:
+            dedup_key: Событие и ID платежа
+            payload: Тело уведомления
+
+        Returns:
+            Записанное уведомление или None, если оно уже было записано
+        """
+        try:
+            query = f"""
+                INSERT INTO yookassa_events (dedup_key, payload)
+                VALUES ($1, $2::jsonb)
+                ON CONFLICT (dedup_key) DO NOTHING
+                RETURNING {EVENT_COLUMNS}
+            """
+            result = await fetch_one(query, dedup_key, json.dumps(payload, ensure_ascii=False))
+            return YooKassaEvent(**result) if result else None
+
+        except Exception as e:
+            logger.error(f"Ошибка при записи уведомления YooKassa {dedup_key}: {str(e)}")
+            raise RuntimeError(f"Ошибка при записи уведомления YooKassa: {str(e)}")
+
+    @staticmethod
+    async def mark_processed(event_id: int) -> None:
+        """Отметка успешной обработки уведомления."""
+        try:
+            await execute_query("UPDATE yookassa_events SET processed_at = NOW() WHERE id = $1", event_id)
+
+        except Exception as e:
+            logger.error(f"Ошибка при отметке уведомления YooKassa {event_id}: {str(e)}")
+            raise RuntimeError(f"Ошибка при отметке уведомления YooKassa: {str(e)}")
+
+    @staticmethod
+    async def mark_failed(event_id: int) -> None:
+        """Учет неудачной попытки обработки уведомления."""
+        try:
+            await execute_query("UPDATE yookassa_events SET attempts = attempts + 1 WHERE id = $1", event_id)
+
+        except Exception as e:
+            logger.error(f"Ошибка при отметке уведомления YooKassa {event_id}: {str(e)}")
+            raise RuntimeError(f"Ошибка при отметке уведомления YooKassa: {str(e)}")
+
+    @staticmethod
+    async def get_unprocessed(older_than: timedelta, max_attempts: int, limit: int = 100) -> List[YooKassaEvent]:
+        """Необработанные уведомления для повторной обработки.
+
+        Args:
+            older_than: Минимальный возраст уведомления, чтобы не забрать его у очереди
+            max_attempts: Уведомления с таким числом неудачных попыток больше не повторяются
+            limit: Максимальное количество уведомлений
+
+        Returns:
+            Уведомления в порядке получения
+        """
+        try:
+            query = f"""
+                SELECT {EVENT_COLUMNS}
+                FROM yookassa_events
+                WHERE processed_at IS NULL
+                  AND received_at < NOW() - $1::interval
+                  AND attempts < $2
+                ORDER BY received_at
+                LIMIT $3
+            """
+            results = await fetch_many(query, older_than, max_attempts, limit)
+            return [YooKassaEvent(**result) for result in results]
+
+        except Exception as e:
+            logger.error(f"Ошибка при получении необработанных уведомлений YooKassa: {str(e)}")
+            raise RuntimeError(f"Ошибка при получении уведомлений YooKassa: {str(e)}")
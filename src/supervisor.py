@@ -0,0 +1,178 @@
+"""Супервизор процессов webhook-воркеров."""
+
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from multiprocessing.connection import wait
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Воркер, проработавший дольше этого времени, считается стабильным:
+# счётчик подряд идущих падений сбрасывается
+STABLE_UPTIME_SEC = 60
+
+
+class WorkerSupervisor:
+    """Запускает N процессов-воркеров и перезапускает упавшие.
+
+    Воркеры не наследуют состояние супервизора: каждый создает собственные
+    пул БД и сессию Bot. Если заданы модули preload, воркеры создаются
+    через forkserver: сервер один раз импортирует приложение, и запуск или
+    перезапуск воркера - это fork без повторного импорта aiogram и
+    обработчиков. Иначе (или где forkserver недоступен) используется spawn.
+    Перезапуск идет с экспоненциальной задержкой, чтобы воркер, падающий
+    при старте, не перезапускался в цикле без паузы.
+    """
+
+    def __init__(
+        self,
+        target: Callable[[int], None],
+        workers: int,
+        restart_delay_sec: float = 1,
+        max_restart_delay_sec: float = 30,
+        shutdown_timeout_sec: float = 30,
+        preload: Sequence[str] = (),
+    ):
+        """Инициализация супервизора.
+
+        Args:
+            target: Функция воркера уровня модуля, получает номер воркера
+            workers: Число процессов
+            restart_delay_sec: Задержка перед первым перезапуском
+            max_restart_delay_sec: Предельная задержка перезапуска
+            shutdown_timeout_sec: Время на корректную остановку воркеров
+            preload: Модули, импортируемые сервером forkserver до запуска воркеров
+        """
+        self.target = target
+        self.workers = workers
+        self.restart_delay_sec = restart_delay_sec
+        self.max_restart_delay_sec = max_restart_delay_sec
+        self.shutdown_timeout_sec = shutdown_timeout_sec
+
+        if preload and "forkserver" in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context("forkserver")
+            self._context.set_forkserver_preload(list(preload))
+        else:
+            self._context = multiprocessing.get_context("spawn")
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        self._started_at: Dict[int, float] = {}
+        self._failures: Dict[int, int] = {}
+        self._restart_at: Dict[int, float] = {}
+        self._stopping = threading.Event()
+
+    def run(self) -> None:
+        """Запуск воркеров и наблюдение за ними до сигнала остановки."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self._handle_signal)
+            signal.signal(signal.SIGINT, self._handle_signal)
+
+        logger.info("Запуск %s webhook-воркеров", self.workers)
+        for index in range(self.workers):
+            self._start(index)
+
+        try:
+            while not self._stopping.is_set():
+                self._restart_due()
+                sentinels = [p.sentinel for p in self._processes.values()]
+                wait(sentinels, timeout=self._wait_timeout())
+                self._reap()
+        finally:
+            self._stop_all()
+
+    def stop(self) -> None:
+        """Запрос остановки супервизора."""
+        self._stopping.set()
+
+    def restart_delay(self, failures: int) -> float:
+        """Задержка перед перезапуском после failures падений подряд."""
+        if failures <= 0:
+            return 0.0
+        return min(self.restart_delay_sec * 2 ** (failures - 1), self.max_restart_delay_sec)
+
+    def _handle_signal(self, signum, frame) -> None:
+        """Обработчик SIGTERM/SIGINT."""
+        logger.info("Супервизор получил сигнал %s, остановка воркеров...", signum)
+        self.stop()
+
+    def _start(self, index: int) -> None:
+        """Запуск процесса воркера."""
+        process = self._context.Process(
+            target=self.target,
+            args=(index,),
+            name=f"webhook-worker-{index}",
+        )
+        process.start()
+        self._processes[index] = process
+        self._started_at[index] = time.monotonic()
+        logger.info("Воркер %s запущен (pid=%s)", index, process.pid)
+
+    def _reap(self) -> None:
+        """Обработка завершившихся воркеров."""
+        now = time.monotonic()
+        for index, process in list(self._processes.items()):
+            if process.is_alive():
+                continue
+
+            process.join()
+            del self._processes[index]
+            if self._stopping.is_set():
+                continue
+
+            if now - self._started_at[index] >= STABLE_UPTIME_SEC:
+                self._failures[index] = 0
+            self._failures[index] = self._failures.get(index, 0) + 1
+
+            delay = self.restart_delay(self._failures[index])
+            self._restart_at[index] = now + delay
+            logger.error(
+                f"Воркер {index} (pid={process.pid}) завершился с кодом {process.exitcode}, "
+                f"перезапуск через {delay:.1f} сек"
+            )
+
+    def _restart_due(self) -> None:
+        """Перезапуск воркеров, у которых истекла задержка."""
+        now = time.monotonic()
+        for index, restart_at in list(self._restart_at.items()):
+            if restart_at <= now:
+                del self._restart_at[index]
+                self._start(index)
+
+    def _wait_timeout(self) -> float:
+        """Время ожидания до ближайшего перезапуска или проверки флага остановки."""
+        timeout = 0.5
+        if self._restart_at:
+            timeout = min(timeout, max(0.0, min(self._restart_at.values()) - time.monotonic()))
+        return timeout
+
+    def _stop_all(self) -> None:
+        """Корректная остановка воркеров с принудительным завершением по таймауту."""
+        self._restart_at.clear()
+        processes: List[multiprocessing.Process] = list(self._processes.values())
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + self.shutdown_timeout_sec
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Воркер pid={process.pid} не остановился за отведенное время, kill")
+                process.kill()
+                process.join()
+
+        self._processes.clear()
+        logger.info("Все воркеры остановлены")
+
+
+def resolve_worker_count(configured: int, cpu_count: Optional[int] = None) -> int:
+    """Число воркеров: заданное явно или по числу ядер."""
+    if configured > 0:
+        return configured
+    if cpu_count is None:
+        # Учитываем ограничение CPU affinity (контейнеры, taskset)
+        cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    return cpu_count or 1
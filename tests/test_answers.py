@@ -0,0 +1,212 @@
+"""Тесты приема ответов на вопросы сценария."""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from aiogram import Bot
+from aiogram.dispatcher.event.bases import UNHANDLED
+
+from benchmarks.dispatcher_bench import UpdateFactory, build_update
+from benchmarks.memory_backend import InMemoryBackend
+from benchmarks.mock_session import MockedSession
+from src.handlers import scenarios
+from src.models.answer import AnswerCallback
+from src.models.question import Question
+from src.services import answer_service
+from src.services.answer_service import PendingQuestion, answer_recorder
+from src.services.chat_executor import ChatExecutor
+from src.services.scenario_content import scenario_content
+from src.services.scenario_runs import scenario_runs
+
+USER_ID = 8_000_000_001
+
+
+class FakeRedis:
+    """Списки Redis для RPUSH / LPOP."""
+
+    def __init__(self):
+        self.lists = {}
+        self.hashes = {}
+        self.ttl = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def lpop(self, name):
+        values = self.lists.get(name)
+        return values.pop(0).encode() if values else None
+
+    async def hexists(self, name, key):
+        return key in self.hashes.get(name, {})
+
+
+class FakePipeline:
+    """Пайплайн, выполняющий команды по execute()."""
+
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def rpush(self, name, value):
+        self.commands.append(lambda: self.redis.lists.setdefault(name, []).append(value))
+
+    def hset(self, name, key, value):
+        self.commands.append(lambda: self.redis.hashes.setdefault(name, {}).__setitem__(key, value))
+
+    def expire(self, name, seconds):
+        self.commands.append(lambda: self.redis.ttl.__setitem__(name, seconds))
+
+    async def execute(self):
+        for command in self.commands:
+            command()
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    """Буфер ответов без записи в БД."""
+    recorded = []
+    monkeypatch.setattr(answer_recorder, "record", lambda *args, **kwargs: recorded.append((args, kwargs)) or True)
+    monkeypatch.setattr(answer_service, "get_redis", lambda: None)
+    answer_recorder._pending.clear()
+    answer_recorder._choices.clear()
+    yield recorded
+    answer_recorder._pending.clear()
+    answer_recorder._choices.clear()
+
+
+async def feed(data, bot=None):
+    """Update в роутер сценариев."""
+    bot = bot or Bot(token="42:TEST", session=MockedSession())
+    update = build_update(data, bot)
+    event_type = "message" if update.message else "callback_query"
+    return await scenarios.router.propagate_event(event_type, update.event, bot=bot)
+
+
+class TestTextAnswers:
+    """Тесты текстовых ответов."""
+
+    @pytest.mark.asyncio
+    async def test_command_is_not_taken_as_answer(self, recorder):
+        """Команда проходит мимо ожидающего вопроса, следующий текст становится ответом."""
+        factory = UpdateFactory(users=1, admin_id=1)
+        await answer_recorder.expect_text(USER_ID, reading_id=7, question_id=3)
+
+        assert await feed(factory.message(USER_ID, "/buy")) is UNHANDLED
+        assert recorder == []
+
+        await feed(factory.message(USER_ID, "Спокойно"))
+        assert recorder == [((7, 3), {"answer_text": "Спокойно"})]
+        assert await answer_recorder.pop_pending_text(USER_ID) is None
+
+    @pytest.mark.asyncio
+    async def test_pending_question_is_shared_through_redis(self, monkeypatch):
+        """Вопрос, зарегистрированный одним воркером, забирается другим."""
+        redis = FakeRedis()
+        monkeypatch.setattr(answer_service, "get_redis", lambda: redis)
+
+        await answer_service.AnswerRecorder().expect_text(USER_ID, reading_id=7, question_id=3)
+
+        other_worker = answer_service.AnswerRecorder()
+        assert await other_worker.pop_pending_text(USER_ID) == PendingQuestion(7, 3)
+        assert await other_worker.pop_pending_text(USER_ID) is None
+
+
+class TestAnswerCallback:
+    """Тесты кнопок ответа."""
+
+    @pytest.mark.asyncio
+    async def test_option_index_resolves_payload(self, recorder, monkeypatch):
+        """В callback data номер варианта; записывается payload из сценария."""
+        now = datetime.now(timezone.utc)
+        question = Question(
+            id=3, step_id=1, question_text="Как вы?", question_type="single_choice", question_order=1,
+            options=[{"text": "Хорошо", "payload": "mood:good"}, {"text": "Плохо", "payload": "x" * 100}],
+            is_required=False, created_at=now, updated_at=now,
+        )
+
+        async def get_question(question_id):
+            return question if question_id == 3 else None
+
+        monkeypatch.setattr(scenario_content, "get_question", get_question)
+        factory = UpdateFactory(users=1, admin_id=1)
+        await answer_recorder.expect_choice(USER_ID, reading_id=7, question_id=3)
+
+        data = AnswerCallback(reading_id=7, question_id=3, option=1).pack()
+        assert len(data.encode()) <= 64
+        await feed(factory.callback(USER_ID, data))
+        await feed(factory.callback(USER_ID, AnswerCallback(reading_id=7, question_id=3, option=0).pack()))
+
+        assert recorder == [
+            ((7, 3), {"answer_payload": "x" * 100}),
+            ((7, 3), {"answer_payload": "mood:good"}),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_answer_to_foreign_reading_is_rejected(self, recorder):
+        """Ответ с ID чтения, вопрос которого не отправлялся в чат, не записывается."""
+        factory = UpdateFactory(users=2, admin_id=1)
+        await answer_recorder.expect_choice(USER_ID, reading_id=7, question_id=3)
+        bot = Bot(token="42:TEST", session=MockedSession())
+
+        forged = AnswerCallback(reading_id=7, question_id=3, option=0).pack()
+        await feed(factory.callback(USER_ID + 1, forged), bot)
+        await feed(factory.callback(USER_ID, AnswerCallback(reading_id=8, question_id=3, option=0).pack()), bot)
+
+        assert recorder == []
+        assert bot.session.calls["answerCallbackQuery"] == 2
+
+    @pytest.mark.asyncio
+    async def test_choice_is_shared_through_redis(self, monkeypatch):
+        """Вопрос с кнопками, отправленный одним воркером, принимается другим."""
+        redis = FakeRedis()
+        monkeypatch.setattr(answer_service, "get_redis", lambda: redis)
+
+        await answer_service.AnswerRecorder().expect_choice(USER_ID, reading_id=7, question_id=3)
+
+        other_worker = answer_service.AnswerRecorder()
+        assert await other_worker.is_expected_choice(USER_ID, 7, 3)
+        assert not await other_worker.is_expected_choice(USER_ID, 8, 3)
+
+    @pytest.mark.asyncio
+    async def test_answer_is_not_queued_behind_playback(self, recorder):
+        """Нажатие кнопки во время паузы сценария обрабатывается сразу, в порядке update чата."""
+        backend = InMemoryBackend()
+        backend.seed_scenario(steps=2, questions_per_step=1)
+        backend.steps[0].content.delay_sec = 60
+        backend.install()
+        scenario_content.invalidate()
+        try:
+            bot = Bot(token="42:TEST", session=MockedSession())
+            factory = UpdateFactory(users=1, admin_id=1)
+            question = backend.questions_by_step[backend.steps[0].id][0]
+
+            async def press() -> None:
+                # Кнопка нажимается после того, как фоновый сценарий отправил вопрос
+                while not answer_recorder._choices:
+                    await asyncio.sleep(0)
+                reading_id = next(iter(backend.readings))
+                data = AnswerCallback(reading_id=reading_id, question_id=question.id, option=0).pack()
+                await feed(factory.callback(USER_ID, data), bot)
+
+            # Update одного чата выполняются по порядку, как в режиме polling
+            executor = ChatExecutor(max_concurrency=10)
+            await executor.submit(USER_ID, lambda: feed(factory.message(USER_ID, "/read"), bot))
+            await executor.submit(USER_ID, press)
+            await asyncio.wait_for(executor.close(timeout=1), timeout=1)
+
+            assert scenario_runs.active == 1
+            assert len(recorder) == 1
+            assert bot.session.calls["answerCallbackQuery"] == 1
+        finally:
+            scenario_runs.interrupt()
+            await scenario_runs.wait(timeout=1)
+            scenario_runs.reset()
+            backend.uninstall()
+            scenario_content.invalidate()
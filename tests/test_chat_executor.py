@@ -0,0 +1,98 @@
+"""Тесты исполнителя задач по чатам."""
+
+import asyncio
+import pytest
+
+from src.services.chat_executor import ChatExecutor
+from src.services.metrics import registry, watch_chat_executor
+
+
+class TestChatExecutor:
+    """Тесты ChatExecutor."""
+
+    @pytest.mark.asyncio
+    async def test_same_chat_runs_in_order_other_chats_in_parallel(self):
+        """Задачи одного чата идут по порядку, другой чат не ждет их."""
+        log = []
+        release = asyncio.Event()
+
+        def job(name, wait=False):
+            async def run():
+                if wait:
+                    await release.wait()
+                log.append(name)
+            return run
+
+        executor = ChatExecutor(max_concurrency=10)
+        await executor.submit(1, job("1a", wait=True))
+        await executor.submit(1, job("1b"))
+        await executor.submit(2, job("2a"))
+        await asyncio.sleep(0.01)
+
+        assert log == ["2a"]
+        assert executor.active_chats == 1
+        assert executor.queue_depth(1) == 1
+
+        release.set()
+        await executor.close(timeout=1)
+        assert log == ["2a", "1a", "1b"]
+        assert executor.active_chats == 0
+        assert executor.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_global_concurrency_cap(self):
+        """Одновременно выполняется не больше max_concurrency задач."""
+        peak = 0
+
+        async def job():
+            nonlocal peak
+            peak = max(peak, executor.running)
+            await asyncio.sleep(0.01)
+
+        executor = ChatExecutor(max_concurrency=2)
+        for chat_id in range(6):
+            await executor.submit(chat_id, job)
+        await executor.close(timeout=1)
+        assert peak == 2
+        assert executor.completed == 6
+
+    @pytest.mark.asyncio
+    async def test_submit_waits_when_pending_limit_reached(self):
+        """При достижении max_pending submit ждет освобождения места."""
+        release = asyncio.Event()
+
+        async def job():
+            await release.wait()
+
+        executor = ChatExecutor(max_concurrency=10, max_pending=1)
+        await executor.submit(1, job)
+        blocked = asyncio.create_task(executor.submit(2, job))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        release.set()
+        await asyncio.wait_for(blocked, timeout=1)
+        await executor.close(timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_stats_are_exported_as_gauges(self):
+        """Показатели наблюдаемого исполнителя видны в /metrics с меткой executor."""
+        release = asyncio.Event()
+
+        async def job():
+            await release.wait()
+
+        executor = ChatExecutor(max_concurrency=10)
+        watch_chat_executor("test", executor)
+        await executor.submit(1, job)
+        await executor.submit(1, job)
+        await asyncio.sleep(0.01)
+
+        text = registry.render()
+        assert 'chat_executor_active_chats{executor="test"} 1' in text
+        assert 'chat_executor_pending{executor="test"} 2' in text
+        assert 'chat_executor_max_queue_depth{executor="test"} 1' in text
+
+        release.set()
+        await executor.close(timeout=1)
+        assert 'chat_executor_completed{executor="test"} 2' in registry.render()
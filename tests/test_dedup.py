@@ -0,0 +1,107 @@
+"""Тесты кэша и дедупликации повторных доставок."""
+
+import pytest
+from aiogram.types import Update
+
+from src.middlewares import UpdateDedupMiddleware
+from src.services import dedup as dedup_module
+from src.services.cache import TTLCache
+from src.services.dedup import Deduplicator
+
+
+class FakeRedis:
+    """Минимальная замена Redis для SET NX / DELETE."""
+
+    def __init__(self, fail: bool = False):
+        self.data = {}
+        self.calls = 0
+        self.fail = fail
+
+    async def set(self, name, value, nx=False, ex=None):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("redis down")
+        if nx and name in self.data:
+            return None
+        self.data[name] = value
+        return True
+
+    async def delete(self, name):
+        self.data.pop(name, None)
+
+
+class TestTTLCache:
+    """Тесты TTLCache."""
+
+    def test_lru_eviction_and_expiry(self):
+        """Вытесняется давно не использованная запись, просроченные не возвращаются."""
+        cache = TTLCache(max_size=2, ttl_sec=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        assert "b" not in cache
+        assert "a" in cache
+
+        cache.set("d", 4, ttl_sec=0)
+        assert cache.get("d") is None
+
+
+class TestDeduplicator:
+    """Тесты Deduplicator."""
+
+    @pytest.mark.asyncio
+    async def test_redis_is_source_of_truth_across_processes(self, monkeypatch):
+        """Ключ, уже записанный другим воркером, считается повтором."""
+        redis = FakeRedis()
+        monkeypatch.setattr(dedup_module, "get_redis", lambda: redis)
+
+        worker_a = Deduplicator("test", ttl_sec=60)
+        worker_b = Deduplicator("test", ttl_sec=60)
+        assert await worker_a.is_duplicate("42") is False
+        assert await worker_b.is_duplicate("42") is True
+
+        # Повтор в том же процессе отсекается без обращения к Redis
+        calls = redis.calls
+        assert await worker_a.is_duplicate("42") is True
+        assert redis.calls == calls
+
+    @pytest.mark.asyncio
+    async def test_forget_allows_redelivery(self, monkeypatch):
+        """После forget повторная доставка обрабатывается."""
+        monkeypatch.setattr(dedup_module, "get_redis", lambda: FakeRedis())
+        deduplicator = Deduplicator("test", ttl_sec=60)
+        assert await deduplicator.is_duplicate("payment.succeeded:1") is False
+        await deduplicator.forget("payment.succeeded:1")
+        assert await deduplicator.is_duplicate("payment.succeeded:1") is False
+
+    @pytest.mark.asyncio
+    async def test_redis_failure_falls_back_to_local(self, monkeypatch):
+        """При недоступном Redis работает только локальное окно."""
+        monkeypatch.setattr(dedup_module, "get_redis", lambda: FakeRedis(fail=True))
+        deduplicator = Deduplicator("test", ttl_sec=60)
+        assert await deduplicator.is_duplicate("1") is False
+        assert await deduplicator.is_duplicate("1") is True
+
+
+class TestUpdateDedupMiddleware:
+    """Тесты UpdateDedupMiddleware."""
+
+    @pytest.mark.asyncio
+    async def test_failed_update_is_released(self, monkeypatch):
+        """Повтор отбрасывается, а update, обработка которого упала, можно доставить снова."""
+        monkeypatch.setattr(dedup_module, "get_redis", lambda: FakeRedis())
+        middleware = UpdateDedupMiddleware(Deduplicator("test", ttl_sec=60))
+        calls = []
+
+        async def handler(event, data):
+            calls.append(event.update_id)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await middleware(handler, Update(update_id=1), {})
+        await middleware(handler, Update(update_id=1), {})
+        await middleware(handler, Update(update_id=1), {})
+
+        assert calls == [1, 1]
@@ -0,0 +1,57 @@
+"""Тесты микробенчмарка обработчиков на бэкенде в памяти."""
+
+import argparse
+
+import pytest
+
+from benchmarks.dispatcher_bench import HANDLERS, compare, run
+from src.config import settings
+from src.services.user_repository import UserRepository
+
+
+def bench_args(**overrides) -> argparse.Namespace:
+    """Параметры короткого прогона."""
+    values = dict(
+        backend="memory", iterations=5, warmup=1, users=3, steps=2,
+        handlers=None, keep_delays=False,
+    )
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+class TestDispatcherBench:
+    """Тесты прогона через Dispatcher.feed_update."""
+
+    @pytest.mark.asyncio
+    async def test_every_handler_is_reached(self, monkeypatch):
+        """Каждый update доходит до своего обработчика и вызывает ожидаемые репозитории."""
+        monkeypatch.setattr(settings, "admin_id", 1)
+        original = UserRepository.__dict__["get_by_telegram_id"]
+
+        report = await run(bench_args())
+
+        handlers = report["handlers"]
+        assert list(handlers) == list(HANDLERS)
+        assert all(m["unhandled"] == 0 for m in handlers.values())
+        assert handlers["cmd_start"]["db_calls_by_method"] == {
+            "ReadingRepository.get_by_user_id": 1.0,
+            "UserRepository.get_by_telegram_id": 1.0,
+        }
+        assert handlers["cmd_read"]["bot_calls_by_method"]["sendMessage"] == 6.0
+        assert handlers["answer_question"]["db_calls"] == 0
+        assert handlers["handle_buy_callback"]["db_calls_by_method"]["PaymentRepository.create"] == 1.0
+        assert handlers["cmd_stats"]["db_calls_by_method"] == {"StatsRepository.get_summary": 1.0}
+        # Подмененные методы возвращены
+        assert UserRepository.__dict__["get_by_telegram_id"] is original
+
+    def test_compare_flags_regressions(self):
+        """Рост выше порога и любой рост вызовов БД считаются регрессией."""
+        metrics = {"cpu_mean_ms": 1.0, "wall_p50_ms": 1.0, "alloc_peak_kb": 10.0, "db_calls": 2.0}
+        baseline = {"handlers": {"cmd_start": metrics}}
+        current = {"handlers": {"cmd_start": dict(metrics, cpu_mean_ms=1.05, alloc_peak_kb=13.0, db_calls=3.0)}}
+
+        regressions = compare(baseline, current, threshold_pct=10)
+
+        assert len(regressions) == 2
+        assert regressions[0].startswith("cmd_start: alloc_peak_kb")
+        assert regressions[1].startswith("cmd_start: db_calls")
@@ -0,0 +1,166 @@
+"""Тесты остановки сценариев с сохранением прогресса."""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+from aiogram import Bot
+
+from benchmarks.dispatcher_bench import UpdateFactory, build_update
+from benchmarks.memory_backend import InMemoryBackend
+from benchmarks.mock_session import MockedSession
+from src.handlers import scenarios
+from src.models.reading import ReadingCreate
+from src.services.funnel_service import funnel_recorder
+from src.services.reading_repository import ReadingRepository
+from src.services.scenario_content import scenario_content
+from src.services.scenario_runs import ScenarioRuns, scenario_runs
+from src.services.scenario_service import ScenarioService
+
+
+@pytest.fixture
+def backend():
+    """Сценарий из трех шагов с паузой после первого."""
+    backend = InMemoryBackend()
+    backend.seed_scenario(steps=3, questions_per_step=0)
+    backend.steps[0].content.delay_sec = 60
+    backend.install()
+    scenario_content.invalidate()
+    yield backend
+    backend.uninstall()
+    scenario_content.invalidate()
+    scenario_runs.reset()
+
+
+class TestScenarioRuns:
+    """Тесты сигнала остановки."""
+
+    @pytest.mark.asyncio
+    async def test_interrupt_wakes_sleepers(self):
+        """interrupt() прерывает паузу; после него паузы не начинаются."""
+        runs = ScenarioRuns()
+        sleeper = asyncio.create_task(runs.sleep(60))
+        await asyncio.sleep(0)
+
+        runs.interrupt()
+
+        assert await asyncio.wait_for(sleeper, timeout=1) is False
+        assert await runs.sleep(60) is False
+        assert await ScenarioRuns().sleep(0) is True
+
+
+class TestScenarioDrain:
+    """Тесты прерывания и продолжения сценария."""
+
+    @pytest.mark.asyncio
+    async def test_read_handler_does_not_wait_for_playback(self, backend):
+        """/read завершается сразу, сценарий с паузой проигрывается в фоне."""
+        session = MockedSession()
+        bot = Bot(token="42:TEST", session=session)
+        update = build_update(UpdateFactory(users=1, admin_id=1).message(100, "/read"), bot)
+
+        await asyncio.wait_for(scenarios.router.propagate_event("message", update.message, bot=bot), timeout=1)
+        while session.calls["sendMessage"] < 2:
+            await asyncio.sleep(0)
+        assert scenario_runs.active == 1
+
+        scenario_runs.interrupt()
+        await scenario_runs.wait(timeout=1)
+
+        assert scenario_runs.active == 0
+        assert [reading.status for reading in backend.readings.values()] == ["interrupted"]
+
+    @pytest.mark.asyncio
+    async def test_interrupted_scenario_resumes_from_checkpoint(self, backend):
+        """Прерванный в паузе сценарий сохраняет шаг и продолжается с него."""
+        session = MockedSession()
+        service = ScenarioService(Bot(token="42:TEST", session=session))
+        reading = await ReadingRepository.create(ReadingCreate(user_id=1, reading_type="default"))
+
+        playing = asyncio.create_task(service.play_scenario_steps(1, 100, reading.id))
+        while session.calls["sendMessage"] < 1:
+            await asyncio.sleep(0)
+        scenario_runs.interrupt()
+
+        assert await asyncio.wait_for(playing, timeout=1) is True
+        interrupted = backend.readings[reading.id]
+        assert interrupted.status == "interrupted"
+        assert interrupted.reading_payload["scenario"] == {"chat_id": 100, "next_step_order": 2}
+        assert session.calls["sendMessage"] == 1
+
+        scenario_runs.reset()
+        assert await service.resume_interrupted() == 1
+        await scenario_runs.wait(timeout=1)
+
+        assert backend.readings[reading.id].status == "completed"
+        # Уведомление о продолжении, шаги 2 и 3, сообщение о завершении
+        assert session.calls["sendMessage"] == 5
+        assert await service.resume_interrupted() == 0
+
+    @pytest.mark.asyncio
+    async def test_step_cancelled_midway_is_reached_once(self, backend, monkeypatch):
+        """Шаг, отмененный посреди паузы, проигрывается заново без повторного reached в воронке."""
+        events = []
+        monkeypatch.setattr(
+            funnel_recorder, "record",
+            lambda reading_id, reading_type, step, event: events.append((step.step_order, event))
+        )
+        session = MockedSession()
+        service = ScenarioService(Bot(token="42:TEST", session=session))
+        reading = await ReadingRepository.create(ReadingCreate(user_id=1, reading_type="default"))
+
+        playing = asyncio.create_task(service.play_scenario_steps(1, 100, reading.id))
+        while session.calls["sendMessage"] < 1:
+            await asyncio.sleep(0)
+        playing.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await playing
+        assert backend.readings[reading.id].reading_payload["scenario"] == {
+            "chat_id": 100, "next_step_order": 1, "step_reached": True,
+        }
+
+        backend.steps[0].content.delay_sec = 0
+        scenario_content.invalidate()
+        assert await service.resume_interrupted() == 1
+        await scenario_runs.wait(timeout=1)
+
+        assert backend.readings[reading.id].status == "completed"
+        assert [event for event in events if event[1] == "reached"] == [(1, "reached"), (2, "reached"), (3, "reached")]
+
+    @pytest.mark.asyncio
+    async def test_resume_claims_bounded_batches(self, backend, monkeypatch):
+        """Чтения захватываются пачками и проигрываются через исполнитель сценариев."""
+        for chat_id in (100, 101, 102):
+            reading = await ReadingRepository.create(ReadingCreate(user_id=1, reading_type="default"))
+            backend.readings[reading.id] = reading.model_copy(update={
+                "status": "interrupted",
+                "reading_payload": {"scenario": {"chat_id": chat_id, "next_step_order": 2}},
+            })
+        limits = []
+        claim = ReadingRepository.claim_interrupted
+
+        async def claim_interrupted(limit, lease):
+            limits.append(limit)
+            return await claim(limit, lease)
+
+        monkeypatch.setattr(ReadingRepository, "claim_interrupted", claim_interrupted)
+        service = ScenarioService(Bot(token="42:TEST", session=MockedSession()))
+
+        assert await service.resume_interrupted(batch_size=2) == 3
+        assert limits == [2, 2, 2]
+
+        await scenario_runs.wait(timeout=1)
+        assert {reading.status for reading in backend.readings.values()} == {"completed"}
+
+    @pytest.mark.asyncio
+    async def test_claim_expires_back_to_interrupted(self, backend):
+        """Захваченное, но не начатое чтение по истечении аренды захватывается снова."""
+        reading = await ReadingRepository.create(ReadingCreate(user_id=1, reading_type="default"))
+        backend.readings[reading.id] = reading.model_copy(update={"status": "interrupted"})
+
+        claimed = await ReadingRepository.claim_interrupted(10, timedelta(minutes=5))
+        assert [item.status for item in claimed] == ["resuming"]
+        assert await ReadingRepository.claim_interrupted(10, timedelta(minutes=5)) == []
+
+        reclaimed = await ReadingRepository.claim_interrupted(10, timedelta(0))
+        assert [item.id for item in reclaimed] == [reading.id]
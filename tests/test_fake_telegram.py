@@ -0,0 +1,82 @@
+"""Тесты заглушки Telegram Bot API вместе с aiogram."""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiogram import Bot, Dispatcher, F, Router, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.filters import Command
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from aiohttp.test_utils import TestServer
+
+from benchmarks.fake_telegram import FakeTelegram
+
+
+@pytest_asyncio.fixture
+async def telegram():
+    """Запущенная заглушка и Bot, направленный на нее."""
+    fake = FakeTelegram(chat_rate=1, chat_burst=2)
+    server = TestServer(fake.create_app())
+    await server.start_server()
+    session = AiohttpSession(api=TelegramAPIServer.from_base(str(server.make_url("")).rstrip("/")))
+    bot = Bot(token="123456:TEST-TOKEN", session=session)
+    yield fake, bot
+    await bot.session.close()
+    await server.close()
+
+
+class TestFakeTelegram:
+    """Тесты заглушки Bot API."""
+
+    @pytest.mark.asyncio
+    async def test_send_methods_return_messages(self, telegram):
+        """sendMessage и sendPhoto возвращают сообщения, которые разбирает aiogram."""
+        fake, bot = telegram
+        keyboard = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="A", callback_data="answer:1:2:a")]])
+        message = await bot.send_message(42, "hello", reply_markup=keyboard)
+        assert message.text == "hello"
+        photo = await bot.send_photo(43, "photo-file-id", caption="cap")
+        assert photo.photo[0].file_id == "photo-file-id"
+        assert fake.find_callback_button(42, "answer:")["data"] == "answer:1:2:a"
+
+    @pytest.mark.asyncio
+    async def test_per_chat_rate_limit(self, telegram):
+        """Превышение лимита чата дает 429 с retry_after, другой чат не затронут."""
+        fake, bot = telegram
+        await bot.send_message(1, "a")
+        await bot.send_message(1, "b")
+        with pytest.raises(TelegramRetryAfter) as error:
+            await bot.send_message(1, "c")
+        assert error.value.retry_after >= 1
+        await bot.send_message(2, "a")
+        assert fake.rate_limited["sendMessage"] == 1
+
+    @pytest.mark.asyncio
+    async def test_polling_round_trip(self, telegram):
+        """Update из getUpdates обрабатывается диспетчером, первый ответ дает задержку."""
+        fake, bot = telegram
+        router = Router()
+
+        @router.message(Command("start"))
+        async def start(message: types.Message) -> None:
+            await message.answer("hi")
+
+        @router.callback_query(F.data == "buy_5")
+        async def buy(callback: types.CallbackQuery) -> None:
+            await callback.answer("ok")
+
+        dp = Dispatcher()
+        dp.include_router(router)
+        polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=1))
+        try:
+            latency = await asyncio.wait_for(fake.push_update(fake.message_update(7, "/start")), timeout=5)
+            assert latency >= 0
+            assert fake.messages[7][-1]["text"] == "hi"
+            await asyncio.wait_for(fake.push_update(fake.callback_update(7, "buy_5")), timeout=5)
+        finally:
+            await dp.stop_polling()
+            await polling
+        assert fake.method_calls["answerCallbackQuery"] == 1
@@ -0,0 +1,114 @@
+"""Тесты клиента YooKassa против локальной заглушки API."""
+
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from benchmarks.fake_yookassa import FakeYooKassa
+from src.config import settings
+from src.models.payment import YooKassaEvent
+from src.services import payments as payments_module
+from src.services.dedup import Deduplicator
+from src.services.work_queue import BoundedWorkQueue
+from src.services.yookassa_client import YooKassaClient
+from src.services.yookassa_event_repository import YooKassaEventRepository
+
+BODY = {"amount": {"value": "299.00", "currency": "RUB"}, "metadata": {"readings": "5"}}
+
+
+async def save_event(dedup_key, payload):
+    """Запись уведомления без БД."""
+    return YooKassaEvent(id=1, dedup_key=dedup_key, payload=payload, received_at=datetime.now(timezone.utc))
+
+
+@pytest_asyncio.fixture
+async def fake():
+    """Запущенная заглушка и клиент, настроенный на нее."""
+    fake = FakeYooKassa(secret_key=settings.yookassa_api_key, seed=1)
+    server = TestServer(fake.create_app())
+    await server.start_server()
+    client = YooKassaClient(
+        api_url=str(server.make_url("/v3")), shop_id=fake.shop_id, secret_key=fake.secret_key, retries=3
+    )
+    client.RETRY_DELAY_SEC = 0
+    yield fake, client
+    await client.close()
+    await server.close()
+
+
+class TestFakeYooKassa:
+    """Тесты заглушки и клиента."""
+
+    @pytest.mark.asyncio
+    async def test_create_and_find(self, fake):
+        """Созданный платеж находится по ID, неизвестный - нет."""
+        fake, client = fake
+        payment = await client.create_payment(BODY)
+        assert payment["status"] == "pending"
+        assert (await client.get_payment(payment["id"]))["id"] == payment["id"]
+        assert await client.get_payment("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_idempotence_key(self, fake):
+        """Повтор с тем же ключом возвращает тот же платеж, с другим телом - ошибку."""
+        fake, client = fake
+        first = await client.create_payment(BODY, idempotence_key="key-1")
+        second = await client.create_payment(BODY, idempotence_key="key-1")
+        assert first["id"] == second["id"]
+        assert len(fake.payments) == 1
+
+        with pytest.raises(RuntimeError):
+            await client.create_payment({**BODY, "description": "other"}, idempotence_key="key-1")
+
+    @pytest.mark.asyncio
+    async def test_lost_response_retried_without_duplicate(self, fake):
+        """Потерянный ответ повторяется с тем же ключом и не создает второй платеж."""
+        fake, client = fake
+        fake.lost_response_rate = 1
+        with pytest.raises(RuntimeError):
+            await client.create_payment(BODY, idempotence_key="key-2")
+        assert len(fake.payments) == 1
+        assert fake.idempotent_replays == client.retries
+
+    @pytest.mark.asyncio
+    async def test_wrong_credentials_rejected(self, fake):
+        """Запрос с чужим ключом получает 401."""
+        fake, client = fake
+        client.secret_key = "wrong"
+        with pytest.raises(RuntimeError, match="401"):
+            await client.create_payment(BODY)
+
+    @pytest.mark.asyncio
+    async def test_signed_webhook_accepted_by_bot(self, fake, monkeypatch):
+        """Уведомление заглушки проходит проверку подписи обработчика бота."""
+        fake, client = fake
+        received = []
+
+        async def handler(item):
+            received.append(item)
+
+        queue = BoundedWorkQueue("test-yookassa", handler, workers=1)
+        monkeypatch.setattr(payments_module, "yookassa_event_queue", queue)
+        monkeypatch.setattr(payments_module, "yookassa_deduplicator", Deduplicator("test", ttl_sec=60))
+        monkeypatch.setattr("src.services.dedup.get_redis", lambda: None)
+        monkeypatch.setattr(YooKassaEventRepository, "save", save_event)
+
+        bot_app = web.Application()
+        bot_app.router.add_post("/yookassa_webhook", payments_module.yookassa_webhook_handler)
+        bot = TestServer(bot_app)
+        await bot.start_server()
+        queue.start()
+        try:
+            fake.webhook_url = str(bot.make_url("/yookassa_webhook"))
+            payment = await client.create_payment(BODY)
+            await fake.set_status(payment["id"], "succeeded")
+            await queue.close()
+        finally:
+            await bot.close()
+
+        assert fake.webhook_statuses == [200]
+        assert received[0].payload["event"] == "payment.succeeded"
+        assert received[0].payload["object"]["id"] == payment["id"]
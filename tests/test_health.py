@@ -0,0 +1,160 @@
+"""Тесты проверок /healthz и /readyz."""
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.services import database, redis_client
+from src.services.health import READY, HealthChecker
+from src.services.warmup import warmup
+
+
+class FakePool:
+    """Пул с заданной занятостью; считает запросы SELECT 1."""
+
+    def __init__(self, in_use: int, max_size: int = 10):
+        self.in_use = in_use
+        self.max_size = max_size
+        self.queries = 0
+
+    def get_max_size(self):
+        return self.max_size
+
+    def get_size(self):
+        return self.max_size
+
+    def get_idle_size(self):
+        return self.max_size - self.in_use
+
+    async def acquire(self):
+        return self
+
+    async def release(self, conn):
+        pass
+
+    async def fetchval(self, query, *args):
+        self.queries += 1
+        return 1
+
+
+class FakeRedis:
+    """Redis, отвечающий на PING или падающий."""
+
+    def __init__(self, available: bool = True):
+        self.available = available
+
+    async def ping(self):
+        if not self.available:
+            raise ConnectionError("Connection refused")
+        return True
+
+
+@pytest.fixture
+def environment(monkeypatch):
+    """Пул, Redis и завершенный прогрев."""
+    pool = FakePool(in_use=2)
+    monkeypatch.setattr(database, "pool", pool)
+    monkeypatch.setattr(redis_client, "redis", FakeRedis())
+    monkeypatch.setattr(warmup, "completed", True)
+    return pool
+
+
+def build_app(checker: HealthChecker) -> web.Application:
+    """Приложение с маршрутами проверок."""
+    app = web.Application()
+    checker.register(app)
+    return app
+
+
+class TestHealthChecker:
+    """Тесты условий готовности."""
+
+    @pytest.mark.asyncio
+    async def test_ready(self, environment):
+        """Все проверки пройдены."""
+        report = await HealthChecker(cache_ttl_sec=0).check()
+
+        assert report["status"] == "ready"
+        assert report["checks"]["database"] == {"ok": True, "in_use": 2, "max_size": 10}
+        assert READY.value() == 1
+
+    @pytest.mark.asyncio
+    async def test_saturated_pool_is_not_queried(self, environment):
+        """При занятом пуле процесс не готов, и SELECT 1 не выполняется."""
+        environment.in_use = 9
+
+        report = await HealthChecker(cache_ttl_sec=0, pool_saturation=0.9).check()
+
+        assert report["status"] == "not_ready"
+        assert not report["checks"]["database"]["ok"]
+        assert environment.queries == 0
+        assert READY.value() == 0
+
+    @pytest.mark.asyncio
+    async def test_warmup_and_queue_depth(self, environment, monkeypatch):
+        """Незавершенный прогрев и заполненная очередь снимают готовность."""
+        checker = HealthChecker(cache_ttl_sec=0, queue_saturation=0.8)
+        depth = [10]
+        checker.watch_queue("telegram-updates", lambda: depth[0], 100)
+
+        assert (await checker.check())["status"] == "ready"
+
+        depth[0] = 80
+        report = await checker.check()
+        assert report["checks"]["queue:telegram-updates"] == {"ok": False, "depth": 80, "capacity": 100}
+
+        depth[0] = 0
+        monkeypatch.setattr(warmup, "completed", False)
+        assert (await checker.check())["status"] == "not_ready"
+
+    @pytest.mark.asyncio
+    async def test_draining_is_not_ready(self, environment):
+        """После начала остановки /readyz сразу перестает отвечать из кэша готовности."""
+        checker = HealthChecker(cache_ttl_sec=60)
+        assert (await checker.readiness())["status"] == "ready"
+
+        checker.start_draining()
+
+        report = await checker.readiness()
+        assert report["status"] == "not_ready"
+        assert report["checks"]["accepting"] == {"ok": False}
+
+    @pytest.mark.asyncio
+    async def test_redis_is_required_only_when_configured(self, environment, monkeypatch):
+        """Недоступный Redis видно в ответе; готовность зависит от require_redis."""
+        monkeypatch.setattr(redis_client, "redis", FakeRedis(available=False))
+
+        report = await HealthChecker(cache_ttl_sec=0, require_redis=False).check()
+        assert report["status"] == "ready"
+        assert not report["checks"]["redis"]["ok"]
+
+        report = await HealthChecker(cache_ttl_sec=0, require_redis=True).check()
+        assert report["status"] == "not_ready"
+
+
+class TestHealthEndpoints:
+    """Тесты HTTP маршрутов проверок."""
+
+    @pytest.mark.asyncio
+    async def test_readyz_is_cached(self, environment):
+        """Повторные /readyz отвечают из кэша без запросов к БД."""
+        async with TestClient(TestServer(build_app(HealthChecker(cache_ttl_sec=60)))) as client:
+            responses = [await client.get("/readyz") for _ in range(5)]
+            body = await responses[-1].json()
+
+        assert [response.status for response in responses] == [200] * 5
+        assert body["status"] == "ready"
+        assert environment.queries == 1
+
+    @pytest.mark.asyncio
+    async def test_not_ready_returns_503(self, environment):
+        """Неготовый процесс отвечает 503, /healthz при этом 200."""
+        environment.in_use = 10
+        async with TestClient(TestServer(build_app(HealthChecker(cache_ttl_sec=0)))) as client:
+            ready = await client.get("/readyz")
+            live = await client.get("/healthz")
+            body = await live.json()
+
+        assert ready.status == 503
+        assert live.status == 200
+        assert body["status"] == "ok"
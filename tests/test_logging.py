@@ -0,0 +1,152 @@
+"""Тесты асинхронного вывода логов."""
+
+import io
+import json
+import logging
+import threading
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from benchmarks.dispatcher_bench import UpdateFactory, build_update
+from benchmarks.mock_session import MockedSession
+from src.middlewares import LogContextMiddleware
+from src.services import logging_setup
+from src.services.logging_setup import (
+    LOG_RECORDS_DROPPED,
+    RateLimitFilter,
+    SamplingFilter,
+    bind_log_context,
+    log_context,
+    reset_log_context,
+    setup_logging,
+    shutdown_logging,
+)
+from src.services.tracing import Tracer
+
+
+def make_record(name: str = "test", level: int = logging.INFO) -> logging.LogRecord:
+    """Запись лога с сообщением без аргументов."""
+    return logging.LogRecord(name, level, __file__, 1, "сообщение", None, None)
+
+
+@pytest.fixture
+def log_output():
+    """Вывод корневого логгера в строку; прежние обработчики восстанавливаются."""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    stream = io.StringIO()
+    setup_logging(level="INFO", log_format="json", stream=stream)
+    yield stream
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def read_lines(stream: io.StringIO) -> list:
+    """Записи, выведенные до остановки потока вывода."""
+    shutdown_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class Rendered:
+    """Аргумент лога, запоминающий поток, в котором его отформатировали."""
+
+    thread = None
+
+    def __str__(self) -> str:
+        Rendered.thread = threading.current_thread()
+        return "значение"
+
+
+class TestLogPipeline:
+    """Тесты обработчика с очередью."""
+
+    def test_json_record_with_context(self, log_output):
+        """Запись выводится строкой JSON с полями контекста и extra."""
+        token = bind_log_context(update_id=7, user_id=42)
+        try:
+            logging.getLogger("src.test").info("Создан шаг: %s", "intro", extra={"step_id": 3})
+        finally:
+            reset_log_context(token)
+
+        (line,) = read_lines(log_output)
+        assert line["message"] == "Создан шаг: intro"
+        assert line["level"] == "INFO"
+        assert line["logger"] == "src.test"
+        assert (line["update_id"], line["user_id"], line["step_id"]) == (7, 42, 3)
+
+    def test_message_is_formatted_in_writer_thread(self, log_output):
+        """Аргументы подставляются в потоке вывода, а не в вызывающем."""
+        logging.getLogger("src.test").info("Аргумент: %s", Rendered())
+
+        (line,) = read_lines(log_output)
+        assert line["message"] == "Аргумент: значение"
+        assert Rendered.thread is not threading.current_thread()
+
+    def test_exception_is_serialized(self, log_output):
+        """Трассировка исключения попадает в поле exc_info."""
+        try:
+            raise ValueError("сбой")
+        except ValueError:
+            logging.getLogger("src.test").exception("Ошибка")
+
+        (line,) = read_lines(log_output)
+        assert "ValueError: сбой" in line["exc_info"]
+
+
+class TestLogFilters:
+    """Тесты сэмплирования и ограничения частоты."""
+
+    def test_rate_limit_per_logger(self, monkeypatch):
+        """Сверх burst записи отбрасываются, число отброшенных выводится позже."""
+        now = [100.0]
+        monkeypatch.setattr(logging_setup.time, "monotonic", lambda: now[0])
+        limit = RateLimitFilter(rate_per_sec=1, burst=2)
+        dropped_before = LOG_RECORDS_DROPPED.value("rate_limit")
+
+        assert [limit.filter(make_record("noisy")) for _ in range(4)] == [True, True, False, False]
+        assert limit.filter(make_record("other"))
+        assert limit.filter(make_record("noisy", logging.WARNING))
+        assert LOG_RECORDS_DROPPED.value("rate_limit") == dropped_before + 2
+
+        now[0] += 1
+        record = make_record("noisy")
+        assert limit.filter(record)
+        assert record.suppressed == 2
+
+    def test_sampling_by_logger_prefix(self):
+        """Доля родительского логгера действует на дочерние, предупреждения не сэмплируются."""
+        sampling = SamplingFilter({"aiogram": 0.0, "aiogram.dispatcher": 1.0})
+
+        assert not sampling.filter(make_record("aiogram.event"))
+        assert sampling.filter(make_record("aiogram.dispatcher"))
+        assert sampling.filter(make_record("aiogram.event", logging.WARNING))
+        assert sampling.filter(make_record("src.handlers"))
+
+
+class TestLogContextMiddleware:
+    """Тесты полей update в контексте логов."""
+
+    @pytest.mark.asyncio
+    async def test_update_fields_are_bound(self):
+        """Обработчик видит поля update, после обработки контекст пуст."""
+        seen = {}
+        router = Router()
+
+        @router.message(Command("start"))
+        async def start(message: Message) -> None:
+            seen.update(log_context())
+
+        dp = Dispatcher()
+        dp.update.middleware(LogContextMiddleware(Tracer(enabled=False)))
+        dp.include_router(router)
+        bot = Bot(token="42:TEST", session=MockedSession())
+        update = UpdateFactory(users=1, admin_id=1).message(100, "/start")
+
+        await dp.feed_update(bot, build_update(update, bot))
+
+        assert seen == {"update_id": update["update_id"], "user_id": 100, "chat_id": 100}
+        assert log_context() == {}
@@ -0,0 +1,191 @@
+"""Тесты метрик Prometheus."""
+
+import asyncio
+import logging
+import time
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.filters import Command
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from benchmarks.dispatcher_bench import UpdateFactory, build_update
+from benchmarks.mock_session import MockedSession
+from src.middlewares import BotApiMetricsMiddleware, HandlerMetricsMiddleware
+from src.services.loop_monitor import EventLoopLagMonitor
+from src.services.startup import STARTUP_PHASE, StartupTimer
+from src.services.metrics import (
+    CONTENT_TYPE,
+    EVENT_LOOP_BLOCKED,
+    EVENT_LOOP_LAG,
+    EVENT_LOOP_SLOW_CALLBACKS,
+    HANDLER_DURATION,
+    TELEGRAM_API_DURATION,
+    MetricsRegistry,
+    create_metrics_app,
+)
+
+
+class TestExposition:
+    """Тесты текстового формата."""
+
+    def test_counter_and_gauge(self):
+        """Счетчик с метками, экранирование и gauge с функцией чтения."""
+        registry = MetricsRegistry()
+        counter = registry.counter("requests_total", "Запросы", ["method"])
+        counter.inc('say "hi"')
+        counter.inc('say "hi"', amount=2)
+        registry.gauge("pool_size", "Пул", collect=lambda: 7)
+        registry.gauge("absent", "Нет значения", collect=lambda: None)
+        registry.gauge("depth", "По меткам", ["queue"], collect=lambda: {("a",): 2, ("b",): 0})
+
+        text = registry.render()
+
+        assert '# TYPE requests_total counter' in text
+        assert 'requests_total{method="say \\"hi\\""} 3' in text
+        assert "pool_size 7" in text
+        assert 'depth{queue="a"} 2' in text
+        assert 'depth{queue="b"} 0' in text
+        assert not any(line.startswith("absent ") for line in text.splitlines())
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Корзины накопительные, последняя +Inf равна количеству."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Время", ["op"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, "get")
+
+        lines = registry.render().splitlines()
+
+        assert 'latency_seconds_bucket{op="get",le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{op="get",le="1"} 3' in lines
+        assert 'latency_seconds_bucket{op="get",le="+Inf"} 4' in lines
+        assert 'latency_seconds_sum{op="get"} 4.05' in lines
+        assert 'latency_seconds_count{op="get"} 4' in lines
+        assert histogram.count("get") == 4
+
+    def test_wrong_label_count_raises(self):
+        """Число значений меток проверяется."""
+        counter = MetricsRegistry().counter("x_total", "X", ["a", "b"])
+        with pytest.raises(ValueError):
+            counter.inc("only-one")
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self):
+        """GET /metrics отдает текстовый формат."""
+        async with TestClient(TestServer(create_metrics_app("/metrics"))) as client:
+            response = await client.get("/metrics")
+            body = await response.text()
+
+        assert response.status == 200
+        assert response.headers["Content-Type"] == CONTENT_TYPE
+        assert "# TYPE bot_handler_duration_seconds histogram" in body
+
+
+class TestMiddlewares:
+    """Тесты middleware метрик."""
+
+    @pytest.mark.asyncio
+    async def test_handler_and_api_calls_are_observed(self):
+        """Обработчик вложенного роутера и его вызов Bot API попадают в метрики."""
+        router = Router()
+
+        @router.message(Command("metrics_probe"))
+        async def metrics_probe(message: Message) -> None:
+            await message.answer("ok")
+
+        session = MockedSession()
+        session.middleware(BotApiMetricsMiddleware())
+        bot = Bot(token="42:TEST", session=session)
+        dp = Dispatcher()
+        dp.message.middleware(HandlerMetricsMiddleware())
+        dp.include_router(router)
+        api_before = TELEGRAM_API_DURATION.count("sendMessage")
+
+        update = UpdateFactory(users=1, admin_id=1).message(100, "/metrics_probe")
+        await dp.feed_update(bot, build_update(update, bot))
+
+        assert HANDLER_DURATION.count("test_metrics", "metrics_probe", "ok") == 1
+        assert TELEGRAM_API_DURATION.count("sendMessage") == api_before + 1
+
+
+class TestEventLoopLagMonitor:
+    """Тесты замера задержки цикла событий."""
+
+    def test_record(self):
+        """Замер пишется в гистограмму и последнее значение."""
+        monitor = EventLoopLagMonitor(interval_sec=0.1)
+        before = EVENT_LOOP_LAG.count()
+
+        monitor.record(0.2)
+
+        assert monitor.last_lag == 0.2
+        assert EVENT_LOOP_LAG.count() == before + 1
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_stack_is_reported(self, caplog):
+        """Стек синхронного вызова, заблокировавшего цикл, попадает в лог и метрику."""
+        monitor = EventLoopLagMonitor(interval_sec=0.05, slow_callback_ms=50, asyncio_debug=False)
+        blocked_before = EVENT_LOOP_BLOCKED.count()
+
+        def blocking_report_writer() -> None:
+            time.sleep(0.3)
+
+        monitor.start()
+        try:
+            await asyncio.sleep(0.1)
+            with caplog.at_level(logging.WARNING, logger="src.services.loop_monitor"):
+                blocking_report_writer()
+                await asyncio.sleep(0.1)
+        finally:
+            await monitor.stop()
+
+        assert EVENT_LOOP_BLOCKED.count() == blocked_before + 1
+        assert "blocking_report_writer" in caplog.text
+        assert monitor.last_lag >= 0
+
+    @pytest.mark.asyncio
+    async def test_asyncio_slow_callbacks_are_counted(self, caplog):
+        """Предупреждение asyncio о медленном callback считается и дополняется стеком."""
+        monitor = EventLoopLagMonitor(interval_sec=0.05, slow_callback_ms=50, asyncio_debug=True)
+        slow_before = EVENT_LOOP_SLOW_CALLBACKS.value()
+        loop = asyncio.get_running_loop()
+
+        def slow_callback() -> None:
+            time.sleep(0.2)
+
+        monitor.start()
+        try:
+            with caplog.at_level(logging.WARNING, logger="asyncio"):
+                loop.call_soon(slow_callback)
+                await asyncio.sleep(0.1)
+        finally:
+            await monitor.stop()
+            loop.set_debug(False)
+
+        assert EVENT_LOOP_SLOW_CALLBACKS.value() >= slow_before + 1
+        assert "Стек во время callback" in caplog.text
+        assert "slow_callback" in caplog.text
+
+
+class TestStartupTimer:
+    """Тесты отчета о фазах запуска."""
+
+    @pytest.mark.asyncio
+    async def test_parallel_phases_are_timed_separately(self):
+        """Параллельные фазы замеряются по отдельности, общее время - не их сумма."""
+        startup = StartupTimer()
+        startup.record("import", 0.25)
+
+        with startup.phase("connect"):
+            await asyncio.gather(
+                startup.timed("database", asyncio.sleep(0.1)),
+                startup.timed("redis", asyncio.sleep(0.1)),
+            )
+
+        assert list(startup.phases) == ["import", "database", "redis", "connect"]
+        assert startup.phases["connect"] < startup.phases["database"] + startup.phases["redis"]
+        assert STARTUP_PHASE.value("import") == 0.25
+        assert startup.report().startswith("Запуск за ")
+        assert "import=250" in startup.report()
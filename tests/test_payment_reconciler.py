@@ -0,0 +1,176 @@
+"""Тесты сверки зависших платежей."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.models.payment import Payment, PaymentTransition, YooKassaEvent, can_transition
+from src.services import database
+from src.services import payment_reconciler as reconciler_module
+from src.services.payment_reconciler import PaymentReconciler
+from src.services.yookassa_client import YooKassaClient
+
+NOW = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+
+def make_payment(payment_id: int, age: timedelta, status: str = "pending", now: datetime = NOW) -> Payment:
+    """Платеж из БД заданного возраста."""
+    return Payment(
+        id=payment_id,
+        user_id=1,
+        yookassa_payment_id=f"yk-{payment_id}",
+        amount=Decimal("299.00"),
+        currency="RUB",
+        status=status,
+        metadata={"readings": 5},
+        created_at=now - age,
+        updated_at=now - age,
+    )
+
+
+@pytest_asyncio.fixture
+async def yookassa_server():
+    """Минимальный сервер API YooKassa со счетчиком одновременных запросов."""
+    state = {"statuses": {}, "active": 0, "max_active": 0}
+
+    async def get_payment(request: web.Request) -> web.Response:
+        state["active"] += 1
+        state["max_active"] = max(state["max_active"], state["active"])
+        try:
+            await asyncio.sleep(0.01)
+            payment_id = request.match_info["payment_id"]
+            status = state["statuses"].get(payment_id)
+            if status is None:
+                return web.json_response({"type": "error", "code": "not_found"}, status=404)
+            if status == "error":
+                return web.json_response({"type": "error", "code": "internal_server_error"}, status=500)
+            return web.json_response({"id": payment_id, "status": status})
+        finally:
+            state["active"] -= 1
+
+    app = web.Application()
+    app.router.add_get("/v3/payments/{payment_id}", get_payment)
+    server = TestServer(app)
+    await server.start_server()
+    client = YooKassaClient(api_url=str(server.make_url("/v3")), shop_id="shop", secret_key="key")
+    yield client, state
+    await client.close()
+    await server.close()
+
+
+class TestResolveStatus:
+    """Тесты выбора нового статуса."""
+
+    def test_remote_status_wins(self):
+        """Статус из YooKassa применяется, если отличается от локального."""
+        reconciler = PaymentReconciler(expire_hours=24)
+        payment = make_payment(1, timedelta(minutes=30))
+        assert reconciler.resolve_status(payment, "succeeded", now=NOW) == "succeeded"
+        assert reconciler.resolve_status(payment, "pending", now=NOW) is None
+
+    def test_stale_or_unknown_payment_expires(self):
+        """Неизвестный YooKassa или слишком старый платеж истекает."""
+        reconciler = PaymentReconciler(expire_hours=24)
+        assert reconciler.resolve_status(make_payment(1, timedelta(minutes=30)), None, now=NOW) == "expired"
+        assert reconciler.resolve_status(make_payment(2, timedelta(hours=25)), "pending", now=NOW) == "expired"
+
+    def test_late_success_after_expiry_is_allowed(self):
+        """Оплата истекшего платежа засчитывается."""
+        assert can_transition("expired", "succeeded")
+        assert not can_transition("succeeded", "expired")
+
+
+class TestRunOnce:
+    """Тесты прохода сверки."""
+
+    @pytest.mark.asyncio
+    async def test_batches_are_checked_concurrently_and_applied(self, yookassa_server, monkeypatch):
+        """Статусы запрашиваются с ограничением параллельности, изменения - одной пачкой."""
+        client, state = yookassa_server
+        now = datetime.now(timezone.utc)
+        batches = [
+            [make_payment(i, timedelta(minutes=30), now=now) for i in range(1, 7)],
+            [make_payment(7, timedelta(minutes=30), now=now)],
+        ]
+        state["statuses"] = {
+            "yk-1": "succeeded", "yk-2": "canceled", "yk-3": "pending", "yk-4": "error",
+            "yk-5": "pending", "yk-6": "succeeded", "yk-7": "pending",
+        }
+        applied = []
+
+        async def iter_stale_pending(older_than, batch_size):
+            for batch in batches:
+                yield batch
+
+        async def apply_status_transitions(changes):
+            applied.append(list(changes))
+            return [
+                PaymentTransition(payment_id=1, user_id=1, old_status="pending", new_status=status, applied=True)
+                for _, status in changes
+            ]
+
+        repository = reconciler_module.PaymentRepository
+        monkeypatch.setattr(repository, "iter_stale_pending", iter_stale_pending)
+        monkeypatch.setattr(repository, "apply_status_transitions", apply_status_transitions)
+
+        reconciler = PaymentReconciler(client=client, concurrency=2, expire_hours=24)
+        stats = await reconciler.run_once()
+
+        assert applied == [[("yk-1", "succeeded"), ("yk-2", "canceled"), ("yk-6", "succeeded")]]
+        assert stats == {"checked": 7, "updated": 3, "expired": 0, "failed": 1}
+        assert state["max_active"] == 2
+
+    @pytest.mark.asyncio
+    async def test_unprocessed_events_are_retried(self, monkeypatch):
+        """Записанные, но не обработанные уведомления YooKassa обрабатываются повторно."""
+        events = [
+            YooKassaEvent(
+                id=i, dedup_key=f"payment.succeeded:yk-{i}", payload={"event": "payment.succeeded"}, received_at=NOW
+            )
+            for i in (1, 2)
+        ]
+        requested = []
+
+        async def get_unprocessed(older_than, max_attempts, limit):
+            requested.append((older_than, max_attempts, limit))
+            return events
+
+        async def process_webhook_event(event):
+            return event.id == 1
+
+        monkeypatch.setattr(reconciler_module.YooKassaEventRepository, "get_unprocessed", get_unprocessed)
+        monkeypatch.setattr(reconciler_module.payment_service, "process_webhook_event", process_webhook_event)
+
+        assert await PaymentReconciler(batch_size=50).retry_events() == 1
+        assert requested == [(reconciler_module.EVENT_RETRY_AFTER, reconciler_module.MAX_EVENT_ATTEMPTS, 50)]
+
+    @pytest.mark.asyncio
+    async def test_round_is_skipped_without_lock(self, monkeypatch):
+        """Процесс без advisory-блокировки не обращается к YooKassa."""
+        calls = []
+
+        class LockedPool:
+            async def acquire(self):
+                return self
+
+            async def release(self, conn):
+                pass
+
+            async def fetchval(self, query, *args):
+                calls.append(query)
+                return False
+
+        async def run_once():
+            raise AssertionError("сверка без блокировки")
+
+        monkeypatch.setattr(database, "pool", LockedPool())
+        reconciler = PaymentReconciler()
+        monkeypatch.setattr(reconciler, "run_once", run_once)
+
+        assert await reconciler.run_exclusive() is False
+        assert calls == ["SELECT pg_try_advisory_lock($1)"]
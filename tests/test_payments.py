@@ -0,0 +1,162 @@
+"""Тесты автомата статусов платежа и webhook YooKassa."""
+
+import hashlib
+import hmac
+import json
+from datetime import datetime, timezone
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.config import settings
+from src.models.payment import YooKassaEvent, can_transition
+from src.services import payments as payments_module
+from src.services.dedup import Deduplicator
+from src.services.work_queue import BoundedWorkQueue
+from src.services.yookassa_event_repository import YooKassaEventRepository
+
+
+def sign(body: bytes) -> str:
+    """Подпись тела запроса в формате YooKassa."""
+    return "sha256_" + hmac.new(settings.yookassa_api_key.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+class FakeInbox:
+    """Таблица yookassa_events в памяти."""
+
+    def __init__(self, monkeypatch):
+        self.events = {}
+        self.failing = False
+        monkeypatch.setattr(YooKassaEventRepository, "save", self.save)
+        monkeypatch.setattr(YooKassaEventRepository, "mark_processed", self.mark_processed)
+        monkeypatch.setattr(YooKassaEventRepository, "mark_failed", self.mark_failed)
+
+    async def save(self, dedup_key, payload):
+        if self.failing:
+            raise RuntimeError("database is down")
+        if dedup_key in self.events:
+            return None
+        event = YooKassaEvent(
+            id=len(self.events) + 1, dedup_key=dedup_key, payload=payload, received_at=datetime.now(timezone.utc)
+        )
+        self.events[dedup_key] = event
+        return event
+
+    async def mark_processed(self, event_id):
+        self._get(event_id).processed_at = datetime.now(timezone.utc)
+
+    async def mark_failed(self, event_id):
+        self._get(event_id).attempts += 1
+
+    def _get(self, event_id):
+        return next(event for event in self.events.values() if event.id == event_id)
+
+
+class TestStatusTransitions:
+    """Тесты допустимых переходов статуса."""
+
+    def test_forward_transitions_allowed(self):
+        """Из pending и waiting_for_capture можно перейти дальше."""
+        assert can_transition("pending", "succeeded")
+        assert can_transition("pending", "waiting_for_capture")
+        assert can_transition("waiting_for_capture", "canceled")
+
+    def test_final_and_backward_transitions_rejected(self):
+        """Финальные статусы не меняются, откат и повтор статуса запрещены."""
+        assert not can_transition("succeeded", "canceled")
+        assert not can_transition("canceled", "succeeded")
+        assert not can_transition("waiting_for_capture", "pending")
+        assert not can_transition("pending", "pending")
+        assert not can_transition("unknown", "succeeded")
+
+
+class TestWebhookSignature:
+    """Тесты проверки подписи."""
+
+    def test_signature_checked_over_raw_bytes(self):
+        """Подпись сверяется с байтами тела, включая не-ASCII."""
+        body = json.dumps({"event": "payment.succeeded", "description": "Пакет"}, ensure_ascii=False).encode("utf-8")
+        service = payments_module.payment_service
+        assert service.verify_webhook_signature(body, sign(body))
+        assert not service.verify_webhook_signature(body + b" ", sign(body))
+
+
+class TestWebhookHandler:
+    """Тесты HTTP обработчика уведомлений."""
+
+    @pytest.fixture
+    def queue(self, monkeypatch):
+        """Очередь с перехватом поставленных событий и локальная дедупликация."""
+        received = []
+
+        async def handler(item):
+            received.append(item)
+
+        queue = BoundedWorkQueue("test-yookassa", handler, workers=1, max_size=1)
+        queue.received = received
+        queue.inbox = FakeInbox(monkeypatch)
+        monkeypatch.setattr(payments_module, "yookassa_event_queue", queue)
+        monkeypatch.setattr(payments_module, "yookassa_deduplicator", Deduplicator("test", ttl_sec=60))
+        monkeypatch.setattr("src.services.dedup.get_redis", lambda: None)
+        return queue
+
+    async def post(self, body: bytes, signature: str = None) -> int:
+        app = web.Application()
+        app.router.add_post("/yookassa_webhook", payments_module.yookassa_webhook_handler)
+        headers = {"Yookassa-Signature": signature} if signature else {}
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post("/yookassa_webhook", data=body, headers=headers)
+            return response.status
+
+    @pytest.mark.asyncio
+    async def test_invalid_signature_rejected(self, queue):
+        """Без подписи 400, с неверной подписью 401."""
+        queue.start()
+        body = b'{"event": "payment.succeeded", "object": {"id": "p1"}}'
+        assert await self.post(body) == 400
+        assert await self.post(body, "sha256_deadbeef") == 401
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_event_enqueued_once(self, queue):
+        """Событие записывается и ставится в очередь, повтор подтверждается без постановки."""
+        queue.start()
+        body = b'{"event": "payment.succeeded", "object": {"id": "p1"}}'
+        assert await self.post(body, sign(body)) == 200
+        assert await self.post(body, sign(body)) == 200
+        await queue.close()
+        assert [event.payload for event in queue.received] == [json.loads(body)]
+        assert list(queue.inbox.events) == ["payment.succeeded:p1"]
+
+    @pytest.mark.asyncio
+    async def test_unsaved_event_is_not_acknowledged(self, queue):
+        """Если уведомление не записано, ответ 503, и повторная доставка обрабатывается."""
+        queue.start()
+        body = b'{"event": "payment.succeeded", "object": {"id": "p3"}}'
+        queue.inbox.failing = True
+        assert await self.post(body, sign(body)) == 503
+
+        queue.inbox.failing = False
+        assert await self.post(body, sign(body)) == 200
+        await queue.close()
+        assert len(queue.received) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_processing_stays_in_inbox(self, queue, monkeypatch):
+        """Уведомление о платеже, которого еще нет в БД, остается необработанным для сверки."""
+        async def apply_status_transition(yookassa_payment_id, new_status):
+            return None
+
+        monkeypatch.setattr(payments_module.PaymentRepository, "apply_status_transition", apply_status_transition)
+        event = await queue.inbox.save("payment.succeeded:p4", {"event": "payment.succeeded", "object": {"id": "p4"}})
+
+        assert await payments_module.payment_service.process_webhook_event(event) is False
+        assert event.processed_at is None
+        assert event.attempts == 1
+
+    @pytest.mark.asyncio
+    async def test_unavailable_when_queue_closed(self, queue):
+        """Остановленная очередь отвечает 503, чтобы YooKassa повторила доставку."""
+        body = b'{"event": "payment.succeeded", "object": {"id": "p2"}}'
+        assert await self.post(body, sign(body)) == 503
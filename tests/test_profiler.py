@@ -0,0 +1,108 @@
+"""Тесты профилирования по командам администратора."""
+
+import asyncio
+import time
+
+import pytest
+from aiogram import Bot
+from aiogram.filters import CommandObject
+
+from benchmarks.dispatcher_bench import UpdateFactory, build_update
+from benchmarks.mock_session import MockedSession
+from src.config import settings
+from src.handlers.admin import cmd_memprofile, cmd_profile, parse_seconds
+from src.services.profiler import TASKS_ROOT, MemoryProfiler, SamplingProfiler
+
+
+def burn_cpu(seconds: float) -> None:
+    """Синхронная нагрузка на поток цикла событий."""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+async def waiting_handler() -> None:
+    """Корутина, ожидающая в asyncio.sleep."""
+    await asyncio.sleep(10)
+
+
+class TestSamplingProfiler:
+    """Тесты профилировщика потока цикла."""
+
+    @pytest.mark.asyncio
+    async def test_cpu_wall_and_task_stacks(self):
+        """Нагрузка видна в профиле CPU, ожидающая задача - в профиле реального времени."""
+        profiler = SamplingProfiler(interval_ms=5)
+        waiter = asyncio.create_task(waiting_handler(), name="waiter")
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, burn_cpu, 0.2)
+
+        profile = await profiler.run(0.4)
+        waiter.cancel()
+
+        assert profile.samples > 10
+        assert "burn_cpu" in profile.cpu_collapsed()
+        assert any("burn_cpu" in line for line in profile.top())
+        wall = profile.wall_collapsed()
+        assert f"{TASKS_ROOT};task waiter;waiting_handler" in wall
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in wall.splitlines())
+
+    @pytest.mark.asyncio
+    async def test_only_one_run_at_a_time(self):
+        """Второй запуск во время первого отклоняется."""
+        profiler = SamplingProfiler(interval_ms=5)
+        first = asyncio.create_task(profiler.run(0.1))
+        await asyncio.sleep(0)
+
+        with pytest.raises(RuntimeError):
+            await profiler.run(0.1)
+        await first
+
+
+class TestMemoryProfiler:
+    """Тесты замера памяти."""
+
+    @pytest.mark.asyncio
+    async def test_top_allocation_site(self):
+        """Место с наибольшим приростом памяти попадает в отчет."""
+        kept = []
+
+        async def allocate() -> None:
+            await asyncio.sleep(0.05)
+            kept.extend(bytearray(1024) for _ in range(2000))
+
+        task = asyncio.create_task(allocate())
+        report = await MemoryProfiler(frames=5).run(0.2)
+        await task
+
+        assert report.sites
+        assert report.sites[0].size_diff >= 2000 * 1024
+        assert "test_profiler.py" in report.sites[0].location
+
+
+class TestProfileCommands:
+    """Тесты команд /profile и /memprofile."""
+
+    def test_parse_seconds(self):
+        """Длительность по умолчанию, явная и вне диапазона."""
+        assert parse_seconds(None, 30, 120) == 30
+        assert parse_seconds(" 5 ", 30, 120) == 5
+        for args in ("0", "121", "abc"):
+            with pytest.raises(ValueError):
+                parse_seconds(args, 30, 120)
+
+    @pytest.mark.asyncio
+    async def test_profile_sends_collapsed_stacks(self, monkeypatch):
+        """/profile 1 отвечает сводкой и файлами профилей, /memprofile 1 - отчетом."""
+        monkeypatch.setattr(settings, "admin_id", 1)
+        session = MockedSession()
+        bot = Bot(token="42:TEST", session=session)
+        updates = UpdateFactory(users=1, admin_id=1)
+
+        profile_update = build_update(updates.message(1, "/profile 1"), bot)
+        await cmd_profile(profile_update.message, CommandObject(command="profile", args="1"))
+        memprofile_update = build_update(updates.message(1, "/memprofile 1"), bot)
+        await cmd_memprofile(memprofile_update.message, CommandObject(command="memprofile", args="1"))
+
+        assert session.calls["sendDocument"] >= 1
+        assert session.calls["sendMessage"] == 4
@@ -0,0 +1,51 @@
+"""Тесты точечных изменений reading_payload."""
+
+import pytest
+from pydantic import ValidationError
+
+from src.models.reading import PayloadPatch, ReadingUpdate
+from src.services.reading_repository import ReadingRepository, compile_payload_patch
+
+
+class TestPayloadPatch:
+    """Тесты PayloadPatch и сборки UPDATE."""
+
+    def test_dotted_path_is_split(self):
+        """Путь через точку разбирается в список ключей."""
+        assert PayloadPatch.incr("progress.steps_done").path == ["progress", "steps_done"]
+
+    def test_invalid_patches_are_rejected(self):
+        """Операции с некорректными значениями не создаются."""
+        with pytest.raises(ValidationError):
+            PayloadPatch.incr("counter", True)
+        with pytest.raises(ValidationError):
+            PayloadPatch.merge("", [1, 2])
+        with pytest.raises(ValidationError):
+            PayloadPatch.set("", 1)
+
+    def test_compile_nests_each_operation_once(self):
+        """Каждая операция оборачивает предыдущее выражение ровно один раз."""
+        args = []
+        expr = compile_payload_patch(
+            "reading_payload",
+            [PayloadPatch.set("a", 1), PayloadPatch.append("cards", "The Fool")],
+            args,
+        )
+        assert expr == (
+            "jsonb_patch_append(jsonb_patch_set(reading_payload, $1::text[], $2::jsonb), "
+            "$3::text[], $4::jsonb)"
+        )
+        assert args == [["a"], "1", ["cards"], '"The Fool"']
+
+    def test_build_update_applies_patch_on_top_of_replacement(self):
+        """Новый документ и операции сводятся к одному SET reading_payload."""
+        fields, args = ReadingRepository._build_update(ReadingUpdate(
+            reading_payload={"x": 1},
+            payload_patch=[PayloadPatch.incr("x")],
+            status="completed",
+        ))
+        assert fields == [
+            "reading_payload = jsonb_patch_incr($1::jsonb, $2::text[], $3::jsonb)",
+            "status = $4",
+        ]
+        assert args == ['{"x": 1}', ["x"], "1", "completed"]
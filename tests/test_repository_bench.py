@@ -0,0 +1,126 @@
+"""Тесты генератора объемных данных и анализа планов запросов."""
+
+from collections import Counter
+
+from benchmarks.repository_bench import build_cases, find_flags, public_methods, sql_key, summarize_plan
+from benchmarks.seed_dataset import (
+    PAYMENT_COLUMNS,
+    READING_COLUMNS,
+    USER_COLUMNS,
+    DatasetGenerator,
+    DatasetSize,
+)
+from src.services.payment_repository import PaymentRepository
+from src.services.question_repository import QuestionRepository
+from src.services.reading_repository import ReadingRepository
+from src.services.step_repository import StepRepository
+from src.services.user_repository import UserRepository
+
+SEQ_SCAN_PLAN = [{
+    "Plan": {
+        "Node Type": "Limit",
+        "Total Cost": 25000.5,
+        "Plan Rows": 50,
+        "Plans": [{
+            "Node Type": "Sort",
+            "Plans": [{"Node Type": "Parallel Seq Scan", "Relation Name": "readings"}],
+        }],
+    }
+}]
+
+INDEX_PLAN = [{
+    "Plan": {
+        "Node Type": "Index Scan",
+        "Index Name": "idx_readings_user_id",
+        "Relation Name": "readings",
+        "Total Cost": 8.5,
+        "Plan Rows": 1,
+    }
+}]
+
+
+def method_result(sql: str, explain) -> dict:
+    """Результат метода с одним запросом."""
+    return {"queries": [dict(key=sql_key(sql), sql=sql, **summarize_plan(explain))]}
+
+
+class TestDatasetGenerator:
+    """Тесты генератора строк для COPY."""
+
+    def test_rows_reference_generated_users(self):
+        """Строки соответствуют колонкам, чтения и платежи ссылаются на созданных пользователей."""
+        generator = DatasetGenerator(DatasetSize(users=1000, readings=20_000, payments=4000), seed=1)
+
+        users = list(generator.users())
+        readings = list(generator.readings())
+        payments = list(generator.payments())
+
+        assert len(users) == 1000 and all(len(row) == len(USER_COLUMNS) for row in users)
+        assert all(len(row) == len(READING_COLUMNS) for row in readings)
+        assert all(len(row) == len(PAYMENT_COLUMNS) for row in payments)
+        assert {row[1] for row in readings} <= {row[0] for row in users}
+        assert len({row[2] for row in payments}) == len(payments)
+
+    def test_readings_are_skewed_towards_active_users(self):
+        """На первый 1% пользователей приходится заметно больше 1% чтений."""
+        generator = DatasetGenerator(DatasetSize(users=1000, readings=20_000, payments=0), seed=1, skew=2.0)
+        list(generator.users())
+
+        per_user = Counter(row[1] for row in generator.readings())
+
+        top_share = sum(per_user[user_id] for user_id in range(1, 11)) / 20_000
+        assert 0.07 < top_share < 0.13
+
+    def test_same_seed_gives_same_rows(self):
+        """Одинаковое зерно дает одинаковые данные."""
+        size = DatasetSize(users=50, readings=200, payments=20)
+        first, second = DatasetGenerator(size, seed=3), DatasetGenerator(size, seed=3)
+        list(first.users()), list(second.users())
+
+        assert [row[1:5] for row in first.readings()] == [row[1:5] for row in second.readings()]
+
+
+class TestPlanFlags:
+    """Тесты разбора планов и флагов."""
+
+    def test_summarize_plan_finds_nested_seq_scan(self):
+        """Seq Scan во вложенном узле попадает в сводку."""
+        summary = summarize_plan(SEQ_SCAN_PLAN)
+
+        assert summary["total_cost"] == 25000.5
+        assert summary["seq_scans"] == ["readings"]
+        assert summary["nodes"] == ["Limit", "Sort", "Parallel Seq Scan on readings"]
+
+    def test_seq_scan_flagged_only_on_large_tables(self):
+        """Seq scan большой таблицы отмечается, маленькой - нет, подсчет всех строк ожидаем."""
+        methods = {
+            "ReadingRepository.get_by_status": method_result("SELECT 1", SEQ_SCAN_PLAN),
+            "ReadingRepository.get_total_count": method_result("SELECT 2", SEQ_SCAN_PLAN),
+        }
+
+        flags = find_flags(methods, {"readings": 10_000_000})
+        small = find_flags(methods, {"readings": 100})
+
+        assert [(f["method"], f["expected"]) for f in flags] == [
+            ("ReadingRepository.get_by_status", False),
+            ("ReadingRepository.get_total_count", True),
+        ]
+        assert small == []
+
+    def test_cost_jump_against_baseline(self):
+        """Рост стоимости того же запроса больше чем в cost_ratio раз отмечается."""
+        sql = "SELECT * FROM readings WHERE user_id = $1"
+        baseline = {"ReadingRepository.get_by_user_id": method_result(sql, INDEX_PLAN)}
+        current = {"ReadingRepository.get_by_user_id": method_result(sql, SEQ_SCAN_PLAN)}
+
+        flags = find_flags(current, {"readings": 100}, baseline, cost_ratio=2.0)
+
+        assert [f["kind"] for f in flags] == ["cost_jump"]
+        assert "Index Scan using idx_readings_user_id" in flags[0]["detail"]
+        assert find_flags(baseline, {"readings": 100}, baseline) == []
+
+    def test_every_public_method_has_a_case(self):
+        """Для каждого публичного метода пяти репозиториев есть сценарий замера."""
+        repositories = [UserRepository, ReadingRepository, StepRepository, QuestionRepository, PaymentRepository]
+
+        assert sorted(case.method for case in build_cases()) == sorted(public_methods(repositories))
@@ -0,0 +1,139 @@
+"""Тесты учета ресурсов обработчиков и поиска N+1."""
+
+from datetime import datetime, timezone
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from benchmarks.dispatcher_bench import UpdateFactory, build_update
+from benchmarks.mock_session import MockedSession
+from src.middlewares import BotApiUsageMiddleware, ResourceUsageMiddleware
+from src.services import database
+from src.services.resource_usage import API_BYTES, API_CALLS, DB_QUERIES, DB_ROWS, NPlusOneError
+from src.services.step_repository import StepRepository
+from src.services.user_repository import UserRepository
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeConnection:
+    """Соединение, отвечающее на запросы шагов, вопросов и пользователей."""
+
+    def __init__(self, steps: int):
+        """Инициализация.
+
+        Args:
+            steps: Количество активных шагов
+        """
+        self.steps = steps
+
+    async def fetch(self, query, *args):
+        if "FROM steps" in query:
+            return [
+                {
+                    "id": i, "name": f"step-{i}", "description": None, "content": "{}",
+                    "step_order": i, "is_active": True, "created_at": NOW, "updated_at": NOW,
+                }
+                for i in range(1, self.steps + 1)
+            ]
+        return []
+
+    async def fetchrow(self, query, *args):
+        return None
+
+
+class FakePool:
+    """Пул с одним соединением."""
+
+    def __init__(self, conn: FakeConnection):
+        self.conn = conn
+
+    async def acquire(self):
+        return self.conn
+
+    async def release(self, conn):
+        pass
+
+
+def build_dispatcher(usage_middleware: ResourceUsageMiddleware, count_bytes: bool = False) -> tuple:
+    """Бот и диспетчер с обработчиками /steps и /me."""
+    router = Router()
+
+    @router.message(Command("steps"))
+    async def list_steps(message: Message) -> None:
+        steps = await StepRepository.get_active_with_questions()
+        await message.answer(f"Шагов: {len(steps)}")
+
+    @router.message(Command("me"))
+    async def whoami(message: Message) -> None:
+        await UserRepository.get_by_telegram_id(message.from_user.id)
+        await message.answer("Нет профиля")
+        await message.answer("Нажмите /start")
+
+    session = MockedSession()
+    session.middleware(BotApiUsageMiddleware(count_bytes=count_bytes))
+    bot = Bot(token="42:TEST", session=session)
+    dp = Dispatcher()
+    dp.message.middleware(usage_middleware)
+    dp.include_router(router)
+    return bot, dp
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    """Пул с тремя активными шагами вместо PostgreSQL."""
+    monkeypatch.setattr(database, "pool", FakePool(FakeConnection(steps=3)))
+
+
+class TestResourceUsage:
+    """Тесты показателей и поиска N+1."""
+
+    @pytest.mark.asyncio
+    async def test_counts_are_recorded_per_handler(self, fake_pool):
+        """Запросы, строки и вызовы Bot API попадают в метрики обработчика."""
+        bot, dp = build_dispatcher(ResourceUsageMiddleware())
+        updates = UpdateFactory(users=1, admin_id=1)
+        queries_before = DB_QUERIES.sum("test_resource_usage", "list_steps")
+        rows_before = DB_ROWS.value("test_resource_usage", "list_steps")
+        calls_before = API_CALLS.sum("test_resource_usage", "whoami")
+
+        await dp.feed_update(bot, build_update(updates.message(100, "/steps"), bot))
+        await dp.feed_update(bot, build_update(updates.message(100, "/me"), bot))
+
+        # Запрос шагов и по запросу вопросов на каждый из трех шагов
+        assert DB_QUERIES.sum("test_resource_usage", "list_steps") == queries_before + 4
+        assert DB_ROWS.value("test_resource_usage", "list_steps") == rows_before + 3
+        assert API_CALLS.sum("test_resource_usage", "whoami") == calls_before + 2
+
+    @pytest.mark.asyncio
+    async def test_bytes_are_counted_only_when_enabled(self, fake_pool):
+        """Размер параметров вызовов Bot API считается только при count_bytes."""
+        updates = UpdateFactory(users=1, admin_id=1)
+        bytes_before = API_BYTES.value("test_resource_usage", "whoami")
+
+        bot, dp = build_dispatcher(ResourceUsageMiddleware())
+        await dp.feed_update(bot, build_update(updates.message(100, "/me"), bot))
+        assert API_BYTES.value("test_resource_usage", "whoami") == bytes_before
+
+        bot, dp = build_dispatcher(ResourceUsageMiddleware(), count_bytes=True)
+        await dp.feed_update(bot, build_update(updates.message(100, "/me"), bot))
+        assert API_BYTES.value("test_resource_usage", "whoami") > bytes_before
+
+    @pytest.mark.asyncio
+    async def test_n_plus_one_is_flagged(self, fake_pool):
+        """get_active_with_questions запрашивает вопросы каждого шага отдельно."""
+        bot, dp = build_dispatcher(ResourceUsageMiddleware(n_plus_one_threshold=2, strict=True))
+        update = UpdateFactory(users=1, admin_id=1).message(100, "/steps")
+
+        with pytest.raises(NPlusOneError, match="list_steps: запрос выполнен 3 раз"):
+            await dp.feed_update(bot, build_update(update, bot))
+
+    @pytest.mark.asyncio
+    async def test_single_queries_pass_strict_mode(self, fake_pool):
+        """Обработчик без повторов проходит строгую проверку."""
+        bot, dp = build_dispatcher(ResourceUsageMiddleware(n_plus_one_threshold=2, strict=True))
+        update = UpdateFactory(users=1, admin_id=1).message(100, "/me")
+
+        await dp.feed_update(bot, build_update(update, bot))
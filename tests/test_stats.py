@@ -0,0 +1,97 @@
+"""Тесты агрегированной статистики."""
+
+import pytest
+from datetime import date
+
+from src.config import settings
+from src.handlers.admin import parse_stats_period
+from src.services import database, stats_service
+from src.services.stats_repository import histogram_percentile, DURATION_BUCKETS_SEC
+
+
+class TestStatsPeriod:
+    """Тесты разбора периода для /stats."""
+
+    def test_default_period(self):
+        """Без аргументов берутся последние stats_default_period_days дней."""
+        date_from, date_to = parse_stats_period(None, date(2024, 3, 31))
+        assert date_to == date(2024, 3, 31)
+        assert (date_to - date_from).days == settings.stats_default_period_days - 1
+
+    def test_explicit_period(self):
+        """Обе даты указаны явно."""
+        assert parse_stats_period("2024-01-01 2024-01-31", date(2024, 3, 31)) == (
+            date(2024, 1, 1), date(2024, 1, 31)
+        )
+        assert parse_stats_period("2024-03-01", date(2024, 3, 31)) == (
+            date(2024, 3, 1), date(2024, 3, 31)
+        )
+
+    def test_invalid_period(self):
+        """Неверный формат и перевернутый период отклоняются."""
+        with pytest.raises(ValueError):
+            parse_stats_period("01.01.2024", date(2024, 3, 31))
+        with pytest.raises(ValueError):
+            parse_stats_period("2024-02-01 2024-01-01", date(2024, 3, 31))
+
+
+class TestHistogramPercentile:
+    """Тесты оценки перцентилей по гистограмме длительностей."""
+
+    def test_empty_histogram(self):
+        """Пустая гистограмма дает 0."""
+        assert histogram_percentile([], 0.5) == 0.0
+
+    def test_percentiles(self):
+        """Перцентиль равен верхней границе бакета, где набирается ранг."""
+        buckets = [(10.0, 50), (60.0, 40), (300.0, 9), (float("inf"), 1)]
+        assert histogram_percentile(buckets, 0.50) == 10.0
+        assert histogram_percentile(buckets, 0.90) == 60.0
+        assert histogram_percentile(buckets, 0.99) == 300.0
+        assert histogram_percentile(buckets, 1.0) == DURATION_BUCKETS_SEC[-1]
+
+
+class FakeLockPool:
+    """Пул, в котором advisory-блокировка занята или свободна."""
+
+    def __init__(self, locked: bool):
+        self.locked = locked
+        self.queries = []
+
+    async def acquire(self):
+        return self
+
+    async def release(self, conn):
+        pass
+
+    async def fetchval(self, query, *args):
+        self.queries.append((query, args))
+        return not self.locked if "pg_try_advisory_lock" in query else True
+
+
+class TestRollupWorkerLock:
+    """Тесты выполнения пересчёта в одном процессе."""
+
+    @pytest.mark.asyncio
+    async def test_round_runs_only_under_lock(self, monkeypatch):
+        """Пересчёт идет только при полученной блокировке, блокировка снимается."""
+        runs = []
+
+        async def refresh_rollups(lookback):
+            runs.append(lookback)
+
+        monkeypatch.setattr(stats_service.StatsRepository, "refresh_rollups", refresh_rollups)
+        worker = stats_service.StatsRollupWorker(interval_sec=60, lookback_minutes=5)
+
+        monkeypatch.setattr(database, "pool", FakeLockPool(locked=True))
+        assert await worker.run_exclusive() is False
+        assert runs == []
+
+        pool = FakeLockPool(locked=False)
+        monkeypatch.setattr(database, "pool", pool)
+        assert await worker.run_exclusive() is True
+        assert len(runs) == 1
+        assert pool.queries == [
+            ("SELECT pg_try_advisory_lock($1)", (stats_service.ROLLUP_LOCK_KEY,)),
+            ("SELECT pg_advisory_unlock($1)", (stats_service.ROLLUP_LOCK_KEY,)),
+        ]
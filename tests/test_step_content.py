@@ -0,0 +1,61 @@
+"""Тесты структурированного содержимого шагов."""
+
+import pytest
+from pydantic import ValidationError
+
+from src.models.step import StepButton, StepContent, StepCreate, StepUpdate
+
+
+class TestStepContent:
+    """Тесты StepContent и валидаторов шагов."""
+
+    def test_from_description_extracts_directives(self):
+        """Директивы вырезаются из текста и переносятся в поля."""
+        content = StepContent.from_description(
+            "Вот фото: image_file_id:AgADBAADXqcxG | Спасибо за внимание! | delay_sec:3"
+        )
+        assert content.text == "Вот фото:\nСпасибо за внимание!"
+        assert content.media.file_id == "AgADBAADXqcxG"
+        assert content.delay_sec == 3
+
+    def test_from_description_plain_text(self):
+        """Описание без директив становится текстом шага."""
+        content = StepContent.from_description("Добро пожаловать")
+        assert content.text == "Добро пожаловать"
+        assert content.media is None
+        assert content.delay_sec == 0
+
+    @pytest.mark.parametrize("description", [
+        "Hi | delay_sec: abc",
+        "Hi | delay_sec: 5s",
+        "Hi | delay_sec: -2",
+        "Hi | image_file_id: | delay_sec: 3",
+        "Hi | image_file_id: delay_sec:3",
+        "Hi | delay_sec:1 | delay_sec:2",
+    ])
+    def test_malformed_directive_is_rejected(self, description):
+        """Нераспознанная директива не превращается в 0 или пустое медиа."""
+        with pytest.raises(ValueError):
+            StepContent.from_description(description)
+        with pytest.raises(ValidationError):
+            StepCreate(name="Шаг", description=description, step_order=1)
+        with pytest.raises(ValidationError):
+            StepUpdate(description=description)
+
+    def test_step_create_builds_content_from_description(self):
+        """StepCreate без content разбирает description."""
+        step = StepCreate(name="Пауза", description="Ждем delay_sec:2", step_order=1)
+        assert step.content == StepContent(text="Ждем", delay_sec=2)
+
+    def test_step_update_keeps_content_unset(self):
+        """StepUpdate без description и content не трогает content."""
+        assert StepUpdate(name="Новое имя").content is None
+
+    def test_invalid_content_is_rejected(self):
+        """Некорректные значения не проходят валидацию."""
+        with pytest.raises(ValidationError):
+            StepContent(delay_sec=-1)
+        with pytest.raises(ValidationError):
+            StepButton(text="Кнопка")
+        with pytest.raises(ValidationError):
+            StepButton(text="Кнопка", callback_data="x" * 65)
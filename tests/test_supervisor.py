@@ -0,0 +1,115 @@
+"""Тесты супервизора webhook-воркеров."""
+
+import functools
+import multiprocessing.forkserver
+import sys
+import threading
+import time
+
+from src.supervisor import WorkerSupervisor, resolve_worker_count
+
+
+def crashing_worker(index: int) -> None:
+    """Воркер, падающий сразу после запуска."""
+    sys.exit(1)
+
+
+def startup_reporting_worker(report_path: str, index: int) -> None:
+    """Воркер из forkserver, записывающий время запуска, как webhook_worker_process, и падающий."""
+    from src.main import BotManager
+
+    bot_manager = BotManager(time.perf_counter())
+    report = bot_manager.startup.report()
+    total = time.perf_counter() - bot_manager.startup.started
+    with open(report_path, "a") as file:
+        file.write(f"{total} {'import' in bot_manager.startup.phases} {report}\n")
+    sys.exit(1)
+
+
+class CountingSupervisor(WorkerSupervisor):
+    """Супервизор, считающий запуски воркеров."""
+
+    starts = 0
+
+    def _start(self, index: int) -> None:
+        self.starts += 1
+        super()._start(index)
+
+
+class TestWorkerSupervisor:
+    """Тесты WorkerSupervisor."""
+
+    def test_restart_delay_grows_exponentially_up_to_limit(self):
+        """Задержка перезапуска удваивается и ограничена сверху."""
+        supervisor = WorkerSupervisor(crashing_worker, workers=1, restart_delay_sec=1, max_restart_delay_sec=5)
+        assert [supervisor.restart_delay(n) for n in range(5)] == [0.0, 1, 2, 4, 5]
+
+    def test_worker_count_defaults_to_cpu_count(self):
+        """WEBHOOK_WORKERS=0 означает по одному воркеру на ядро."""
+        assert resolve_worker_count(3, cpu_count=8) == 3
+        assert resolve_worker_count(0, cpu_count=8) == 8
+        assert resolve_worker_count(0) >= 1
+
+    def test_crashed_worker_is_restarted(self):
+        """Упавший воркер перезапускается."""
+        supervisor = CountingSupervisor(
+            crashing_worker, workers=1, restart_delay_sec=0.01, max_restart_delay_sec=0.01,
+            shutdown_timeout_sec=5
+        )
+        thread = threading.Thread(target=supervisor.run)
+        thread.start()
+        try:
+            deadline = time.monotonic() + 30
+            while supervisor.starts < 2 and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            supervisor.stop()
+            thread.join(10)
+        assert supervisor.starts >= 2
+        assert not thread.is_alive()
+
+    def test_preloaded_workers_are_forked_from_forkserver(self):
+        """С preload воркеры запускаются через forkserver и тоже перезапускаются."""
+        supervisor = CountingSupervisor(
+            crashing_worker, workers=1, restart_delay_sec=0.01, max_restart_delay_sec=0.01,
+            shutdown_timeout_sec=5, preload=["tests.test_supervisor"]
+        )
+        assert supervisor._context.get_start_method() == "forkserver"
+
+        thread = threading.Thread(target=supervisor.run)
+        thread.start()
+        try:
+            deadline = time.monotonic() + 30
+            while supervisor.starts < 2 and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            supervisor.stop()
+            thread.join(10)
+        assert supervisor.starts >= 2
+
+    def test_forked_worker_startup_excludes_forkserver_uptime(self, tmp_path):
+        """Время запуска воркера из forkserver не включает время жизни сервера и фазу import."""
+        report_path = tmp_path / "startup.txt"
+        # forkserver один на процесс: новый сервер импортирует src.main заранее
+        multiprocessing.forkserver._forkserver._stop()
+        supervisor = CountingSupervisor(
+            functools.partial(startup_reporting_worker, str(report_path)), workers=1, restart_delay_sec=1, max_restart_delay_sec=1,
+            shutdown_timeout_sec=5, preload=["src.main"]
+        )
+
+        thread = threading.Thread(target=supervisor.run)
+        thread.start()
+        try:
+            deadline = time.monotonic() + 30
+            while supervisor.starts < 3 and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            supervisor.stop()
+            thread.join(10)
+
+        reports = [line.split(" ", 2) for line in report_path.read_text().splitlines()]
+        assert len(reports) >= 2
+        for total, has_import, _ in reports:
+            # Перезапуск идет через секунду после падения: старое время импорта дало бы больше
+            assert float(total) < 0.5
+            assert has_import == "False"
@@ -0,0 +1,134 @@
+"""Тесты трассировки update."""
+
+import json
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from benchmarks.dispatcher_bench import UpdateFactory, build_update
+from benchmarks.mock_session import MockedSession
+from src.middlewares import BotApiTracingMiddleware, UpdateTracingMiddleware
+from src.services.database import traced
+from src.services.tracing import NOOP_SPAN, TraceFileExporter, Tracer
+
+
+def read_spans(path) -> list:
+    """Все span из файла OTLP JSON Lines."""
+    spans = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        for resource in json.loads(line)["resourceSpans"]:
+            for scope in resource["scopeSpans"]:
+                spans.extend(scope["spans"])
+    return spans
+
+
+def attributes(span: dict) -> dict:
+    """Атрибуты span в виде словаря."""
+    return {item["key"]: next(iter(item["value"].values())) for item in span["attributes"]}
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    """Путь к файлу трасс."""
+    return tmp_path / "traces.jsonl"
+
+
+class TestTracer:
+    """Тесты решения о сохранении трасс."""
+
+    @pytest.mark.asyncio
+    async def test_slow_trace_is_kept(self, trace_file):
+        """Трасса дольше порога сохраняется со всеми дочерними span."""
+        exporter = TraceFileExporter(str(trace_file))
+        tracer = Tracer(exporter, enabled=True, sample_rate=0, slow_ms=0)
+
+        with tracer.trace("update message", {"telegram.update_id": 1}) as root:
+            with tracer.span("db fetch_one", attributes={"db.statement": "SELECT 1"}):
+                with tracer.span("inner"):
+                    pass
+        await exporter.flush()
+
+        spans = {span["name"]: span for span in read_spans(trace_file)}
+        assert set(spans) == {"update message", "db fetch_one", "inner"}
+        assert attributes(spans["update message"])["sampling.reason"] == "slow"
+        assert spans["db fetch_one"]["parentSpanId"] == root.span_id
+        assert spans["inner"]["parentSpanId"] == spans["db fetch_one"]["spanId"]
+        assert len({span["traceId"] for span in spans.values()}) == 1
+
+    @pytest.mark.asyncio
+    async def test_fast_unsampled_trace_is_discarded(self, trace_file):
+        """Быстрая трасса вне доли head sampling не записывается."""
+        exporter = TraceFileExporter(str(trace_file))
+        tracer = Tracer(exporter, enabled=True, sample_rate=0, slow_ms=60_000)
+
+        with tracer.trace("update message"):
+            with tracer.span("db fetch_one"):
+                pass
+
+        assert tracer.discarded == 1
+        assert len(exporter.buffer) == 0
+
+    @pytest.mark.asyncio
+    async def test_error_trace_is_kept(self, trace_file):
+        """Трасса с ошибкой сохраняется независимо от длительности."""
+        exporter = TraceFileExporter(str(trace_file))
+        tracer = Tracer(exporter, enabled=True, sample_rate=0, slow_ms=60_000)
+
+        with pytest.raises(ValueError):
+            with tracer.trace("update message"):
+                with tracer.span("telegram sendMessage"):
+                    raise ValueError("boom")
+        await exporter.flush()
+
+        spans = {span["name"]: span for span in read_spans(trace_file)}
+        assert spans["telegram sendMessage"]["status"] == {"code": 2, "message": "ValueError: boom"}
+        assert attributes(spans["update message"])["sampling.reason"] == "error"
+
+    def test_span_outside_trace_is_noop(self):
+        """Вне корневого span и при выключенной трассировке span не создаются."""
+        assert Tracer(enabled=True).span("db fetch_one") is NOOP_SPAN
+        assert Tracer(enabled=False).trace("update message") is NOOP_SPAN
+
+
+class TestTracingMiddlewares:
+    """Тесты span update, Bot API и БД."""
+
+    @pytest.mark.asyncio
+    async def test_update_trace(self, trace_file, monkeypatch):
+        """Update дает корневой span с дочерними span запроса и вызова Bot API."""
+        exporter = TraceFileExporter(str(trace_file))
+        tracer = Tracer(exporter, enabled=True, sample_rate=1, slow_ms=60_000)
+        monkeypatch.setattr("src.services.database.tracer", tracer)
+
+        @traced("fetch_val")
+        async def fetch_val(query: str, *args):
+            return 1
+
+        router = Router()
+
+        @router.message(Command("trace_probe"))
+        async def trace_probe(message: Message) -> None:
+            await fetch_val("SELECT 1")
+            await message.answer("ok")
+
+        session = MockedSession()
+        session.middleware(BotApiTracingMiddleware(tracer))
+        bot = Bot(token="42:TEST", session=session)
+        dp = Dispatcher()
+        dp.update.middleware(UpdateTracingMiddleware(tracer))
+        dp.include_router(router)
+
+        update = UpdateFactory(users=1, admin_id=1).message(100, "/trace_probe")
+        await dp.feed_update(bot, build_update(update, bot))
+        await exporter.flush()
+
+        spans = {span["name"]: span for span in read_spans(trace_file)}
+        root = spans["update message"]
+        assert attributes(root)["telegram.chat_id"] == "100"
+        assert attributes(root)["telegram.handled"] is True
+        assert attributes(root)["sampling.reason"] == "head"
+        assert attributes(spans["db fetch_val"])["db.statement"] == "SELECT 1"
+        assert spans["db fetch_val"]["parentSpanId"] == root["spanId"]
+        assert spans["telegram sendMessage"]["parentSpanId"] == root["spanId"]
@@ -0,0 +1,184 @@
+"""Тесты кэша содержимого сценария и прогрева."""
+
+import asyncio
+import inspect
+from datetime import datetime, timezone
+
+import pytest
+
+from src.services import database, health, redis_client
+from src.services.health import HealthChecker
+from src.services.scenario_content import ScenarioContent, scenario_content
+from src.services.warmup import Warmup
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeConnection:
+    """Соединение с двумя шагами и вопросом у каждого; запросы считаются."""
+
+    def __init__(self):
+        self.queries = []
+
+    async def fetch(self, query, *args):
+        self.queries.append(query)
+        await asyncio.sleep(0)
+        if "FROM steps" in query:
+            return [
+                {
+                    "id": i, "name": f"step-{i}", "description": None, "content": "{}",
+                    "step_order": i, "is_active": True, "created_at": NOW, "updated_at": NOW,
+                }
+                for i in (1, 2)
+            ]
+        if "FROM questions" in query:
+            return [
+                {
+                    "id": 10 + step_id, "step_id": step_id, "question_text": "?", "question_type": "text",
+                    "options": [], "question_order": 1, "is_required": True,
+                    "created_at": NOW, "updated_at": NOW,
+                }
+                for step_id in args
+            ]
+        return []
+
+    async def fetchrow(self, query, *args):
+        return None
+
+
+class FakePool:
+    """Пул с одним соединением."""
+
+    def __init__(self, conn: FakeConnection):
+        self.conn = conn
+
+    async def acquire(self):
+        return self.conn
+
+    async def release(self, conn):
+        pass
+
+
+@pytest.fixture
+def fake_conn(monkeypatch):
+    """Соединение, подставленное в модуль database."""
+    conn = FakeConnection()
+    monkeypatch.setattr(database, "pool", FakePool(conn))
+    return conn
+
+
+class TestScenarioContent:
+    """Тесты кэша активных шагов."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_reads_share_one_load(self, fake_conn):
+        """Параллельные обращения при пустом кэше делают одну загрузку из двух запросов."""
+        content = ScenarioContent(ttl_sec=60)
+
+        results = await asyncio.gather(*(content.get_active_steps() for _ in range(5)))
+
+        assert len(fake_conn.queries) == 2
+        assert all(steps is results[0] for steps in results)
+        assert [[q.id for q in step.questions] for step in results[0]] == [[11], [12]]
+
+    @pytest.mark.asyncio
+    async def test_invalidate_reloads(self, fake_conn):
+        """После invalidate содержимое загружается заново."""
+        content = ScenarioContent(ttl_sec=60)
+        await content.get_active_steps()
+        content.invalidate()
+        await content.get_active_steps()
+
+        assert len(fake_conn.queries) == 4
+
+
+class TestWarmup:
+    """Тесты прогрева процесса."""
+
+    @pytest.fixture(autouse=True)
+    def empty_content(self):
+        """Кэш процесса пуст до и после теста."""
+        scenario_content.invalidate()
+        yield
+        scenario_content.invalidate()
+
+    @pytest.mark.asyncio
+    async def test_run_loads_content(self, fake_conn):
+        """Прогрев загружает шаги с вопросами и отмечается завершенным."""
+        warmup = Warmup(recent_users=0)
+
+        stats = await warmup.run()
+
+        assert warmup.completed
+        assert (stats["steps"], stats["questions"]) == (2, 2)
+        assert "users" in stats
+
+    @pytest.mark.asyncio
+    async def test_failures_do_not_stop_startup(self, monkeypatch):
+        """Недоступная БД не останавливает запуск, но прогрев не считается завершенным."""
+        monkeypatch.setattr(database, "pool", None)
+        warmup = Warmup(recent_users=10)
+
+        stats = await warmup.run()
+
+        assert not warmup.completed
+        assert warmup.failed == ["steps", "users"]
+        assert "steps" not in stats and "users" not in stats
+
+    @pytest.mark.asyncio
+    async def test_failed_warmup_is_not_ready_until_retried(self, fake_conn, monkeypatch):
+        """Процесс с неудавшимся прогревом не готов; повторный прогрев в проверке возвращает готовность."""
+        process_warmup = Warmup(recent_users=0)
+        monkeypatch.setattr(health, "warmup", process_warmup)
+        monkeypatch.setattr(redis_client, "redis", None)
+        monkeypatch.setattr(HealthChecker, "_check_database", lambda self: _ok())
+        get_active_steps = scenario_content.get_active_steps
+
+        async def failing_get_active_steps():
+            raise RuntimeError("connection refused")
+
+        monkeypatch.setattr(scenario_content, "get_active_steps", failing_get_active_steps)
+        await process_warmup.run()
+
+        report = await HealthChecker(cache_ttl_sec=0).check()
+        assert report["status"] == "not_ready"
+        assert report["checks"]["warmup"] == {"ok": False, "failed": ["steps"]}
+
+        monkeypatch.setattr(scenario_content, "get_active_steps", get_active_steps)
+        report = await HealthChecker(cache_ttl_sec=0).check()
+        assert report["checks"]["warmup"] == {"ok": True}
+        assert process_warmup.completed
+
+
+async def _ok():
+    """Пройденная проверка."""
+    return {"ok": True}
+
+
+class TestPrepareConnection:
+    """Тесты подготовки запросов на соединении пула."""
+
+    def test_asyncpg_exposes_get_statement(self):
+        """prepare_connection кладет запросы в кэш через внутренний метод asyncpg.
+
+        Тест падает при обновлении asyncpg, в котором метод пропал или
+        сменил сигнатуру: тогда подготовка уходит в запасной prepare().
+        """
+        import asyncpg
+
+        parameters = list(inspect.signature(asyncpg.Connection._get_statement).parameters)
+        assert parameters[:3] == ["self", "query", "timeout"]
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_prepare(self, monkeypatch):
+        """Без _get_statement запросы готовятся публичным prepare()."""
+        prepared = []
+
+        class PublicOnlyConnection:
+            async def prepare(self, query):
+                prepared.append(query)
+
+        monkeypatch.setattr(database, "PREPARED_STATEMENTS", ["SELECT 1", "SELECT 2"])
+        await database.prepare_connection(PublicOnlyConnection())
+
+        assert prepared == ["SELECT 1", "SELECT 2"]
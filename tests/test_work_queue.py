@@ -0,0 +1,126 @@
+"""Тесты очереди фоновой обработки и webhook-обработчика."""
+
+import asyncio
+import pytest
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.services import dedup as dedup_module
+from src.services.dedup import Deduplicator
+from src.services.telegram_webhook import QueuedRequestHandler
+from src.services.work_queue import BoundedWorkQueue
+
+
+class TestBoundedWorkQueue:
+    """Тесты BoundedWorkQueue."""
+
+    @pytest.mark.asyncio
+    async def test_submit_rejects_when_full(self):
+        """Заполненная очередь отклоняет задачи вместо ожидания."""
+        release = asyncio.Event()
+        done = []
+
+        async def handler(item):
+            await release.wait()
+            done.append(item)
+
+        queue = BoundedWorkQueue("test", handler, workers=1, max_size=1)
+        queue.start()
+        assert queue.submit(1) is True
+        await asyncio.sleep(0)  # воркер забрал первую задачу
+        assert queue.submit(2) is True
+        assert queue.submit(3) is False
+        assert queue.rejected == 1
+
+        release.set()
+        await queue.close(timeout=1)
+        assert done == [1, 2]
+        assert queue.submit(4) is False
+
+    @pytest.mark.asyncio
+    async def test_handler_errors_do_not_stop_worker(self):
+        """Ошибка обработчика не останавливает воркер."""
+        done = []
+
+        async def handler(item):
+            if item == "bad":
+                raise RuntimeError("boom")
+            done.append(item)
+
+        queue = BoundedWorkQueue("test", handler, workers=1, max_size=10)
+        queue.start()
+        queue.submit("bad")
+        queue.submit("good")
+        await queue.close(timeout=1)
+        assert done == ["good"]
+        assert queue.failed == 1
+
+
+class TestQueuedRequestHandler:
+    """Тесты QueuedRequestHandler."""
+
+    @pytest.mark.asyncio
+    async def test_secret_ack_and_backpressure(self):
+        """Неверный секрет - 401, принятый update - 200, переполнение - 429."""
+        release = asyncio.Event()
+
+        async def handler(update):
+            await release.wait()
+
+        queue = BoundedWorkQueue("test", handler, workers=1, max_size=1)
+        queue.start()
+        bot = Bot(token="123456:TEST-TOKEN")
+        app = web.Application()
+        QueuedRequestHandler(Dispatcher(), bot, queue, secret_token="s3cret").register(app, path="/webhook")
+
+        async with TestClient(TestServer(app)) as client:
+            headers = {"X-Telegram-Bot-Api-Secret-Token": "s3cret"}
+            response = await client.post("/webhook", json={"update_id": 1}, headers={"X-Telegram-Bot-Api-Secret-Token": "x"})
+            assert response.status == 401
+
+            response = await client.post("/webhook", json={"update_id": 1}, headers=headers)
+            assert response.status == 200
+            await asyncio.sleep(0)
+            response = await client.post("/webhook", json={"update_id": 2}, headers=headers)
+            assert response.status == 200
+            response = await client.post("/webhook", json={"update_id": 3}, headers=headers)
+            assert response.status == 429
+            assert response.headers["Retry-After"]
+
+            release.set()
+            await queue.close(timeout=1)
+            response = await client.post("/webhook", json={"update_id": 4}, headers=headers)
+            assert response.status == 503
+        await bot.session.close()
+
+    @pytest.mark.asyncio
+    async def test_duplicates_are_dropped_before_queue(self, monkeypatch):
+        """Повтор update_id подтверждается без постановки в очередь; отклоненный update можно доставить снова."""
+        monkeypatch.setattr(dedup_module, "get_redis", lambda: None)
+        release = asyncio.Event()
+
+        async def handler(update):
+            await release.wait()
+
+        queue = BoundedWorkQueue("test", handler, workers=1, max_size=1)
+        queue.start()
+        bot = Bot(token="123456:TEST-TOKEN")
+        app = web.Application()
+        deduplicator = Deduplicator("test", ttl_sec=60)
+        QueuedRequestHandler(Dispatcher(), bot, queue, deduplicator=deduplicator).register(app, path="/webhook")
+
+        async with TestClient(TestServer(app)) as client:
+            assert (await client.post("/webhook", json={"update_id": 1})).status == 200
+            await asyncio.sleep(0)
+            assert (await client.post("/webhook", json={"update_id": 2})).status == 200
+            # Повтор не занимает место в заполненной очереди
+            assert (await client.post("/webhook", json={"update_id": 2})).status == 200
+            assert queue.rejected == 0
+
+            assert (await client.post("/webhook", json={"update_id": 3})).status == 429
+            release.set()
+            await asyncio.sleep(0.01)
+            assert (await client.post("/webhook", json={"update_id": 3})).status == 200
+            await queue.close(timeout=1)
+        await bot.session.close()
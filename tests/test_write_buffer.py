@@ -0,0 +1,78 @@
+"""Тесты буфера пакетной записи."""
+
+import asyncio
+import pytest
+
+from src.services.write_buffer import BatchBuffer
+
+
+class TestBatchBuffer:
+    """Тесты BatchBuffer."""
+
+    @pytest.mark.asyncio
+    async def test_flush_on_max_rows(self):
+        """Пачка сбрасывается сразу при достижении max_rows."""
+        batches = []
+
+        async def flush(batch):
+            batches.append(batch)
+
+        buffer = BatchBuffer("test", flush, max_rows=3, flush_interval_ms=60_000)
+        for i in range(3):
+            buffer.add(i)
+        await asyncio.sleep(0)
+        assert batches == [[0, 1, 2]]
+        await buffer.close()
+
+    @pytest.mark.asyncio
+    async def test_flush_on_interval(self):
+        """Неполная пачка сбрасывается по таймеру."""
+        batches = []
+
+        async def flush(batch):
+            batches.append(batch)
+
+        buffer = BatchBuffer("test", flush, max_rows=100, flush_interval_ms=10)
+        buffer.add("a")
+        buffer.add("b")
+        await asyncio.sleep(0.05)
+        assert batches == [["a", "b"]]
+        await buffer.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried_on_close(self):
+        """Записи неудачного сброса возвращаются в буфер и пишутся при закрытии."""
+        batches = []
+        failures = [RuntimeError("db down")]
+
+        async def flush(batch):
+            if failures:
+                raise failures.pop()
+            batches.append(batch)
+
+        buffer = BatchBuffer("test", flush, max_rows=100, flush_interval_ms=60_000)
+        buffer.add(1)
+        assert await buffer.flush() == 0
+        assert len(buffer) == 1
+        buffer.add(2)
+        await buffer.close()
+        assert batches == [[1, 2]]
+        assert buffer.add(3) is False
+
+    @pytest.mark.asyncio
+    async def test_duplicates_within_window_are_dropped(self):
+        """Повторная запись с тем же ключом в пределах окна отбрасывается."""
+        batches = []
+
+        async def flush(batch):
+            batches.append(batch)
+
+        buffer = BatchBuffer(
+            "test", flush, max_rows=100, flush_interval_ms=60_000,
+            dedup_key=lambda item: item[0], dedup_window_sec=60
+        )
+        assert buffer.add(("a", 1)) is True
+        assert buffer.add(("a", 2)) is False
+        assert buffer.add(("b", 3)) is True
+        await buffer.close()
+        assert batches == [[("a", 1), ("b", 3)]]